@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+
+""" Times smeared-charge Coulomb interaction energies between a water layer and the rest of a water box over a trajectory; per-frame calls of the minimum image function vs the trajectory-level function (minimum image and Ewald summed)
+
+Usage: python3 bench_coulomb_interactions.py [nFrames] [nWaterPerSide]
+
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+import gen_basis_helpers.misc.ewald_coulomb as ewaldHelp
+import gen_basis_helpers.misc.smeared_charges_analysis as smearedHelp
+
+
+def main():
+	nFrames = int(sys.argv[1]) if len(sys.argv)>1 else 20
+	nWaterPerSide = int(sys.argv[2]) if len(sys.argv)>2 else 5
+
+	traj, eles = _getRandomWaterTraj(nFrames, nWaterPerSide)
+	exponentDict = smearedHelp.getStandardExponentDict_Cardenas2016_neutralVals()
+	exponents = [exponentDict[ele] for ele in eles]
+	charges = [-0.8 if ele=="O" else 0.4 for ele in eles]
+	nLayerAtoms = 3*nWaterPerSide**2
+	indicesA, indicesB = list(range(nLayerAtoms)), list(range(nLayerAtoms, len(eles)))
+	distLenConv = 1.8897259886
+
+	timings = list()
+	perFrameFunct = lambda: [smearedHelp.getCoulombInteractionEnergyStandard(step.unitCell, exponentDict, charges, indicesA, indicesB, distLenConv=distLenConv) for step in traj]
+	timings.append( ["per-frame, minimum image", _timeFunct(perFrameFunct)] )
+
+	for ewaldSum in [False, True]:
+		currFunct = lambda: ewaldHelp.getGroupInteractionEnergiesOverTraj(traj, charges, indicesA, indicesB, exponents=exponents, distLenConv=distLenConv, ewaldSum=ewaldSum)
+		timings.append( ["trajectory, {}".format("Ewald" if ewaldSum else "minimum image"), _timeFunct(currFunct)] )
+
+	print("nFrames={}, nAtoms={}, nPairs={}".format(nFrames, len(eles), len(indicesA)*len(indicesB)))
+	for label, timing in timings:
+		print("{:<40} {:10.4f} s  {:12.1f} frames/s".format(label, timing, nFrames/timing))
+
+
+#Water on a cubic grid; each frame every atom gets a small random displacement
+def _getRandomWaterTraj(nFrames, nWaterPerSide, spacing=3.1, displacement=0.05):
+	lattParams, lattAngles = [nWaterPerSide*spacing for x in range(3)], [90,90,90]
+	coords, eles = list(), list()
+	for idxC in range(nWaterPerSide):
+		for idxA in range(nWaterPerSide):
+			for idxB in range(nWaterPerSide):
+				oxyPos = np.array([idxA*spacing, idxB*spacing, idxC*spacing])
+				coords.extend( [oxyPos, oxyPos + [0.76,0.0,0.59], oxyPos + [-0.76,0.0,0.59]] )
+				eles.extend( ["O","H","H"] )
+
+	coords = np.array(coords)
+	trajSteps = list()
+	for stepIdx in range(nFrames):
+		currCell = uCellHelp.UnitCell(lattParams=lattParams, lattAngles=lattAngles)
+		currCell.cartCoords = [ x + [ele] for x,ele in zip(coords.tolist(), eles) ]
+		trajSteps.append( trajCoreHelp.TrajStepFlexible(unitCell=currCell, step=stepIdx) )
+		coords = coords + np.random.uniform(-displacement, displacement, coords.shape)
+
+	return trajCoreHelp.TrajectoryInMemory(trajSteps), eles
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
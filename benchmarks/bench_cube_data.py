@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+
+""" Times CubeDataSimple geometry (centres/edges), nearest-voxel lookup and interpolation for a skewed cube grid
+
+Usage: python3 bench_cube_data.py [nPointsEachDim] [nQueryPoints]
+
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import gen_basis_helpers.misc.manip_cube_data as cubeHelp
+
+
+def main():
+	nPointsEachDim = int(sys.argv[1]) if len(sys.argv)>1 else 100
+	nQueryPoints = int(sys.argv[2]) if len(sys.argv)>2 else 100000
+
+	vectors = [ [0.2,0.0,0.0], [-0.1,0.17,0.0], [0.0,0.0,0.25] ]
+	cubeObj = cubeHelp.CubeDataSimple(vectors, np.random.uniform(size=[nPointsEachDim for x in range(3)]), origin=[0.5,0.5,0.5])
+	queryPoints = cubeObj.getPositionsForFractIndices( np.random.uniform(0, nPointsEachDim, (nQueryPoints,3)) )
+
+	timings = list()
+	timings.append( ["centres (first access)", _timeFunct(lambda: cubeObj.centres)] )
+	timings.append( ["centres (cached)", _timeFunct(lambda: cubeObj.centres)] )
+	timings.append( ["edges", _timeFunct(lambda: cubeObj.edges)] )
+	timings.append( ["closest voxel, single point", _timeFunct(lambda: cubeHelp.getIdxClosestToInpPointForCubeDataObj(queryPoints[0], cubeObj))] )
+	timings.append( ["closest voxels, all points", _timeFunct(lambda: cubeObj.getIndicesClosestToPoints(queryPoints))] )
+	timings.append( ["interpolation, all points", _timeFunct(lambda: cubeHelp.getInterpolatedValsAtPointsForCubeDataObj(queryPoints, cubeObj, periodic=True))] )
+
+	print("grid={}^3, nQueryPoints={}".format(nPointsEachDim, nQueryPoints))
+	for label, timing in timings:
+		print("{:<40} {:10.4f} s".format(label, timing))
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+
+""" Times parsing a cube file into nested lists line-by-line vs streaming it into a numpy array (float64/float32 and via the memory-mapped sidecar), and single-pass reductions vs loading the full grid first
+
+Usage: python3 bench_cube_file_io.py [nPointsPerDim]
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import gen_basis_helpers.misc.cube_file_io as cubeIOHelp
+
+
+def main():
+	nPointsPerDim = int(sys.argv[1]) if len(sys.argv)>1 else 80
+	workFolder = tempfile.mkdtemp()
+	try:
+		cubePath = os.path.join(workFolder, "bench.cube")
+		_writeRandomCubeFile(cubePath, nPointsPerDim)
+		_runTimings(cubePath, nPointsPerDim)
+	finally:
+		shutil.rmtree(workFolder)
+
+
+def _runTimings(cubePath, nPointsPerDim):
+	timings = list()
+	timings.append( ["line-by-line, nested lists", _timeFunct(lambda: _parseCubeNaive(cubePath))] )
+	timings.append( ["streamed, float64", _timeFunct(lambda: cubeIOHelp.parseCubeFile(cubePath))] )
+	timings.append( ["streamed, float32", _timeFunct(lambda: cubeIOHelp.parseCubeFile(cubePath, dtype=np.float32))] )
+	timings.append( ["sidecar, first read", _timeFunct(lambda: cubeIOHelp.parseCubeFile(cubePath, useSidecar=True))] )
+	timings.append( ["sidecar, re-read", _timeFunct(lambda: cubeIOHelp.parseCubeFile(cubePath, useSidecar=True))] )
+
+	def _fullGridReductions():
+		dataGrid = cubeIOHelp.getCubeDataArrayFromFile(cubePath)
+		return [np.mean(dataGrid, axis=(0,1)), dataGrid[0,0,:], np.sum(dataGrid[:,:,:10])]
+	reducers = [cubeIOHelp.CubePlanarAverage(axis=2), cubeIOHelp.CubeLineProfile(2,[0,0]), cubeIOHelp.CubeSlabIntegral(axis=2, endIdx=10)]
+	timings.append( ["reductions, full grid in memory", _timeFunct(_fullGridReductions)] )
+	timings.append( ["reductions, single streamed pass", _timeFunct(lambda: cubeIOHelp.applyReducersToCubeFile(cubePath, reducers, maxChunkVals=2**18))] )
+
+	print("nPoints={}, fileSize={:.1f} MB".format(nPointsPerDim**3, os.path.getsize(cubePath)/1e6))
+	for label, timing in timings:
+		print("{:<40} {:10.4f} s".format(label, timing))
+
+
+#Roughly how cube files were previously parsed; every value becomes a python float in nested lists
+def _parseCubeNaive(inpPath):
+	header = cubeIOHelp.readCubeFileHeader(inpPath)
+	with open(inpPath, "rt") as f:
+		f.seek(header["data_offset"])
+		allVals = [float(x) for line in f for x in line.split()]
+	nX, nY, nZ = header["n_x"], header["n_y"], header["n_z"]
+	return [ [ allVals[(idxX*nY+idxY)*nZ:(idxX*nY+idxY+1)*nZ] for idxY in range(nY) ] for idxX in range(nX) ]
+
+
+def _writeRandomCubeFile(outPath, nPointsPerDim, spacing=0.2):
+	dataGrid = np.random.uniform(size=(nPointsPerDim,)*3)
+	with open(outPath, "wt") as f:
+		f.write("Benchmark cube file\nRandom values\n")
+		f.write("1 0.0 0.0 0.0\n")
+		for idx in range(3):
+			step = [spacing if x==idx else 0.0 for x in range(3)]
+			f.write("{} {} {} {}\n".format(nPointsPerDim, *step))
+		f.write("8 0.0 0.0 0.0 0.0\n")
+		for lineVals in dataGrid.reshape(-1, nPointsPerDim):
+			for startIdx in range(0, nPointsPerDim, 6):
+				f.write( " ".join( ["{:13.5E}".format(x) for x in lineVals[startIdx:startIdx+6]] ) + "\n" )
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+
+""" Compares the standard extended xyz reader/writer in analyse_md.traj_io against the vectorized/array versions
+
+Usage: python3 bench_extended_xyz.py [nSteps] [nAtoms]
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+import gen_basis_helpers.analyse_md.traj_io as trajIoHelp
+
+
+def main():
+	nSteps = int(sys.argv[1]) if len(sys.argv)>1 else 200
+	nAtoms = int(sys.argv[2]) if len(sys.argv)>2 else 500
+
+	inpTraj = _getRandomTraj(nSteps, nAtoms)
+	with tempfile.TemporaryDirectory() as workDir:
+		xyzPath = os.path.join(workDir, "bench.exyz")
+		arrays = {"coords":np.random.random((nSteps,nAtoms,3))*20, "lattVects":np.array([np.eye(3)*20 for x in range(nSteps)]),
+		          "elements":["O" for x in range(nAtoms)]}
+
+		timings = list()
+		timings.append( ["write (list + join, previous implementation)", nSteps, _timeFunct(lambda: _writeTrajListJoin(inpTraj, xyzPath))] )
+		timings.append( ["writeTrajToSimpleExtendedXyzFormat", nSteps, _timeFunct(lambda: trajIoHelp.writeTrajToSimpleExtendedXyzFormat(inpTraj, xyzPath))] )
+		timings.append( ["writeFramesToSimpleExtendedXyzFormat (arrays)", nSteps, _timeFunct(lambda: trajIoHelp.writeFramesToSimpleExtendedXyzFormat(xyzPath, **arrays))] )
+		timings.append( ["readTrajFromSimpleExtendedXyzFormat", nSteps, _timeFunct(lambda: trajIoHelp.readTrajFromSimpleExtendedXyzFormat(xyzPath))] )
+		timings.append( ["readTrajFromSimpleExtendedXyzFormatVectorized", nSteps, _timeFunct(lambda: trajIoHelp.readTrajFromSimpleExtendedXyzFormatVectorized(xyzPath))] )
+		timings.append( ["readFramesFromSimpleExtendedXyzFormatToArrays", nSteps, _timeFunct(lambda: trajIoHelp.readFramesFromSimpleExtendedXyzFormatToArrays(xyzPath))] )
+		timings.append( ["readFramesFromSimpleExtendedXyzFormatToArrays (stride=10)", nSteps//10, _timeFunct(lambda: trajIoHelp.readFramesFromSimpleExtendedXyzFormatToArrays(xyzPath, stride=10))] )
+
+	print("nSteps={}, nAtoms={}".format(nSteps, nAtoms))
+	for label, nFrames, timing in timings:
+		print("{:<60} {:10.4f} s  {:12.1f} frames/s".format(label, timing, nFrames/timing))
+
+
+#How writeTrajToSimpleExtendedXyzFormat worked before; whole file built as a list of lines then joined
+def _writeTrajListJoin(traj, outPath):
+	outList = list()
+	for trajStep in traj:
+		outList.append( str(len(trajStep.unitCell.cartCoords)) )
+		lattVectStr = ""
+		for lVect in trajStep.unitCell.lattVects:
+			lattVectStr += " ".join([str(x) for x in lVect]) + " "
+		outList.append( "Lattice=\"{}\" Properties=species:S:1:pos:R:3 step={} time={:.2f}".format(lattVectStr, trajStep.step, trajStep.time) )
+		for coord in trajStep.unitCell.cartCoords:
+			outList.append( "{} {:.8f} {:.8f} {:.8f}".format(coord[-1], *coord[0:3]) )
+
+	with open(outPath,"wt") as f:
+		f.write("\n".join(outList))
+
+
+def _getRandomTraj(nSteps, nAtoms):
+	outSteps = list()
+	for step in range(nSteps):
+		currCell = uCellHelp.UnitCell(lattParams=[20,20,20], lattAngles=[90,90,90])
+		currCell.cartCoords = [ list(x) + ["O"] for x in (np.random.random((nAtoms,3))*20).tolist() ]
+		outSteps.append( trajCoreHelp.TrajStepBase(unitCell=currCell, step=step, time=step*0.5) )
+	return trajCoreHelp.TrajectoryInMemory(outSteps)
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
+
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+
+""" Compares classification_distr.getClassDistrCountsOverTraj against the incremental classifier (getClassCountsAndTimeSeriesOverTraj_incremental) for a box of water above a surface, with various skin distances
+
+Usage: python3 bench_incremental_classification.py [nFrames] [nWaterPerSide]
+
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.classification_distr as classDistrHelp
+import gen_basis_helpers.analyse_md.classification_distr_opt_objs as classDistrOptObjs
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+
+
+def main():
+	nFrames = int(sys.argv[1]) if len(sys.argv)>1 else 20
+	nWaterPerSide = int(sys.argv[2]) if len(sys.argv)>2 else 4
+
+	traj, optsObj = _getRandomWaterTrajAndOptsObj(nFrames, nWaterPerSide)
+	nWater = len(optsObj.oxyIndices)
+
+	timings = list()
+	timings.append( ["getClassDistrCountsOverTraj", _timeFunct(lambda: classDistrHelp.getClassDistrCountsOverTraj(traj, optsObj))] )
+	for skin in [0.0, 0.2, 0.5]:
+		currFunct = lambda: classDistrHelp.getClassCountsAndTimeSeriesOverTraj_incremental(traj, optsObj, skin=skin)
+		timings.append( ["incremental, skin={}".format(skin), _timeFunct(currFunct)] )
+
+	print("nFrames={}, nWater={}".format(nFrames, nWater))
+	for label, timing in timings:
+		print("{:<40} {:10.4f} s  {:12.1f} frames/s".format(label, timing, nFrames/timing))
+
+
+#Water on a grid (two layers) above a layer of "X" atoms; each frame every atom gets a small random displacement
+def _getRandomWaterTrajAndOptsObj(nFrames, nWaterPerSide, spacing=2.9, displacement=0.05):
+	lattParams, lattAngles = [nWaterPerSide*spacing, nWaterPerSide*spacing, 20], [90,90,90]
+	coords = [ [x,y,0.0,"X"] for x in np.arange(0,lattParams[0],3.0) for y in np.arange(0,lattParams[1],3.0) ]
+	oxyIndices, hyIndices = list(), list()
+	for idxA in range(nWaterPerSide):
+		for idxB in range(nWaterPerSide):
+			for height in [2.5, 2.5+spacing]:
+				oxyPos = np.array([idxA*spacing, idxB*spacing, height]) + np.random.uniform(-0.2,0.2,3)
+				oxyIndices.append(len(coords))
+				hyIndices.append( [len(coords)+1, len(coords)+2] )
+				coords.append( oxyPos.tolist() + ["O"] )
+				coords.append( (oxyPos + [0.76,0.0,0.59]).tolist() + ["H"] )
+				coords.append( (oxyPos + [-0.76,0.0,0.59]).tolist() + ["H"] )
+
+	coords = np.array([x[:3] for x in coords])
+	eles = ["X" if idx<oxyIndices[0] else ("O" if idx in oxyIndices else "H") for idx in range(len(coords))]
+	trajSteps = list()
+	for stepIdx in range(nFrames):
+		currCell = uCellHelp.UnitCell(lattParams=lattParams, lattAngles=lattAngles)
+		currCell.cartCoords = [ x + [ele] for x,ele in zip(coords.tolist(), eles) ]
+		trajSteps.append( trajCoreHelp.TrajStepFlexible(unitCell=currCell, step=stepIdx) )
+		coords = coords + np.random.uniform(-displacement, displacement, coords.shape)
+
+	distFilterIndices = [idx for idx,ele in enumerate(eles) if ele=="X"]
+	currKwargs = {"nDonorFilterRanges":[[-0.1,1.1],[1.9,2.1]], "nAcceptorFilterRanges":[[-1,1000],[-1,1000]], "nTotalFilterRanges":[[-1,1000],[-1,1000]]}
+	optsObj = classDistrOptObjs.WaterCountTypesMinDistAndHBondSimpleOpts(None, oxyIndices, hyIndices, distFilterIndices, [[0,4],[0,4]], **currKwargs)
+
+	return trajCoreHelp.TrajectoryInMemory(trajSteps), optsObj
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+
+""" Times reading a LAMMPS dump file with lammps_parsers; in serial, in parallel, with a frame stride and via the streaming iterator
+
+Usage: python3 bench_lammps_dump.py [nFrames] [nAtoms] [nCores]
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import gen_basis_helpers.lammps_interface.lammps_parsers as lammpsParsers
+
+
+def main():
+	nFrames = int(sys.argv[1]) if len(sys.argv)>1 else 200
+	nAtoms = int(sys.argv[2]) if len(sys.argv)>2 else 3000
+	nCores = int(sys.argv[3]) if len(sys.argv)>3 else 4
+
+	with tempfile.TemporaryDirectory() as workDir:
+		dumpPath = os.path.join(workDir, "dump.lammpstrj")
+		_writeRandomDumpFile(dumpPath, nFrames, nAtoms)
+
+		timings = list()
+		timings.append( ["getTrajectoryFromLammpsDumpFile (nCores=1)", nFrames, _timeFunct(lambda: lammpsParsers.getTrajectoryFromLammpsDumpFile(dumpPath))] )
+		timings.append( ["getTrajectoryFromLammpsDumpFile (nCores={})".format(nCores), nFrames, _timeFunct(lambda: lammpsParsers.getTrajectoryFromLammpsDumpFile(dumpPath, nCores=nCores))] )
+		timings.append( ["getTrajectoryFromLammpsDumpFile (stride=10)", nFrames//10, _timeFunct(lambda: lammpsParsers.getTrajectoryFromLammpsDumpFile(dumpPath, stride=10))] )
+		timings.append( ["iterTrajStepsFromLammpsDumpFile", nFrames, _timeFunct(lambda: [x for x in lammpsParsers.iterTrajStepsFromLammpsDumpFile(dumpPath)])] )
+
+	print("nFrames={}, nAtoms={}".format(nFrames, nAtoms))
+	for label, nParsed, timing in timings:
+		print("{:<50} {:10.4f} s  {:12.1f} frames/s".format(label, timing, nParsed/timing))
+
+
+#Atom ids are shuffled in each frame, as lammps doesnt sort them by default
+def _writeRandomDumpFile(outPath, nFrames, nAtoms):
+	boxStr = "ITEM: BOX BOUNDS xy xz yz pp pp pp\n-4.81 30.0 -4.81\n0.0 30.0 0.0\n0.0 30.0 0.0\n"
+	with open(outPath, "wt") as f:
+		for frameIdx in range(nFrames):
+			f.write("ITEM: TIMESTEP\n{}\nITEM: NUMBER OF ATOMS\n{}\n".format(frameIdx*50, nAtoms))
+			f.write(boxStr)
+			f.write("ITEM: ATOMS id type x y z\n")
+			atomIds = np.random.permutation(nAtoms) + 1
+			coords = np.random.uniform(0, 30, (nAtoms,3))
+			f.write( "".join(["{} {} {:.6f} {:.6f} {:.6f}\n".format(atomId, 1+(atomId%3>0), *xyz) for atomId,xyz in zip(atomIds,coords)]) )
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+
+""" Times dumping an MD run to the database folder in the json-lines vs compressed chunked formats (including copying wfn backups serially vs concurrently), and reading the full trajectory vs a small subset back from each
+
+Usage: python3 bench_md_db_dump.py [nFrames] [nAtoms] [wfnSizeMB]
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.thermo_data as thermoDataHelp
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+import gen_basis_helpers.db_help.md_files_help as mdFilesHelp
+import gen_basis_helpers.shared.calc_runners as calcRunnersHelp
+import gen_basis_helpers.shared.label_objs as labelHelp
+
+
+def main():
+	nFrames = int(sys.argv[1]) if len(sys.argv)>1 else 1000
+	nAtoms = int(sys.argv[2]) if len(sys.argv)>2 else 300
+	wfnSizeMB = int(sys.argv[3]) if len(sys.argv)>3 else 50
+
+	workFolder = tempfile.mkdtemp()
+	try:
+		stdOutObj = _getStdOutObj(workFolder, nFrames, nAtoms, wfnSizeMB)
+		_runTimings(workFolder, stdOutObj, nFrames, nAtoms)
+	finally:
+		shutil.rmtree(workFolder)
+
+
+def _runTimings(workFolder, stdOutObj, nFrames, nAtoms):
+	timings, records = list(), dict()
+	optsDict = {"jsonl, serial copies": {"storageFormat":"jsonl", "nCopyThreads":1, "verifyCopies":False},
+	            "compressed, concurrent verified copies": {"storageFormat":"compressed", "nCopyThreads":4, "verifyCopies":True}}
+
+	for label, currOpts in optsDict.items():
+		startDir = os.path.join(workFolder, label.split(",")[0])
+		dumpFunct = lambda: records.update( {label:mdFilesHelp.getOutDictForMDFromStdOutObj_simple(startDir, stdOutObj, maxNumbWfnBackups=5, **currOpts)} )
+		timings.append( ["dump: {}".format(label), _timeFunct(dumpFunct)] )
+		records[label]["db_ext_path"] = label.split(",")[0]
+
+	subsetIndices = list(range(0, nFrames, max(1,nFrames//10)))[:10]
+	for label, record in records.items():
+		fmt = label.split(",")[0]
+		trajPath = mdFilesHelp.getMdFilePathFromRecord(workFolder, record, "md_traj_filename")
+		timings.append( ["read all frames: {}".format(fmt), _timeFunct(lambda: mdFilesHelp.getMdTrajInMemFromBaseDbFolderAndRecord(workFolder, record))] )
+		timings.append( ["read 10 frames: {}".format(fmt), _timeFunct(lambda: mdFilesHelp.getMdTrajInMemFromBaseDbFolderAndRecord(workFolder, record, frameIndices=subsetIndices))] )
+		print("{:<12} trajectory size on disk = {:8.2f} MB".format(fmt, _getSizeOnDisk(trajPath)/1e6))
+
+	print("nFrames={}, nAtoms={}".format(nFrames, nAtoms))
+	for label, timing in timings:
+		print("{:<50} {:10.4f} s".format(label, timing))
+
+
+#Water-like random coordinates with 3 significant decimal places (similar precision to cp2k xyz output)
+def _getStdOutObj(workFolder, nFrames, nAtoms, wfnSizeMB):
+	runFolder = os.path.join(workFolder, "run_folder")
+	os.makedirs(runFolder)
+	for fileName in ["inp-1.restart", "inp-RESTART.wfn"] + ["inp-RESTART.wfn.bak-{}".format(idx) for idx in range(1,5)]:
+		with open(os.path.join(runFolder, fileName), "wb") as f:
+			f.write( os.urandom(wfnSizeMB*(10**6)) )
+
+	eles = [ ["O","H","H"][idx%3] for idx in range(nAtoms) ]
+	coords = np.random.uniform(0, 20, size=(nAtoms,3))
+	trajSteps = list()
+	for stepIdx in range(nFrames):
+		currCell = uCellHelp.UnitCell(lattParams=[20,20,20], lattAngles=[90,90,90])
+		currCell.cartCoords = [ x + [ele] for x,ele in zip(np.round(coords,3).tolist(), eles) ]
+		trajSteps.append( trajCoreHelp.TrajStepFlexible(unitCell=currCell, step=stepIdx, time=0.5*stepIdx) )
+		coords = coords + np.random.uniform(-0.05, 0.05, coords.shape)
+
+	thermoObj = thermoDataHelp.ThermoDataStandard( {"step":list(range(nFrames)), "time":[0.5*x for x in range(nFrames)],
+	                                                "temp":np.random.uniform(290,310,nFrames).tolist()} )
+	parsedFile = types.SimpleNamespace(trajectory=trajCoreHelp.TrajectoryInMemory(trajSteps), thermo_data=thermoObj, finalRunFolder=runFolder)
+	label = labelHelp.StandardLabel(eleKey="ele", structKey="struct", methodKey="method")
+	return calcRunnersHelp.StandardOutputObj([types.SimpleNamespace(parsedFile=parsedFile)], label)
+
+
+def _getSizeOnDisk(inpPath):
+	if os.path.isdir(inpPath):
+		return sum( [os.path.getsize(os.path.join(inpPath,x)) for x in os.listdir(inpPath)] )
+	return os.path.getsize(inpPath)
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+
+""" Times water detection (GetWaterMoleculeIndicesFromGeomStandard) over a trajectory of a water box for various neighbour-list skin distances
+
+Usage: python3 bench_molecule_detection.py [nFrames] [nWaterPerSide]
+
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.get_indices_from_geom_impl as getIndicesHelp
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+
+
+def main():
+	nFrames = int(sys.argv[1]) if len(sys.argv)>1 else 20
+	nWaterPerSide = int(sys.argv[2]) if len(sys.argv)>2 else 6
+
+	traj = _getRandomWaterTraj(nFrames, nWaterPerSide)
+	nWater = nWaterPerSide**3
+
+	timings = list()
+	for skin in [0.0, 0.2, 0.5]:
+		detector = getIndicesHelp.GetWaterMoleculeIndicesFromGeomStandard(maxOH=1.2, minAngle=90, maxAngle=120, skin=skin)
+		currFunct = lambda: getIndicesHelp.getMoleculeIndexArraysOverTraj(traj, detector)
+		timings.append( ["skin={}".format(skin), _timeFunct(currFunct)] )
+
+	print("nFrames={}, nWater={}".format(nFrames, nWater))
+	for label, timing in timings:
+		print("{:<40} {:10.4f} s  {:12.1f} frames/s".format(label, timing, nFrames/timing))
+
+
+#Water on a cubic grid; each frame every atom gets a small random displacement
+def _getRandomWaterTraj(nFrames, nWaterPerSide, spacing=3.1, displacement=0.02):
+	lattParams, lattAngles = [nWaterPerSide*spacing for x in range(3)], [90,90,90]
+	coords, eles = list(), list()
+	for idxA in range(nWaterPerSide):
+		for idxB in range(nWaterPerSide):
+			for idxC in range(nWaterPerSide):
+				oxyPos = np.array([idxA*spacing, idxB*spacing, idxC*spacing])
+				coords.extend( [oxyPos, oxyPos + [0.76,0.0,0.59], oxyPos + [-0.76,0.0,0.59]] )
+				eles.extend( ["O","H","H"] )
+
+	coords = np.array(coords)
+	trajSteps = list()
+	for stepIdx in range(nFrames):
+		currCell = uCellHelp.UnitCell(lattParams=lattParams, lattAngles=lattAngles)
+		currCell.cartCoords = [ x + [ele] for x,ele in zip(coords.tolist(), eles) ]
+		trajSteps.append( trajCoreHelp.TrajStepFlexible(unitCell=currCell, step=stepIdx) )
+		coords = coords + np.random.uniform(-displacement, displacement, coords.shape)
+
+	return trajCoreHelp.TrajectoryInMemory(trajSteps)
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
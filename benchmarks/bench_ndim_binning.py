@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+
+""" Compares the array-based NDimensionalBinnedResults.addBinValuesToCounts against the original loop-based implementation for 2-d/3-d distributions similar to those used for water (e.g. O-O distance vs. height vs. angle)
+
+Usage: python3 bench_ndim_binning.py [nFrames] [nValsPerFrame]
+
+"""
+
+import copy
+import sys
+import time
+
+import numpy as np
+
+import gen_basis_helpers.analyse_md.binned_res as binResHelp
+
+
+def main():
+	nFrames = int(sys.argv[1]) if len(sys.argv)>1 else 100
+	nValsPerFrame = int(sys.argv[2]) if len(sys.argv)>2 else 2000
+
+	for label, edges in _getEdgesForEachCase():
+		valsPerFrame = [_getRandomWaterLikeVals(nValsPerFrame, len(edges)) for x in range(nFrames)]
+		binObj = binResHelp.NDimensionalBinnedResults(edges)
+		binObj.initialiseCountsMatrix()
+		objA, objB, objC = [copy.deepcopy(binObj) for x in range(3)]
+
+		timings = list()
+		timings.append( ["loop based (per frame)", _timeFunct(lambda: [objA._addBinValuesToCountsLoopBased(x) for x in valsPerFrame])] )
+		timings.append( ["array based (per frame)", _timeFunct(lambda: [objB.addBinValuesToCounts(x) for x in valsPerFrame])] )
+		timings.append( ["array based (all frames at once)", _timeFunct(lambda: objC.addBinValuesForMultipleFramesToCounts(valsPerFrame))] )
+		assert (objA == objB) and (objA == objC)
+
+		print("{}; nFrames={}, nValsPerFrame={}".format(label, nFrames, nValsPerFrame))
+		for currLabel, timing in timings:
+			print("    {:<40} {:10.4f} s  {:12.1f} frames/s".format(currLabel, timing, nFrames/timing))
+
+
+def _getEdgesForEachCase():
+	distEdges = np.arange(2.0, 6.01, 0.05).tolist()
+	heightEdges = np.arange(-1, 8.01, 0.1).tolist()
+	angleEdges = np.arange(180, -0.1, -5.0).tolist() #Descending; as some callers use
+	nonUniformDistEdges = sorted( set(np.arange(2,3.5,0.02).tolist() + np.arange(3.5,6.01,0.1).tolist()) )
+	return [ ["2-dim (dist vs height), uniform edges", [distEdges, heightEdges]],
+	         ["2-dim (dist vs height), non-uniform edges", [nonUniformDistEdges, heightEdges]],
+	         ["3-dim (dist vs height vs angle)", [distEdges, heightEdges, angleEdges]] ]
+
+
+#Roughly water-like; a peak around the H-bond distance, a layer near the surface and a broad angle distribution. Some values are outside the edges
+def _getRandomWaterLikeVals(nVals, nDims):
+	dists = np.concatenate( [np.random.normal(2.8, 0.15, nVals//2), np.random.uniform(2, 8, nVals - nVals//2)] )
+	heights = np.random.normal(2.5, 1.5, nVals)
+	angles = np.random.uniform(0, 180, nVals)
+	return np.array([dists, heights, angles][:nDims]).T
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
+
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+
+""" Times gaussian broadening of pdos from many frames; evaluating one broadening function per peak (python loop, as in the sim_xps based path) vs the array-based direct and FFT methods
+
+Usage: python3 bench_pdos_broadening.py [nFrames] [nEigPerFrame] [nXVals]
+
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import gen_basis_helpers.misc.pdos_broadening as pdosBroadHelp
+
+
+def main():
+	nFrames = int(sys.argv[1]) if len(sys.argv)>1 else 20
+	nEig = int(sys.argv[2]) if len(sys.argv)>2 else 1000
+	nXVals = int(sys.argv[3]) if len(sys.argv)>3 else 2000
+	nShells, fwhm = 3, 0.3
+
+	xVals = np.linspace(-20, 10, nXVals)
+	eigenVals = np.random.uniform(-25, 15, size=(nFrames,nEig))
+	intensities = np.random.uniform(size=(nFrames,nEig,nShells))
+
+	timings, results = list(), dict()
+	def _runArrayMethod(method):
+		results[method] = pdosBroadHelp.getBroadenedSpectraFromArrays(xVals, eigenVals, intensities, fwhm, method=method)
+	timings.append( ["per-peak loop (first frame only)", _timeFunct(lambda: _getSpectrumPerPeak(xVals, eigenVals[0], intensities[0], fwhm))] )
+	timings.append( ["array, direct", _timeFunct(lambda: _runArrayMethod("direct"))] )
+	timings.append( ["array, fft", _timeFunct(lambda: _runArrayMethod("fft"))] )
+
+	maxRelDiff = np.max(np.abs(results["direct"]-results["fft"])) / np.max(results["direct"])
+	print("nFrames={}, nEig={}, nShells={}, nXVals={}".format(nFrames, nEig, nShells, nXVals))
+	for label, timing in timings:
+		print("{:<40} {:10.4f} s".format(label, timing))
+	print("max |direct-fft| / max(direct) = {:.2e}".format(maxRelDiff))
+
+
+#One broadening function evaluated per peak per shell (vectorised over x only)
+def _getSpectrumPerPeak(xVals, eigenVals, intensities, fwhm):
+	sigma = fwhm / (2*np.sqrt(2*np.log(2)))
+	outVals = np.zeros( (intensities.shape[1], len(xVals)) )
+	for eig, iVals in zip(eigenVals, intensities):
+		for shellIdx, iVal in enumerate(iVals):
+			outVals[shellIdx] += iVal*np.exp( -((xVals-eig)**2)/(2*sigma**2) ) / (sigma*np.sqrt(2*np.pi))
+	return outVals
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+
+""" Compares the planned and unplanned modes of atom_combo_core._SparseMatrixCalculatorStandard for several h-bond option groups (plus H-O-H angles) sharing one box of water
+
+Usage: python3 bench_sparse_matrix_planning.py [nFrames] [nWaterPerSide] [nOptGroups]
+
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.atom_combo_core as atomComboCoreHelp
+import gen_basis_helpers.analyse_md.atom_combo_populators as atomComboPopulatorHelp
+
+
+def main():
+	nFrames = int(sys.argv[1]) if len(sys.argv)>1 else 5
+	nWaterPerSide = int(sys.argv[2]) if len(sys.argv)>2 else 3
+	nOptGroups = int(sys.argv[3]) if len(sys.argv)>3 else 4
+
+	cells, oxyIndices, hyIndices, distFilterIndices = _getRandomWaterCellsAndIndices(nFrames, nWaterPerSide)
+	populators = _getPopulators(oxyIndices, hyIndices, distFilterIndices, nOptGroups)
+
+	timings = list()
+	for planned in [False, True]:
+		calculator = atomComboCoreHelp._SparseMatrixCalculatorStandard(populators, planned=planned)
+		currFunct = lambda: [calculator.calcMatricesForGeom(cell) for cell in cells]
+		timings.append( ["planned={}".format(planned), _timeFunct(currFunct)] )
+
+	print("nFrames={}, nAtoms={}, nOptGroups={}".format(nFrames, len(cells[0].cartCoords), nOptGroups))
+	for label, timing in timings:
+		print("{:<40} {:10.4f} s  {:12.1f} frames/s".format(label, timing, nFrames/timing))
+
+
+def _getPopulators(oxyIndices, hyIndices, distFilterIndices, nOptGroups):
+	outPopulators = list()
+	for idx in range(nOptGroups):
+		distFilterVals = [ [0,3+idx], [3+idx,20] ]
+		currArgs = [oxyIndices, hyIndices, distFilterIndices, distFilterVals]
+		outPopulators.append( atomComboPopulatorHelp._DiscHBondCounterBetweenGroupsWithOxyDistFilterPopulator(*currArgs) )
+	triAtomIndices = [ [hyA,oxyIdx,hyB] for oxyIdx,(hyA,hyB) in zip(oxyIndices, hyIndices) ]
+	outPopulators.append( atomComboPopulatorHelp._TriAtomAnglesPopulator(triAtomIndices) )
+	return outPopulators
+
+
+#Water on a grid (two layers) above a layer of "X" atoms; each frame every atom gets a small random displacement
+def _getRandomWaterCellsAndIndices(nFrames, nWaterPerSide, spacing=2.9, displacement=0.05):
+	lattParams, lattAngles = [nWaterPerSide*spacing, nWaterPerSide*spacing, 20], [90,90,90]
+	coords = [ [x,y,0.0,"X"] for x in np.arange(0,lattParams[0],3.0) for y in np.arange(0,lattParams[1],3.0) ]
+	oxyIndices, hyIndices = list(), list()
+	for idxA in range(nWaterPerSide):
+		for idxB in range(nWaterPerSide):
+			for height in [2.5, 2.5+spacing]:
+				oxyPos = np.array([idxA*spacing, idxB*spacing, height]) + np.random.uniform(-0.2,0.2,3)
+				oxyIndices.append(len(coords))
+				hyIndices.append( [len(coords)+1, len(coords)+2] )
+				coords.append( oxyPos.tolist() + ["O"] )
+				coords.append( (oxyPos + [0.76,0.0,0.59]).tolist() + ["H"] )
+				coords.append( (oxyPos + [-0.76,0.0,0.59]).tolist() + ["H"] )
+
+	distFilterIndices = [idx for idx,x in enumerate(coords) if x[-1]=="X"]
+	eles = [x[-1] for x in coords]
+	coords = np.array([x[:3] for x in coords])
+	outCells = list()
+	for stepIdx in range(nFrames):
+		currCell = uCellHelp.UnitCell(lattParams=lattParams, lattAngles=lattAngles)
+		currCell.cartCoords = [ x + [ele] for x,ele in zip(coords.tolist(), eles) ]
+		outCells.append(currCell)
+		coords = coords + np.random.uniform(-displacement, displacement, coords.shape)
+
+	return outCells, oxyIndices, hyIndices, distFilterIndices
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
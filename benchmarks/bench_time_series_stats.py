@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+
+""" Times the array-based statistics in time_series_stats for many long series at once, and the streaming (OnlineBlockingStats) version fed in chunks
+
+Usage: python3 bench_time_series_stats.py [nSeries] [nPoints] [chunkSize]
+
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import gen_basis_helpers.analyse_md.time_series_stats as tsStatsHelp
+
+
+def main():
+	nSeries = int(sys.argv[1]) if len(sys.argv)>1 else 100
+	nPoints = int(sys.argv[2]) if len(sys.argv)>2 else 100000
+	chunkSize = int(sys.argv[3]) if len(sys.argv)>3 else 1000
+
+	inpData = _getAROneData(nSeries, nPoints, phi=0.9)
+
+	timings = list()
+	timings.append( ["getBlockingStats", _timeFunct(lambda: tsStatsHelp.getBlockingStats(inpData))] )
+	timings.append( ["getAutocorrelationFunctions", _timeFunct(lambda: tsStatsHelp.getAutocorrelationFunctions(inpData, maxLag=1000))] )
+	timings.append( ["getIntegratedCorrelationTimes", _timeFunct(lambda: tsStatsHelp.getIntegratedCorrelationTimes(inpData))] )
+	timings.append( ["getCentralWindowAverages", _timeFunct(lambda: tsStatsHelp.getCentralWindowAverages(inpData, 50))] )
+	timings.append( ["OnlineBlockingStats (chunkSize={})".format(chunkSize), _timeFunct(lambda: _runOnlineBlocking(inpData, chunkSize))] )
+
+	print("nSeries={}, nPoints={}".format(nSeries, nPoints))
+	for label, timing in timings:
+		print("{:<45} {:10.4f} s".format(label, timing))
+
+
+def _runOnlineBlocking(inpData, chunkSize):
+	statsObj = tsStatsHelp.OnlineBlockingStats(inpData.shape[0])
+	for startIdx in range(0, inpData.shape[1], chunkSize):
+		statsObj.update( inpData[:,startIdx:startIdx+chunkSize] )
+	return statsObj.getBlockingStats()
+
+
+def _getAROneData(nSeries, nPoints, phi):
+	noise = np.random.normal(size=(nSeries,nPoints))
+	outData = np.zeros( (nSeries,nPoints) )
+	for idx in range(1,nPoints):
+		outData[:,idx] = phi*outData[:,idx-1] + noise[:,idx]
+	return outData
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+
+""" Compares read throughput of the *.traj (json-lines) format against the binary format in analyse_md.traj_binary
+
+Usage: python3 bench_traj_formats.py [nSteps] [nAtoms]
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+import gen_basis_helpers.analyse_md.traj_binary as trajBinHelp
+
+
+def main():
+	nSteps = int(sys.argv[1]) if len(sys.argv)>1 else 200
+	nAtoms = int(sys.argv[2]) if len(sys.argv)>2 else 500
+
+	with tempfile.TemporaryDirectory() as workDir:
+		trajPath, binDir = os.path.join(workDir, "bench.traj"), os.path.join(workDir, "bench_bin")
+		trajCoreHelp.dumpTrajObjToFile(_getRandomTraj(nSteps, nAtoms), trajPath)
+		trajBinHelp.convertTrajFileToBinaryFormat(trajPath, binDir)
+
+		timings = list()
+		timings.append( ["readTrajObjFromFileToTrajectoryInMemory", _timeFunct(lambda: trajCoreHelp.readTrajObjFromFileToTrajectoryInMemory(trajPath))] )
+		timings.append( ["TrajectoryBinary (coords array, all frames)", _timeFunct(lambda: np.array(trajBinHelp.readTrajFromBinaryFormat(binDir).coords))] )
+		timings.append( ["TrajectoryBinary (TrajStepFlexible objs)", _timeFunct(lambda: [x for x in trajBinHelp.readTrajFromBinaryFormat(binDir)])] )
+
+	print("nSteps={}, nAtoms={}".format(nSteps, nAtoms))
+	for label, timing in timings:
+		print("{:<50} {:10.4f} s  {:12.1f} frames/s".format(label, timing, nSteps/timing))
+
+
+def _getRandomTraj(nSteps, nAtoms):
+	outSteps = list()
+	for step in range(nSteps):
+		currCell = uCellHelp.UnitCell(lattParams=[20,20,20], lattAngles=[90,90,90])
+		currCell.cartCoords = [ list(x) + ["O"] for x in (np.random.random((nAtoms,3))*20).tolist() ]
+		outSteps.append( trajCoreHelp.TrajStepFlexible(unitCell=currCell, step=step, time=step*0.5) )
+	return trajCoreHelp.TrajectoryInMemory(outSteps)
+
+
+def _timeFunct(funct):
+	startTime = time.perf_counter()
+	funct()
+	return time.perf_counter() - startTime
+
+
+if __name__ == '__main__':
+	main()
+
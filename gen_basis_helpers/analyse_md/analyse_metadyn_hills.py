@@ -83,7 +83,7 @@ def _getVelocitiesAndAccelFromPositionsAndTimes(inpPositions, inpTimes):
 	return allVel[1:], accel
 
 
-def getTimeVsPotAtValsForEachHillAdded(inpObj, inpVals, timeRange=None, timeTol=1e-4, minTimeDiff=1e-3, oneDimOutput=True):
+def getTimeVsPotAtValsForEachHillAdded(inpObj, inpVals, timeRange=None, timeTol=1e-4, minTimeDiff=1e-3, oneDimOutput=True, incremental=False, snapshotStride=1):
 	""" Gets [ [x,....z], [val] ] for the potential at each time a hill was added.
 	
 	Args:
@@ -93,31 +93,67 @@ def getTimeVsPotAtValsForEachHillAdded(inpObj, inpVals, timeRange=None, timeTol=
 		timeTol: (float) Tolerance parameter for timeRange
 		minTimeDiff: (float) If multiple hills were added between t and t+minTimeDiff, then they are considered as all being added at time t
 		oneDimOutput: (Bool) If True AND this is a 1-dimensional case then we will return [ [xA,valA], [xB,valB] ] in data fields (outVals) instead of [ [[xA],valA], [[xB],valB] ]; which is less awkward to plot 
+		incremental: (Bool) If True each hill is evaluated once and the potential at each time is found as a running sum (see iterTimeVsPotAtValsForEachHillAdded). Much faster for many hills
+		snapshotStride: (int) Only used if incremental=True. Only return every snapshotStride-th time (starting from the first)
 
 	Returns
 		outVals: e.g. [ [timeA,dataA], [timeB,dataB] ]. Length of iterable is number of hills added. Each element represents the potential at one step (i.e. time when 1 hill is added). Each data is a len-n iter. Within each, the first elements are positions in the n-dimensional collective variable space; i.e. the length of this iter will be the number of collective variable dimensions. An example would be dataA= [ [[xA,yA], valA], [[xB,yB], valB] ]
  
 	"""
-	#Get time + potential objs
-	timeVsPotObjs = _getTimeVsPotObjsForEachTimeHillAdded(inpObj, timeRange=timeRange, timeTol=timeTol, minTimeDiff=1e-3)
-	outTimes = [ x[0] for x in timeVsPotObjs ]
-	outPotObjs = [ x[1] for x in timeVsPotObjs ]
+	#Get times + potentials at each time
+	if incremental:
+		currKwargs = {"timeRange":timeRange, "timeTol":timeTol, "minTimeDiff":minTimeDiff, "snapshotStride":snapshotStride}
+		timeVsPotVals = [ [t,vals.tolist()] for t,vals in iterTimeVsPotAtValsForEachHillAdded(inpObj, inpVals, **currKwargs) ]
+	else:
+		timeVsPotObjs = _getTimeVsPotObjsForEachTimeHillAdded(inpObj, timeRange=timeRange, timeTol=timeTol, minTimeDiff=minTimeDiff)
+		timeVsPotVals = [ [t,pot.evalFunctAtVals(inpVals)] for t,pot in timeVsPotObjs ]
 
-	#Calculate the actual potentials at each time
+	outTimes = [ x[0] for x in timeVsPotVals ]
+
+	#Put in the output format
 	outData = list()
-	for pot in outPotObjs:
-		currData = pot.evalFunctAtVals(inpVals)
+	for unused, currVals in timeVsPotVals:
 		if len(inpVals[0])==1 and oneDimOutput:
-			currData = [ [x[0],y] for x,y in it.zip_longest(inpVals,currData) ]
+			currData = [ [x[0],y] for x,y in it.zip_longest(inpVals,currVals) ]
 		else:
-			currData = [ [x,y] for x,y in it.zip_longest(inpVals,currData) ]
+			currData = [ [x,y] for x,y in it.zip_longest(inpVals,currVals) ]
 
 		outData.append(currData)
 
 	return [ [t,data] for t,data in it.zip_longest(outTimes,outData)]
 
-#This is going to be much slower than it COULD be. I could alternatively get the pot obj for the full time and sum its contribs
-#in certain ways to get total potential at earlier times; that would be faster but probably trickier to test
+
+def iterTimeVsPotAtValsForEachHillAdded(inpObj, inpVals, timeRange=None, timeTol=1e-4, minTimeDiff=1e-3, snapshotStride=1, maxChunkElements=None):
+	""" Iterates over the potential at inpVals for each time a hill was added. The contribution of each hill is evaluated once (in chunks) and added to a running total; so cost scales linearly with the number of hills and only one potential is held in memory at a time
+	
+	Args:
+		inpObj: (MetadynHillsInfo obj)
+		inpVals: (iter of len-n iters) n is the number of dimensions where we want to evaluate the Hills at
+		timeRange: (len-2 iter) Range of times to include potentials for; default is to just include all potentials spawned between -1 and np.inf
+		timeTol: (float) Tolerance parameter for timeRange
+		minTimeDiff: (float) If multiple hills were added between t and t+minTimeDiff, then they are considered as all being added at time t
+		snapshotStride: (int) Only yield every snapshotStride-th time (starting from the first). All hills still contribute to later snapshots
+		maxChunkElements: (int, Optional) Caps memory use when evaluating hills; see ArrayGroupedMultiDimGaussHills
+
+	Yields
+		time: (float) The time the hill(s) was added
+		potVals: (len(inpVals) array) Potential at each of inpVals for all hills added between timeRange[0] and time. Note the same array is updated in place between iterations; so copy it if you need to keep it
+
+	"""
+	sortedObj = MetadynHillsInfo(times=list(inpObj.times), positions=list(inpObj.positions), scales=list(inpObj.scales), heights=list(inpObj.heights), sortTimes=True)
+	spawnTimes, timeRanges = _getSpawnTimesAndTimeRangesForEachTimeHillAdded(sortedObj.times, timeRange=timeRange, minTimeDiff=minTimeDiff)
+
+	#Every time range starts at the same minTime; so hills for each are the first N from the full range
+	fullTimeRange = [timeRanges[0][0], timeRanges[-1][1]]
+	hillTimes = np.array( sortedObj.getTimesWithinRange(timeRange=fullTimeRange, timeTol=timeTol) )
+	hillsObj = sortedObj.createArrayGroupedHills(timeRange=fullTimeRange, timeTol=timeTol, maxChunkElements=maxChunkElements)
+	hillCounts = [ int(np.searchsorted(hillTimes, maxTime+abs(timeTol), side="left")) for unused,maxTime in timeRanges ]
+
+	for idx, potVals in enumerate( hillsObj.iterCumulativeFunctValsAtVals(inpVals, hillCounts) ):
+		if idx%snapshotStride == 0:
+			yield spawnTimes[idx], potVals
+
+
 def _getTimeVsPotObjsForEachTimeHillAdded(inpObj, timeRange=None, timeTol=1e-4, minTimeDiff=1e-3):
 	""" Returns iter of [time,potObj] for each time a hill was added in a metadynamics simulation
 	
@@ -133,20 +169,43 @@ def _getTimeVsPotObjsForEachTimeHillAdded(inpObj, timeRange=None, timeTol=1e-4,
 	NOTE:
 		I've not really tested how timeTol and minTimeDiff interact. I wouldnt try to do anything too clever with them tbh and minTimeDiff>timeTol is probably advisable
 		Also; setting timeTol=0 will probably totally break things; so keep it sensible
+		This builds (and later evaluates) a new potential object for every time; iterTimeVsPotAtValsForEachHillAdded is much faster if only values at fixed positions are needed
  
 	"""
 	useObj = copy.deepcopy(inpObj)
 	useObj.sortTimes()
 
+	outTimeVals, outTimeRanges = _getSpawnTimesAndTimeRangesForEachTimeHillAdded(useObj.times, timeRange=timeRange, minTimeDiff=minTimeDiff)
+
+	#Get potential objs from these times
+	outObjs = list()
+	for tRange in outTimeRanges:
+		currObj = useObj.createGroupedHills(timeRange=tRange, timeTol=timeTol)
+		outObjs.append(currObj)
+
+	return [ [t,obj] for t,obj in it.zip_longest(outTimeVals,outObjs)]
+
+
+def _getSpawnTimesAndTimeRangesForEachTimeHillAdded(sortedTimes, timeRange=None, minTimeDiff=1e-3):
+	""" Gets the times hills were (effectively) spawned and the time range of hills contributing to the potential at each
+	
+	Args:
+		sortedTimes: (iter of floats) Times each hill was added, in ascending order
+		timeRange: (len-2 iter) See _getTimeVsPotObjsForEachTimeHillAdded
+		minTimeDiff: (float) See _getTimeVsPotObjsForEachTimeHillAdded
+
+	Returns
+		outTimeVals: (iter of floats) Each time a hill(s) was spawned
+		outTimeRanges: (iter of len-2 iters) Same length as outTimeVals. [minTime,maxTime] for the hills contributing to the potential at each time
+
+	"""
 	#Step 0: Figure out the time range
 	if timeRange is None:
 		timeRange = [-1, np.inf]
 
 	#Step 1: We need to figure out the time ranges for each
 	minTime, maxTime = timeRange
-	spawnTimes = [t for t in useObj.times if t>minTime and t<maxTime] #this will be in order
-
-
+	spawnTimes = [t for t in sortedTimes if t>minTime and t<maxTime] #this will be in order
 
 	#Find the INDICES corresponding to times where hills were essentially spawned
 	spawnIndices, outTimeVals = [0], [spawnTimes[0]]
@@ -163,16 +222,10 @@ def _getTimeVsPotObjsForEachTimeHillAdded(inpObj, timeRange=None, timeTol=1e-4,
 	#We need to figure out the last one now; which just runs from minTime to maxTime
 	outTimeRanges.append([minTime, maxTime])
 
-	#Step 2: get potential objs from these times
-	outObjs = list()
-	for tRange in outTimeRanges:
-		currObj = useObj.createGroupedHills(timeRange=tRange, timeTol=timeTol)
-		outObjs.append(currObj)
-
-	return [ [t,obj] for t,obj in it.zip_longest(outTimeVals,outObjs)]
+	return outTimeVals, outTimeRanges
 
 
-def evalPotAddedOverTimeRangeForHillsInfoObj(inpObj, evalAtVals, timeRange=None, timeTol=1e-3):
+def evalPotAddedOverTimeRangeForHillsInfoObj(inpObj, evalAtVals, timeRange=None, timeTol=1e-3, incremental=False):
 	""" Calculates the potential added at a set of colvar coords
 	
 	Args:
@@ -180,11 +233,15 @@ def evalPotAddedOverTimeRangeForHillsInfoObj(inpObj, evalAtVals, timeRange=None,
 		evalAtVals: (iter of len-n iters) The values at which to calculate the potential. For 1 dimension this may be [ [0], [1], [2] ], for 2-dimension it may be [ [1,2], [3,4], [5,6] ]
 		timeRange: (len-2 iter) Range of times to include potentials for; default is to just include all potentials
 		timeTol: (float) Tolerance parameter for timeRange
+		incremental: (Bool) If True the hills are evaluated with array operations, adding contributions from chunks of hills to a running total (ArrayGroupedMultiDimGaussHills). Much faster for many hills
 
 	Returns
 		outVals: (iter of floats) Length is the same as len(evalAtVals); This gives the potential at each input point
  
 	"""
+	if incremental:
+		return inpObj.createArrayGroupedHills(timeRange=timeRange, timeTol=timeTol).evalFunctAtVals(evalAtVals).tolist()
+
 	gauFunctGrouped = inpObj.createGroupedHills(timeRange=timeRange, timeTol=timeTol)
 	outVals = gauFunctGrouped.evalFunctAtVals(evalAtVals)
 	return outVals
@@ -365,6 +422,27 @@ class MetadynHillsInfo():
 		groupedHills = GroupedMultiDimGaussHills(multiDimHills)
 		return groupedHills
 
+	def createArrayGroupedHills(self, timeRange=None, timeTol=1e-4, maxChunkElements=None):
+		""" Function to create an "ArrayGroupedMultiDimGaussHills" object. This represents the same potential as createGroupedHills but evaluates it using arrays; much faster when there are many hills and/or positions
+		
+		Args:
+			timeRange: (len-2 iter of floats) [minTime, maxTime] Default is to use each hill regardless of time spawned
+			timeTol: (float) Two times are considered the same if their values are within "timeTol"; purpose is to deal with float errors
+			maxChunkElements: (int, Optional) Caps memory use when evaluating; see ArrayGroupedMultiDimGaussHills
+
+		Returns
+			ArrayGroupedMultiDimGaussHills:
+	 
+		"""
+		timeIndices = self._getIndicesWithinTimeRange(timeRange, timeTol)
+		heights = [self.heights[idx] for idx in timeIndices]
+		scales = [self.scales[idx] for idx in timeIndices]
+		positions = [self.positions[idx] for idx in timeIndices]
+		currKwargs = {"heights":heights, "scales":scales, "positions":positions}
+		if maxChunkElements is not None:
+			currKwargs["maxChunkElements"] = maxChunkElements
+		return ArrayGroupedMultiDimGaussHills(**currKwargs)
+
 	def createMultiDimHills(self, timeRange=None, timeTol=1e-4):
 		""" 
 		
@@ -564,6 +642,164 @@ class GroupedMultiDimGaussHills():
 
 		return outVectors
 
+class ArrayGroupedMultiDimGaussHills():
+	""" Represents the sum of multi-dimensional Gaussian hills (same function as GroupedMultiDimGaussHills) with parameters held in (nHills, nDims) arrays. Evaluation is vectorized over hills and positions, and is done in chunks to keep memory use bounded for very large (nPositions x nHills) products """
+
+	def __init__(self, heights=None, scales=None, positions=None, maxChunkElements=2**22):
+		""" Initializer. Each hill is prod_{d} heights[d]*exp( -0.5*(dPos[d]^2)/(scales[d]^2) ) where d runs over dimensions and dPos is the distance from the hill centre
+		
+		Args [heights/scales/positions are required, despite using keywords]:
+			heights: (iter of len-n iter of floats) Where n is number of collective variables. One element per hill
+			scales: (iter of len-n iter of floats) Where n is number of collective variables. scale=0 is treated as an infinitely flat Gaussian (as in CP2K)
+			positions: (iter of len-n iter of floats) Where n is number of collective variables
+			maxChunkElements: (int) Maximum number of elements in the (nPositions, nHills, nDims) work arrays built at any one time. Memory use scales with this; smaller values mean more (smaller) chunks
+
+		"""
+		self.heights, self.scales, self.positions = [_getTwoDimFloatArray(x) for x in [heights, scales, positions]]
+		self.maxChunkElements = maxChunkElements
+		if not (self.heights.shape == self.scales.shape == self.positions.shape):
+			raise ValueError("heights/scales/positions should all have the same shape but have shapes {},{},{}".format(self.heights.shape, self.scales.shape, self.positions.shape))
+
+		#Quantities re-used for every evaluation
+		self._hillHeights = np.prod(self.heights, axis=1)
+		nonZeroScales = np.where(self.scales==0, 1, self.scales)
+		self._invScalesSqr = np.where(self.scales==0, 0, 1/(nonZeroScales**2))
+
+	@classmethod
+	def fromMultiDimHills(cls, multiDimHills, **kwargs):
+		""" Alternative initializer
+		
+		Args:
+			multiDimHills: (iter of MultiDimGaussHill objects)
+			kwargs: Passed to the standard initializer (e.g. maxChunkElements)
+				 
+		"""
+		heights = [ [x.height for x in hill.oneDimHills] for hill in multiDimHills ]
+		scales = [ [x.scale for x in hill.oneDimHills] for hill in multiDimHills ]
+		positions = [ [x.pos for x in hill.oneDimHills] for hill in multiDimHills ]
+		return cls(heights=heights, scales=scales, positions=positions, **kwargs)
+
+	@property
+	def nHills(self):
+		return self.heights.shape[0]
+
+	def getContribsAtPositions(self, posVals):
+		""" Gets an array of contributions (1 per hill) at each position in posVal. Note this holds the full (nPositions x nHills) output in memory
+	
+		Args:
+			posVals: (Iter of len-n floats; where n is number of dimensions) For example, for two dimensions this may be [ [1,2], [3,4], [5,6] ] which will evaluate for 3 positions
+ 
+		Returns
+			outContribs: (nPositions x nHills array) 1 row per position, one column per hill
+	 
+		"""
+		posVals = self._getPosValsArray(posVals)
+		outContribs = np.zeros( (posVals.shape[0], self.nHills) )
+		for posSlice, hillSlice in self._iterChunkSlices(posVals.shape[0]):
+			outContribs[posSlice,hillSlice], unused = self._getContribsAndDeltasForChunk(posVals[posSlice], hillSlice)
+		return outContribs
+
+	def evalFunctAtVals(self, posVals):
+		""" Get the function evaluated at a set of position values
+		
+		Args:
+			posVals: (Iter of len-n floats; where n is number of dimensions) For example, for two dimensions this may be [ [1,2], [3,4], [5,6] ] which will evaluate for 3 positions
+
+		Returns
+			outVals: (len(posVals) array) The summed potential at each position
+				 
+		"""
+		posVals = self._getPosValsArray(posVals)
+		outVals = np.zeros( posVals.shape[0] )
+		for posSlice, hillSlice in self._iterChunkSlices(posVals.shape[0]):
+			contribs, unused = self._getContribsAndDeltasForChunk(posVals[posSlice], hillSlice)
+			outVals[posSlice] += np.sum(contribs, axis=1)
+		return outVals
+
+	def evalGradientAtVals(self, posVals):
+		""" Gets the gradient vector at an iter of positions
+		
+		Args:
+			posVals: (Iter of len-n floats; where n is number of dimensions) For example, for two dimensions this may be [ [1,2], [3,4], [5,6] ] which will evaluate for 3 positions
+				 
+		Returns
+			grads: (len(posVals) x n array) Each row is one gradient vector. Each element of the gradient vector is the derivative in one of the dimensions
+
+		NOTES:
+			This is the full gradient of the product of Gaussians; for n>1 it therefore differs from GroupedMultiDimGaussHills.evalGradientAtVals, which only uses the derivative of the one-dimensional Gaussian in each dimension
+	 
+		"""
+		posVals = self._getPosValsArray(posVals)
+		outGrads = np.zeros( posVals.shape )
+		for posSlice, hillSlice in self._iterChunkSlices(posVals.shape[0]):
+			contribs, deltas = self._getContribsAndDeltasForChunk(posVals[posSlice], hillSlice)
+			scaledDeltas = deltas*self._invScalesSqr[np.newaxis,hillSlice,:]
+			outGrads[posSlice] -= np.einsum("ph,phd->pd", contribs, scaledDeltas)
+		return outGrads
+
+	def iterCumulativeFunctValsAtVals(self, posVals, hillCounts):
+		""" Iterates over the function evaluated using only the first N hills, for each N in hillCounts. Each hill is only evaluated once; contributions are added to a running total
+		
+		Args:
+			posVals: (Iter of len-n floats; where n is number of dimensions) See evalFunctAtVals
+			hillCounts: (iter of ints) Number of hills to include for each output. Must be in ascending (non-decreasing) order
+
+		Yields
+			outVals: (len(posVals) array) The summed potential from the first N hills at each position. Note the same array is updated in place between iterations
+	 
+		"""
+		posVals = self._getPosValsArray(posVals)
+		outVals = np.zeros( posVals.shape[0] )
+		prevCount = 0
+		for currCount in hillCounts:
+			if currCount < prevCount:
+				raise ValueError("hillCounts must be in ascending order; but {} follows {}".format(currCount, prevCount))
+			for posSlice, hillSlice in self._iterChunkSlices(posVals.shape[0], hillStart=prevCount, hillEnd=currCount):
+				contribs, unused = self._getContribsAndDeltasForChunk(posVals[posSlice], hillSlice)
+				outVals[posSlice] += np.sum(contribs, axis=1)
+			prevCount = currCount
+			yield outVals
+
+	def _getPosValsArray(self, posVals):
+		posVals = _getTwoDimFloatArray(posVals)
+		if (self.nHills > 0) and (posVals.shape[0] > 0) and (posVals.shape[1] != self.heights.shape[1]):
+			raise ValueError("Positions have {} dimensions but hills have {}".format(posVals.shape[1], self.heights.shape[1]))
+		return posVals
+
+	def _iterChunkSlices(self, nPositions, hillStart=0, hillEnd=None):
+		hillEnd = self.nHills if hillEnd is None else min(hillEnd, self.nHills)
+		nDims = max(1, self.heights.shape[1])
+		hillChunkSize = max(1, min(hillEnd-hillStart, self.maxChunkElements//nDims))
+		posChunkSize = max(1, self.maxChunkElements//(hillChunkSize*nDims))
+		for posStart in range(0, nPositions, posChunkSize):
+			posSlice = slice(posStart, posStart+posChunkSize)
+			for startIdx in range(hillStart, hillEnd, hillChunkSize):
+				yield posSlice, slice(startIdx, min(startIdx+hillChunkSize,hillEnd))
+
+	def _getContribsAndDeltasForChunk(self, posVals, hillSlice):
+		deltas = posVals[:,np.newaxis,:] - self.positions[np.newaxis,hillSlice,:]
+		exponents = -0.5*np.sum( (deltas**2)*self._invScalesSqr[np.newaxis,hillSlice,:], axis=2 )
+		contribs = self._hillHeights[np.newaxis,hillSlice]*np.exp(exponents)
+		return contribs, deltas
+
+	def __eq__(self, other):
+		eqTol = 1e-5
+		for attr in ["heights", "scales", "positions"]:
+			valsA, valsB = getattr(self,attr), getattr(other,attr)
+			if valsA.shape != valsB.shape:
+				return False
+			if not np.allclose(valsA, valsB, atol=eqTol, rtol=0):
+				return False
+		return True
+
+
+def _getTwoDimFloatArray(inpIter):
+	outArray = np.array(inpIter, dtype=np.float64)
+	if outArray.size == 0:
+		return np.zeros( (len(inpIter),0) )
+	return outArray.reshape( len(inpIter), -1 )
+
+
 class MultiDimGaussHill():
 	""" Combines a series of 1-dimensional GaussianHill functions and uses their product over multiple dims. e.g. if evaluating at xy we use f(x,y) = G(x)G(y) where G(x) and G(y) are the 1-dimensional Gaussian functions over x and y """
 
@@ -4,6 +4,7 @@ import itertools as it
 import math
 
 from . import std_stats as statsHelp
+from . import time_series_stats as tsStatsHelp
 
 from ..shared import creator_resetable_kwargs as resetableKwargFactory
 from ..shared import data_plot_base as dPlotBase
@@ -144,6 +145,23 @@ def _getSimpleCentralWindowAverageFromIter(inpIter, widthEachSide, fillValWhenNo
 	return statsHelp.getCentralWindowAverageFromIter(inpIter, widthEachSide, fillValWhenNotCalc=fillValWhenNotCalc)
 
 
+def getBlockingStatsFromThermoData(thermoData, props, maxOrder=None, startIdx=0):
+	""" Gets blocking statistics (estimates of the standard error of the mean for correlated data) for multiple properties at once
+	
+	Args:
+		thermoData: ThermoDataStandard object
+		props: (iter of str) The properties to get stats for
+		maxOrder: (Optional, int) The maximum blocking order. Default is to block until fewer than 2 blocks remain
+		startIdx: (int) The idx in thermoData to start at
+			 
+	Returns
+		outDict: (dict) See time_series_stats.getBlockingStats; arrays are nProps x nOrders, in the same order as props
+ 
+	"""
+	inpArray = [thermoData.dataDict[prop][startIdx:] for prop in props]
+	return tsStatsHelp.getBlockingStats(inpArray, maxOrder=maxOrder)
+
+
 class GetStatsForThermoProps(resetableKwargFactory.CreatorWithResetableKwargsTemplate):
 	registeredKwargs = set(resetableKwargFactory.CreatorWithResetableKwargsTemplate.registeredKwargs)
 
@@ -410,7 +410,7 @@ class _WaterPlanarMinDistBinValGetter(atomComboCoreHelp._GetOneDimValsToBinFromS
 
 class _CountHBondsBetweenGenericGroupsBinValGetter(atomComboCoreHelp._GetOneDimValsToBinFromSparseMatricesBase):
 
-	def __init__(self, fromNonHyIndices, fromHyIndices, toNonHyIndices, toHyIndices, acceptor=True, donor=True, maxOO=3.5, maxAngle=35):
+	def __init__(self, fromNonHyIndices, fromHyIndices, toNonHyIndices, toHyIndices, acceptor=True, donor=True, maxOO=3.5, maxAngle=35, useNebLists=False):
 		""" Initializer
 		
 		Args:
@@ -422,6 +422,7 @@ class _CountHBondsBetweenGenericGroupsBinValGetter(atomComboCoreHelp._GetOneDimV
 			donor: (Bool) If True we calculate dists/angles required to count number of groupA donors to groupB
 			maxOO: (float) The maximum X-X distance between two hydrogen-bonded water. For water X are the oxygen atoms; hence the variable name. Angles are only calculated when this criterion is fulfilled
 			maxAngle: (float) The maximum XA-XD-XD angle for a hydrogen bond; OA = acceptor oxygen, OD=Donor oxygen, HD=donor hydrogen
+			useNebLists: (Bool) If True we use the sparse "nebDistMatrix"/"nebAngleMatrix" (see _CountHBondsBetweenGenericGroupsPopulator) and only check groups which are neighbours
 
 		"""
 		self.fromNonHyIndices = fromNonHyIndices
@@ -432,8 +433,12 @@ class _CountHBondsBetweenGenericGroupsBinValGetter(atomComboCoreHelp._GetOneDimV
 		self.donor = donor
 		self.maxOO = maxOO
 		self.maxAngle = maxAngle
+		self.useNebLists = useNebLists
 
 	def getValsToBin(self, sparseMatrixCalculator):
+		if self.useNebLists:
+			return self._getValsToBin_nebLists(sparseMatrixCalculator)
+
 		distMatrix = sparseMatrixCalculator.outDict["distMatrix"]
 		angleMatrix = sparseMatrixCalculator.outDict["angleMatrix"]
 
@@ -446,6 +451,20 @@ class _CountHBondsBetweenGenericGroupsBinValGetter(atomComboCoreHelp._GetOneDimV
 
 		return outVals
 
+	def _getValsToBin_nebLists(self, sparseMatrixCalculator):
+		distMatrix = sparseMatrixCalculator.outDict["nebDistMatrix"]
+		angleMatrix = sparseMatrixCalculator.outDict.get("nebAngleMatrix", dict())
+		nebGroupIndices = atomComboPopulatorHelp._getNebGroupIndicesFromSparseDistMatrix(self.fromNonHyIndices, self.toNonHyIndices, distMatrix)
+
+		outVals = list()
+		sharedKwargs = {"acceptor":self.acceptor, "donor":self.donor, "maxOO":self.maxOO, "maxAngle":self.maxAngle}
+		for fromNonHy, fromHy, toGroupIndices in it.zip_longest(self.fromNonHyIndices, self.fromHyIndices, nebGroupIndices):
+			toNonHy, toHy = [self.toNonHyIndices[x] for x in toGroupIndices], [self.toHyIndices[x] for x in toGroupIndices]
+			currArgs = [fromNonHy, fromHy, toNonHy, toHy, distMatrix, angleMatrix]
+			outVals.append( _getNumberHBondsForOneGenericFromGroup(*currArgs, **sharedKwargs) )
+
+		return outVals
+
 
 class _HBondsPropertiesBetweenGenericGroupsBinValGetter(_CountHBondsBetweenGenericGroupsBinValGetter):
 
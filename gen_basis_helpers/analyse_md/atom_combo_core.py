@@ -12,23 +12,32 @@ from . import calc_dists as calcDistsHelp
 #Real core/ abstract go here
 class _SparseMatrixCalculatorStandard():
 
-	def __init__(self, populators):
+	def __init__(self, populators, planned=True):
 		""" Initializer
 		
 		Args:
 			populators: (_SparseMatrixPopulator) Objects which handle calculating specific matrices
+			planned: (Bool) If True, the distances/angles requested by all populators (see _SparseMatrixPopulator.getMatrixRequests) are collected at each level and each is calculated once. Populators which dont support this just have populateMatrices called (after the planned calculations for that level)
 		
 		NOTES:
 			I havent directly tested the multi-level cases at the time of writing
+			With planned=True outDict["angleMatrix"] is a SparseAngleMatrix rather than a dense NxNxN array
 	 
 		"""
 		self.populators = populators
+		self.planned = planned
 
 	def calcMatricesForGeom(self, inpGeom):
 		self.outDict = dict() #Need to reset it between calls
 		maxLevel = max([x.maxLevel for x in self.populators])
+		leafPopulators = _getLeafPopulators(self.populators)
 		for level in range(maxLevel+1):
-			for populator in self.populators:
+			if self.planned:
+				unplannedPopulators = _populatePlannedMatrices(leafPopulators, inpGeom, self.outDict, level)
+			else:
+				unplannedPopulators = self.populators
+
+			for populator in unplannedPopulators:
 				populator.populateMatrices(inpGeom, self.outDict, level)
 
 	def __eq__(self, other):
@@ -66,8 +75,187 @@ class _SparseMatrixPopulator():
 		"""
 		raise NotImplementedError("")
 
+	def getMatrixRequests(self, inpGeom, outDict, level):
+		""" Gets the distances/angles this populator needs at a given level, so they can be calculated once for ALL populators (by _SparseMatrixCalculatorStandard). If this returns a _MatrixRequests object then populateMatrices is NOT called for this level
+		
+		Args:
+			inpGeom: (plato_pylib UnitCell instance)
+			outDict: (dict) Matrices calculated at lower levels
+			level: (int) The level matrices are being populated for
+				 
+		Returns
+			matrixRequests: (_MatrixRequests or None) None means planning isnt supported; in which case populateMatrices gets called as normal
+	 
+		"""
+		return None
+
+
+class _MatrixRequests():
+	""" Holds the distances/angles a populator needs at one level; see _SparseMatrixPopulator.getMatrixRequests """
+
+	def __init__(self, distIndexBlocks=None, angleIndices=None):
+		""" Initializer
+		
+		Args:
+			distIndexBlocks: (iter of len-2 iters) Each is [fromIndices, toIndices]; distances are needed between all of these pairs (stored in outDict["distMatrix"]). None for either means all atoms
+			angleIndices: (iter of len-3 int iters) Each is [idxA,idxB,idxC]; the angle needed (stored in outDict["angleMatrix"])
+				 
+		"""
+		self.distIndexBlocks = list() if distIndexBlocks is None else list(distIndexBlocks)
+		self.angleIndices = list() if angleIndices is None else angleIndices
 
 
+class SparseAngleMatrix():
+	""" Stores angles for only the atom triples requested; indexing mirrors a dense NxNxN angle matrix (angleMatrix[idxA][idxB][idxC] or angleMatrix[(idxA,idxB,idxC)]) but unstored triples return fillValue
+
+	Meant as a drop-in for the dense angle matrix, which needs far too much memory (and time to initialise) for all but the smallest cells
+
+	"""
+
+	def __init__(self, nAtoms, fillValue=np.nan):
+		""" Initializer
+		
+		Args:
+			nAtoms: (int) Number of atoms in the geometry; only used when converting to a dense array
+			fillValue: (float) Value returned for any triple not stored
+
+		"""
+		self.nAtoms = nAtoms
+		self.fillValue = fillValue
+		self._angleDict = dict()
+
+	def addAngles(self, angleIndices, angles):
+		""" Adds angles to the matrix
+		
+		Args:
+			angleIndices: (iter of len-3 int iters)
+			angles: (iter of floats) Same length as angleIndices
+				 
+		"""
+		keys = [tuple(x) for x in np.array(angleIndices, dtype=int).reshape(-1,3).tolist()]
+		self._angleDict.update( zip(keys, [float(x) for x in angles]) )
+
+	def __len__(self):
+		return len(self._angleDict)
+
+	def __getitem__(self, idx):
+		if np.ndim(idx)==0:
+			return _SparseAngleMatrixPartialIndex(self, (int(idx),))
+		return self._angleDict.get( tuple([int(x) for x in idx]), self.fillValue )
+
+	def __setitem__(self, idx, val):
+		self._angleDict[ tuple([int(x) for x in idx]) ] = float(val)
+
+	#Mainly for testing/debugging; this creates the full dense matrix
+	def __array__(self, dtype=None, copy=None):
+		outMatrix = np.full( (self.nAtoms,self.nAtoms,self.nAtoms), self.fillValue, dtype=float )
+		if len(self._angleDict)>0:
+			indices = np.array( list(self._angleDict.keys()), dtype=int )
+			outMatrix[tuple(indices.T)] = list(self._angleDict.values())
+		return outMatrix if dtype is None else outMatrix.astype(dtype)
+
+
+class _SparseAngleMatrixPartialIndex():
+
+	def __init__(self, angleMatrix, indices):
+		self.angleMatrix = angleMatrix
+		self.indices = indices
+
+	def __getitem__(self, idx):
+		indices = self.indices + (int(idx),)
+		if len(indices)==3:
+			return self.angleMatrix._angleDict.get(indices, self.angleMatrix.fillValue)
+		return _SparseAngleMatrixPartialIndex(self.angleMatrix, indices)
+
+
+def _getLeafPopulators(populators):
+	outPopulators = list()
+	for populator in populators:
+		if isinstance(populator, _SparseMatrixPopulatorComposite):
+			outPopulators.extend( _getLeafPopulators(populator.populators) )
+		else:
+			outPopulators.append(populator)
+	return outPopulators
+
+
+def _populatePlannedMatrices(populators, inpGeom, outDict, level):
+	""" Collects the matrix requests from all populators for one level, then calculates each requested distance/angle once
+	
+	Args:
+		populators: (iter of _SparseMatrixPopulator) Should not include composites
+		inpGeom: (plato_pylib UnitCell instance)
+		outDict: (dict) Values are sparse matrices; modified in place
+		level: (int) The level we're populating matrices for
+			 
+	Returns
+		unplannedPopulators: (list of _SparseMatrixPopulator) Those which dont support planning; populateMatrices still needs calling for these
+ 
+	"""
+	allRequests, unplannedPopulators = list(), list()
+	for populator in populators:
+		currRequests = populator.getMatrixRequests(inpGeom, outDict, level)
+		if currRequests is None:
+			unplannedPopulators.append(populator)
+		else:
+			allRequests.append(currRequests)
+
+	distIndexBlocks = [block for requests in allRequests for block in requests.distIndexBlocks]
+	_populateDistMatrixFromIndexBlocks(inpGeom, outDict, distIndexBlocks)
+
+	angleIndices = [indices for requests in allRequests for indices in requests.angleIndices]
+	_populateAngleMatrixFromIndices(inpGeom, outDict, angleIndices)
+
+	return unplannedPopulators
+
+
+def _populateDistMatrixFromIndexBlocks(inpGeom, outDict, indexBlocks):
+	mergedBlocks = _getMergedDistIndexBlocks(indexBlocks, len(inpGeom.cartCoords))
+	if len(mergedBlocks)==0:
+		return None
+
+	nAtoms = len(inpGeom.cartCoords)
+	if outDict.get("distMatrix") is None:
+		outDict["distMatrix"] = np.full( (nAtoms,nAtoms), np.nan )
+	useMatrix = outDict["distMatrix"]
+
+	#Assign whole blocks at once; going element by element (as in calc_dists._getTwoDimSparseMatrix) is much slower
+	for fromIndices, toIndices in mergedBlocks:
+		currBlock = calcDistsHelp.calcDistanceMatrixForCell_minImageConv(inpGeom, indicesA=fromIndices, indicesB=toIndices)
+		useMatrix[np.ix_(fromIndices,toIndices)] = currBlock
+		useMatrix[np.ix_(toIndices,fromIndices)] = currBlock.T
+
+
+#Merges blocks with the same "from" indices (e.g. O-O and O-X for water) so we make a single call for them
+#Distances are symmetric, so [A,B] is skipped if [B,A] was already requested
+def _getMergedDistIndexBlocks(indexBlocks, nAtoms):
+	mergedDict = dict()
+	for fromIndices, toIndices in indexBlocks:
+		fromKey = tuple(range(nAtoms)) if fromIndices is None else tuple([int(x) for x in fromIndices])
+		toKey = tuple(range(nAtoms)) if toIndices is None else tuple([int(x) for x in toIndices])
+		if (len(fromKey)==0) or (len(toKey)==0):
+			continue
+		if (toKey in mergedDict) and set(fromKey).issubset(mergedDict[toKey]):
+			continue
+		mergedDict.setdefault(fromKey, dict()).update( dict.fromkeys(toKey) )
+
+	return [ (list(fromKey), list(toDict.keys())) for fromKey, toDict in mergedDict.items() ]
+
+
+def _populateAngleMatrixFromIndices(inpGeom, outDict, angleIndices):
+	if len(angleIndices)==0:
+		return None
+
+	uniqueIndices = np.unique( np.array(angleIndices, dtype=int).reshape(-1,3), axis=0 )
+	angles = calcDistsHelp.getInterAtomicAnglesArrayForInpGeom(inpGeom, uniqueIndices)
+
+	if outDict.get("angleMatrix") is None:
+		outDict["angleMatrix"] = SparseAngleMatrix( len(inpGeom.cartCoords) )
+	useMatrix = outDict["angleMatrix"]
+
+	if isinstance(useMatrix, SparseAngleMatrix):
+		useMatrix.addAngles(uniqueIndices, angles)
+	else:
+		useMatrix[tuple(uniqueIndices.T)] = angles
 
 
 class _SparseMatrixPopulatorComposite(_SparseMatrixPopulator):
@@ -10,17 +10,20 @@ from . import binned_res as binResHelp
 from . import calc_distrib_core as calcDistrCoreHelp
 from . import calc_dists as calcDistsHelp
 from . import calc_radial_distrib_impl as calcRadImpl
+from . import traj_parallel as trajParallelHelp
 from . import water_combo_distrs as waterComboDistrHelp
 
 from ..shared import plane_equations as planeEqnHelp
 
 
-def getAtomicComboDistrBinsFromOptsObjs(inpTraj, optsObjsGroups):
+def getAtomicComboDistrBinsFromOptsObjs(inpTraj, optsObjsGroups, nCores=1, nChunks=None):
 	""" Gets populated NDimensionalBinnedResults objects from a trajectory and options objects
 	
 	Args:
-		inpTraj: (TrajectoryInMemory object)
+		inpTraj: (TrajectoryBase object) Usually TrajectoryInMemory; TrajectoryOnDisk can be used to keep memory use bounded for long trajectories
 		optsObjsGroups: (iter of iter of calcOptions objects). Currently these can have "CalcRdfOptions" (with minDistAToB=True) or "" or "CalcPlanarRdfOptions" option objs (a mixture is fine). 
+		nCores: (int) Number of processes to use. If >1 the trajectory is split into chunks of frames, counts are found for each chunk in a separate process and then summed
+		nChunks: (int, Optional) Number of chunks to split the trajectory into when nCores>1. Default is nCores
 			 
 	Returns
 		outRes: (iter of NDimensionalBinnedResults) One of these per element in optsObjs
@@ -33,7 +36,29 @@ def getAtomicComboDistrBinsFromOptsObjs(inpTraj, optsObjsGroups):
 	for optObjGroup in optsObjsGroups:
 		_checkIndicesConsistentInOptsObjGroup(optObjGroup)
 
-	#2) Setup object to calculate basic matrices (e.g. dist matrix) and one to get bin values from this
+	#2) Get the (unnormalised) counts; either serially or by summing counts from chunks of the trajectory
+	if nCores==1:
+		outBinObjs = _getAtomicComboDistrBinsWithCountsOnly(inpTraj, optsObjsGroups)
+	else:
+		currKwargs = {"nChunks":nChunks, "functArgs":[optsObjsGroups]}
+		allChunkBinObjs = trajParallelHelp.mapFunctOverTrajChunks(_getAtomicComboDistrBinsWithCountsOnly, inpTraj, nCores, **currKwargs)
+		outBinObjs = allChunkBinObjs[0]
+		for chunkBinObjs in allChunkBinObjs[1:]:
+			for outBinObj, chunkBinObj in it.zip_longest(outBinObjs, chunkBinObjs):
+				outBinObj.binVals["counts"] += chunkBinObj.binVals["counts"]
+
+	#Get the normalised counts
+	nSteps = len(inpTraj.trajSteps)
+	for binObj in outBinObjs:
+		waterComboDistrHelp._attachCountsNormalisedByNStepsToBin(binObj, nSteps)
+
+
+	return outBinObjs
+
+
+#Module-level so it can be sent to worker processes
+def _getAtomicComboDistrBinsWithCountsOnly(inpTraj, optsObjsGroups):
+	#1) Setup object to calculate basic matrices (e.g. dist matrix) and one to get bin values from this
 	sparseMatrixCalculator =  optsObjsMapHelp.getSparseMatrixCalculatorFromOptsObjIter( [optObj for optObj in it.chain(*optsObjsGroups)] )
 
 	binValGetters = list()
@@ -41,10 +66,10 @@ def getAtomicComboDistrBinsFromOptsObjs(inpTraj, optsObjsGroups):
 		currBinValGetter = optsObjsMapHelp.getMultiDimBinValGetterFromOptsObjs(group)
 		binValGetters.append( currBinValGetter )
 
-	#3) Setup the bin objects
+	#2) Setup the bin objects
 	outBinObjs = [_getBinObjForOptsObjGroup(group) for group in optsObjsGroups]
 
-	#4) Loop over trajectory + bin values
+	#3) Loop over trajectory + bin values
 	for trajStep in inpTraj:
 		currGeom = trajStep.unitCell
 		sparseMatrixCalculator.calcMatricesForGeom(currGeom)
@@ -52,12 +77,6 @@ def getAtomicComboDistrBinsFromOptsObjs(inpTraj, optsObjsGroups):
 			currBinVals = binValGetter.getValsToBin(sparseMatrixCalculator)
 			binObj.addBinValuesToCounts(currBinVals)
 
-	#Get the normalised counts
-	nSteps = len(inpTraj.trajSteps)
-	for binObj in outBinObjs:
-		waterComboDistrHelp._attachCountsNormalisedByNStepsToBin(binObj, nSteps)
-
-
 	return outBinObjs
 
 
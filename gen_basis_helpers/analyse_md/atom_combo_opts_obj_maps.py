@@ -140,12 +140,18 @@ def _(inpObj):
 
 @TYPE_TO_POPULATOR_REGISTER_DECO(distrOptsObjHelp.GetOOHAnglesForHBondsBetweenGenericGroups)
 @TYPE_TO_POPULATOR_REGISTER_DECO(distrOptsObjHelp.GetOODistsForHBondsBetweenGenericGroups)
-@TYPE_TO_POPULATOR_REGISTER_DECO(distrOptsObjHelp.CountHBondsBetweenGenericGroupsOptions)
 def _(inpObj):
 	currArgs = [inpObj.fromNonHyIndices, inpObj.fromHyIndices, inpObj.toNonHyIndices, inpObj.toHyIndices]
 	currKwargs = {"acceptor":inpObj.acceptor, "donor":inpObj.donor, "maxOO":inpObj.maxOO}
 	return atomComboPopulatorHelp._CountHBondsBetweenGenericGroupsPopulator(*currArgs, **currKwargs)
 
+#Only the plain counting case can use neighbour lists at the moment
+@TYPE_TO_POPULATOR_REGISTER_DECO(distrOptsObjHelp.CountHBondsBetweenGenericGroupsOptions)
+def _(inpObj):
+	currArgs = [inpObj.fromNonHyIndices, inpObj.fromHyIndices, inpObj.toNonHyIndices, inpObj.toHyIndices]
+	currKwargs = {"acceptor":inpObj.acceptor, "donor":inpObj.donor, "maxOO":inpObj.maxOO, "useNebLists":inpObj.useNebLists}
+	return atomComboPopulatorHelp._CountHBondsBetweenGenericGroupsPopulator(*currArgs, **currKwargs)
+
 
 @TYPE_TO_POPULATOR_REGISTER_DECO(distrOptsObjHelp.GetNonHyToHyDistanceForHBonds)
 def _(inpObj):
@@ -329,6 +335,8 @@ def _(inpObj):
 @TYPE_TO_POPULATOR_REGISTER_DECO(classDistrOptObjHelp.ClassifyByNumberNebsWithinDistanceOptsObj)
 def _(inpObj):
 	currArgs = [inpObj.fromIndices, inpObj.toIndices]
+	if inpObj.useNebLists:
+		return atomComboPopulatorHelp._NebDistMatrixPopulator(*currArgs, inpObj.maxDist)
 	distMatrixPopulator = atomComboPopulatorHelp._DistMatrixPopulator(*currArgs)
 	return distMatrixPopulator
 
@@ -374,7 +382,7 @@ def _(inpObj):
 @TYPE_TO_BINNER_REGISTER_DECO(distrOptsObjHelp.CountHBondsBetweenGenericGroupsOptions)
 def _(inpObj):
 	currArgs = [inpObj.fromNonHyIndices, inpObj.fromHyIndices, inpObj.toNonHyIndices, inpObj.toHyIndices]
-	currKwargs = {"acceptor":inpObj.acceptor, "donor":inpObj.donor, "maxOO":inpObj.maxOO, "maxAngle":inpObj.maxAngle}
+	currKwargs = {"acceptor":inpObj.acceptor, "donor":inpObj.donor, "maxOO":inpObj.maxOO, "maxAngle":inpObj.maxAngle, "useNebLists":inpObj.useNebLists}
 	return binValGettersHelp._CountHBondsBetweenGenericGroupsBinValGetter(*currArgs, **currKwargs)
 
 @TYPE_TO_BINNER_REGISTER_DECO(distrOptsObjHelp.GetOODistsForHBondsBetweenGenericGroups)
@@ -553,7 +561,7 @@ def _(inpObj):
 	sharedArgs = [inpObj.fromIndices, inpObj.toIndices, inpObj.minDist, inpObj.maxDist]
 	for idx, unused in enumerate(inpObj.nebRanges):
 		currArgs = sharedArgs + [inpObj.nebRanges[idx]]
-		currObj = classBinvalGetterHelp._NumberAtomsWithNNebsWithinDistBinvalGetter(*currArgs)
+		currObj = classBinvalGetterHelp._NumberAtomsWithNNebsWithinDistBinvalGetter(*currArgs, useNebLists=inpObj.useNebLists)
 		outObjs.append(currObj)
 	return outObjs
 
@@ -8,6 +8,7 @@ import numpy as np
 
 from . import atom_combo_core as atomComboCoreHelp
 from . import calc_dists as calcDistsHelp
+from . import get_neb_lists as nebListHelp
 from . import water_rotations as waterRotHelp
 
 from ..shared import simple_vector_maths as vectHelp
@@ -39,6 +40,11 @@ class _DistMatrixPopulator(atomComboCoreHelp._SparseMatrixPopulator):
 		else:
 			self._populateMatrices(inpGeom, outDict)
 
+	def getMatrixRequests(self, inpGeom, outDict, level):
+		if level!=self.level:
+			return atomComboCoreHelp._MatrixRequests()
+		return atomComboCoreHelp._MatrixRequests(distIndexBlocks=[ [self.fromIndices, self.toIndices] ])
+
 	def _populateMatrices(self, inpGeom, outDict):
 		try:
 			useMatrix = outDict["distMatrix"]
@@ -78,6 +84,60 @@ class _DistMatrixPopulator(atomComboCoreHelp._SparseMatrixPopulator):
 		return True
 
 
+class _NebDistMatrixPopulator(atomComboCoreHelp._SparseMatrixPopulator):
+	""" Populator for distances between sets of indices, but only for pairs within a cutoff. Uses a neighbour-list search (roughly linear scaling) rather than the full min-image distance matrix (quadratic scaling). Results go in outDict["nebDistMatrix"] (a get_neb_lists.SparseDistMatrix) """
+
+	def __init__(self, fromIndices, toIndices, cutoff, level=0):
+		""" Initializer
+		
+		Args: (to/from is probably an arbitrary distinction here)
+			fromIndices: (iter of ints) Indices of atoms to calculate distances from
+			toIndices: (iter of ints) Indices of atoms to calculate distances to
+			cutoff: (float) Only pairs with distance <=cutoff are stored. Unstored pairs give inf when indexing the output matrix
+			level: (int) The level to populate the matrix at
+
+		NOTES:
+			a) If multiple populators share an outDict then pairs beyond this cutoff may also be present (if requested by another populator with a larger cutoff); hence consumers should still filter by distance
+
+		"""
+		self.fromIndices = fromIndices
+		self.toIndices = toIndices
+		self.cutoff = cutoff
+		self.level = level
+
+	@property
+	def maxLevel(self):
+		return self.level
+
+	def populateMatrices(self, inpGeom, outDict, level):
+		if level!=self.level:
+			pass
+		else:
+			self._populateMatrices(inpGeom, outDict)
+
+	def _populateMatrices(self, inpGeom, outDict):
+		try:
+			useMatrix = outDict["nebDistMatrix"]
+		except KeyError:
+			useMatrix = nebListHelp.SparseDistMatrix()
+			outDict["nebDistMatrix"] = useMatrix
+
+		pairIndicesA, pairIndicesB, dists = nebListHelp.getNebPairsWithinCutoffForInpCell(inpGeom, self.cutoff, indicesA=self.fromIndices, indicesB=self.toIndices)
+		useMatrix.addPairs(pairIndicesA, pairIndicesB, dists)
+
+	def __eq__(self, other):
+		if type(self) is not type(other):
+			return False
+
+		directCmpAttrs = ["fromIndices", "toIndices", "cutoff", "level"]
+		for attr in directCmpAttrs:
+			valA, valB = getattr(self,attr), getattr(other,attr)
+			if valA != valB:
+				return False
+
+		return True
+
+
 class _HozDistMatrixPopulator(atomComboCoreHelp._SparseMatrixPopulator):
 	""" Populator meant for calculating in-surface-plane distances between groups of atoms; like a lower dimensional (2-d vs 3-d) rdf """
 
@@ -233,13 +293,18 @@ class _TriAtomAnglesPopulator(atomComboCoreHelp._SparseMatrixPopulator):
 		else:
 			self._populateMatrices(inpGeom, outDict)
 
+	def getMatrixRequests(self, inpGeom, outDict, level):
+		if level != self.level:
+			return atomComboCoreHelp._MatrixRequests()
+		return atomComboCoreHelp._MatrixRequests(angleIndices=self.triAtomIndices)
+
 	def _populateMatrices(self, inpGeom, outDict):
 		try:
 			unused = outDict["angleMatrix"]
 		except KeyError:
 			self._populateAngleMatrixWhenNonePresent(inpGeom, outDict)
 		else:
-			self._poulateAngleMatrixWhenSomePresent(inpGeom, outDict)
+			self._populateAngleMatrixWhenSomePresent(inpGeom, outDict)
 
 	def _populateAngleMatrixWhenNonePresent(self, inpGeom, outDict):
 		#Iniitialise the matrix
@@ -490,6 +555,13 @@ class _WaterMinDist_plusMinDistFilter_populator(atomComboCoreHelp._SparseMatrixP
 		populatorB = _DistMatrixPopulator(self.toIndices, self.filterToIndices, level=self.level)
 		populatorB.populateMatrices(inpGeom, outDict, level)
 
+	def getMatrixRequests(self, inpGeom, outDict, level):
+		if level!=self.level:
+			return atomComboCoreHelp._MatrixRequests()
+		fromIndices = _WaterMinDistPopulator(self.oxyIndices, self.hyIndices, self.toIndices, self.minDistType)._getFromIndices()
+		distIndexBlocks = [ [fromIndices, self.toIndices], [self.toIndices, self.filterToIndices] ]
+		return atomComboCoreHelp._MatrixRequests(distIndexBlocks=distIndexBlocks)
+
 
 
 class _WaterMinDistPopulator(atomComboCoreHelp._SparseMatrixPopulator):
@@ -519,6 +591,11 @@ class _WaterMinDistPopulator(atomComboCoreHelp._SparseMatrixPopulator):
 		populator = _DistMatrixPopulator(fromIndices, self.toIndices, level=self.level)
 		populator.populateMatrices(inpGeom,outDict,level)
 
+	def getMatrixRequests(self, inpGeom, outDict, level):
+		if level!=self.level:
+			return atomComboCoreHelp._MatrixRequests()
+		return atomComboCoreHelp._MatrixRequests(distIndexBlocks=[ [self._getFromIndices(), self.toIndices] ])
+
 	def _getFromIndices(self):
 		if self.minDistType.upper()=="ALL":
 			outIndices = self.oxyIndices + [x for x in it.chain(*self.hyIndices)]
@@ -578,7 +655,7 @@ class _WaterPlanarDistPopulator(atomComboCoreHelp._SparseMatrixPopulator):
 
 class _CountHBondsBetweenGenericGroupsPopulator(atomComboCoreHelp._SparseMatrixPopulator):
 
-	def __init__(self, fromNonHyIndices, fromHyIndices, toNonHyIndices, toHyIndices, acceptor=True, donor=True, maxOO=3.5):
+	def __init__(self, fromNonHyIndices, fromHyIndices, toNonHyIndices, toHyIndices, acceptor=True, donor=True, maxOO=3.5, useNebLists=False):
 		""" Initializer
 		
 		Args:
@@ -590,6 +667,7 @@ class _CountHBondsBetweenGenericGroupsPopulator(atomComboCoreHelp._SparseMatrixP
 			donor: (Bool) If True we calculate dists/angles required to count number of groupA donors to groupB
 			maxOO: (float) The maximum X-X distance between two hydrogen-bonded water. For water X are the oxygen atoms; hence the variable name. Angles are only calculated when this criterion is fulfilled
 			maxAngle: (float) The maximum XA-XD-XD angle for a hydrogen bond; OA = acceptor oxygen, OD=Donor oxygen, HD=donor hydrogen
+			useNebLists: (Bool) If True, non-hy distances are only calculated for pairs within maxOO (using a neighbour-list search) and stored in outDict["nebDistMatrix"] rather than outDict["distMatrix"]. Much faster for large cells
 	 
 		NOTE:
 			Don't have multiple NonHyIndices in one entry unless there are no hyIndices. For example, it would be fine to use both oxygen in CO2, but not for (HO)2-CO since theres no way to know which hydrogen is connected to each oxygen
@@ -602,6 +680,7 @@ class _CountHBondsBetweenGenericGroupsPopulator(atomComboCoreHelp._SparseMatrixP
 		self.acceptor = acceptor
 		self.donor = donor
 		self.maxOO = maxOO
+		self.useNebLists = useNebLists
 		self.nanMatrix = False
 
 	@property
@@ -616,15 +695,34 @@ class _CountHBondsBetweenGenericGroupsPopulator(atomComboCoreHelp._SparseMatrixP
 		else:
 			pass
 
+	#Neighbour-list case isnt planned; its matrices are already sparse
+	def getMatrixRequests(self, inpGeom, outDict, level):
+		if self.useNebLists:
+			return None
+
+		if level==0:
+			fromIndices, toIndices = [x for x in it.chain(*self.fromNonHyIndices)], [x for x in it.chain(*self.toNonHyIndices)]
+			return atomComboCoreHelp._MatrixRequests(distIndexBlocks=[ [fromIndices, toIndices] ])
+		elif level==1:
+			return atomComboCoreHelp._MatrixRequests(angleIndices=self._getFullOutAngleIndicesRequired(inpGeom, outDict))
+		return atomComboCoreHelp._MatrixRequests()
+
 	def _populateDistMatrices(self, inpGeom, outDict):
 		level = 0
 		populatorFromIndices = [x for x in it.chain(*self.fromNonHyIndices)]
 		populatorToIndices = [x for x in it.chain(*self.toNonHyIndices)]
  
-		distPopulator = _DistMatrixPopulator(populatorFromIndices, populatorToIndices)
+		if self.useNebLists:
+			distPopulator = _NebDistMatrixPopulator(populatorFromIndices, populatorToIndices, self.maxOO)
+		else:
+			distPopulator = _DistMatrixPopulator(populatorFromIndices, populatorToIndices)
 		distPopulator.populateMatrices(inpGeom, outDict, level)
 
 	def _populateAngleMatrices(self, inpGeom, outDict):
+		if self.useNebLists:
+			self._populateNebAngleMatrix(inpGeom, outDict)
+			return None
+
 		try:
 			unused = outDict["angleMatrix"]
 		except KeyError:
@@ -632,6 +730,20 @@ class _CountHBondsBetweenGenericGroupsPopulator(atomComboCoreHelp._SparseMatrixP
 		else:
 			self._populateAngleMatrixWhenSomePresent(inpGeom, outDict)
 
+	#Nested dicts (angleMatrix[idxA][idxB][idxC]) since a dense NxNxN matrix is far too large for the cells neighbour lists are meant for
+	def _populateNebAngleMatrix(self, inpGeom, outDict):
+		try:
+			useMatrix = outDict["nebAngleMatrix"]
+		except KeyError:
+			useMatrix = dict()
+			outDict["nebAngleMatrix"] = useMatrix
+
+		outAngleIndices = self._getFullOutAngleIndicesRequired(inpGeom, outDict)
+		outAngles = calcDistsHelp.getInterAtomicAnglesForInpGeom(inpGeom, outAngleIndices)
+
+		for currIdx, currAngle in it.zip_longest(outAngleIndices, outAngles):
+			useMatrix.setdefault(currIdx[0], dict()).setdefault(currIdx[1], dict())[currIdx[2]] = currAngle
+
 	def _populateAngleMatrixWhenSomePresent(self, inpGeom, outDict):
 		useMatrix = outDict["angleMatrix"]
 		outAngleIndices = self._getFullOutAngleIndicesRequired(inpGeom, outDict)
@@ -664,6 +776,9 @@ class _CountHBondsBetweenGenericGroupsPopulator(atomComboCoreHelp._SparseMatrixP
 
 
 	def _getFullOutAngleIndicesRequired(self, inpGeom, outDict):
+		if self.useNebLists:
+			return self._getFullOutAngleIndicesRequired_nebLists(inpGeom, outDict)
+
 		distMatrix = outDict["distMatrix"]
 
 		#Get all possible angle indices
@@ -671,6 +786,19 @@ class _CountHBondsBetweenGenericGroupsPopulator(atomComboCoreHelp._SparseMatrixP
 		outAngleIndices = _getFullOutAngleIndicesRequired_GENERIC(*currArgs)
 		return outAngleIndices
 
+	#Only loop over group pairs which are neighbours; looping over ALL group pairs would make this step quadratic scaling again
+	def _getFullOutAngleIndicesRequired_nebLists(self, inpGeom, outDict):
+		distMatrix = outDict["nebDistMatrix"]
+		nebGroupIndices = _getNebGroupIndicesFromSparseDistMatrix(self.fromNonHyIndices, self.toNonHyIndices, distMatrix)
+
+		outAngleIndices = list()
+		for fromIdx, toGroupIndices in enumerate(nebGroupIndices):
+			toNonHy, toHy = [self.toNonHyIndices[x] for x in toGroupIndices], [self.toHyIndices[x] for x in toGroupIndices]
+			currArgs = [ [self.fromNonHyIndices[fromIdx]], toNonHy, [self.fromHyIndices[fromIdx]], toHy, self.maxOO, self.acceptor, self.donor, distMatrix ]
+			outAngleIndices.extend( _getFullOutAngleIndicesRequired_GENERIC(*currArgs) )
+
+		return outAngleIndices
+
 
 
 class _DiscHBondCounterBetweenGroupsWithOxyDistFilterPopulator(atomComboCoreHelp._SparseMatrixPopulator):
@@ -721,6 +849,16 @@ class _DiscHBondCounterBetweenGroupsWithOxyDistFilterPopulator(atomComboCoreHelp
 		if self.distFilterIndices is not None:
 			distPopulatorB.populateMatrices(inpGeom, outDict, level)
 
+	def getMatrixRequests(self, inpGeom, outDict, level):
+		if level==0:
+			distIndexBlocks = [ [self.oxyIndices, self.oxyIndices] ]
+			if self.distFilterIndices is not None:
+				distIndexBlocks.append( [self.oxyIndices, self.distFilterIndices] )
+			return atomComboCoreHelp._MatrixRequests(distIndexBlocks=distIndexBlocks)
+		elif level==1:
+			return atomComboCoreHelp._MatrixRequests(angleIndices=self._getFullOutAngleIndicesRequired(inpGeom, outDict))
+		return atomComboCoreHelp._MatrixRequests()
+
 
 	def _populateAngleMatrices(self, inpGeom, outDict):
 		try:
@@ -804,6 +942,35 @@ class _DiscHBondCounterBetweenGroupsWithOxyDistFilterPopulator(atomComboCoreHelp
 
 #The GENERIC in caps was originally to differentiate it from a version that worked only for water.
 #Though i removed that so i should probably change name of this one at some point
+def _getNebGroupIndicesFromSparseDistMatrix(fromNonHyIndices, toNonHyIndices, nebDistMatrix):
+	""" Gets indices of groups in toNonHyIndices which have at least one atom stored as a neighbour of each group in fromNonHyIndices
+	
+	Args:
+		fromNonHyIndices: (iter of iter of ints) Each entry contains the non-hydrogen indices for one molecule
+		toNonHyIndices: (iter of iter of ints) Same as fromNonHyIndices, but for the second group
+		nebDistMatrix: (get_neb_lists.SparseDistMatrix) Contains the stored neighbour pairs
+ 
+	Returns
+		outIndices: (iter of iter of ints) Same length as fromNonHyIndices. Each entry contains (sorted) indices of neighbouring groups in toNonHyIndices
+ 
+	"""
+	atomToGroupIndices = collections.defaultdict(list)
+	for groupIdx, nonHyIndices in enumerate(toNonHyIndices):
+		for atomIdx in nonHyIndices:
+			atomToGroupIndices[atomIdx].append(groupIdx)
+
+	outIndices = list()
+	for nonHyIndices in fromNonHyIndices:
+		currGroupIndices = set()
+		for atomIdx in nonHyIndices:
+			nebIndices, unused = nebDistMatrix.getNebIndicesAndDists(atomIdx)
+			for nebIdx in nebIndices:
+				currGroupIndices.update( atomToGroupIndices.get(nebIdx, list()) )
+		outIndices.append( sorted(currGroupIndices) )
+
+	return outIndices
+
+
 def _getFullOutAngleIndicesRequired_GENERIC(groupANonHyIndices, groupBNonHyIndices, hyIndicesA, hyIndicesB, maxOO, countAcceptor, countDonor, distMatrix):
 
 
@@ -557,10 +557,61 @@ class NDimensionalBinnedResults():
 		self.binVals[countKey] = np.zeros(shapes)
 
 
-	#Probably gonna factor out a function that gets the indices to add to in order (so i could do more flexible things than +1)
 	def addBinValuesToCounts(self, valsToBin, countKey="counts"):
 		""" Updates bin values with counts
 		
+		Args:
+			valsToBin: (iter of len-n iters, or (nVals x n) array) Where n is equal to the number of dimensions (length of self.edges). We add 1 to the counts for each bin
+			countKey: (str) The key used for storing the counts matrix
+
+		NOTE:
+			Criteria to land in a bin with edges minEdge, maxEdge is minEdge<= x < maxEdge. Float imprecision probably mean this has little practical improtance though
+			Edges in each dimension can be ascending or descending and dont need to be evenly spaced (though evenly spaced edges are faster). Values outside the edges (or NaN) are ignored
+	
+		Returns
+			Nothing; works in place
+	 
+		"""
+		nDims = len(self.edges)
+		valsToBin = np.asarray(valsToBin, dtype=np.float64).reshape(-1, nDims)
+		countsShape = self.binVals[countKey].shape
+
+		#Get bin indices for all values in each dimension; throwing out any value outside the edges in any dimension
+		allBinIndices, useVals = list(), np.ones( valsToBin.shape[0], dtype=bool )
+		for dimIdx, dimEdges in enumerate(self.edges):
+			currIndices, currValid = _getOneDimBinIndicesForVals(valsToBin[:,dimIdx], dimEdges)
+			allBinIndices.append(currIndices)
+			useVals &= currValid
+
+		#Add all counts at once. bincount is faster unless there are far fewer values than bins
+		useBinIndices = tuple( [x[useVals] for x in allBinIndices] )
+		nBinsTotal = int(np.prod(countsShape))
+		if len(useBinIndices[0]) > nBinsTotal//8:
+			flatIndices = np.ravel_multi_index(useBinIndices, countsShape)
+			self.binVals[countKey] += np.bincount(flatIndices, minlength=nBinsTotal).reshape(countsShape)
+		else:
+			np.add.at(self.binVals[countKey], useBinIndices, 1)
+
+	def addBinValuesForMultipleFramesToCounts(self, valsToBinForFrames, countKey="counts"):
+		""" Same as addBinValuesToCounts, but takes values for a batch of frames at once. Equivalent to calling addBinValuesToCounts for each frame
+		
+		Args:
+			valsToBinForFrames: (iter of iter of len-n iters) Each element contains the values to bin for one frame (see addBinValuesToCounts). Frames can have different numbers of values
+			countKey: (str) The key used for storing the counts matrix
+	
+		Returns
+			Nothing; works in place
+	 
+		"""
+		nDims = len(self.edges)
+		allVals = [np.asarray(x, dtype=np.float64).reshape(-1,nDims) for x in valsToBinForFrames]
+		allVals = np.concatenate(allVals) if len(allVals)>0 else np.zeros( (0,nDims) )
+		self.addBinValuesToCounts(allVals, countKey=countKey)
+
+	#Original (loop-based) version of addBinValuesToCounts; kept as a reference implementation for testing/benchmarking
+	def _addBinValuesToCountsLoopBased(self, valsToBin, countKey="counts"):
+		""" Updates bin values with counts
+		
 		Args:
 			valsToBin: (iter of len-n iters) Where n is equal to the number of dimensions (length of self.edges). We add 1 to the counts for each bin
 			countKey: (str) The key used for storing the counts matrix
@@ -649,6 +700,45 @@ class NDimensionalBinnedResults():
 
 
 
+def _getOneDimBinIndicesForVals(vals, edges):
+	""" Gets the bin index for each value in one dimension. Bins are edges[i] <= x < edges[i+1] (or edges[i+1] <= x < edges[i] for descending edges)
+	
+	Args:
+		vals: (1-dim float array) Values to bin
+		edges: (iter of floats) Bin edges; either ascending or descending
+			 
+	Returns
+		binIndices: (1-dim int array) Index of the bin for each value. Values are meaningless where isValid is False
+		isValid: (1-dim bool array) False for values outside of the edges (or NaN)
+ 
+	"""
+	edges = np.asarray(edges, dtype=np.float64)
+	isDescending = edges[0] > edges[-1]
+	ascEdges = edges[::-1] if isDescending else edges
+	nBins = len(ascEdges) - 1
+
+	with np.errstate(invalid="ignore"):
+		isValid = (vals >= ascEdges[0]) & (vals < ascEdges[-1])
+	useVals = np.where(isValid, vals, ascEdges[0])
+
+	#Evenly spaced edges let us calculate indices directly; we then correct for any float errors at the edges
+	widths = np.diff(ascEdges)
+	if (nBins > 0) and np.allclose(widths, widths[0], rtol=1e-10, atol=0):
+		binIndices = np.floor( (useVals-ascEdges[0])/widths[0] ).astype(np.int64)
+		binIndices = np.clip(binIndices, 0, nBins-1)
+		binIndices -= (useVals < ascEdges[binIndices])
+		binIndices += (useVals >= ascEdges[binIndices+1])
+		binIndices = np.clip(binIndices, 0, nBins-1)
+	else:
+		binIndices = np.searchsorted(ascEdges, useVals, side="right") - 1
+		binIndices = np.clip(binIndices, 0, max(nBins-1,0))
+
+	if isDescending:
+		binIndices = (nBins-1) - binIndices
+
+	return binIndices, isValid
+
+
 def getLowerDimBinObj_weightedAverageMethod(inpBinObj, keepDims, useCountKey="counts", outKey="weighted_average"):
 	""" Function takes an NDimensionalBinnedResults instance, and returns a similar object with a lower number of dimensions. Includes a "weighted_average" for the output binVals, which contains the mean value for the removed dimension. Original purpose was to get average numbers of h-bonds for varying planar positions
 	
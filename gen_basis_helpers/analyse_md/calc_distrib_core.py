@@ -3,18 +3,23 @@ import collections
 import itertools as it
 import math
 
+import numpy as np
+
 from . import binned_res as binResHelp
 from . import calc_dists as calcDistsHelp
+from . import calc_dists_batched as batchedDistsHelp
+from . import traj_parallel as trajParallelHelp
 
 """ Module to provide core (generally backend) functions to help calculation of radial/angular distributions """
 
 
-def populateRdfValsOnOptionObjs(inpTraj, optionsObjs):
+def populateRdfValsOnOptionObjs(inpTraj, optionsObjs, nCores=1):
 	""" Populates bin results objs stored on CalcRdfOptions instances
 	
 	Args:
 		inpTraj: (TrajectoryInMemory object)
 		optionsObjs: (iter of CalcRdfOptions)
+		nCores: (int) Number of processes to use; see _populateBinsWithRdfBetweenAtomGroups
 			 
 	Returns
 		Nothing; works in place on x.binResObj in optionsObjs
@@ -28,7 +33,7 @@ def populateRdfValsOnOptionObjs(inpTraj, optionsObjs):
 	minDistAToB = [x.minDistAToB for x in optionsObjs]
 
 	#
-	_populateBinsWithRdfBetweenAtomGroups(inpTraj, binResObjs, indicesA, indicesB, volumes=volumes, minDistAToB=minDistAToB)
+	_populateBinsWithRdfBetweenAtomGroups(inpTraj, binResObjs, indicesA, indicesB, volumes=volumes, minDistAToB=minDistAToB, nCores=nCores)
 
 
 
@@ -77,7 +82,7 @@ class CalcRdfOptions(CalcDistribOptionsBase):
 		self.filterBasedOnBins = filterBasedOnBins
 
 #TODO: Probably introduce some command objects to determine the options for these; so i can individually specify the runs but get them all combined this way
-def _populateBinsWithRdfBetweenAtomGroups(inpTraj, binResObjs, indicesA, indicesB, volumes=None, minDistAToB=None):
+def _populateBinsWithRdfBetweenAtomGroups(inpTraj, binResObjs, indicesA, indicesB, volumes=None, minDistAToB=None, chunkSize=100, nCores=1):
 	""" Gets rdf functions for multiple binResObjs/atom groups simultaneously. This can be used to efficiently calculate multiple rdf for different element combinations (e.g. g_{OH}/g_{OO}) or the same element combo with varying bin widths
 	
 	Args:
@@ -87,6 +92,8 @@ def _populateBinsWithRdfBetweenAtomGroups(inpTraj, binResObjs, indicesA, indices
 		indicesB: (iter of iter of ints) Each element corresponds to one binResObj. Within that each element contains the indices of atoms to get an rdf TO (e.g. for g_{AB} indicesB should contain all indices of atom type B)
 		volumes: (iter of floats) The total cell volume to assume for each case; Default is to use the unit cell volume. Using the whole cell may not be sensible when calculating for slab geometries.
 		minDistAToB: (iter of Bools) See the description on the opts object. Default is all to be False 
+		chunkSize: (int) Number of frames to calculate distances for at once. Memory use scales with this
+		nCores: (int) Number of processes to use. If >1 the trajectory is split into chunks of frames, counts are found for each chunk in a separate process and then summed before normalising
 
 	Returns
 		Nothing; works in place
@@ -97,18 +104,11 @@ def _populateBinsWithRdfBetweenAtomGroups(inpTraj, binResObjs, indicesA, indices
 	volumes = _getVolumesFromTrajAndInpVolumesArg(inpTraj, nBins, volumes)
 	minDistAToB = [False for x in range(nBins)] if minDistAToB is None else minDistAToB
 
-	#Create objects to handle binning for each traj step
-	singleBinners = list()
-	for resObj, idxListA, idxListB, doMinDist in it.zip_longest(binResObjs, indicesA, indicesB, minDistAToB):
-		currBinner = _RdfBinnerFixedIndices(resObj, idxListA, idxListB, minDistAToB=doMinDist)
-		singleBinners.append(currBinner)
-	multiBinner = _MultiRdfBinnerFixedIndices(singleBinners)
-
 	#Figure out the counts for each case(and append to the results object)
-	nSteps = 0
-	for trajStep in inpTraj:
-		multiBinner.updateCountsFromTrajStep(trajStep)
-		nSteps += 1
+	if nCores==1:
+		nSteps = _addRdfCountsToBinsForTraj(inpTraj, binResObjs, indicesA, indicesB, minDistAToB, chunkSize)
+	else:
+		nSteps = _addRdfCountsToBinsForTraj_multiProcess(inpTraj, binResObjs, indicesA, indicesB, minDistAToB, chunkSize, nCores)
 
 	#Attach the rdf
 	for resObj, idxListA, idxListB,vol, doMinDist in it.zip_longest(binResObjs, indicesA, indicesB, volumes, minDistAToB):
@@ -126,6 +126,45 @@ def _populateBinsWithRdfBetweenAtomGroups(inpTraj, binResObjs, indicesA, indices
 			_addRdfToBinValsForBinsWithCounts(resObj, vol, nA, nB, nSteps)
 
 
+def _addRdfCountsToBinsForTraj(inpTraj, binResObjs, indicesA, indicesB, minDistAToB, chunkSize):
+	#Create objects to handle binning for each traj step
+	singleBinners = list()
+	for resObj, idxListA, idxListB, doMinDist in it.zip_longest(binResObjs, indicesA, indicesB, minDistAToB):
+		currBinner = _RdfBinnerFixedIndices(resObj, idxListA, idxListB, minDistAToB=doMinDist)
+		singleBinners.append(currBinner)
+	multiBinner = _MultiRdfBinnerFixedIndices(singleBinners)
+
+	nSteps = 0
+	for coords, lattVects in batchedDistsHelp.iterCoordsAndLattVectsChunksFromTraj(inpTraj, chunkSize=chunkSize):
+		multiBinner.updateCountsFromFrames(coords, lattVects)
+		nSteps += coords.shape[0]
+
+	return nSteps
+
+
+def _addRdfCountsToBinsForTraj_multiProcess(inpTraj, binResObjs, indicesA, indicesB, minDistAToB, chunkSize, nCores):
+	#Workers only need the bin edges; counts already present on binResObjs are kept and added to
+	emptyBinObjs = [binResHelp.BinnedResultsStandard.fromBinEdges(x.binEdges) for x in binResObjs]
+	currArgs = [emptyBinObjs, indicesA, indicesB, minDistAToB, chunkSize]
+	allOutputs = trajParallelHelp.mapFunctOverTrajChunks(_getRdfCountsForTrajChunk, inpTraj, nCores, functArgs=currArgs)
+
+	nSteps = 0
+	for chunkCounts, chunkSteps in allOutputs:
+		nSteps += chunkSteps
+		for resObj, counts in it.zip_longest(binResObjs, chunkCounts):
+			if resObj.binVals.get("counts", None) is None:
+				resObj.binVals["counts"] = [0 for x in range(len(resObj.binCentres))]
+			resObj.binVals["counts"] = [a+b for a,b in it.zip_longest(resObj.binVals["counts"], counts)]
+
+	return nSteps
+
+
+def _getRdfCountsForTrajChunk(inpTraj, binResObjs, indicesA, indicesB, minDistAToB, chunkSize):
+	nSteps = _addRdfCountsToBinsForTraj(inpTraj, binResObjs, indicesA, indicesB, minDistAToB, chunkSize)
+	outCounts = [ resObj.binVals.get("counts", [0 for x in range(len(resObj.binCentres))]) for resObj in binResObjs ]
+	return outCounts, nSteps
+
+
 def _getVolumesFromTrajAndInpVolumesArg(inpTraj, nBins, volumes):
 	volInit = inpTraj.trajSteps[0].unitCell.volume
 	if volumes is None:
@@ -180,12 +219,34 @@ class _MultiRdfBinnerFixedIndices():
 
 	def __init__(self, singleRdfBinners):
 		self.singleBinners = singleRdfBinners
+		self._distBuffer = None
 
 	def updateCountsFromTrajStep(self, trajStep):
 		fullDistMatrix = calcDistsHelp.calcDistanceMatrixForCell_minImageConv(trajStep.unitCell)
 		for currBinner in self.singleBinners:
 			currBinner.updateCountsFromDistMatrix(fullDistMatrix)
 
+	def updateCountsFromFrames(self, coords, lattVects):
+		""" Updates counts for many frames at once; only distances between the union of all indicesA and all indicesB get calculated
+		
+		Args:
+			coords: (nFrames x nAtoms x 3 array)
+			lattVects: (nFrames x 3 x 3 array)
+				 
+		"""
+		rowIndices = sorted(set(it.chain(*[x.indicesA for x in self.singleBinners])))
+		colIndices = sorted(set(it.chain(*[x.indicesB for x in self.singleBinners])))
+		boxDims = batchedDistsHelp.getMDAnalysisDimsFromLattVectsArray(lattVects)
+
+		#Reuse the output buffer when the number of frames doesnt change between calls
+		expShape = (coords.shape[0], len(rowIndices), len(colIndices))
+		if (self._distBuffer is None) or (self._distBuffer.shape != expShape):
+			self._distBuffer = np.empty(expShape, dtype=np.float64)
+
+		distMatrices = batchedDistsHelp.calcDistanceMatricesForFrames_minImageConv(coords, boxDims, indicesA=rowIndices, indicesB=colIndices, outArray=self._distBuffer)
+		for currBinner in self.singleBinners:
+			currBinner.updateCountsFromSubDistMatrices(distMatrices, rowIndices, colIndices)
+
 
 class _RdfBinnerFixedIndices():
 
@@ -210,6 +271,77 @@ class _RdfBinnerFixedIndices():
 		valsToBin = _getRadialToBinValsFromFullDistMatrix(distMatrix, indicesA=self.indicesA, indicesB=self.indicesB, minDistAToB=self.minDistAToB)
 		binResHelp.binCountsFromOneDimDataSimple(valsToBin, self.resBins)
 
+	def updateCountsFromSubDistMatrices(self, distMatrices, rowIndices, colIndices):
+		""" Updates counts from distance matrices for many frames
+		
+		Args:
+			distMatrices: (nFrames x len(rowIndices) x len(colIndices) array) Distances between atoms in rowIndices and colIndices for each frame
+			rowIndices: (iter of ints) Atom indices for each row of distMatrices; must include all of self.indicesA
+			colIndices: (iter of ints) Atom indices for each column of distMatrices; must include all of self.indicesB
+				 
+		"""
+		valsToBin = _getRadialToBinValsFromSubDistMatrices(distMatrices, rowIndices, colIndices, indicesA=self.indicesA, indicesB=self.indicesB, minDistAToB=self.minDistAToB)
+		binResHelp.binCountsFromOneDimDataSimple(valsToBin, self.resBins)
+
+
+def _getRadialToBinValsFromSubDistMatrices(distMatrices, rowIndices, colIndices, indicesA, indicesB, minDistAToB=False):
+	""" Array version of _getRadialToBinValsFromFullDistMatrix which works on many frames at once and on distance matrices which only contain a subset of atoms
+	
+	Args:
+		distMatrices: (nFrames x len(rowIndices) x len(colIndices) array)
+		rowIndices: (iter of ints) Atom indices for each row of distMatrices
+		colIndices: (iter of ints) Atom indices for each column of distMatrices
+		indicesA: (iter of ints) Indices of atoms to bin FROM
+		indicesB: (iter of ints) Indices of atoms to bin TO
+		minDistAToB: (Bool) If True only bin the SHORTEST AB contact for each index in A (for each frame)
+ 
+	Returns
+		outVals: (1-dim np array) Values to bin for all frames
+ 
+	"""
+	uniquePairs = _getUniqueIdxPairsForRdf(indicesA, indicesB)
+	if len(uniquePairs)==0:
+		return np.array( list() )
+
+	rowMap = {atomIdx:outIdx for outIdx,atomIdx in enumerate(rowIndices)}
+	colMap = {atomIdx:outIdx for outIdx,atomIdx in enumerate(colIndices)}
+	rowPositions = np.array([rowMap[x[0]] for x in uniquePairs])
+	colPositions = np.array([colMap[x[1]] for x in uniquePairs])
+	pairVals = distMatrices[:, rowPositions, colPositions]
+
+	if not minDistAToB:
+		return pairVals.ravel()
+
+	idxAToListIdx = {inpIdx:outIdx for outIdx,inpIdx in enumerate(indicesA)}
+	groupIndices = np.array([idxAToListIdx[x[0]] for x in uniquePairs])
+	minVals = np.full( (pairVals.shape[0], len(indicesA)), np.inf )
+	np.minimum.at( minVals, (slice(None), groupIndices), pairVals )
+	minVals = minVals[ :, np.unique(groupIndices) ]
+	return minVals.ravel()
+
+
+def _getUniqueIdxPairsForRdf(indicesA, indicesB):
+	""" Gets all pairs of [idxA,idxB] which contribute to an rdf; equivalent pairs (e.g. [2,1] and [1,2]) only appear once and self-pairs are removed """
+	idxPairs = [ [x,y] for x,y in it.product(indicesA,indicesB) ]
+
+	#Filter out equivalent ones ( [2,1]==[1,2] )
+ 	#Taken from https://stackoverflow.com/questions/38187286/find-unique-pairs-in-list-of-pairs
+	ctr = collections.Counter(frozenset(x) for x in idxPairs)
+	bools = [ctr[frozenset(x)]==1 for x in idxPairs]
+
+	uniquePairs = list()
+	for idx,pair in enumerate(idxPairs):
+		if pair[0]==pair[1]:
+			pass
+		elif bools[idx]:
+			uniquePairs.append(pair)
+		elif  pair[0]>pair[1]:
+			uniquePairs.append(pair)
+		else:
+			pass
+
+	return uniquePairs
+
 #May be able to actually make this more general than distances
 def _getRadialToBinValsFromFullDistMatrix(distMatrix, indicesA=None, indicesB=None, minDistAToB=False):
 	""" Takes a distance matrix and extracts relevant distances to bin based on indicesA and indicesB
@@ -238,22 +370,8 @@ def _getRadialToBinValsFromFullDistMatrix(distMatrix, indicesA=None, indicesB=No
 	nRows, nCols = len(distMatrix), len(distMatrix[0])
 	assert nRows==nCols, "Need a square matrix but found nRows={}, nCols={}".format(nRows,nCols)
 
-	#Figure out all pairs of indices
-	idxPairs = [ [x,y] for x,y in it.product(indicesA,indicesB) ]
-
-	#Filter out equivalent ones ( [2,1]==[1,2] )
- 	#Taken from https://stackoverflow.com/questions/38187286/find-unique-pairs-in-list-of-pairs
-	ctr = collections.Counter(frozenset(x) for x in idxPairs)
-	bools = [ctr[frozenset(x)]==1 for x in idxPairs]
-
-	uniquePairs = list()
-	for idx,pair in enumerate(idxPairs):
-		if bools[idx]:
-			uniquePairs.append(pair)
-		elif  pair[0]>pair[1]:
-			uniquePairs.append(pair)
-		else:
-			pass
+	#Figure out all unique pairs of indices
+	uniquePairs = _getUniqueIdxPairsForRdf(indicesA, indicesB)
 
 	#Get values to bin grouped by indexA [TODO: Unit tests dont really cover the mapping]
 	twoDimValsToBin = [ list() for x in range(len(indicesA)) ]
@@ -57,20 +57,17 @@ def calcSparseDiatomAngleWithArbVectorMatrix(inpCell, inpIndices, inpVector, bot
 	outMatrix = np.empty( (len(cartCoords),len(cartCoords)) )
 	outMatrix[:] = np.nan
 
-	#Step 1) Get all the nearest image coords
-	useCoords = list()
-	for indices in inpIndices:
-		firstCoord = cartCoords[indices[0]]
-		secondCoord	= getNearestImageNebCoordsBasic(inpCell, firstCoord, cartCoords[indices[1]])
-		useCoords.append( [firstCoord, secondCoord] )
+	#Step 1) Get all the nearest image vectors in one go
+	if len(inpIndices)==0:
+		return outMatrix
+	forwardVectors = getNearestImageVectorsForIdxPairs(inpCell, inpIndices).tolist()
 
 	#Step 2) Get the angles for each
-	for indices, useCoords in it.zip_longest(inpIndices, useCoords):
-		forwardVector = [b-a for a,b in it.zip_longest(useCoords[0][:3], useCoords[1][:3])]
+	for indices, forwardVector in it.zip_longest(inpIndices, forwardVectors):
 		currAngle = vectHelp.getAngleTwoVectors(inpVector, forwardVector)
 		outMatrix[tuple(indices)] = currAngle
 		if bothDirs:
-			backwardVector = [b-a for a,b in it.zip_longest(useCoords[1][:3],useCoords[0][:3])]
+			backwardVector = [-1*x for x in forwardVector]
 			outMatrix[tuple(reversed(indices))] = vectHelp.getAngleTwoVectors(inpVector, backwardVector)
 
 	return outMatrix
@@ -143,14 +140,14 @@ def calcHozDistMatrixForCell_minImageConv(inpCell, indicesA=None, indicesB=None,
 	#3) hozDit = math.sqrt(totalDist**2 - interPlanarDist**2)
 	totalDistMatrix = calcDistanceMatrixForCell_minImageConv(inpCell, indicesA=indicesA, indicesB=indicesB) #Somehow this seems to come out wrong
 	surfPlane = cartHelp.getABPlaneEqnWithNormVectorSameDirAsC_uCellInterface(inpCell)
-	nearestImageNebCoordsMatrix = getNearestImageNebCoordsMatrixBasic(inpCell, indicesA=indicesA, indicesB=indicesB)
+	nebCoordsA, nebCoordsB = getNearestImageNebCoordsArrays(inpCell, indicesA=indicesA, indicesB=indicesB)
 
 	outMatrix = np.zeros( [len(indicesA), len(indicesB)] )
 	for dMatrixIdxA, atomIdxA in enumerate(indicesA):
 		for dMatrixIdxB,atomIdxB in enumerate(indicesB):
 			currTotalDist = totalDistMatrix[dMatrixIdxA][dMatrixIdxB]
 
-			posA, posB = [x[:3] for x in nearestImageNebCoordsMatrix[dMatrixIdxA][dMatrixIdxB]] #Taking from here effectively handles PBCs
+			posA, posB = nebCoordsA[dMatrixIdxA].tolist(), nebCoordsB[dMatrixIdxA][dMatrixIdxB].tolist() #Taking from here effectively handles PBCs
 			currInterPlaneDist = planeEqnHelp.getInterPlaneDistTwoPoints(posA, posB, surfPlane)
 
 			#Figure out the horizontal distance
@@ -265,13 +262,13 @@ def calcDistancesFromSurfPlaneForCell(inpCell, indices=None, planeEqn=None, spar
 
 	#Get the nearest coords to the surface plane
 	indicesForAllAtoms = [idx for idx in range(len(useCartCoords))]
-	coordMatrix = getNearestImageNebCoordsMatrixBasic(useCell, indicesA=[indicesForAllAtoms[-1]], indicesB=indicesForAllAtoms)
+	coordsA, nebCoordsB = getNearestImageNebCoordsArrays(useCell, indicesA=[indicesForAllAtoms[-1]], indicesB=indicesForAllAtoms)
+	coordA, nebCoordsB = coordsA[0].tolist(), nebCoordsB[0].tolist()
 
 	#Get the distances
 	outDists = list()
 	for idx in indices:
-		coordA, coordB = coordMatrix[0][idx]
-		currDist = planeEqnHelp.getInterPlaneDistTwoPoints( coordA[:3], coordB[:3], planeEqn )
+		currDist = planeEqnHelp.getInterPlaneDistTwoPoints( coordA, nebCoordsB[idx], planeEqn )
 		outDists.append(currDist)
 
 	#Convert output to sparse form if requested
@@ -305,66 +302,27 @@ def getNearestImageVectorsForIdxPairs(inpCell, idxPairs, sparseMatrix=False):
 	
 	Args:
 		inpCell: (plato_pylib UnitCell object)
-		idxPairs: (iter of ints) The indices we want the position vectors for. If sparseMatrix output is used then the reverse vectors should automatically be calculated
+		idxPairs: (iter of len-2 int iters) The indices we want the position vectors for. If sparseMatrix output is used then the reverse vectors should automatically be calculated
 		sparseMatrix: (Bool) If True return a sparsely populated matrix of values (explained more below)
  
 	Returns
-		outVects: one vector per idxPair if sparseMatrix is False, else NxNx3 matrix containing np.nan for most entries but [coordB-coordA] for those corresponding to values in idxPairs. Here "N" refers to the number of atoms in inpCell
+		outVects: (nPairs x 3 np array) One vector per idxPair if sparseMatrix is False, else NxNx3 matrix containing np.nan for most entries but [coordB-coordA] for those corresponding to values in idxPairs. Here "N" refers to the number of atoms in inpCell
  
 	"""
-	#Step 1: Get the MINIMAL nearest image matrix by doing it row by row
-	useCell = uCellHelp.UnitCell(lattParams=inpCell.getLattParamsList(), lattAngles=inpCell.getLattAnglesList())
-	fractCoords = inpCell.fractCoords
-	fCoordsNoEles = np.array([x[:3] for x in fractCoords])
-	eleList = [x[-1] for x in fractCoords]
-
-	outDim = len(fractCoords)
-#	sparseNearestNebMatrix = [ [list() for x in range(outDim)]  for unused in range(outDim) ]
-
-	sparseNearestNebMatrix = np.empty( (outDim,outDim,2,3) )
-	sparseNearestNebMatrix[:] = np.nan
-
-	sortedIdxPairs = sorted(idxPairs)
-
-	#Step 1.X: Loop over idx pairs, calculating the relevant row for sparseNearestNebMatrix
-	idx = 0
-	while idx < len(sortedIdxPairs):
-		#Get all relevant idxB values for this row
-		startIdx, rowIdx = idx, sortedIdxPairs[idx][0]
-		endIdx = startIdx + 1
-
-		while endIdx < len(sortedIdxPairs):
-			if sortedIdxPairs[endIdx][0] != rowIdx:
-				break
-			else:
-				endIdx += 1
-
-		indicesB = [x[1] for x in idxPairs[startIdx:endIdx]]
-
-		#Append to the sparse matrix and Update our idx value
-		currRowVals = _getSingleRowOfNearestImageNebCoordsMatrix(fCoordsNoEles, eleList, useCell, rowIdx, indicesB)
-		for idxB, currRowVal in it.zip_longest(indicesB, currRowVals):
-			sparseNearestNebMatrix[rowIdx][idxB][0] = currRowVal[0][:3] #Dont need the element type
-			sparseNearestNebMatrix[rowIdx][idxB][1] = currRowVal[1][:3]
-
-		idx = endIdx
-
-	#Step 2: Build sparse matrix with the vectors
-	outSparseMatrix = np.empty( (outDim,outDim,3) )
-	outSparseMatrix[:] = np.nan
+	idxPairs = np.array(idxPairs, dtype=int).reshape(-1,2)
+	cartCoords, fractCoords, lattVects = _getCoordArraysAndLattVectsForNearestImageCalcs(inpCell)
+	idxA, idxB = idxPairs[:,0], idxPairs[:,1]
+	outVects = _getNearestImageVectorsFromCoords(cartCoords[idxA], cartCoords[idxB], fractCoords[idxA], fractCoords[idxB], lattVects)
 
-	for idxPair in idxPairs:
-		coordA, coordB = sparseNearestNebMatrix[idxPair[0]][idxPair[1]]
-		outSparseMatrix[ tuple(idxPair)] = np.array([b-a for b,a in it.zip_longest(coordB[:3],coordA[:3])])
-		outSparseMatrix[ tuple(reversed(idxPair)) ] = np.array([a-b for b,a in it.zip_longest(coordB[:3],coordA[:3])])
-
-	#Step 3: Also build a sparse output matrix as we go; and optionally return it
 	if sparseMatrix:
-		outVals = outSparseMatrix
-	else:
-		outVals =  [ outSparseMatrix[tuple(idxPair)] for idxPair in idxPairs ] 
+		outDim = len(fractCoords)
+		outSparseMatrix = np.empty( (outDim,outDim,3) )
+		outSparseMatrix[:] = np.nan
+		outSparseMatrix[idxPairs[:,0], idxPairs[:,1]] = outVects
+		outSparseMatrix[idxPairs[:,1], idxPairs[:,0]] = -1*outVects
+		return outSparseMatrix
 
-	return outVals
+	return outVects
 
 
 def getNearestImageVectorMatrixBasic(inpCell, indicesA=None, indicesB=None, sparseMatrix=False):
@@ -380,20 +338,15 @@ def getNearestImageVectorMatrixBasic(inpCell, indicesA=None, indicesB=None, spar
 		outMatrix: (NxM Matrix) outMatrix[n][m] = [coordM-coordN] where N and M are lengths of indicesA and indicesB
  
 	"""
-	outMatrix = getNearestImageNebCoordsMatrixBasic(inpCell, indicesA=indicesA, indicesB=indicesB)
-
-	for rIdx in range(len(outMatrix)):
-		for cIdx in range(len(outMatrix[rIdx])):
-			coordA, coordB = outMatrix[rIdx][cIdx]
-			outMatrix[rIdx][cIdx] = [b-a for b,a in it.zip_longest(coordB[:3],coordA[:3])]
-#			outMatrix[cIdx][rIdx] = [a-b for b,a in it.zip_longest(coordB[:3],coordA[:3])]
+	coordsA, nebCoordsB = getNearestImageNebCoordsArrays(inpCell, indicesA=indicesA, indicesB=indicesB)
+	outMatrix = nebCoordsB - coordsA[:,np.newaxis,:]
 
 	if sparseMatrix:
-		cartCoords = inpCell.cartCoords
-		outDim = len(cartCoords)
-		outMatrix = _getTwoDimSparsePosVectorMatrix(np.array(outMatrix), outDim, indicesA, indicesB)
+		outDim = len(inpCell.cartCoords)
+		return _getTwoDimSparsePosVectorMatrix(outMatrix, outDim, indicesA, indicesB)
+
+	return outMatrix.tolist()
 
-	return outMatrix
 
 def getNearestImageNebCoordsMatrixBasic(inpCell, indicesA=None, indicesB=None):
 	""" Gets a matrix where each element contains [coordA,coordB] where A,B are row/column indices. coordA is the same co-ordinate found in inpCell; coordB is the nearest neighbour for it
@@ -406,51 +359,61 @@ def getNearestImageNebCoordsMatrixBasic(inpCell, indicesA=None, indicesB=None):
 	Returns
 		outMatrix: (NxM matrix) outMatrix[n][m] = [coordN, coordM] where N and M are lengths of indicesA and indicesB
  
+	NOTES:
+		a) Building the nested lists (with element labels) dominates the runtime for large N; use getNearestImageNebCoordsArrays if you dont need them
+
 	"""
-	#Sort out default args
-	fractCoords = inpCell.fractCoords
-	fCoordsNoEles = np.array([x[:3] for x in fractCoords])
-	eleList = [x[-1] for x in fractCoords]
-	indicesA = [x for x in range(len(fractCoords))] if indicesA is None else indicesA
+	eleList = [x[-1] for x in inpCell.fractCoords]
+	indicesA = [x for x in range(len(eleList))] if indicesA is None else indicesA
 	indicesB = indicesA if indicesB is None else indicesB
+	coordsA, nebCoordsB = getNearestImageNebCoordsArrays(inpCell, indicesA=indicesA, indicesB=indicesB)
 
-	#Figure out the value for each row; we need useCell to exploit some relevant function in the ucell_class thing
-	useCell = uCellHelp.UnitCell(lattParams=inpCell.getLattParamsList(), lattAngles=inpCell.getLattAnglesList())
+	elesB = [eleList[idx] for idx in indicesB]
 	outMatrix = list()
-	for idxA in indicesA:
-		currRow = _getSingleRowOfNearestImageNebCoordsMatrix(fCoordsNoEles, eleList, useCell, idxA, indicesB)
-		outMatrix.append(currRow)
+	for idxA, coordA, rowCoords in zip(indicesA, coordsA.tolist(), nebCoordsB.tolist()):
+		partA = coordA + [eleList[idxA]]
+		outMatrix.append( [ [partA, coordB + [eleB]] for coordB, eleB in zip(rowCoords, elesB) ] )
 
 	return outMatrix
 
 
-def _getSingleRowOfNearestImageNebCoordsMatrix(startFractCoords, eleList, useCell, idxA, indicesB):
-	#Setup the cell to have the fractCoords we want
-#	startFractCoords = inpCell.fractCoords
-	centralFractUnshifted = startFractCoords[idxA]
-	fractCoords = np.array( [centralFractUnshifted.tolist()] + [startFractCoords[idx].tolist() for idx in indicesB] )
+def getNearestImageNebCoordsArrays(inpCell, indicesA=None, indicesB=None):
+	""" Gets co-ordinates for indicesA and the nearest image co-ordinates of each atom in indicesB to each of them. Array version of getNearestImageNebCoordsMatrixBasic
+	
+	Args:
+		inpCell: (plato_pylib UnitCell object)
+		indicesA: (Optional, iter of ints) Indices of the atoms to include for the first dimension; Default is to include ALL atoms
+		indicesB: (Optional, iter of ints) Indices of the atoms to include for the second dimension; Default is indicesA
+			
+	Returns
+		coordsA: (len(indicesA) x 3 np array) Cartesian co-ordinates for each atom in indicesA
+		nebCoordsB: (len(indicesA) x len(indicesB) x 3 np array) nebCoordsB[n][m] is the image of indicesB[m] nearest to indicesA[n]
+ 
+	"""
+	cartCoords, fractCoords, lattVects = _getCoordArraysAndLattVectsForNearestImageCalcs(inpCell)
+	indicesA = np.arange(len(fractCoords)) if indicesA is None else np.array(indicesA, dtype=int).reshape(-1)
+	indicesB = indicesA if indicesB is None else np.array(indicesB, dtype=int).reshape(-1)
+
+	coordsA, coordsB = cartCoords[indicesA], cartCoords[indicesB]
+	fractA, fractB = fractCoords[indicesA], fractCoords[indicesB]
+	outVects = _getNearestImageVectorsFromCoords(coordsA[:,np.newaxis,:], coordsB[np.newaxis,:,:], fractA[:,np.newaxis,:], fractB[np.newaxis,:,:], lattVects)
 
-	#Shift the cell such that the first index is right at the centre + fold all atoms into the cell
-	centralFractShifted = [0.5,0.5,0.5]
-	fractShiftVector = [x-y for x,y in zip(centralFractShifted, centralFractUnshifted)]
-	reverseFractShiftVector = [-1*x for x in fractShiftVector]
+	return coordsA, coordsA[:,np.newaxis,:] + outVects
 
-	useFractCoords = np.add(fractCoords, fractShiftVector)
-	uCellHelp.foldFractCoordArrayToValsBetweenZeroAndOne(useFractCoords, tolerance=1e-5)
 
-	#Now shift it back; this now contains only the nearest image co-ords for the index 0 val
-	useFractCoords = np.add(useFractCoords, reverseFractShiftVector)
+def _getCoordArraysAndLattVectsForNearestImageCalcs(inpCell):
+	cartCoords = np.array( [x[:3] for x in inpCell.cartCoords], dtype=np.float64 ).reshape(-1,3)
+	fractCoords = np.array( [x[:3] for x in inpCell.fractCoords], dtype=np.float64 ).reshape(-1,3)
+	return cartCoords, fractCoords, np.array(inpCell.lattVects, dtype=np.float64)
 
-	#Convert to cartesian co-ordinates and 
-	outCartCoords = uCellHelp._getCartCoordsFromFract_NoElement(useCell.lattVects, useFractCoords)
 
-	outRow = list()
-	for idxB,coord in enumerate(outCartCoords[1:]):
-		partA = [x for x in outCartCoords[0]] + [eleList[idxA]] #Can reach pretty significant runtime portion
-		partB = coord + [eleList[indicesB[idxB]]]
-		outRow.append( [partA,partB] )
+def _getNearestImageVectorsFromCoords(cartA, cartB, fractA, fractB, lattVects, tolerance=1e-5):
+	""" Gets minimum image vectors [coordB-coordA] from (broadcastable) arrays of co-ordinates. The image is chosen in fractional co-ordinates (so works for any triclinic cell) with fractional differences within 0.5+tolerance left alone; the vectors themselves come from cartesian differences so atoms which dont need shifting have no round-off from the fract->cart conversion """
+	fractDiffs = fractB - fractA
+	shifts = np.round(fractDiffs)
+	shifts[np.abs(fractDiffs) <= 0.5+tolerance] = 0
+	return (cartB - cartA) - (shifts @ lattVects)
 
-	return outRow
 
 #TODO: Not sure if this works for dists >L/2. If not i maybe need to test and raise for it
 def getNearestImageNebCoordsBasic(inpCell, coordA, coordB):
@@ -529,6 +492,30 @@ def getInterAtomicAnglesForInpGeom(inpCell, angleIndices, degrees=True):
 
 
 
+def getInterAtomicAnglesArrayForInpGeom(inpCell, angleIndices, degrees=True):
+	""" Same as getInterAtomicAnglesForInpGeom, but vectorised and returns a numpy array. Faster when lots of angles are needed
+	
+	Args:
+		inpCell: (plato_pylib UnitCell object)
+		angleIndices: (iter of len-3 iters/ nx3 int array) Each element contains [idxA,idxB,idxC]
+		degrees: (Bool) If True then return angles in degrees; else use radians
+
+	Returns
+		outAngles: (len-n numpy array) Each is an angle calculated for a value in angleIndices
+ 
+	"""
+	angleIndices = np.array(angleIndices, dtype=int).reshape(-1,3)
+	if len(angleIndices)==0:
+		return np.zeros( (0) )
+
+	cartArray = np.array( [x[:3] for x in inpCell.cartCoords], dtype=np.float64 )
+	dims = mdAnalysisInter.getMDAnalysisDimsFromUCellObj(inpCell)
+	coordsA, coordsB, coordsC = [cartArray[angleIndices[:,idx]] for idx in range(3)]
+	outAngles = distLib.calc_angles(coordsA, coordsB, coordsC, box=dims)
+
+	return np.degrees(outAngles) if degrees else outAngles
+
+
 def _getTwoDimSparsePosVectorMatrix(inpMatrix, outDim, indicesA, indicesB):
 	""" Gets a sparsely populated 2-D vector matrix from a given inpMatrix. This allows us to not worry about how atom indices map to indicesA and indicesB, while still not calculating more values than we need. This differs SLIGHTLY from getting a sparse 3-d matrix in that we assume here that the vectors are len-3 by default (may extend later)
 	
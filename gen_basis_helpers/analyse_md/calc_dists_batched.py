@@ -0,0 +1,184 @@
+""" Functions to calculate distance-based quantities for many frames (geometries) at once. These work on stacked arrays (e.g. (nFrames, nAtoms, 3) co-ordinates) rather than UnitCell objects; this avoids rebuilding co-ordinate arrays from cartCoords lists for every frame and lets output buffers be reused between frames """
+
+import itertools as it
+
+import numpy as np
+
+import MDAnalysis.lib.distances as distLib
+
+from . import traj_binary as trajBinHelp
+
+
+def getMDAnalysisDimsFromLattVectsArray(lattVects):
+	""" Gets MDAnalysis-style box dimensions [a,b,c,alpha,beta,gamma] from lattice vectors
+
+	Args:
+		lattVects: (3x3 or nFramesx3x3 array) Lattice vectors (one per row) for one or many frames
+
+	Returns
+		outDims: (len-6 or nFramesx6 array) Lattice parameters and angles (in degrees) for each frame
+
+	"""
+	lattVects = np.asarray(lattVects, dtype=np.float64)
+	lengths = np.linalg.norm(lattVects, axis=-1)
+	vectA, vectB, vectC = lattVects[...,0,:], lattVects[...,1,:], lattVects[...,2,:]
+	lenA, lenB, lenC = lengths[...,0], lengths[...,1], lengths[...,2]
+
+	alpha = _getAngleFromDotProds( np.sum(vectB*vectC, axis=-1), lenB*lenC )
+	beta  = _getAngleFromDotProds( np.sum(vectA*vectC, axis=-1), lenA*lenC )
+	gamma = _getAngleFromDotProds( np.sum(vectA*vectB, axis=-1), lenA*lenB )
+
+	return np.stack([lenA, lenB, lenC, alpha, beta, gamma], axis=-1)
+
+
+def _getAngleFromDotProds(dotProds, lenProds):
+	return np.degrees( np.arccos( np.clip(dotProds/lenProds, -1, 1) ) )
+
+
+def getCoordsAndLattVectsArraysFromTrajSteps(trajSteps):
+	""" Stacks co-ordinates and lattice vectors from a set of trajectory steps into arrays
+
+	Args:
+		trajSteps: (iter of TrajStepBase) All should contain the same number of atoms
+
+	Returns
+		coords: (nFrames x nAtoms x 3 array) Cartesian co-ordinates for each frame
+		lattVects: (nFrames x 3 x 3 array) Lattice vectors for each frame
+
+	"""
+	coords = np.array( [ [x[:3] for x in step.unitCell.cartCoords] for step in trajSteps ], dtype=np.float64 )
+	lattVects = np.array( [step.unitCell.lattVects for step in trajSteps], dtype=np.float64 )
+	return coords, lattVects
+
+
+def iterCoordsAndLattVectsChunksFromTraj(inpTraj, chunkSize=100):
+	""" Iterates over a trajectory in chunks of frames; yielding co-ordinate and lattice vector arrays for each chunk. Trajectories in the binary format (TrajectoryBinary) are read directly from their arrays, others are converted one chunk at a time
+
+	Args:
+		inpTraj: (TrajectoryBase object)
+		chunkSize: (int) Maximum number of frames in each chunk. Memory use scales with this
+
+	Yields
+		coords: (nChunk x nAtoms x 3 array)
+		lattVects: (nChunk x 3 x 3 array)
+
+	"""
+	if isinstance(inpTraj, trajBinHelp.TrajectoryBinary):
+		for startIdx in range(0, len(inpTraj), chunkSize):
+			currTraj = inpTraj[startIdx:startIdx+chunkSize]
+			yield np.asarray(currTraj.coords, dtype=np.float64), np.asarray(currTraj.lattVects, dtype=np.float64)
+		return
+
+	trajIter = iter(inpTraj)
+	while True:
+		currSteps = list( it.islice(trajIter, chunkSize) )
+		if len(currSteps)==0:
+			return
+		yield getCoordsAndLattVectsArraysFromTrajSteps(currSteps)
+
+
+def calcDistanceMatricesForFrames_minImageConv(coords, boxDims, indicesA=None, indicesB=None, outArray=None):
+	""" Calculates distance matrices for multiple frames using the nearest image convention
+
+	Args:
+		coords: (nFrames x nAtoms x 3 array) Cartesian co-ordinates for each frame
+		boxDims: (len-6 or nFramesx6 array) MDAnalysis-style box dims for each frame [a,b,c,alpha,beta,gamma]. If len-6 the same box is used for every frame. See getMDAnalysisDimsFromLattVectsArray
+		indicesA: (Optional, iter of ints) Indices of the atoms to include for the first dimension; Default is to include ALL atoms
+		indicesB: (Optional, iter of ints) Indices of the atoms to include for the second dimension; Default is indicesA
+		outArray: (Optional, nFrames x len(indicesA) x len(indicesB) float64 array) Preallocated array to write the output into. Passing this lets one buffer be reused for many calls
+
+	Returns
+		outArray: (nFrames x len(indicesA) x len(indicesB) array) outArray[f][n][m] gives the distance between indicesA[n] and indicesB[m] for frame f
+
+	"""
+	coords = np.asarray(coords, dtype=np.float64)
+	nFrames, nAtoms = coords.shape[0], coords.shape[1]
+	indicesA = np.arange(nAtoms) if indicesA is None else np.array(indicesA, dtype=int)
+	indicesB = indicesA if indicesB is None else np.array(indicesB, dtype=int)
+	boxDims = _getBoxDimsPerFrame(boxDims, nFrames)
+
+	expShape = (nFrames, len(indicesA), len(indicesB))
+	if outArray is None:
+		outArray = np.empty(expShape, dtype=np.float64)
+	elif outArray.shape != expShape:
+		raise ValueError("outArray has shape {}; expected {}".format(outArray.shape, expShape))
+
+	if (len(indicesA)==0) or (len(indicesB)==0):
+		return outArray
+
+	for frameIdx in range(nFrames):
+		coordsA = np.ascontiguousarray( coords[frameIdx][indicesA] )
+		coordsB = np.ascontiguousarray( coords[frameIdx][indicesB] )
+		distLib.distance_array(coordsA, coordsB, box=boxDims[frameIdx], result=outArray[frameIdx])
+
+	return outArray
+
+
+def iterDistanceMatricesForFrames_minImageConv(coords, boxDims, indicesA=None, indicesB=None, chunkSize=None):
+	""" Generator version of calcDistanceMatricesForFrames_minImageConv which works on chunks of frames to cap memory use. The same output buffer is reused for every chunk, so copy anything you need to keep before requesting the next chunk
+
+	Args:
+		coords: (nFrames x nAtoms x 3 array) See calcDistanceMatricesForFrames_minImageConv
+		boxDims: (len-6 or nFramesx6 array) See calcDistanceMatricesForFrames_minImageConv
+		indicesA: (Optional, iter of ints) See calcDistanceMatricesForFrames_minImageConv
+		indicesB: (Optional, iter of ints) See calcDistanceMatricesForFrames_minImageConv
+		chunkSize: (Optional, int) Maximum number of frames to calculate at once. Default is to do all frames in one chunk
+
+	Yields
+		startIdx: (int) Index of the first frame in the current chunk
+		distMatrices: (nChunk x len(indicesA) x len(indicesB) array) View into the reused buffer
+
+	"""
+	nFrames, nAtoms = coords.shape[0], coords.shape[1]
+	chunkSize = nFrames if chunkSize is None else chunkSize
+	nA = nAtoms if indicesA is None else len(indicesA)
+	nB = nA if indicesB is None else len(indicesB)
+	boxDims = _getBoxDimsPerFrame(boxDims, nFrames)
+
+	outBuffer = np.empty( (min(chunkSize,nFrames), nA, nB), dtype=np.float64 )
+	for startIdx in range(0, nFrames, chunkSize):
+		endIdx = min(startIdx+chunkSize, nFrames)
+		currBuffer = outBuffer[:endIdx-startIdx]
+		calcDistanceMatricesForFrames_minImageConv(coords[startIdx:endIdx], boxDims[startIdx:endIdx], indicesA=indicesA, indicesB=indicesB, outArray=currBuffer)
+		yield startIdx, currBuffer
+
+
+def calcDistancesFromABPlaneForFrames(coords, lattVects, planeEqn, indices=None, outArray=None):
+	""" Calculates distances of atoms from a plane parallel to the ab-plane for multiple frames, taking PBCs along the plane normal into account (i.e. the distance to the nearest periodic image of the plane)
+
+	Args:
+		coords: (nFrames x nAtoms x 3 array) Cartesian co-ordinates for each frame
+		lattVects: (3x3 or nFramesx3x3 array) Lattice vectors for each frame
+		planeEqn: (ThreeDimPlaneEquation) MUST be parallel to axb; but this isnt checked
+		indices: (Optional, iter of ints) Indices of atoms to calculate this distance for. Default is all atoms
+		outArray: (Optional, nFrames x len(indices) array) Preallocated array to write the output into
+
+	Returns
+		outArray: (nFrames x len(indices) array) Absolute distance of each atom from the plane
+
+	"""
+	coords = np.asarray(coords, dtype=np.float64)
+	nFrames = coords.shape[0]
+	indices = np.arange(coords.shape[1]) if indices is None else np.array(indices, dtype=int)
+	lattVects = np.asarray(lattVects, dtype=np.float64)
+	lattVects = np.broadcast_to(lattVects, (nFrames,3,3)) if lattVects.ndim==2 else lattVects
+
+	#Signed distance from the plane, then fold into [-L/2, L/2] where L is the cell width along the plane normal
+	normVect = np.array(planeEqn.coeffs[:3], dtype=np.float64)
+	normLength = np.linalg.norm(normVect)
+	signedDists = ( (coords[:,indices,:] @ normVect) - planeEqn.coeffs[3] ) / normLength
+	periodLengths = np.abs( lattVects[:,2,:] @ normVect ) / normLength
+	periodLengths = periodLengths[:,np.newaxis]
+
+	if outArray is None:
+		outArray = np.empty( signedDists.shape, dtype=np.float64 )
+	outArray[:] = np.abs( signedDists - periodLengths*np.round(signedDists/periodLengths) )
+	return outArray
+
+
+def _getBoxDimsPerFrame(boxDims, nFrames):
+	boxDims = np.asarray(boxDims, dtype=np.float64)
+	if boxDims.ndim == 1:
+		boxDims = np.broadcast_to(boxDims, (nFrames,6))
+	return boxDims
+
@@ -10,6 +10,7 @@ import plato_pylib.shared.unit_convs as uConvHelp
 
 from . import binned_res as binResHelp
 from . import calc_dists as calcDistHelp
+from . import calc_dists_batched as batchedDistsHelp
 from . import calc_distrib_core as calcDistribCoreHelp
 
 from ..shared import cart_coord_utils as cartHelp
@@ -85,7 +86,7 @@ class CalcPlanarRdfOptions(calcDistribCoreHelp.CalcDistribOptionsBase):
 		self.volume = volume
 
 
-def _populateBinsWithPlanarRdfVals(inpTraj, binResObjs, indices, planeEqn=None, volumes=None):
+def _populateBinsWithPlanarRdfVals(inpTraj, binResObjs, indices, planeEqn=None, volumes=None, chunkSize=100):
 	""" Gets planar rdf values for multiple binResObjs/atom groups separately. This can be used to efficiently calculate, for example, the effect of different bin sizing on the rdfs
 	
 	Args:
@@ -94,6 +95,7 @@ def _populateBinsWithPlanarRdfVals(inpTraj, binResObjs, indices, planeEqn=None,
 		indices: (iter of iter of ints) Each element corresponds to one binResObj. Within that each element contains the indices of atoms to get an rdf for
 		volumes: (iter of floats) The total cell volume to assume for each case; Default is to use the unit cell volume. Using the whole cell may not be sensible when calculating for slab geometries.
 		planeEqn: (a SINGLE ThreeDimPlaneEquation object) Default is to use the surface plane equation with d=0 (i.e. the bottom of the cell)
+		chunkSize: (int) Number of frames to calculate distances for at once. Memory use scales with this
 
 	NOTE:
 		planeEqn MUST be parralel to axb; but this likely wont be checked
@@ -116,9 +118,9 @@ def _populateBinsWithPlanarRdfVals(inpTraj, binResObjs, indices, planeEqn=None,
 
 	#Figure out the counts for each case
 	nSteps = 0
-	for trajStep in inpTraj:
-		multiBinner.updateCountsFromTrajStep(trajStep)
-		nSteps += 1
+	for coords, lattVects in batchedDistsHelp.iterCoordsAndLattVectsChunksFromTraj(inpTraj, chunkSize=chunkSize):
+		multiBinner.updateCountsFromFrames(coords, lattVects)
+		nSteps += coords.shape[0]
 
 	#Attach the rdf info
 	surfAreaAll = inpTraj.trajSteps[0].unitCell.volume / inpTraj.trajSteps[0].unitCell.lattParams["c"]
@@ -174,6 +176,24 @@ class _PlanarRdfMultiBinnerFixedIndices():
 			binner.updateCountsFromAllDists(useDists)
 
 
+	def updateCountsFromFrames(self, coords, lattVects):
+		""" Updates counts for many frames at once
+		
+		Args:
+			coords: (nFrames x nAtoms x 3 array)
+			lattVects: (nFrames x 3 x 3 array)
+				 
+		"""
+		uniqueIndices = sorted(set(it.chain(*[binner.indices for binner in self.singleBinners])))
+		self._checkAllPlaneEquationsAreTheSame()
+		usePlaneEqn = self.singleBinners[0].planeEqn
+		allRelevantDists = batchedDistsHelp.calcDistancesFromABPlaneForFrames(coords, lattVects, usePlaneEqn, indices=uniqueIndices)
+
+		idxToColumn = {atomIdx:colIdx for colIdx,atomIdx in enumerate(uniqueIndices)}
+		for binner in self.singleBinners:
+			currColumns = [idxToColumn[idx] for idx in binner.indices]
+			binResHelp.binCountsFromOneDimDataSimple(allRelevantDists[:,currColumns].ravel(), binner.resBins)
+
 	def _checkAllPlaneEquationsAreTheSame(self):
 		planeEqns = [x.planeEqn for x in self.singleBinners]
 		for planeEqn in planeEqns:
@@ -1,5 +1,8 @@
 
+import numpy as np
+
 from . import atom_combo_opts_obj_maps as atomComboOptObjMapHelp
+from . import classification_incremental as classIncrHelp
 from ..misc import shared_io as sharedIOHelp
 
 def getIterOfClassDistrCountsOverTraj(inpTraj, optsObjs):
@@ -90,6 +93,35 @@ def getClassDistrCountsOverTraj(inpTraj, optsObj):
 
 
 
+def getClassCountsAndTimeSeriesOverTraj_incremental(inpTraj, optsObj, skin=0.0):
+	""" Gets the number of water in each class at each step in inpTraj, plus the class of each water at each step. Uses classification_incremental, which only re-counts h-bonds for water whose surroundings have moved by more than skin between frames
+	
+	Args:
+		inpTraj: (TrajectoryInMemory) (Actually probably also works for TrajectoryBase)
+		optsObj: (WaterCountTypesMinDistAndHBondSimpleOpts) Defines the classes
+		skin: (float) See IncrementalWaterClassifierMinDistAndNumberHBonds. skin=0 gives the same counts as getClassDistrCountsOverTraj
+
+	Returns
+		outCounts: (nSteps x nClasses int array) Number of water in each class at each step
+		classIndices: (nSteps x nWater int array) Index of the (first) class each water is in at each step; -1 if its in none. Uses a small int type (int8 for <127 classes)
+ 
+	"""
+	classifier = classIncrHelp.IncrementalWaterClassifierMinDistAndNumberHBonds.fromWaterCountTypesOptsObj(optsObj, skin=skin)
+	outCounts, classIndices = list(), list()
+
+	for trajStep in inpTraj:
+		classMembership = classifier.classifyGeom(trajStep.unitCell)
+		outCounts.append( np.sum(classMembership, axis=0) )
+		classIndices.append( classIncrHelp.getClassIndicesFromClassMembership(classMembership) )
+
+	nWater, nClasses = len(classifier.oxyIndices), classifier.nClasses
+	outCounts = np.array(outCounts, dtype=np.int32).reshape(-1,nClasses)
+	classIndices = np.array(classIndices).reshape(-1,nWater)
+
+	return outCounts, classIndices
+
+
+
 def getFilteredScatterDataOverTime(inpTraj, optsObj, foldOneDimData=True):
 	""" Gets data [ [timeA,valsA], [timeA,valsB], [timeB,valsC] ] for filterered groups. Original goal was to track planar positions of self-ionised water groups (hydroxyl/hydronium) which spontaneously appeared in an MD run
 	
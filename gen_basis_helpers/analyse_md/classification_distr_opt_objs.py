@@ -466,7 +466,7 @@ class ClassifyByNumberNebsWithinDistanceOptsObj():
 	Original use case was to find free hydrogen and H2 within a simulation where water split
 	"""
 
-	def __init__(self, binResObjs, fromIndices, toIndices, maxDist=1.3, minDist=0.01, nebRanges=None):
+	def __init__(self, binResObjs, fromIndices, toIndices, maxDist=1.3, minDist=0.01, nebRanges=None, useNebLists=False):
 		""" Description of function
 		
 		Args:
@@ -476,6 +476,7 @@ class ClassifyByNumberNebsWithinDistanceOptsObj():
 			maxDist: (float) The maximum distance for an atom to be considered as a neighbour
 			minDist: (float) The minimum distance for an atom to be considered as a neighbour; useful to have set low to avoid self-counting
 			nebRanges: (iter of len-2 floats) Number of neighbours needed to fit into a classification. e.g. [ [-0.1,0.1], [0.9,1.1] ] will have one group with zero neighbours and one group with a single neighbour 
+			useNebLists: (Bool) If True, distances are found with a neighbour-list search (only pairs within maxDist) rather than a full distance matrix. Much faster for large cells
  
 		"""
 		self.binResObjs = binResObjs
@@ -484,6 +485,7 @@ class ClassifyByNumberNebsWithinDistanceOptsObj():
 		self.maxDist = maxDist
 		self.minDist = minDist
 		self.nebRanges = nebRanges
+		self.useNebLists = useNebLists
 
 	@property
 	def atomIndices(self):
@@ -0,0 +1,216 @@
+""" Incremental (frame-to-frame) classification of water molecules. Between consecutive MD frames only a few molecules change class, so instead of recomputing every distance/angle/h-bond for every frame we track per-molecule state and only re-count h-bonds for molecules whose surroundings have changed (in the style of a Verlet list with a skin distance) """
+
+import numpy as np
+
+from . import calc_dists as calcDistsHelp
+from . import get_neb_lists as nebListHelp
+
+
+class IncrementalWaterClassifierMinDistAndNumberHBonds():
+	""" Incremental version of classifier_objs._WaterClassifierMinDistAndNumberHBonds, for many classes (one per set of filter ranges) at once. Call classifyGeom() on each frame in order; the object keeps track of the h-bond counts for each water and the geometry they were last calculated for
+
+	"""
+
+	def __init__(self, oxyIndices, hyIndices, distFilterIndices, distFilterRanges, nDonorFilterRanges, nAcceptorFilterRanges, nTotalFilterRanges,
+	             maxOOHBond=3.5, maxAngleHBond=35, skin=0.0):
+		""" Initializer
+
+		Args:
+			oxyIndices: (iter of ints) The oxygen indices for each water molecule
+			hyIndices: (iter of len-2 ints) Same length as oxyIndices, but each contains the indices of two hydrogen indices bonded to the relevant oxygen
+			distFilterIndices: (iter of ints) Each represents an atom index. We group water by distance of oxygen atoms from these indices
+			distFilterRanges: (iter of len-2 float iters) Each contains [minDist,maxDist] from indices in distFilterIndices for a water to be in the relevant class
+			nDonorFilterRanges: (iter of len-2 float iters) Each contains [minNDonor, maxNDonor] for a water. Same length as distFilterRanges
+			nAcceptorFilterRanges: (iter of len-2 float iters) Each contains [minNAcceptor, maxNAcceptor] for a water. Same length as distFilterRanges
+			nTotalFilterRanges: (iter of len-2 float iters) Each contains [minNTotal,maxNTotal] for a water. Same length as distFilterRanges
+			maxOOHBond: (float) The maximum O-O distance between two hydrogen-bonded water
+			maxAngleHBond: (float) The maximum OA-OD-HD angle for a hydrogen bond; OA = acceptor oxygen, OD=Donor oxygen, HD=donor hydrogen
+			skin: (float) H-bonds for a water are only re-counted when an atom of it (or of a water within maxOOHBond+skin of it) has moved more than skin/2 since they were last counted, or a new water has come within maxOOHBond. skin=0 means any movement leads to a re-count, which gives the same results as the non-incremental classifier
+
+		NOTES:
+			a) For [minX,maxX] ranges we define as minX<=x<maxX (same as the non-incremental classifiers)
+			b) Min-distances to distFilterIndices are cheap and always calculated for every water
+			c) Using skin>0 is an approximation; a water whose neighbours only move a small amount keeps its old h-bond counts even if an angle crosses maxAngleHBond
+
+		"""
+		self.oxyIndices = np.array(oxyIndices, dtype=int)
+		self.hyIndices = np.array(hyIndices, dtype=int).reshape(-1,2)
+		self.distFilterIndices = np.array(distFilterIndices, dtype=int)
+		self.distFilterRanges = np.array(distFilterRanges, dtype=float).reshape(-1,2)
+		self.nDonorFilterRanges = np.array(nDonorFilterRanges, dtype=float).reshape(-1,2)
+		self.nAcceptorFilterRanges = np.array(nAcceptorFilterRanges, dtype=float).reshape(-1,2)
+		self.nTotalFilterRanges = np.array(nTotalFilterRanges, dtype=float).reshape(-1,2)
+		self.maxOOHBond = maxOOHBond
+		self.maxAngleHBond = maxAngleHBond
+		self.skin = skin
+		self._checkInputConsistent()
+		self.reset()
+
+	@classmethod
+	def fromWaterCountTypesOptsObj(cls, optsObj, skin=0.0):
+		""" Alternative initializer from a classification_distr_opt_objs.WaterCountTypesMinDistAndHBondSimpleOpts object; see __init__ for skin """
+		currArgs = [optsObj.oxyIndices, optsObj.hyIndices, optsObj.distFilterIndices, optsObj.distFilterRanges, optsObj.nDonorFilterRanges,
+		            optsObj.nAcceptorFilterRanges, optsObj.nTotalFilterRanges]
+		return cls(*currArgs, maxOOHBond=optsObj.maxOOHBond, maxAngleHBond=optsObj.maxAngleHBond, skin=skin)
+
+	@property
+	def nClasses(self):
+		return len(self.distFilterRanges)
+
+	def reset(self):
+		""" Forget all stored state; the next call to classifyGeom will re-count h-bonds for every water """
+		nWater = len(self.oxyIndices)
+		self.nDonor, self.nAcceptor = np.zeros(nWater, dtype=int), np.zeros(nWater, dtype=int)
+		self.nReEvaluated = 0
+		self._envWaterIndices = [np.zeros(0, dtype=int) for x in range(nWater)]
+		self._envAtomIndices = [np.zeros(0, dtype=int) for x in range(nWater)]
+		self._envRefCoords = [np.zeros((0,3)) for x in range(nWater)]
+		self._needsEval = np.ones(nWater, dtype=bool)
+
+	def classifyGeom(self, inpGeom):
+		""" Classifies each water in inpGeom, using stored state from previous calls where possible
+
+		Args:
+			inpGeom: (plato_pylib UnitCell object) Should be the next frame of the trajectory
+
+		Returns
+			classMembership: (nWater x nClasses bool array) classMembership[i][j] is True if water i is in class j. Water can be in more than one class if ranges overlap
+
+		NOTES:
+			The number of waters re-evaluated for this frame is stored in self.nReEvaluated
+
+		"""
+		cartCoords, fractCoords, lattVects = calcDistsHelp._getCoordArraysAndLattVectsForNearestImageCalcs(inpGeom)
+		oxyPairs = self._getOxyPairsWithinCutoff(inpGeom, self.maxOOHBond+self.skin)
+
+		evalIndices = np.nonzero( self._getWhichWaterNeedEvaluating(cartCoords, lattVects, oxyPairs) )[0]
+		self._evaluateHBondsForWaterIndices(evalIndices, cartCoords, fractCoords, lattVects, oxyPairs)
+		self.nReEvaluated = len(evalIndices)
+
+		minDists = self._getMinDistsToFilterIndices(cartCoords, fractCoords, lattVects)
+		return self._getClassMembership(minDists, self.nDonor, self.nAcceptor)
+
+	#Returns (waterIdxA, waterIdxB, dist) for every ordered pair of different water with O-O distance <= cutoff
+	def _getOxyPairsWithinCutoff(self, inpGeom, cutoff):
+		pairIndicesA, pairIndicesB, dists = nebListHelp.getNebPairsWithinCutoffForInpCell(inpGeom, cutoff, indicesA=self.oxyIndices)
+		oxyToWaterIdx = {oxyIdx:waterIdx for waterIdx,oxyIdx in enumerate(self.oxyIndices)}
+		waterIdxA = np.array([oxyToWaterIdx[x] for x in pairIndicesA], dtype=int)
+		waterIdxB = np.array([oxyToWaterIdx[x] for x in pairIndicesB], dtype=int)
+		useMask = waterIdxA != waterIdxB
+		return waterIdxA[useMask], waterIdxB[useMask], dists[useMask]
+
+	def _getWhichWaterNeedEvaluating(self, cartCoords, lattVects, oxyPairs):
+		outMask = self._needsEval.copy()
+		waterIndices = np.nonzero(~outMask)[0]
+		if len(waterIndices)==0:
+			return outMask
+
+		#1) Any atom of the water (or its stored neighbours) moved by more than skin/2
+		atomIndices = np.concatenate( [self._envAtomIndices[idx] for idx in waterIndices] )
+		refCoords = np.concatenate( [self._envRefCoords[idx] for idx in waterIndices] )
+		ownerIndices = np.repeat( waterIndices, [len(self._envRefCoords[idx]) for idx in waterIndices] )
+		displacements = np.linalg.norm( _getNearestImageVectorsFromCartCoords(refCoords, cartCoords[atomIndices], lattVects), axis=1 )
+		outMask[ ownerIndices[displacements > 0.5*self.skin] ] = True
+
+		#2) A water not stored as a neighbour is now close enough to h-bond
+		nWater = len(self.oxyIndices)
+		waterIdxA, waterIdxB, dists = oxyPairs
+		closeMask = dists < self.maxOOHBond
+		currPairKeys = waterIdxA[closeMask]*nWater + waterIdxB[closeMask]
+		storedPairKeys = np.concatenate( [idx*nWater + self._envWaterIndices[idx] for idx in waterIndices] )
+		outMask[ waterIdxA[closeMask][ ~np.isin(currPairKeys, storedPairKeys) ] ] = True
+
+		return outMask
+
+	def _evaluateHBondsForWaterIndices(self, evalIndices, cartCoords, fractCoords, lattVects, oxyPairs):
+		if len(evalIndices)==0:
+			return
+
+		#1) Figure out which pairs we need (and store the neighbour environments)
+		waterIdxA, waterIdxB, dists = oxyPairs
+		isEval = np.zeros(len(self.oxyIndices), dtype=bool)
+		isEval[evalIndices] = True
+		pairMask = isEval[waterIdxA]
+		waterIdxA, waterIdxB, dists = waterIdxA[pairMask], waterIdxB[pairMask], dists[pairMask]
+
+		for waterIdx in evalIndices:
+			envIndices = np.concatenate( [[waterIdx], np.unique(waterIdxB[waterIdxA==waterIdx])] ).astype(int)
+			self._envWaterIndices[waterIdx] = envIndices
+			self._envAtomIndices[waterIdx] = self._getAtomIndicesForWaterIndices(envIndices)
+			self._envRefCoords[waterIdx] = cartCoords[ self._envAtomIndices[waterIdx] ]
+		self._needsEval[evalIndices] = False
+
+		#2) Count h-bonds for pairs within maxOO. Acceptor: angle [O_A, O_B, H_B]; donor: angle [O_B, O_A, H_A]
+		hBondMask = dists < self.maxOOHBond
+		waterIdxA, waterIdxB = waterIdxA[hBondMask], waterIdxB[hBondMask]
+		nAcceptor, nDonor = np.zeros(len(self.oxyIndices), dtype=int), np.zeros(len(self.oxyIndices), dtype=int)
+
+		if len(waterIdxA) > 0:
+			oxyA, oxyB = self.oxyIndices[waterIdxA], self.oxyIndices[waterIdxB]
+			vectsAB = calcDistsHelp._getNearestImageVectorsFromCoords(cartCoords[oxyA], cartCoords[oxyB], fractCoords[oxyA], fractCoords[oxyB], lattVects)
+			for hyCol in range(2):
+				hyA, hyB = self.hyIndices[waterIdxA,hyCol], self.hyIndices[waterIdxB,hyCol]
+				vectsAHyA = calcDistsHelp._getNearestImageVectorsFromCoords(cartCoords[oxyA], cartCoords[hyA], fractCoords[oxyA], fractCoords[hyA], lattVects)
+				vectsBHyB = calcDistsHelp._getNearestImageVectorsFromCoords(cartCoords[oxyB], cartCoords[hyB], fractCoords[oxyB], fractCoords[hyB], lattVects)
+				acceptorAngles = _getAnglesBetweenVectors(-1*vectsAB, vectsBHyB)
+				donorAngles = _getAnglesBetweenVectors(vectsAB, vectsAHyA)
+				nAcceptor += np.bincount(waterIdxA[acceptorAngles<self.maxAngleHBond], minlength=len(self.oxyIndices))
+				nDonor += np.bincount(waterIdxA[donorAngles<self.maxAngleHBond], minlength=len(self.oxyIndices))
+
+		self.nAcceptor[evalIndices] = nAcceptor[evalIndices]
+		self.nDonor[evalIndices] = nDonor[evalIndices]
+
+	def _getMinDistsToFilterIndices(self, cartCoords, fractCoords, lattVects):
+		if len(self.distFilterIndices)==0:
+			return np.full(len(self.oxyIndices), np.inf)
+		oxyIndices, filterIndices = self.oxyIndices, self.distFilterIndices
+		currArgs = [cartCoords[oxyIndices][:,np.newaxis,:], cartCoords[filterIndices][np.newaxis,:,:],
+		            fractCoords[oxyIndices][:,np.newaxis,:], fractCoords[filterIndices][np.newaxis,:,:], lattVects]
+		return np.min( np.linalg.norm(calcDistsHelp._getNearestImageVectorsFromCoords(*currArgs), axis=2), axis=1 )
+
+	def _getClassMembership(self, minDists, nDonor, nAcceptor):
+		nTotal = nDonor + nAcceptor
+		outMembership = np.ones( (len(self.oxyIndices), self.nClasses), dtype=bool )
+		for vals, ranges in zip([minDists, nDonor, nAcceptor, nTotal], [self.distFilterRanges, self.nDonorFilterRanges, self.nAcceptorFilterRanges, self.nTotalFilterRanges]):
+			outMembership &= (ranges[:,0] <= vals[:,np.newaxis]) & (vals[:,np.newaxis] < ranges[:,1])
+		return outMembership
+
+	def _getAtomIndicesForWaterIndices(self, waterIndices):
+		return np.concatenate( [self.oxyIndices[waterIndices][:,np.newaxis], self.hyIndices[waterIndices]], axis=1 ).reshape(-1)
+
+	def _checkInputConsistent(self):
+		if len(self.oxyIndices) != len(self.hyIndices):
+			raise ValueError("Need the same number of oxyIndices ({}) and hyIndices ({})".format(len(self.oxyIndices), len(self.hyIndices)))
+		nRangesEach = [len(x) for x in [self.distFilterRanges, self.nDonorFilterRanges, self.nAcceptorFilterRanges, self.nTotalFilterRanges]]
+		if len(set(nRangesEach)) != 1:
+			raise ValueError("All filter ranges need the same length; lengths are {}".format(nRangesEach))
+
+
+def getClassIndicesFromClassMembership(classMembership):
+	""" Converts a class membership matrix into a single class index for each molecule
+
+	Args:
+		classMembership: (nMolecules x nClasses bool array) e.g. output from IncrementalWaterClassifierMinDistAndNumberHBonds.classifyGeom
+
+	Returns
+		classIndices: (len-nMolecules int array) Index of the FIRST class each molecule is in; -1 if it is in no class. Smallest int type able to hold nClasses is used
+
+	"""
+	classMembership = np.asarray(classMembership, dtype=bool)
+	outDType = np.int8 if classMembership.shape[1] < np.iinfo(np.int8).max else np.int32
+	outIndices = np.argmax(classMembership, axis=1).astype(outDType)
+	outIndices[ ~np.any(classMembership, axis=1) ] = -1
+	return outIndices
+
+
+#Nearest image vectors (coordB-coordA) when we only have cartesian co-ordinates for A (e.g. stored from a previous frame)
+def _getNearestImageVectorsFromCartCoords(cartA, cartB, lattVects):
+	invLattVects = np.linalg.inv(lattVects)
+	return calcDistsHelp._getNearestImageVectorsFromCoords(cartA, cartB, cartA @ invLattVects, cartB @ invLattVects, lattVects)
+
+
+def _getAnglesBetweenVectors(vectsA, vectsB):
+	dotProds = np.sum(vectsA*vectsB, axis=1)
+	lenProds = np.linalg.norm(vectsA, axis=1) * np.linalg.norm(vectsB, axis=1)
+	return np.degrees( np.arccos( np.clip(dotProds/lenProds, -1, 1) ) )
+
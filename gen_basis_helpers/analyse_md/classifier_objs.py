@@ -77,7 +77,7 @@ class _WaterClassifierBase():
 
 class _AtomsWithNNebsWithinDistsClassifier():
 
-	def __init__(self, fromIndices, toIndices, minDist, maxDist, minMaxNebs, execCount=0):
+	def __init__(self, fromIndices, toIndices, minDist, maxDist, minMaxNebs, execCount=0, useNebLists=False):
 		""" Initializer
 		
 		Args:
@@ -87,6 +87,7 @@ class _AtomsWithNNebsWithinDistsClassifier():
 			maxDist: (float) An atom must be <=maxDist to be considered a neighbour
 			minMaxNebs: (len-2 float-iter) Number of nebs must be >=0th entry and <=1st entry
 			execCount: (int) Used to track how many times .classify is called; used as a safety check when using "byReference" classifiers
+			useNebLists: (Bool) If True we use sparseMatrixCalculator.outDict["nebDistMatrix"] (populated by _NebDistMatrixPopulator with cutoff>=maxDist) rather than the full distance matrix
  
 		"""
 		self.fromIndices = fromIndices
@@ -95,9 +96,24 @@ class _AtomsWithNNebsWithinDistsClassifier():
 		self.maxDist = maxDist
 		self.minMaxNebs = minMaxNebs
 		self.execCount = execCount
+		self.useNebLists = useNebLists
 
 	def classify(self, sparseMatrixCalculator):
 		#1) Figure out number of neighbours in each
+		if self.useNebLists:
+			numbNebs = self._getNumbNebsFromNebDistMatrix(sparseMatrixCalculator)
+		else:
+			numbNebs = self._getNumbNebsFromDistMatrix(sparseMatrixCalculator)
+		
+		#2) Figure out which atoms have the correct number of neighbours
+		outIndices = list()
+		for idx,numbNeb in enumerate(numbNebs):
+			if (numbNeb>=self.minMaxNebs[0]) and (numbNeb<=self.minMaxNebs[1]):
+				outIndices.append(self.fromIndices[idx])
+
+		return outIndices	
+
+	def _getNumbNebsFromDistMatrix(self, sparseMatrixCalculator):
 		numbNebs = list()
 		distMatrix = sparseMatrixCalculator.outDict["distMatrix"]
 
@@ -108,14 +124,23 @@ class _AtomsWithNNebsWithinDistsClassifier():
 				if (currDist>self.minDist) and (currDist<=self.maxDist):
 					counts += 1
 			numbNebs.append(counts)
-		
-		#2) Figure out which atoms have the correct number of neighbours
-		outIndices = list()
-		for idx,numbNeb in enumerate(numbNebs):
-			if (numbNeb>=self.minMaxNebs[0]) and (numbNeb<=self.minMaxNebs[1]):
-				outIndices.append(self.fromIndices[idx])
 
-		return outIndices	
+		return numbNebs
+
+	def _getNumbNebsFromNebDistMatrix(self, sparseMatrixCalculator):
+		numbNebs = list()
+		distMatrix = sparseMatrixCalculator.outDict["nebDistMatrix"]
+		toIndices = set(self.toIndices)
+
+		for fromIdx in self.fromIndices:
+			nebIndices, nebDists = distMatrix.getNebIndicesAndDists(fromIdx)
+			counts = 0
+			for nebIdx, currDist in zip(nebIndices, nebDists):
+				if (nebIdx in toIndices) and (currDist>self.minDist) and (currDist<=self.maxDist):
+					counts += 1
+			numbNebs.append(counts)
+
+		return numbNebs
 
 
 class _AtomsWithinMinDistRangeClassifier():
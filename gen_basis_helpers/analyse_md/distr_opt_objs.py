@@ -351,7 +351,7 @@ class WaterPlanarDistOptions(calcDistrCoreHelp.CalcDistribOptionsBase, _WaterOpt
 class CountHBondsBetweenGenericGroupsOptions(calcDistrCoreHelp.CalcDistribOptionsBase):
 	""" Options to count the number of hydrogen bonds between groups """
 
-	def __init__(self, binResObj, fromNonHyIndices, fromHyIndices, toNonHyIndices, toHyIndices, acceptor=True, donor=True, maxOO=3.5, maxAngle=35, primaryIndices=None):
+	def __init__(self, binResObj, fromNonHyIndices, fromHyIndices, toNonHyIndices, toHyIndices, acceptor=True, donor=True, maxOO=3.5, maxAngle=35, primaryIndices=None, useNebLists=False):
 		""" Initializer
 		
 		Args:
@@ -365,6 +365,7 @@ class CountHBondsBetweenGenericGroupsOptions(calcDistrCoreHelp.CalcDistribOption
 			maxOO: (float) The maximum X-X distance between two hydrogen-bonded water. For water X are the oxygen atoms; hence the variable name. Angles are only calculated when this criterion is fulfilled. NOTE: Should probably be changed almost always for non-water/hydroxyl cases
 			maxAngle: (float) The maximum XA-XD-HD angle for a hydrogen bond; XA = acceptor non-hy, XD=Donor non-hy, HD=donor hydrogen
 			primaryIndices: (iter of ints) Indices of atoms to associate these numbers with. Needed to slot into certain combined distributions. Default is to take [x[0] for x in self.fromNonHyIndices] (for water, this would be equivalent to taking the oxygen atom indices)
+			useNebLists: (Bool) If True, non-hy distances are found with a neighbour-list search (only pairs within maxOO) rather than a full distance matrix. Much faster for large cells
 
 		NOTE:
 			Don't have multiple NonHyIndices in one entry unless there are no hyIndices. For example, it would be fine to use both oxygen in CO2, but not for (HO)2-CO since theres no way to know which hydrogen is connected to each oxygen
@@ -381,6 +382,7 @@ class CountHBondsBetweenGenericGroupsOptions(calcDistrCoreHelp.CalcDistribOption
 		self.maxOO = maxOO
 		self.maxAngle = maxAngle
 		self._primaryIndices = primaryIndices
+		self.useNebLists = useNebLists
 
 	#NOTE: NOT TESTED
 	@property
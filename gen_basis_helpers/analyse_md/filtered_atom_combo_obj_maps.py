@@ -73,7 +73,7 @@ def _(inpObj):
 	classifiers = list()
 	for idx,nebRange in enumerate(inpObj.nebRanges):
 		currArgs = [inpObj.fromIndices, inpObj.toIndices, inpObj.minDist, inpObj.maxDist, nebRange]
-		currObj = classifierObjHelp._AtomsWithNNebsWithinDistsClassifier(*currArgs)
+		currObj = classifierObjHelp._AtomsWithNNebsWithinDistsClassifier(*currArgs, useNebLists=inpObj.useNebLists)
 		classifiers.append( currObj )
 	return classifiers
 
@@ -2,12 +2,16 @@
 import copy
 import itertools as it
 
+import numpy as np
+import MDAnalysis.lib.distances as distLib
+
 import plato_pylib.shared.ucell_class as uCellHelp
 import plato_pylib.shared.unit_convs as uConvHelp
 
 from . import get_indices_from_geom_core as getIdxCore
 from . import get_neb_lists as nebListHelp
 from . import calc_dists as calcDistHelp
+from . import mdanalysis_interface as mdAnalysisInter
 
 from ..shared import cart_coord_utils as cartHelp
 from ..shared import plane_equations as planeEqnHelp
@@ -383,84 +387,130 @@ class GetTopWaterLayerIndices():
 
 class GetWaterMoleculeIndicesFromGeomStandard():
 
-	def __init__(self, minOH=0.01, maxOH=1.2*uConvHelp.ANG_TO_BOHR, minAngle=100, maxAngle=110):
+	def __init__(self, minOH=0.01, maxOH=1.2*uConvHelp.ANG_TO_BOHR, minAngle=100, maxAngle=110, skin=0.0):
+		""" Initializer
+		
+		Args:
+			minOH: (float) The minimum O-H distance to be considered an OH bond
+			maxOH: (float) The maximum O-H distance to be considered an OH bond. Oxygen atoms need exactly two neighbours (both hydrogen) within this distance
+			minAngle: (float) Minimum H-O-H angle (degrees)
+			maxAngle: (float) Maximum H-O-H angle (degrees)
+			skin: (float) Skin distance for reusing the neighbour list between calls (see get_neb_lists.NebPairListWithSkin). Only helps when calling repeatedly on similar geometries (e.g. consecutive trajectory frames)
+
+		"""
 		self.minOH = minOH
 		self.maxOH = maxOH
 		self.minAngle = minAngle
 		self.maxAngle = maxAngle
+		self.skin = skin
+		self._nebPairList = nebListHelp.NebPairListWithSkin(self.maxOH, skin=self.skin)
 
 	def getIndicesFromInpGeom(self, inpGeom):
-		cartCoords = inpGeom.cartCoords
-		allAtomsNebLists = nebListHelp.getNeighbourListsForInpCell_imagesMappedToCentral(inpGeom, self.maxOH)
-		oxyIndices = [idx for idx,unused in enumerate(cartCoords) if cartCoords[idx][-1].upper()=="O"]
-
-		outIndices = list()
-		for oIdx in oxyIndices:
-			currNebList = allAtomsNebLists[oIdx]
-			if len(currNebList)==2:
-				eleTypes = [cartCoords[x][-1] for x in currNebList]
-				if all([x.upper()=="H" for x in eleTypes]):
-					oCoord, hCoordA, hCoordB = [ cartCoords[idx][:3] for idx in [oIdx]+currNebList ]
-					hDistA = calcDistHelp.calcSingleDistBetweenCoords_minImageConv(inpGeom, oCoord, hCoordA)
-					hDistB = calcDistHelp.calcSingleDistBetweenCoords_minImageConv(inpGeom, oCoord, hCoordB)
-					angle = calcDistHelp.calcSingleAngleBetweenCoords_minImageConv(inpGeom, hCoordA, oCoord, hCoordB)
-					if self._areDistsAndAnglesConsistent([hDistA,hDistB], angle):
-						outIndices.append( [oIdx] + currNebList )
-
-		return outIndices
+		return self.getIndexArrayFromInpGeom(inpGeom).tolist()
 
-	def _areDistsAndAnglesConsistent(self, dists, angle):
-		if any([x<self.minOH for x in dists]):
-			return False
-
-		if any([x>self.maxOH for x in dists]):
-			return False
+	def getIndexArrayFromInpGeom(self, inpGeom):
+		""" Gets indices of all water molecules in inpGeom as an array
+		
+		Args:
+			inpGeom: (plato_pylib UnitCell object)
+				 
+		Returns
+			outIndices: (nWater x 3 int array) Each row is [oxyIdx, hyIdxA, hyIdxB]; ordered by oxygen index
+	 
+		"""
+		eles, oxyIndices, nebIndices, nebDists = _getNebListArraysForOxygen(inpGeom, self._nebPairList, self.maxOH)
+		useMask = (eles[nebIndices]=="H").all(axis=1) & (nebDists>=self.minOH).all(axis=1) & (nebDists<=self.maxOH).all(axis=1)
+		if nebIndices.shape[1] != 2:
+			useMask[:] = False
+		oxyIndices, nebIndices = oxyIndices[useMask], nebIndices[useMask]
 
-		if angle<self.minAngle:
-			return False
+		if len(oxyIndices)==0:
+			return np.zeros( (0,3), dtype=int )
 
-		if angle>self.maxAngle:
-			return False
+		coords, dims = _getCoordArrayAndMDAnalysisDims(inpGeom)
+		angles = np.degrees( distLib.calc_angles(coords[nebIndices[:,0]], coords[oxyIndices], coords[nebIndices[:,1]], box=dims) )
+		angleMask = (angles>=self.minAngle) & (angles<=self.maxAngle)
 
-		return True
+		return np.concatenate( [oxyIndices[:,np.newaxis], nebIndices], axis=1 )[angleMask]
 
 
 class GetHydroxylMoleculeIndicesFromGeomStandard():
 
-	def __init__(self, minOH=0.01, maxOH=1.05*uConvHelp.ANG_TO_BOHR, maxNebDist=None):
+	def __init__(self, minOH=0.01, maxOH=1.05*uConvHelp.ANG_TO_BOHR, maxNebDist=None, skin=0.0):
 		""" Initializer
 		
 		Args:
 			minOH: (float) The minimum O-H distance to be considered an OH bond (likely NEVER needs setting in practice)
 			maxOH: (float) The maximum O-H distance to be considered an OH bond
 			maxNebDist: (float) Maximum distance (from oxygen) to look for neighbours. A group will ONLY be recognised as a hydroxyl if it has a single neighbour within its range. Thus, this parameter might be useful for getting free OH groups without also getting those covalently bonded (e.g. in MeOH). Though a post-filter step for hydroxyl groups is likely safer. Defaults to maxOH
+			skin: (float) Skin distance for reusing the neighbour list between calls (see get_neb_lists.NebPairListWithSkin)
 				  
 		"""
 		self.minOH = minOH
 		self.maxOH = maxOH
 		self.maxNebDist = maxNebDist if maxNebDist is not None else maxOH
+		self.skin = skin
+		self._nebPairList = nebListHelp.NebPairListWithSkin(max(self.maxOH, self.maxNebDist), skin=self.skin)
 
 	def getIndicesFromInpGeom(self, inpGeom):
-		#Get neighbour lists
+		return self.getIndexArrayFromInpGeom(inpGeom).tolist()
+
+	def getIndexArrayFromInpGeom(self, inpGeom):
+		""" Gets indices of all hydroxyl groups in inpGeom as an array
+		
+		Args:
+			inpGeom: (plato_pylib UnitCell object)
+				 
+		Returns
+			outIndices: (nHydroxyl x 2 int array) Each row is [oxyIdx, hyIdx]; ordered by oxygen index
+	 
+		"""
 		maxNebSearch = max(self.maxOH, self.maxNebDist)
-		cartCoords = inpGeom.cartCoords
-		allAtomsNebLists = nebListHelp.getNeighbourListsForInpCell_imagesMappedToCentral(inpGeom, maxNebSearch)
-		oxyIndices = [idx for idx,unused in enumerate(cartCoords) if cartCoords[idx][-1].upper()=="O"]
-
-		#find the hydroxyls based on neighbour lists
-		outIndices = list()
-		for oIdx in oxyIndices:
-			currNebList = allAtomsNebLists[oIdx]
-			if len(currNebList)==1:
-				eleTypes = [cartCoords[x][-1] for x in currNebList]
-				if all([x.upper()=="H" for x in eleTypes]):
-					oCoord = cartCoords[oIdx][:3]
-					hCoord = cartCoords[currNebList[0]]
-					ohDist = calcDistHelp.calcSingleDistBetweenCoords_minImageConv(inpGeom, oCoord, hCoord)
-					if (ohDist > self.minOH) and (ohDist <= self.maxOH):
-						outIndices.append([oIdx, currNebList[0]])
-
-		return outIndices
+		eles, oxyIndices, nebIndices, nebDists = _getNebListArraysForOxygen(inpGeom, self._nebPairList, maxNebSearch, nNebs=1)
+		if len(oxyIndices)==0:
+			return np.zeros( (0,2), dtype=int )
+
+		useMask = (eles[nebIndices[:,0]]=="H") & (nebDists[:,0]>self.minOH) & (nebDists[:,0]<=self.maxOH)
+		return np.concatenate( [oxyIndices[:,np.newaxis], nebIndices], axis=1 )[useMask]
+
+
+def getMoleculeIndexArraysOverTraj(inpTraj, moleculeDetector):
+	""" Gets indices of molecules (e.g. water) for every step in a trajectory; useful when molecules form/break during a simulation. The detector's neighbour list is reused between frames where possible (so setting its skin > 0 can help)
+	
+	Args:
+		inpTraj: (TrajectoryBase object)
+		moleculeDetector: (e.g. GetWaterMoleculeIndicesFromGeomStandard) Needs a getIndexArrayFromInpGeom(inpGeom) method
+			 
+	Returns
+		outIndices: (list of int arrays) One per trajectory step; e.g. nWater x 3 arrays for water detection
+ 
+	"""
+	return [moleculeDetector.getIndexArrayFromInpGeom(trajStep.unitCell) for trajStep in inpTraj]
+
+
+#Gets neighbours of every oxygen as arrays; only oxygen with exactly nNebs neighbours are returned
+#NOTE: Atoms with no neighbours dont appear in the pair list at all; hence these are only ever returned when nNebs==0
+def _getNebListArraysForOxygen(inpGeom, nebPairList, cutoff, nNebs=2):
+	eles = np.array( [x[-1].upper() for x in inpGeom.cartCoords] )
+	oxyIndices = np.where(eles=="O")[0]
+	pairIndicesA, pairIndicesB, dists = nebPairList.getPairsForInpCell(inpGeom, indicesA=oxyIndices, indicesB=np.arange(len(eles)))
+
+	#Remove self-pairs, then sort by oxygen index (and neighbour index within each oxygen)
+	useMask = pairIndicesA != pairIndicesB
+	pairIndicesA, pairIndicesB, dists = pairIndicesA[useMask], pairIndicesB[useMask], dists[useMask]
+	sortOrder = np.lexsort( (pairIndicesB, pairIndicesA) )
+	pairIndicesA, pairIndicesB, dists = pairIndicesA[sortOrder], pairIndicesB[sortOrder], dists[sortOrder]
+
+	uniqueOxy, startIndices, counts = np.unique(pairIndicesA, return_index=True, return_counts=True)
+	useOxy, useStarts = uniqueOxy[counts==nNebs], startIndices[counts==nNebs]
+	nebPositions = useStarts[:,np.newaxis] + np.arange(nNebs)[np.newaxis,:]
+
+	return eles, useOxy, pairIndicesB[nebPositions], dists[nebPositions]
+
+
+def _getCoordArrayAndMDAnalysisDims(inpGeom):
+	coords = np.array( [x[:3] for x in inpGeom.cartCoords], dtype=np.float64 )
+	return coords, mdAnalysisInter.getMDAnalysisDimsFromUCellObj(inpGeom)
 
 
 #TODO:
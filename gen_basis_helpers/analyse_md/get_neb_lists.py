@@ -3,6 +3,7 @@
 #import plato_pylib.shared.ucell_class as uCellHelp
 import itertools as it
 import numpy as np
+import MDAnalysis.lib.distances as distLib
 import MDAnalysis.lib.pkdtree as pkdTreeHelp
 
 from . import mdanalysis_interface as mdAnalInter
@@ -42,3 +43,165 @@ def getNeighbourListsForInpCell_imagesMappedToCentral(inpCell, cutoff):
 
 	return outList 
 
+
+
+def getNebPairsWithinCutoffForInpCell(inpCell, cutoff, indicesA=None, indicesB=None):
+	""" Gets all pairs of atoms (one from indicesA, one from indicesB) within cutoff of each other using a periodic cell-list/KD-tree search. Cost scales roughly linearly with the number of atoms, rather than quadratically as for a full distance matrix
+
+	Args:
+		inpCell: (UnitCell object)
+		cutoff: (float) Maximum distance between two atoms for them to be counted as a pair (pairs with distance <=cutoff are returned)
+		indicesA: (Optional, iter of ints) Indices of the first atom in each pair. Default is ALL atoms
+		indicesB: (Optional, iter of ints) Indices of the second atom in each pair. Default is indicesA
+
+	Returns
+		pairIndicesA: (int array) Index (in inpCell.cartCoords) of the first atom in each pair
+		pairIndicesB: (int array) Index of the second atom in each pair
+		dists: (float array) Distance between each pair (nearest image convention)
+
+	NOTES:
+		a) If an atom is in both indicesA and indicesB its self-pair (distance zero) is included; this mirrors the diagonal of the full distance matrix
+
+	"""
+	boxDims = mdAnalInter.getMDAnalysisDimsFromUCellObj(inpCell)
+	allCoords = np.array( [x[:3] for x in inpCell.cartCoords], dtype=np.float64 )
+	indicesA = np.arange(len(allCoords)) if indicesA is None else np.array(indicesA, dtype=int)
+	indicesB = indicesA if indicesB is None else np.array(indicesB, dtype=int)
+
+	if (len(indicesA)==0) or (len(indicesB)==0):
+		return np.array(list(), dtype=int), np.array(list(), dtype=int), np.array(list(), dtype=np.float64)
+
+	coordsA, coordsB = allCoords[indicesA], allCoords[indicesB]
+	pairs, dists = distLib.capped_distance(coordsA, coordsB, cutoff, box=boxDims, return_distances=True)
+	pairs = np.array(pairs, dtype=int).reshape(-1,2)
+
+	return indicesA[pairs[:,0]], indicesB[pairs[:,1]], np.array(dists, dtype=np.float64)
+
+
+class NebPairListWithSkin():
+	""" Neighbour pair list which can be reused between frames (a Verlet list). Pairs are searched for within cutoff+skin; on later frames only distances for those candidate pairs are recalculated, unless an atom has moved more than skin/2 (in which case the search is redone)
+
+	Attributes:
+		nSearches: (int) The number of times the full neighbour search has been carried out (useful for tuning skin)
+
+	"""
+
+	def __init__(self, cutoff, skin=0.0):
+		""" Initializer
+		
+		Args:
+			cutoff: (float) Maximum distance between two atoms for them to be counted as a pair
+			skin: (float) Extra distance used for the neighbour search. Larger values mean searches are needed less often, but more candidate pairs need checking each frame. skin=0 means the search is redone whenever any atom moves
+
+		"""
+		self.cutoff = cutoff
+		self.skin = skin
+		self.reset()
+
+	def reset(self):
+		self.nSearches = 0
+		self._refCoords, self._refDims, self._refIndices = None, None, None
+		self._candPairsA, self._candPairsB = None, None
+
+	def getPairsForInpCell(self, inpCell, indicesA=None, indicesB=None):
+		""" Gets all pairs within cutoff; same interface/output as getNebPairsWithinCutoffForInpCell
+
+		Args:
+			inpCell: (UnitCell object)
+			indicesA: (Optional, iter of ints) Indices of the first atom in each pair. Default is ALL atoms
+			indicesB: (Optional, iter of ints) Indices of the second atom in each pair. Default is indicesA
+
+		Returns
+			pairIndicesA: (int array) Index (in inpCell.cartCoords) of the first atom in each pair
+			pairIndicesB: (int array) Index of the second atom in each pair
+			dists: (float array) Distance between each pair (nearest image convention)
+
+		"""
+		boxDims = mdAnalInter.getMDAnalysisDimsFromUCellObj(inpCell)
+		allCoords = np.array( [x[:3] for x in inpCell.cartCoords], dtype=np.float64 )
+		indices = ( None if indicesA is None else np.array(indicesA, dtype=int), None if indicesB is None else np.array(indicesB, dtype=int) )
+
+		if self._searchNeeded(allCoords, boxDims, indices):
+			currArgs = [inpCell, self.cutoff+self.skin]
+			self._candPairsA, self._candPairsB, unused = getNebPairsWithinCutoffForInpCell(*currArgs, indicesA=indicesA, indicesB=indicesB)
+			self._refCoords, self._refDims, self._refIndices = allCoords, np.array(boxDims), indices
+			self.nSearches += 1
+
+		if len(self._candPairsA)==0:
+			return self._candPairsA, self._candPairsB, np.array(list(), dtype=np.float64)
+
+		dists = distLib.calc_bonds(allCoords[self._candPairsA], allCoords[self._candPairsB], box=boxDims)
+		useMask = dists <= self.cutoff
+		return self._candPairsA[useMask], self._candPairsB[useMask], dists[useMask]
+
+	def _searchNeeded(self, allCoords, boxDims, indices):
+		if self._refCoords is None:
+			return True
+		if (len(allCoords) != len(self._refCoords)) or (not np.allclose(boxDims, self._refDims)):
+			return True
+		if not all([_areIndexArraysEqual(x,y) for x,y in zip(indices, self._refIndices)]):
+			return True
+		if len(allCoords)==0:
+			return False
+
+		displacements = distLib.calc_bonds(allCoords, self._refCoords, box=boxDims)
+		return np.max(displacements) > 0.5*self.skin
+
+
+def _areIndexArraysEqual(arrayA, arrayB):
+	if (arrayA is None) or (arrayB is None):
+		return (arrayA is None) and (arrayB is None)
+	return np.array_equal(arrayA, arrayB)
+
+
+class SparseDistMatrix():
+	""" Stores only the distances between pairs of atoms within some cutoff; indexing mirrors a full distance matrix (e.g. distMatrix[idxA][idxB]) but unstored pairs return fillValue rather than their actual distance
+
+	Meant as a drop-in for the full distance matrix when only pairs within a cutoff matter (e.g. h-bond counting or counting neighbours within a distance)
+
+	"""
+
+	def __init__(self, fillValue=np.inf):
+		""" Initializer
+		
+		Args:
+			fillValue: (float) Value returned for any pair not stored. The default (inf) means comparisons such as dist<cutoff are False for unstored pairs
+
+		"""
+		self.fillValue = fillValue
+		self._nebDicts = dict()
+
+	def addPairs(self, pairIndicesA, pairIndicesB, dists):
+		""" Adds pairwise distances to the matrix; these are stored for both [idxA][idxB] and [idxB][idxA]
+		
+		Args:
+			pairIndicesA: (iter of ints) 
+			pairIndicesB: (iter of ints) Same length as pairIndicesA
+			dists: (iter of floats) Same length as pairIndicesA
+				 
+		"""
+		for idxA, idxB, dist in zip(pairIndicesA, pairIndicesB, dists):
+			idxA, idxB, dist = int(idxA), int(idxB), float(dist)
+			self._nebDicts.setdefault(idxA, dict())[idxB] = dist
+			self._nebDicts.setdefault(idxB, dict())[idxA] = dist
+
+	def getNebIndicesAndDists(self, idx):
+		""" Returns (nebIndices, dists) for all pairs stored for idx """
+		nebDict = self._nebDicts.get(idx, dict())
+		return list(nebDict.keys()), list(nebDict.values())
+
+	def __getitem__(self, idx):
+		return _SparseDistMatrixRow(self._nebDicts.get(int(idx), dict()), self.fillValue)
+
+
+class _SparseDistMatrixRow():
+
+	def __init__(self, nebDict, fillValue):
+		self.nebDict = nebDict
+		self.fillValue = fillValue
+
+	def __getitem__(self, idx):
+		if np.ndim(idx)==0:
+			return self.nebDict.get(int(idx), self.fillValue)
+		return np.array( [self.nebDict.get(int(x), self.fillValue) for x in idx], dtype=np.float64 )
+
@@ -14,13 +14,13 @@ def getTrajSampledEveryNSteps(inpTraj, sampleEveryN, inPlace=False, createView=T
 	""" Samples input trajectory every n-steps; useful for making trajectories smaller before analysis
 	
 	Args:
-		inpTraj: (TrajectoryInMemory) MD trajectory
+		inpTraj: (TrajectoryInMemory or TrajectoryOnDisk) MD trajectory
 		sampleEveryN: (int) How frequently to sample. e.g. if set to 10 we take every 10 steps 
 		inPlace: (Bool) Whether to do this in place or not; if False a new trajectory is returned, else the trajectory is updated in place
 		createView: (Bool) Whether the output trajectory references the same steps as inpTraj. This is more memory efficient and cheaper to do (no copying involved). If True then altering a step from outTraj will also alter inpTraj, which may lead to bugs if the output trajectory needs modifying later
 			 
 	Returns
-		outTraj: (TrajectoryInMemory) The trajectory sampled every N steps. Only returned if inPlace is False
+		outTraj: (TrajectoryInMemory) The trajectory sampled every N steps. Only returned if inPlace is False. If inpTraj is a TrajectoryOnDisk then this is also a TrajectoryOnDisk (sharing the same file)
  
 	Raise:
 		ValueError: If both createView and inPlace are set to True
@@ -29,6 +29,12 @@ def getTrajSampledEveryNSteps(inpTraj, sampleEveryN, inPlace=False, createView=T
 	if inPlace and createView:
 		raise ValueError("inPlace and createView are both set to True; at least one of these needs to be set to False for now")
 
+	#Steps are decoded on access for on-disk trajectories; so we just slice the index (nothing to copy/view)
+	if isinstance(inpTraj, trajCoreHelp.TrajectoryOnDisk):
+		if inPlace:
+			inpTraj.trajSteps = inpTraj.trajSteps[::sampleEveryN]
+			return None
+		return inpTraj[::sampleEveryN]
 
 	outSteps = list()
 	for idx,step in enumerate(inpTraj):
@@ -76,13 +82,13 @@ def getTrajBetweenTimes(inpTraj, minTime=0, maxTime=None, timeTol=1e-5):
 	""" Get input trajectory with ONLY the steps which fall between minTime and maxTime
 	
 	Args:
-		inpTraj: (TrajectoryInMemory) MD trajectory
+		inpTraj: (TrajectoryInMemory or TrajectoryOnDisk) MD trajectory
 		minTime: (float, Optional) Minimum time to include in the trajectory. 
 		maxTime: (float, Optional) Maximum time to include in the trajectory; default in np.inf
 		timeTol: (float, Optional) A time is considered outside the range iff time+timeTol>maxTime and time-timeTol<minTime
 
 	Returns
-		outTraj: (TrajectoryInMemory) For now this will share data with inpTraj (i.e. changing inpTraj WILL change whatever you assign outTraj to)
+		outTraj: (TrajectoryInMemory) For now this will share data with inpTraj (i.e. changing inpTraj WILL change whatever you assign outTraj to). If inpTraj is a TrajectoryOnDisk then this is a TrajectoryOnDisk (steps are decoded one at a time, so memory use stays bounded)
  
 	Raises:
 		ValueError: If minTime > maxTime
@@ -93,11 +99,18 @@ def getTrajBetweenTimes(inpTraj, minTime=0, maxTime=None, timeTol=1e-5):
 		raise ValueError("maxTime > minTime required; Actual values are minTime={}, maxTime={}".format(minTime,maxTime))
 
 
-	outSteps = list()
+	outSteps, outIndices = list(), list()
+	onDisk = isinstance(inpTraj, trajCoreHelp.TrajectoryOnDisk)
 	for idx,currStep in enumerate(inpTraj):
 		currTime = currStep.time
 		if (currTime > minTime-timeTol) and (currTime < maxTime + timeTol):
-			outSteps.append(currStep)
+			if onDisk:
+				outIndices.append(idx)
+			else:
+				outSteps.append(currStep)
+
+	if onDisk:
+		return inpTraj.getTrajFromIndices(outIndices)
 	return trajCoreHelp.TrajectoryInMemory(outSteps)
 
 def addVelocitiesToTrajInMemNVT(inpTraj, posConvFactor=1, timeConvFactor=1, velKey="velocities_from_pos", everyN=1):
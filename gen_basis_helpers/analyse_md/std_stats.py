@@ -1,6 +1,10 @@
 
 import math
 
+import numpy as np
+
+from . import time_series_stats as tsStatsHelp
+
 
 
 def calcStandardErrorOfMeanForUncorrelatedData(stdDev, nSamples):
@@ -34,9 +38,7 @@ def calcVarianceOfData(inpData, besselCorr=False):
 	"""
 	if besselCorr:
 		raise NotImplementedError("")
-	mean = sum(inpData)/len(inpData)
-	outVal = (1/len(inpData)) * sum([(x-mean)**2 for x in inpData])
-	return outVal
+	return float( np.var(np.array(inpData, dtype=np.float64)) )
 
 
 def getStatsFromBlockingDataUpToMaxOrder(inpData, maxOrder):
@@ -49,27 +51,17 @@ def getStatsFromBlockingDataUpToMaxOrder(inpData, maxOrder):
 	Returns
 		outDicts: (iter of dicts) Contains various info for each order. Some shown belowish
 
+	NOTES:
+		For many series at once (or to avoid building the dicts) use time_series_stats.getBlockingStats directly
+
 	"""
+	blockingDict = tsStatsHelp.getBlockingStats(inpData, maxOrder=maxOrder)
 	outDicts = list()
-	currOrder = 0
-	currBlock = inpData
-
-	while currOrder <= maxOrder:
-		#Sort out this order
-		currVar = calcVarianceOfData(currBlock) / (len(currBlock)-1)
-		currStdDev = math.sqrt(currVar)
-		currStdDevError = currStdDev * (1 / math.sqrt( 2*(len(currBlock)-1) ))
-		currMean = sum(currBlock)/len(currBlock)
-		currDict = {"order":currOrder, "mean":currMean, "mean_std_dev":currStdDev, "mean_std_dev_std_dev":currStdDevError}
+	for idx,order in enumerate(blockingDict["order"]):
+		currDict = {"order":int(order)}
+		for key in ["mean", "mean_std_dev", "mean_std_dev_std_dev"]:
+			currDict[key] = float(blockingDict[key][idx])
 		outDicts.append(currDict)
-
-		#Block the data
-		currBlock = _getDataDividedIntoTwoBlocks(currBlock)
-
-		#Break if we cant block data further
-		if len(currBlock) < 2:
-			break
-		currOrder += 1
 	return outDicts
 
 
@@ -116,32 +108,12 @@ def getCentralWindowAverageFromIter(inpIter, widthEachSide, fillValWhenNotCalc=N
 		outVals: (iter of float) Central moving average. Each data point is an average of 2*widthEachSide + 1 data points
  
 	"""
-	stack = list()
-	outVals = list()
-	lenIter = len(inpIter)
-	reqStackSize = 2*widthEachSide + 1
-
-	#Initialise our stack
-	stack = [x for x in inpIter[:widthEachSide]]
-
-	#Calculate moving averages
-	for idx,val in enumerate(inpIter):
-
-		#Deal with the stack
-		if len(stack) == reqStackSize:
-			stack.pop(0)
-		
-		if idx < lenIter-widthEachSide:
-			stack.append(inpIter[idx+widthEachSide])
-
-		#Calculate moving average
-		if len(stack) < reqStackSize:
-			outVals.append(fillValWhenNotCalc)
-		else:
-			outVals.append( sum(stack)/len(stack) )
-		
-	return outVals
-
-
+	outVals = tsStatsHelp.getCentralWindowAverages(inpIter, widthEachSide).tolist()
+	lenIter = len(outVals)
+	if lenIter < 2*widthEachSide + 1:
+		return [fillValWhenNotCalc for x in outVals]
 
+	for idx in list(range(widthEachSide)) + list(range(lenIter-widthEachSide,lenIter)):
+		outVals[idx] = fillValWhenNotCalc
+	return outVals
 
@@ -1,4 +1,5 @@
 
+import gzip
 import os
 import itertools as it
 import json
@@ -103,23 +104,25 @@ class ThermoDataStandard(ThermoDataInterface):
 
 		return True
 
-def dumpStandardThermoDataToFile(thermoDataObj, outFile):
+def dumpStandardThermoDataToFile(thermoDataObj, outFile, compress=False):
 	""" Dump MD thermodynamic info (e.g. temperatures/pressures) to a file. File is simply json
 	
 	Args:
 		thermoDataObj: (ThermoDataStandard)
 		outFile: (str) Path to the output file
+		compress: (Bool) If True the json is gzip compressed (readThermoDataFromFile detects this automatically)
 			 
 	"""
 	outDir = os.path.split(outFile)[0]
 	pathlib.Path(outDir).mkdir(parents=True, exist_ok=True)
 
 	outDict = thermoDataObj.toDict()
-	with open(outFile,"w") as f:
+	openFunct = gzip.open if compress else open
+	with openFunct(outFile,"wt") as f:
 		json.dump(outDict, f)
 
 def readThermoDataFromFile(inpFile):
-	""" Reads a thermoData file (format defined by dumpStandardThermoDataToFile) into a ThermoDataStandard object
+	""" Reads a thermoData file (format defined by dumpStandardThermoDataToFile; optionally gzip compressed) into a ThermoDataStandard object
 	
 	Args:
 		inpFile: (str) Path to the file containing thermo data
@@ -128,7 +131,11 @@ def readThermoDataFromFile(inpFile):
 		thermoDataObj: (ThermoDataStandard)
 	
 	"""
-	with open(inpFile,"r") as f:
+	with open(inpFile,"rb") as f:
+		isGzipped = (f.read(2) == b"\x1f\x8b")
+
+	openFunct = gzip.open if isGzipped else open
+	with openFunct(inpFile,"rt") as f:
 		inpDict = json.load(f)
 	return ThermoDataStandard.fromDict(inpDict)
 
@@ -0,0 +1,254 @@
+""" Array-based statistics for (many) long time series at once; e.g. thermo properties or class counts from an MD run. Functions take either a single series (len-N) or a stack of series (nSeries x N) and work along the last axis """
+
+import math
+
+import numpy as np
+
+
+def getBlockingStats(inpData, maxOrder=None):
+	""" Array version of std_stats.getStatsFromBlockingDataUpToMaxOrder. At each order the data is averaged in pairs (so order k contains means of 2^k consecutive points) and the standard error of the mean estimated from the blocked data (see e.g. https://doi.org/10.1063/1.457480)
+
+	Args:
+		inpData: (len-N or nSeries x N array-like)
+		maxOrder: (Optional, int) The maximum blocking order. Default is to keep going until fewer than 2 blocks remain
+
+	Returns
+		outDict: (dict) Keys are "order" (len-nOrders int array), "mean", "mean_std_dev", "mean_std_dev_std_dev" and "n_blocks". Apart from "order" and "n_blocks" (both len-nOrders) values are nSeries x nOrders arrays (or len-nOrders if inpData was 1-d)
+
+	"""
+	inpArray, squeeze = _getTwoDimFloatArray(inpData)
+	allMeans, allVars, allCounts = list(), list(), list()
+
+	currBlock, currOrder = inpArray, 0
+	while (maxOrder is None) or (currOrder <= maxOrder):
+		allCounts.append( currBlock.shape[1] )
+		allMeans.append( np.mean(currBlock, axis=1) )
+		allVars.append( np.var(currBlock, axis=1) )
+
+		nPairs = currBlock.shape[1] // 2
+		if nPairs < 2:
+			break
+		currBlock = 0.5*( currBlock[:,0:2*nPairs:2] + currBlock[:,1:2*nPairs:2] )
+		currOrder += 1
+
+	outDict = _getBlockingStatsDict( np.array(allCounts), np.array(allMeans).T, np.array(allVars).T )
+	return _getSqueezedDict(outDict, squeeze)
+
+
+def getAutocorrelationFunctions(inpData, maxLag=None):
+	""" Gets the normalised autocorrelation function for each series using FFTs (O(N log N) rather than O(N^2))
+
+	Args:
+		inpData: (len-N or nSeries x N array-like)
+		maxLag: (Optional, int) The maximum lag to return. Default is N-1
+
+	Returns
+		acfs: (nSeries x (maxLag+1) array, or len-(maxLag+1) if inpData was 1-d) acfs[...,0] is 1 unless a series is constant (in which case all values are nan)
+
+	NOTES:
+		Uses the standard (biased) estimator; i.e. the sum at each lag is divided by N rather than N-lag
+
+	"""
+	inpArray, squeeze = _getTwoDimFloatArray(inpData)
+	nPoints = inpArray.shape[1]
+	maxLag = nPoints-1 if maxLag is None else min(maxLag, nPoints-1)
+
+	centred = inpArray - np.mean(inpArray, axis=1)[:,np.newaxis]
+	fftLength = 2**math.ceil( math.log2(2*nPoints) ) #Zero-padding means the FFT gives linear (not circular) correlations
+	fftVals = np.fft.rfft(centred, n=fftLength, axis=1)
+	autoCov = np.fft.irfft(fftVals*np.conjugate(fftVals), n=fftLength, axis=1)[:,:maxLag+1]
+
+	with np.errstate(divide="ignore", invalid="ignore"):
+		outVals = autoCov / autoCov[:,0][:,np.newaxis]
+
+	return outVals[0] if squeeze else outVals
+
+
+def getIntegratedCorrelationTimes(inpData, windowFactor=5, maxLag=None):
+	""" Gets the integrated autocorrelation time for each series, tau = 1 + 2*sum_{t=1}^{M} acf(t), using the automatic windowing of Sokal (the smallest M with M >= windowFactor*tau(M))
+
+	Args:
+		inpData: (len-N or nSeries x N array-like)
+		windowFactor: (float) Larger values are less biased but noisier; 5 is the usual choice
+		maxLag: (Optional, int) Maximum lag to consider. Default is N-1
+
+	Returns
+		corrTimes: (len-nSeries array, or float if inpData was 1-d) In units of the sampling interval. Equal to 1 for uncorrelated data
+
+	NOTES:
+		The standard error of the mean is then sqrt(var*tau/N); see getStandardErrorsFromCorrelationTimes
+
+	"""
+	inpArray, squeeze = _getTwoDimFloatArray(inpData)
+	acfs = getAutocorrelationFunctions(inpArray, maxLag=maxLag)
+
+	cumulTaus = 2*np.cumsum(acfs, axis=1) - 1 #tau(M) for every window size M
+	lags = np.arange(acfs.shape[1])
+	windowOk = lags[np.newaxis,:] >= windowFactor*cumulTaus
+
+	#Use the largest window if the criterion is never met (usually means the series is too short)
+	windowIndices = np.where( np.any(windowOk,axis=1), np.argmax(windowOk,axis=1), acfs.shape[1]-1 )
+	outVals = cumulTaus[ np.arange(len(cumulTaus)), windowIndices ]
+
+	return float(outVals[0]) if squeeze else outVals
+
+
+def getStandardErrorsFromCorrelationTimes(inpData, corrTimes=None, windowFactor=5):
+	""" Gets the standard error of the mean for each series, accounting for correlations via the integrated correlation time
+
+	Args:
+		inpData: (len-N or nSeries x N array-like)
+		corrTimes: (Optional, len-nSeries array) Integrated correlation times. Default is to calculate with getIntegratedCorrelationTimes
+		windowFactor: (float) Passed to getIntegratedCorrelationTimes if needed
+
+	Returns
+		stdErrors: (len-nSeries array, or float if inpData was 1-d)
+
+	"""
+	inpArray, squeeze = _getTwoDimFloatArray(inpData)
+	corrTimes = getIntegratedCorrelationTimes(inpArray, windowFactor=windowFactor) if corrTimes is None else np.array(corrTimes, dtype=np.float64).reshape(-1)
+	outVals = np.sqrt( np.var(inpArray, axis=1)*corrTimes / inpArray.shape[1] )
+	return float(outVals[0]) if squeeze else outVals
+
+
+def getCentralWindowAverages(inpData, widthEachSide, fillVal=np.nan):
+	""" Array version of std_stats.getCentralWindowAverageFromIter; each output point is the mean of the 2*widthEachSide + 1 points centred on it
+
+	Args:
+		inpData: (len-N or nSeries x N array-like)
+		widthEachSide: (int) Number of data points to take each side when calculating the mean
+		fillVal: (float) Value used for points where the window would go past the start/end of the data
+
+	Returns
+		outVals: (same shape as inpData) Float array of central moving averages
+
+	"""
+	inpArray, squeeze = _getTwoDimFloatArray(inpData)
+	nSeries, nPoints = inpArray.shape
+	windowSize = 2*widthEachSide + 1
+	outVals = np.full( (nSeries,nPoints), fillVal, dtype=np.float64 )
+
+	if nPoints >= windowSize:
+		#Subtracting the mean first limits rounding errors building up in the cumulative sum for long series
+		means = np.mean(inpArray, axis=1)[:,np.newaxis]
+		cumulSums = np.concatenate( [np.zeros((nSeries,1)), np.cumsum(inpArray-means, axis=1)], axis=1 )
+		windowSums = cumulSums[:,windowSize:] - cumulSums[:,:-windowSize]
+		outVals[:, widthEachSide:nPoints-widthEachSide] = means + windowSums/windowSize
+
+	return outVals[0] if squeeze else outVals
+
+
+class OnlineBlockingStats():
+	""" Accumulates blocking statistics for many series as data arrives (e.g. while a simulation is still running). Memory use is O(nSeries*log(N)) and getBlockingStats() gives the same values as calling getBlockingStats on all data seen so far
+
+	"""
+
+	def __init__(self, nSeries, maxOrder=None):
+		""" Initializer
+
+		Args:
+			nSeries: (int) Number of series being tracked
+			maxOrder: (Optional, int) The maximum blocking order to keep. Default is no limit
+
+		"""
+		self.nSeries = nSeries
+		self.maxOrder = maxOrder
+		self.reset()
+
+	def reset(self):
+		self._counts, self._means, self._sumSqDiffs, self._pending = list(), list(), list(), list()
+
+	@property
+	def nPoints(self):
+		return self._counts[0] if len(self._counts)>0 else 0
+
+	def update(self, newVals):
+		""" Adds new data points
+
+		Args:
+			newVals: (len-nSeries array-like or nSeries x nNew array-like) Value(s) for each series. A 1-d input is taken as a single time step
+
+		"""
+		newVals = np.array(newVals, dtype=np.float64)
+		if newVals.ndim==1:
+			newVals = newVals[:,np.newaxis]
+		if newVals.shape[0] != self.nSeries:
+			raise ValueError("Expected values for {} series; got {}".format(self.nSeries, newVals.shape[0]))
+
+		currVals, order = newVals, 0
+		while (currVals.shape[1] > 0) and ((self.maxOrder is None) or (order <= self.maxOrder)):
+			if order == len(self._counts):
+				self._appendOrder()
+			self._addValsToOrder(order, currVals)
+
+			#Pair up values (including any left over from the previous update) to get the next order
+			if self._pending[order] is not None:
+				currVals = np.concatenate([self._pending[order][:,np.newaxis], currVals], axis=1)
+			nPairs = currVals.shape[1] // 2
+			self._pending[order] = currVals[:,-1] if (currVals.shape[1] % 2 == 1) else None
+			currVals = 0.5*( currVals[:,0:2*nPairs:2] + currVals[:,1:2*nPairs:2] )
+			order += 1
+
+	def getBlockingStats(self):
+		""" Gets blocking statistics for all data seen so far
+
+		Returns
+			outDict: (dict) Same format as getBlockingStats (always the nSeries x nOrders form). Only orders with at least 2 blocks are included (except order 0)
+
+		Raises:
+			ValueError: If no data has been added yet
+
+		"""
+		if len(self._counts)==0:
+			raise ValueError("No data has been added")
+		nOrders = max( 1, len([x for x in self._counts if x>=2]) )
+
+		counts = np.array(self._counts[:nOrders])
+		means = np.array(self._means[:nOrders]).T
+		variances = (np.array(self._sumSqDiffs[:nOrders]) / counts[:,np.newaxis]).T
+		return _getBlockingStatsDict(counts, means, variances)
+
+	def _appendOrder(self):
+		self._counts.append(0)
+		self._means.append( np.zeros(self.nSeries) )
+		self._sumSqDiffs.append( np.zeros(self.nSeries) )
+		self._pending.append(None)
+
+	#Merges running mean/sum of squared differences with those of the new values (Chan et al. parallel algorithm); more stable than tracking sums of squares
+	def _addValsToOrder(self, order, newVals):
+		nOld, nNew = self._counts[order], newVals.shape[1]
+		newMeans = np.mean(newVals, axis=1)
+		newSumSqDiffs = np.sum( (newVals-newMeans[:,np.newaxis])**2, axis=1 )
+		nTotal = nOld + nNew
+		deltas = newMeans - self._means[order]
+
+		self._means[order] = self._means[order] + deltas*(nNew/nTotal)
+		self._sumSqDiffs[order] = self._sumSqDiffs[order] + newSumSqDiffs + (deltas**2)*(nOld*nNew/nTotal)
+		self._counts[order] = nTotal
+
+
+def _getBlockingStatsDict(counts, means, variances):
+	#Variances are the (biased) variance of the block values at each order
+	with np.errstate(divide="ignore", invalid="ignore"):
+		meanStdDevs = np.sqrt( variances / (counts-1)[np.newaxis,:] )
+		meanStdDevStdDevs = meanStdDevs / np.sqrt( 2*(counts-1) )[np.newaxis,:]
+
+	outDict = {"order":np.arange(len(counts)), "n_blocks":np.array(counts), "mean":means,
+	           "mean_std_dev":meanStdDevs, "mean_std_dev_std_dev":meanStdDevStdDevs}
+	return outDict
+
+
+def _getSqueezedDict(inpDict, squeeze):
+	if not squeeze:
+		return inpDict
+	return {key:(val[0] if np.ndim(val)==2 else val) for key,val in inpDict.items()}
+
+
+def _getTwoDimFloatArray(inpData):
+	outArray = np.array(inpData, dtype=np.float64)
+	if outArray.ndim==1:
+		return outArray[np.newaxis,:], True
+	elif outArray.ndim==2:
+		return outArray, False
+	raise ValueError("Expected 1-d or 2-d input data; got {} dimensions".format(outArray.ndim))
+
@@ -0,0 +1,333 @@
+""" Binary (columnar) storage for trajectories. Each quantity is stored as one contiguous array on disk (one file per quantity) which is memory-mapped on reading. This means a single frame can be accessed as a zero-copy view and reading a trajectory doesnt involve any text parsing
+
+The format is a directory containing:
+	meta.json: Number of steps/atoms, element symbols (stored once) and info on any extra attributes
+	coords.bin: float64, shape (nSteps, nAtoms, 3). Cartesian coordinates
+	latt_vects.bin: float64, shape (nSteps, 3, 3). Lattice vectors
+	steps.bin/times.bin: float64, shape (nSteps,). NaN means the value was None
+	extra_{attr}.bin: float64, shape (nSteps, *attrShape). Values of extra attributes on TrajStepFlexible (e.g. velocities)
+	extra_{attr}_present.bin: bool, shape (nSteps,). Whether each step has the extra attribute
+
+"""
+
+import itertools as it
+import json
+import os
+import pathlib
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+from . import traj_core as trajCoreHelp
+from . import traj_io as trajIoHelp
+
+
+FORMAT_VERSION = 1
+_META_FILE_NAME = "meta.json"
+_SUPPORTED_EXTRA_CMP_TYPES = ["numerical", "numericalArray"]
+
+
+class TrajectoryBinary(trajCoreHelp.TrajectoryBase):
+	""" Trajectory read from the binary format (see dumpTrajObjToBinaryFormat). Arrays are memory-mapped, so only frames which are accessed get read from disk
+
+	Iterating yields TrajStepFlexible objects (same as TrajectoryInMemory read from a *.traj file). For analysis it is usually much faster to work with the arrays directly (e.g. getCoordsForFrame/coords)
+
+	"""
+
+	def __init__(self, inpDir, frameIndices=None):
+		""" Initializer
+
+		Args:
+			inpDir: (str) Path to the directory holding the binary trajectory
+			frameIndices: (iter of ints, Optional) Which frames from the file to include (and in which order). Default is to use all frames
+
+		"""
+		self.inpDir = inpDir
+		self._meta = _readMetaDict(inpDir)
+		self._arrays = dict()
+		nFrames = self._meta["nSteps"]
+		self.frameIndices = np.arange(nFrames, dtype=np.int64) if frameIndices is None else np.array(frameIndices, dtype=np.int64)
+
+	@property
+	def nAtoms(self):
+		return self._meta["nAtoms"]
+
+	@property
+	def elements(self):
+		""" Element symbol for each atom; these are the same for every frame """
+		return list(self._meta["elements"])
+
+	@property
+	def extraAttrs(self):
+		""" Names of extra attributes stored (e.g. "velocities") """
+		return list(self._meta["extraAttrs"].keys())
+
+	@property
+	def coords(self):
+		""" (nFrames, nAtoms, 3) array of cartesian coordinates. This is a memory-map when all frames are used in their original order, else a copy of the selected frames """
+		return self._getSelectedFrames("coords")
+
+	@property
+	def lattVects(self):
+		""" (nFrames, 3, 3) array of lattice vectors """
+		return self._getSelectedFrames("latt_vects")
+
+	@property
+	def steps(self):
+		""" (nFrames,) float array of step numbers; NaN where the step was None """
+		return self._getSelectedFrames("steps")
+
+	@property
+	def times(self):
+		""" (nFrames,) float array of times; NaN where the time was None """
+		return self._getSelectedFrames("times")
+
+	@property
+	def trajSteps(self):
+		""" Returns self; indexing/slicing/len work on the object directly without decoding every step """
+		return self
+
+	def getCoordsForFrame(self, idx):
+		""" Returns a (zero-copy) (nAtoms,3) view of the coordinates for frame idx """
+		return self._getArray("coords")[self.frameIndices[idx]]
+
+	def getLattVectsForFrame(self, idx):
+		""" Returns a (zero-copy) (3,3) view of the lattice vectors for frame idx """
+		return self._getArray("latt_vects")[self.frameIndices[idx]]
+
+	def getExtraAttrArray(self, attr):
+		""" Get values of an extra attribute (e.g. velocities) for all frames
+
+		Args:
+			attr: (str) Name of the attribute
+
+		Returns
+			outVals: (nFrames, *attrShape) array. Frames without the attribute contain NaN
+			present: (nFrames,) bool array. Whether each frame has the attribute
+
+		"""
+		return self._getSelectedFrames(_getExtraAttrKey(attr)), self._getSelectedFrames(_getExtraAttrPresentKey(attr))
+
+	def getTrajFromIndices(self, indices):
+		""" Get a TrajectoryBinary containing only the frames at indices (NOT step numbers). Shares the same files as this object """
+		return TrajectoryBinary(self.inpDir, frameIndices=self.frameIndices[np.array(indices, dtype=np.int64)])
+
+	def toTrajInMemory(self):
+		""" Returns a TrajectoryInMemory containing all steps in this object """
+		return trajCoreHelp.TrajectoryInMemory([x for x in self])
+
+	def __len__(self):
+		return len(self.frameIndices)
+
+	def __iter__(self):
+		for idx in range(len(self)):
+			yield self._getTrajStepForFrame(idx)
+
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			return TrajectoryBinary(self.inpDir, frameIndices=self.frameIndices[key])
+		return self._getTrajStepForFrame(key)
+
+	def _getTrajStepForFrame(self, idx):
+		fileIdx = self.frameIndices[idx]
+		unitCell = uCellHelp.UnitCell.fromLattVects( self._getArray("latt_vects")[fileIdx].tolist() )
+		unitCell.cartCoords = [ list(coord) + [ele] for coord,ele in it.zip_longest(self._getArray("coords")[fileIdx].tolist(), self._meta["elements"]) ]
+
+		step, time = self._getArray("steps")[fileIdx], self._getArray("times")[fileIdx]
+		step = None if np.isnan(step) else int(step)
+		time = None if np.isnan(time) else float(time)
+
+		extraAttrDict = dict()
+		for attr, attrInfo in self._meta["extraAttrs"].items():
+			if self._getArray(_getExtraAttrPresentKey(attr))[fileIdx]:
+				currVal = self._getArray(_getExtraAttrKey(attr))[fileIdx].tolist()
+				extraAttrDict[attr] = {"value":currVal, "cmpType":attrInfo["cmpType"]}
+
+		return trajCoreHelp.TrajStepFlexible(unitCell=unitCell, step=step, time=time, extraAttrDict=extraAttrDict)
+
+	def _getSelectedFrames(self, key):
+		outArray = self._getArray(key)
+		if np.array_equal(self.frameIndices, np.arange(outArray.shape[0])):
+			return outArray
+		return outArray[self.frameIndices]
+
+	#Memory-maps would otherwise be pickled as full in-memory arrays (e.g. when sending to worker processes); they get re-opened lazily instead
+	def __getstate__(self):
+		outState = dict(self.__dict__)
+		outState["_arrays"] = dict()
+		return outState
+
+	def _getArray(self, key):
+		if key not in self._arrays:
+			arrayInfo = self._meta["arrays"][key]
+			outPath = os.path.join(self.inpDir, key + ".bin")
+			shape = tuple(arrayInfo["shape"])
+			if shape[0]==0:
+				self._arrays[key] = np.zeros(shape, dtype=arrayInfo["dtype"])
+			else:
+				self._arrays[key] = np.memmap(outPath, dtype=arrayInfo["dtype"], mode="r", shape=shape)
+		return self._arrays[key]
+
+
+def dumpTrajObjToBinaryFormat(trajObj, outDir):
+	""" Dump a trajectory to the binary format. Steps are written one at a time, so memory use is independent of the trajectory length (if trajObj is lazy, e.g. TrajectoryOnDisk)
+
+	Args:
+		trajObj: (TrajectoryBase object) Contains all steps in the trajectory. All steps must contain the same atoms in the same order
+		outDir: (str) Path to the output directory. Created if it doesnt exist
+
+	Raises:
+		ValueError: If the atoms (elements/number) change between steps or if an extra attribute cant be stored as a float array
+
+	"""
+	pathlib.Path(outDir).mkdir(parents=True, exist_ok=True)
+	writer = _BinaryTrajWriter(outDir)
+	try:
+		for trajStep in trajObj:
+			writer.addStep(trajStep)
+	finally:
+		writer.close()
+
+
+def readTrajFromBinaryFormat(inpDir):
+	""" Reads a trajectory dumped with dumpTrajObjToBinaryFormat
+
+	Args:
+		inpDir: (str) Path to the directory holding the binary trajectory
+
+	Returns
+		trajObj: (TrajectoryBinary) Memory-mapped trajectory
+
+	"""
+	return TrajectoryBinary(inpDir)
+
+
+def convertTrajFileToBinaryFormat(inpFile, outDir):
+	""" Converts a *.traj file (format defined by traj_core.dumpTrajObjToFile) to the binary format; one step is held in memory at a time """
+	dumpTrajObjToBinaryFormat(trajCoreHelp.TrajectoryOnDisk(inpFile), outDir)
+
+
+def convertBinaryFormatToTrajFile(inpDir, outFile):
+	""" Converts the binary format to a *.traj file (format defined by traj_core.dumpTrajObjToFile) """
+	trajCoreHelp.dumpTrajObjToFile(TrajectoryBinary(inpDir), outFile)
+
+
+def convertSimpleExtendedXyzToBinaryFormat(inpPath, outDir):
+	""" Converts an extended xyz file (see traj_io.readTrajFromSimpleExtendedXyzFormat) to the binary format """
+	dumpTrajObjToBinaryFormat(trajIoHelp.readTrajFromSimpleExtendedXyzFormatVectorized(inpPath), outDir)
+
+
+def convertBinaryFormatToSimpleExtendedXyz(inpDir, outPath):
+	""" Converts the binary format to an extended xyz file (see traj_io.writeTrajToSimpleExtendedXyzFormat). Extra attributes (e.g. velocities) are not written """
+	inpTraj = TrajectoryBinary(inpDir)
+	steps = [None if np.isnan(x) else int(x) for x in inpTraj.steps]
+	times = [None if np.isnan(x) else float(x) for x in inpTraj.times]
+	currKwargs = {"steps":steps, "times":times}
+	trajIoHelp.writeFramesToSimpleExtendedXyzFormat(outPath, inpTraj.coords, inpTraj.lattVects, inpTraj.elements, **currKwargs)
+
+
+class _BinaryTrajWriter():
+	""" Appends steps to the binary files one at a time; meta data (including array shapes) is written on close """
+
+	def __init__(self, outDir):
+		self.outDir = outDir
+		self.nSteps = 0
+		self.elements = None
+		self.extraAttrs = dict()
+		self._fileObjs = dict()
+		self._shapes = dict()
+		self._dtypes = dict()
+
+	def addStep(self, trajStep):
+		cartCoords = trajStep.unitCell.cartCoords
+		elements = [x[-1] for x in cartCoords]
+		if self.elements is None:
+			self.elements = elements
+		elif elements != self.elements:
+			raise ValueError("Atoms at step {} differ from those in the first step; binary format requires the same atoms in every step".format(trajStep.step))
+
+		self._writeVals("coords", np.array([x[:3] for x in cartCoords], dtype=np.float64))
+		self._writeVals("latt_vects", np.array(trajStep.unitCell.lattVects, dtype=np.float64))
+		self._writeVals("steps", np.array(np.nan if trajStep.step is None else trajStep.step, dtype=np.float64))
+		self._writeVals("times", np.array(np.nan if trajStep.time is None else trajStep.time, dtype=np.float64))
+		self._writeExtraAttrs(trajStep)
+		self.nSteps += 1
+
+	def _writeExtraAttrs(self, trajStep):
+		currAttrs = getattr(trajStep, "extraAttrs", set())
+
+		#Attributes are only registered once they have a value; None gives no info on the shape
+		for attr in sorted(currAttrs):
+			if (attr not in self.extraAttrs) and (getattr(trajStep, attr) is not None):
+				self._registerExtraAttr(trajStep, attr)
+
+		for attr in self.extraAttrs.keys():
+			present = (attr in currAttrs) and (getattr(trajStep, attr) is not None)
+			if present:
+				currVals = np.array(getattr(trajStep, attr), dtype=np.float64)
+			else:
+				currVals = np.full(self.extraAttrs[attr]["shape"], np.nan)
+			self._writeVals(_getExtraAttrKey(attr), currVals)
+			self._writeVals(_getExtraAttrPresentKey(attr), np.array(present, dtype=bool))
+
+	def _registerExtraAttr(self, trajStep, attr):
+		cmpType = _getCmpTypeForAttr(trajStep, attr)
+		if cmpType not in _SUPPORTED_EXTRA_CMP_TYPES:
+			raise ValueError("Cant store attribute {} with cmpType={}; only {} are supported".format(attr, cmpType, _SUPPORTED_EXTRA_CMP_TYPES))
+
+		shape = list( np.array(getattr(trajStep, attr), dtype=np.float64).shape )
+		self.extraAttrs[attr] = {"cmpType":cmpType, "shape":shape}
+
+		#Back-fill any earlier steps which didnt have this attribute
+		for unused in range(self.nSteps):
+			self._writeVals(_getExtraAttrKey(attr), np.full(shape, np.nan))
+			self._writeVals(_getExtraAttrPresentKey(attr), np.array(False, dtype=bool))
+
+	def _writeVals(self, key, vals):
+		if key not in self._fileObjs:
+			self._fileObjs[key] = open(os.path.join(self.outDir, key + ".bin"), "wb")
+			self._shapes[key], self._dtypes[key] = list(vals.shape), vals.dtype.str
+		elif list(vals.shape) != self._shapes[key]:
+			raise ValueError("Shape of {} changed from {} to {}".format(key, self._shapes[key], list(vals.shape)))
+		self._fileObjs[key].write( np.ascontiguousarray(vals).tobytes() )
+
+	def close(self):
+		for fileObj in self._fileObjs.values():
+			fileObj.close()
+
+		arrays = {key: {"shape":[self.nSteps] + self._shapes[key], "dtype":self._dtypes[key]} for key in self._fileObjs.keys()}
+		nAtoms = 0 if self.elements is None else len(self.elements)
+		for key, shape in [ ["coords",[nAtoms,3]], ["latt_vects",[3,3]], ["steps",[]], ["times",[]] ]:
+			if key not in arrays:
+				arrays[key] = {"shape":[0]+shape, "dtype":np.dtype(np.float64).str}
+
+		metaDict = {"version":FORMAT_VERSION, "nSteps":self.nSteps, "nAtoms":nAtoms,
+		            "elements": list() if self.elements is None else self.elements,
+		            "extraAttrs":self.extraAttrs, "arrays":arrays}
+
+		with open(os.path.join(self.outDir, _META_FILE_NAME), "wt") as f:
+			json.dump(metaDict, f)
+
+
+def _getCmpTypeForAttr(trajStep, attr):
+	if attr in trajStep.numericalArrayCmpAttrs:
+		return "numericalArray"
+	elif attr in trajStep.numericalCmpAttrs:
+		return "numerical"
+	return "normal"
+
+
+def _getExtraAttrKey(attr):
+	return "extra_{}".format(attr)
+
+
+def _getExtraAttrPresentKey(attr):
+	return "extra_{}_present".format(attr)
+
+
+def _readMetaDict(inpDir):
+	with open(os.path.join(inpDir, _META_FILE_NAME), "rt") as f:
+		outDict = json.load(f)
+	return outDict
+
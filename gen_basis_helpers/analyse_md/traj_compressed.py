@@ -0,0 +1,238 @@
+""" Compressed, chunked storage for trajectories. Frames are stored in blocks (each block is a compressed .npz holding columnar arrays, similar to traj_binary) and a manifest records which frames/steps/times are in each block along with a checksum of the block file. Readers use the manifest to decompress only the blocks needed for a subset of frames
+
+The format is a directory containing:
+	manifest.json: Number of steps/atoms, element symbols and per-chunk info ("fileName", "startFrame", "nFrames", "firstStep", "lastStep", "minTime", "maxTime", "extraAttrs", "sha256")
+	chunk_{idx}.npz: Arrays "coords" (nFrames, nAtoms, 3), "latt_vects" (nFrames, 3, 3), "steps"/"times" (nFrames,; NaN means None) and "extra_{attr}"/"extra_{attr}_present" for any extra attributes
+
+"""
+
+import hashlib
+import io
+import itertools as it
+import json
+import os
+import pathlib
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+from . import traj_binary as trajBinaryHelp
+from . import traj_core as trajCoreHelp
+
+
+FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = "manifest.json"
+DEFAULT_FRAMES_PER_CHUNK = 200
+
+
+def dumpTrajObjToCompressedFormat(trajObj, outDir, framesPerChunk=DEFAULT_FRAMES_PER_CHUNK):
+	""" Dump a trajectory to the compressed chunked format. Only one chunk of steps is held in memory at a time (if trajObj is lazy, e.g. TrajectoryOnDisk)
+
+	Args:
+		trajObj: (TrajectoryBase object) Contains all steps in the trajectory. Any iter of TrajStepBase objects also works. All steps must contain the same atoms in the same order
+		outDir: (str) Path to the output directory. Created if it doesnt exist
+		framesPerChunk: (int) Number of frames in each compressed block. Smaller values mean less is decompressed when reading a few frames, but compress slightly worse
+
+	Returns
+		manifest: (dict) The contents of the manifest file written to outDir
+
+	Raises:
+		ValueError: If the atoms (elements/number) change between steps or if an extra attribute cant be stored as a float array
+
+	"""
+	pathlib.Path(outDir).mkdir(parents=True, exist_ok=True)
+	elements, chunkInfos, currSteps, currCoords = None, list(), list(), list()
+
+	#cartCoords is only fetched once per step; it can be expensive (e.g. converted from fractional coords on each access)
+	for trajStep in it.chain(trajObj, [None]):
+		if trajStep is not None:
+			cartCoords = trajStep.unitCell.cartCoords
+			currElements = [x[-1] for x in cartCoords]
+			elements = currElements if elements is None else elements
+			if currElements != elements:
+				raise ValueError("Atoms at step {} differ from those in the first step; compressed format requires the same atoms in every step".format(trajStep.step))
+			currSteps.append(trajStep)
+			currCoords.append( [x[:3] for x in cartCoords] )
+
+		if (len(currSteps)==framesPerChunk) or ( (trajStep is None) and (len(currSteps)>0) ):
+			startFrame = sum([x["nFrames"] for x in chunkInfos])
+			chunkInfos.append( _writeChunkFile(outDir, len(chunkInfos), startFrame, currSteps, currCoords) )
+			currSteps, currCoords = list(), list()
+
+	manifest = {"version":FORMAT_VERSION, "nSteps":sum([x["nFrames"] for x in chunkInfos]),
+	            "nAtoms":0 if elements is None else len(elements), "elements":list() if elements is None else elements,
+	            "framesPerChunk":framesPerChunk, "chunks":chunkInfos}
+
+	with open(os.path.join(outDir, MANIFEST_FILE_NAME), "wt") as f:
+		json.dump(manifest, f)
+
+	return manifest
+
+
+def readCompressedTrajManifest(inpDir):
+	""" Reads the manifest for a trajectory dumped with dumpTrajObjToCompressedFormat (see module docstring for the keys) """
+	with open(os.path.join(inpDir, MANIFEST_FILE_NAME), "rt") as f:
+		outDict = json.load(f)
+	return outDict
+
+
+def readTrajFromCompressedFormat(inpDir, frameIndices=None, minTime=None, maxTime=None, verifyChecksums=True):
+	""" Reads (part of) a trajectory dumped with dumpTrajObjToCompressedFormat. Only chunks containing requested frames are decompressed
+
+	Args:
+		inpDir: (str) Path to the directory holding the compressed trajectory
+		frameIndices: (iter of ints, Optional) Indices (NOT step numbers) of the frames to read; output follows the same order. Default is all frames
+		minTime: (float, Optional) Only include frames with time >= minTime. Frames with time=None are excluded if this (or maxTime) is set
+		maxTime: (float, Optional) Only include frames with time <= maxTime
+		verifyChecksums: (Bool) If True check each chunk file read against the checksum in the manifest
+
+	Returns
+		trajObj: (TrajectoryInMemory) Contains the selected frames
+
+	Raises:
+		ValueError: If a chunk file doesnt match its checksum
+
+	"""
+	manifest = readCompressedTrajManifest(inpDir)
+	chunkInfos = manifest["chunks"]
+	chunkStarts = np.array([x["startFrame"] for x in chunkInfos], dtype=np.int64)
+	nSteps = manifest["nSteps"]
+	frameIndices = np.arange(nSteps, dtype=np.int64) if frameIndices is None else np.array(frameIndices, dtype=np.int64)
+	frameIndices = np.where(frameIndices<0, frameIndices+nSteps, frameIndices)
+
+	#Time limits let us skip whole chunks using the manifest
+	if (minTime is not None) or (maxTime is not None):
+		keepChunks = [ _chunkOverlapsTimeRange(x, minTime, maxTime) for x in chunkInfos ]
+		frameChunkIndices = np.searchsorted(chunkStarts, frameIndices, side="right") - 1
+		frameIndices = frameIndices[ np.array(keepChunks, dtype=bool)[frameChunkIndices] ] if len(frameIndices)>0 else frameIndices
+
+	#Decode each needed chunk once
+	frameChunkIndices = np.searchsorted(chunkStarts, frameIndices, side="right") - 1
+	outSteps = [None for x in frameIndices]
+	for chunkIdx in np.unique(frameChunkIndices):
+		chunkInfo = chunkInfos[chunkIdx]
+		chunkArrays = _readChunkArrays(inpDir, chunkInfo, verifyChecksums=verifyChecksums)
+		for outIdx in np.nonzero(frameChunkIndices==chunkIdx)[0]:
+			localIdx = frameIndices[outIdx] - chunkInfo["startFrame"]
+			outSteps[outIdx] = _getTrajStepFromChunkArrays(chunkArrays, localIdx, manifest["elements"], chunkInfo["extraAttrs"])
+
+	if (minTime is not None) or (maxTime is not None):
+		outSteps = [x for x in outSteps if _timeInRange(x.time, minTime, maxTime)]
+
+	return trajCoreHelp.TrajectoryInMemory(outSteps)
+
+
+def convertTrajFileToCompressedFormat(inpFile, outDir, framesPerChunk=DEFAULT_FRAMES_PER_CHUNK):
+	""" Converts a *.traj file (format defined by traj_core.dumpTrajObjToFile) to the compressed format; one chunk of steps is held in memory at a time """
+	return dumpTrajObjToCompressedFormat(trajCoreHelp.TrajectoryOnDisk(inpFile), outDir, framesPerChunk=framesPerChunk)
+
+
+def getSha256ForFile(inpPath, blockSize=2**20):
+	""" Returns the sha256 hex-digest for the contents of a file (read in blocks, so memory use is small) """
+	outHash = hashlib.sha256()
+	with open(inpPath, "rb") as f:
+		for block in iter(lambda: f.read(blockSize), b""):
+			outHash.update(block)
+	return outHash.hexdigest()
+
+
+def _writeChunkFile(outDir, chunkIdx, startFrame, trajSteps, coords):
+	fileName = "chunk_{:05d}.npz".format(chunkIdx)
+	outArrays = {"coords": np.array(coords, dtype=np.float64),
+	             "latt_vects": np.array( [step.unitCell.lattVects for step in trajSteps], dtype=np.float64 ),
+	             "steps": np.array( [np.nan if step.step is None else step.step for step in trajSteps], dtype=np.float64 ),
+	             "times": np.array( [np.nan if step.time is None else step.time for step in trajSteps], dtype=np.float64 )}
+	extraAttrs = _addExtraAttrArrays(trajSteps, outArrays)
+
+	#Write to memory first so the checksum is for exactly the bytes written
+	outBuffer = io.BytesIO()
+	np.savez_compressed(outBuffer, **outArrays)
+	outBytes = outBuffer.getvalue()
+	with open(os.path.join(outDir, fileName), "wb") as f:
+		f.write(outBytes)
+
+	steps, times = outArrays["steps"], outArrays["times"]
+	return {"fileName":fileName, "startFrame":startFrame, "nFrames":len(trajSteps),
+	        "firstStep":_getJsonFloat(steps[0]), "lastStep":_getJsonFloat(steps[-1]),
+	        "minTime":_getJsonFloat(np.nanmin(times) if np.any(~np.isnan(times)) else np.nan),
+	        "maxTime":_getJsonFloat(np.nanmax(times) if np.any(~np.isnan(times)) else np.nan),
+	        "extraAttrs":extraAttrs, "sha256":hashlib.sha256(outBytes).hexdigest()}
+
+
+def _addExtraAttrArrays(trajSteps, outArrays):
+	extraAttrs = dict()
+	for trajStep in trajSteps:
+		for attr in sorted(getattr(trajStep, "extraAttrs", set())):
+			if (attr in extraAttrs) or (getattr(trajStep, attr) is None):
+				continue
+			cmpType = trajBinaryHelp._getCmpTypeForAttr(trajStep, attr)
+			if cmpType not in trajBinaryHelp._SUPPORTED_EXTRA_CMP_TYPES:
+				raise ValueError("Cant store attribute {} with cmpType={}; only {} are supported".format(attr, cmpType, trajBinaryHelp._SUPPORTED_EXTRA_CMP_TYPES))
+			extraAttrs[attr] = {"cmpType":cmpType, "shape":list(np.array(getattr(trajStep, attr), dtype=np.float64).shape)}
+
+	for attr, attrInfo in extraAttrs.items():
+		present = np.array( [ (attr in getattr(x, "extraAttrs", set())) and (getattr(x,attr) is not None) for x in trajSteps ], dtype=bool )
+		currVals = np.full( [len(trajSteps)] + attrInfo["shape"], np.nan )
+		for idx in np.nonzero(present)[0]:
+			currVal = np.array(getattr(trajSteps[idx], attr), dtype=np.float64)
+			if list(currVal.shape) != attrInfo["shape"]:
+				raise ValueError("Shape of {} changed from {} to {}".format(attr, attrInfo["shape"], list(currVal.shape)))
+			currVals[idx] = currVal
+		outArrays[trajBinaryHelp._getExtraAttrKey(attr)] = currVals
+		outArrays[trajBinaryHelp._getExtraAttrPresentKey(attr)] = present
+
+	return extraAttrs
+
+
+def _readChunkArrays(inpDir, chunkInfo, verifyChecksums=True):
+	with open(os.path.join(inpDir, chunkInfo["fileName"]), "rb") as f:
+		inpBytes = f.read()
+
+	if verifyChecksums and (hashlib.sha256(inpBytes).hexdigest() != chunkInfo["sha256"]):
+		raise ValueError("Checksum mismatch for {} in {}; file is corrupt or was modified".format(chunkInfo["fileName"], inpDir))
+
+	with np.load(io.BytesIO(inpBytes)) as npzObj:
+		outDict = {key:npzObj[key] for key in npzObj.files}
+	return outDict
+
+
+def _getTrajStepFromChunkArrays(chunkArrays, localIdx, elements, extraAttrs):
+	unitCell = uCellHelp.UnitCell.fromLattVects( chunkArrays["latt_vects"][localIdx].tolist() )
+	unitCell.cartCoords = [ list(coord) + [ele] for coord,ele in it.zip_longest(chunkArrays["coords"][localIdx].tolist(), elements) ]
+
+	step, time = chunkArrays["steps"][localIdx], chunkArrays["times"][localIdx]
+	step = None if np.isnan(step) else int(step)
+	time = None if np.isnan(time) else float(time)
+
+	extraAttrDict = dict()
+	for attr, attrInfo in extraAttrs.items():
+		if chunkArrays[trajBinaryHelp._getExtraAttrPresentKey(attr)][localIdx]:
+			currVal = chunkArrays[trajBinaryHelp._getExtraAttrKey(attr)][localIdx].tolist()
+			extraAttrDict[attr] = {"value":currVal, "cmpType":attrInfo["cmpType"]}
+
+	return trajCoreHelp.TrajStepFlexible(unitCell=unitCell, step=step, time=time, extraAttrDict=extraAttrDict)
+
+
+def _chunkOverlapsTimeRange(chunkInfo, minTime, maxTime):
+	if (chunkInfo["minTime"] is None) or (chunkInfo["maxTime"] is None):
+		return False
+	if (minTime is not None) and (chunkInfo["maxTime"] < minTime):
+		return False
+	if (maxTime is not None) and (chunkInfo["minTime"] > maxTime):
+		return False
+	return True
+
+
+def _timeInRange(time, minTime, maxTime):
+	if time is None:
+		return False
+	minTime = -np.inf if minTime is None else minTime
+	maxTime = np.inf if maxTime is None else maxTime
+	return minTime <= time <= maxTime
+
+
+#NaN isnt valid json; so None is used instead
+def _getJsonFloat(val):
+	return None if np.isnan(val) else float(val)
+
@@ -4,6 +4,8 @@ import itertools as it
 import json
 import os
 import pathlib
+
+import numpy as np
 import plato_pylib.shared.ucell_class as uCellHelp
 
 from . import shared_misc as miscHelp
@@ -56,6 +58,99 @@ class TrajectoryInMemory(TrajectoryBase):
 		return True
 
 
+class TrajectoryOnDisk(TrajectoryBase):
+	""" Trajectory backed by a file (format defined by dumpTrajObjToFile). Only a byte-offset for each step is held in memory; steps are decoded from the file when accessed. Useful for trajectories too large to hold as TrajectoryInMemory
+
+	Supports iteration, len(), random access (traj[idx]) and slicing (traj[start:stop:step], which returns another TrajectoryOnDisk sharing the same file). Steps returned are new objects each time; modifying them does NOT alter the file
+
+	"""
+
+	def __init__(self, inpFile, stepOffsets=None):
+		""" Initializer
+		
+		Args:
+			inpFile: (str) Path to the trajectory file
+			stepOffsets: (iter of ints, Optional) Byte-offset for the start of each step to use. Default is to build an index for all steps in inpFile the first time it is needed
+				 
+		"""
+		self.inpFile = inpFile
+		self._stepOffsets = None if stepOffsets is None else np.array(stepOffsets, dtype=np.int64)
+
+	@property
+	def stepOffsets(self):
+		if self._stepOffsets is None:
+			self._stepOffsets = getStepByteOffsetsFromTrajFile(self.inpFile)
+		return self._stepOffsets
+
+	@property
+	def trajSteps(self):
+		""" Lazily evaluated sequence of TrajStepFlexible objects; supports len(), indexing and slicing without reading the full trajectory """
+		return _TrajStepsOnDiskSequence(self.inpFile, self.stepOffsets)
+
+	@trajSteps.setter
+	def trajSteps(self, val):
+		if os.path.abspath(val.inpFile) != os.path.abspath(self.inpFile):
+			raise ValueError("Cant set trajSteps from file {} on a trajectory backed by file {}".format(val.inpFile, self.inpFile))
+		self._stepOffsets = val.stepOffsets
+
+	def __iter__(self):
+		return iter(self.trajSteps)
+
+	def __len__(self):
+		return len(self.stepOffsets)
+
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			return TrajectoryOnDisk(self.inpFile, stepOffsets=self.stepOffsets[key])
+		return self.trajSteps[key]
+
+	def getTrajFromIndices(self, indices):
+		""" Get a TrajectoryOnDisk containing only the steps at indices (NOT step numbers)
+		
+		Args:
+			indices: (iter of ints) Indices of the steps to keep; output follows the same order
+				 
+		Returns
+			outTraj: (TrajectoryOnDisk) Shares the same file as this object
+	 
+		"""
+		indices = np.array(indices, dtype=np.int64)
+		return TrajectoryOnDisk(self.inpFile, stepOffsets=self.stepOffsets[indices])
+
+	def toTrajInMemory(self):
+		""" Returns a TrajectoryInMemory containing all steps in this object """
+		return TrajectoryInMemory([x for x in self])
+
+
+class _TrajStepsOnDiskSequence():
+	""" Sequence of trajectory steps decoded on access from a file. Returned from TrajectoryOnDisk.trajSteps """
+
+	def __init__(self, inpFile, stepOffsets):
+		self.inpFile = inpFile
+		self.stepOffsets = stepOffsets
+
+	def __len__(self):
+		return len(self.stepOffsets)
+
+	def __iter__(self):
+		with open(self.inpFile,"rb") as f:
+			for offset in self.stepOffsets:
+				yield _readTrajStepAtOffsetFromFileObj(f, offset)
+
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			return _TrajStepsOnDiskSequence(self.inpFile, self.stepOffsets[key])
+		with open(self.inpFile,"rb") as f:
+			outStep = _readTrajStepAtOffsetFromFileObj(f, self.stepOffsets[key])
+		return outStep
+
+
+def _readTrajStepAtOffsetFromFileObj(fileObj, offset):
+	fileObj.seek(offset)
+	currDict = json.loads( fileObj.readline() )
+	return TrajStepFlexible.fromDict(currDict)
+
+
 class TrajStepBase():
 	""" Represents a single step in a trajectory. Used to define the minimal expected attributes
 
@@ -274,7 +369,7 @@ def dumpTrajObjToFile(trajObj, outFile):
 	""" Dump TrajectoryBase to file. Format involves writing each step as a dict (i.e. JSON notation).
 	
 	Args:
-		trajObj: (TrajectoryBase object) Contains all steps in the trajectory
+		trajObj: (TrajectoryBase object) Contains all steps in the trajectory. Any iter of TrajStepBase objects (e.g. a generator) also works, which lets steps be written as they are created
 		outFile: (str) Path to the output file
 	 
 	"""
@@ -305,6 +400,41 @@ def readTrajObjFromFileToTrajectoryInMemory(inpFile):
 
 	return TrajectoryInMemory(outTrajObjs)
 
+def readTrajObjFromFileToTrajectoryOnDisk(inpFile):
+	""" Reads a trajectory file (format defined by dumpTrajObjToFile) and returns a TrajectoryOnDisk object. This builds an index of where each step starts in the file, but doesnt decode any steps
+	
+	Args:
+		inpFile: (str) Path to file containing the trajectory
+			 
+	Returns
+		 trajObj: (TrajectoryOnDisk) Steps are only decoded when accessed, meaning memory use is (roughly) independent of trajectory length
+
+	"""
+	outTraj = TrajectoryOnDisk(inpFile)
+	outTraj.stepOffsets #Forces the index to be built
+	return outTraj
+
+
+def getStepByteOffsetsFromTrajFile(inpFile):
+	""" Gets the byte-offset for the start of each step in a trajectory file (format defined by dumpTrajObjToFile)
+	
+	Args:
+		inpFile: (str) Path to file containing the trajectory
+			 
+	Returns
+		outOffsets: (int64 np array) Length is the number of steps in the file. f.seek(outOffsets[idx]) moves to the start of step idx
+ 
+	"""
+	outOffsets = list()
+	currOffset = 0
+	with open(inpFile,"rb") as f:
+		for line in f:
+			if line.strip():
+				outOffsets.append(currOffset)
+			currOffset += len(line)
+	return np.array(outOffsets, dtype=np.int64)
+
+
 def readLastTrajStepFromFile(inpFile):
 	""" Reads only the final trajectory step from a trajectory file (format defined by dumpTrajObjToFile). Faster than reading the whole thing and taking the last step
 	
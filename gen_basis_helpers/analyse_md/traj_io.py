@@ -1,42 +1,75 @@
 
+import itertools as it
 import re
 
+import numpy as np
+
 import plato_pylib.shared.ucell_class as uCellHelp
 
 from . import traj_core as trajCore
 
 
 def writeTrajToSimpleExtendedXyzFormat(traj, outPath):
-	outList = list()
-	for trajStep in traj:
-		currSection = _getFileAsListForSingleTraj(trajStep)
-		outList.extend(currSection)
+	""" Writes a trajectory to an extended xyz file. Each frame is formatted and written separately, so memory use doesnt depend on the trajectory length (if traj is lazy, e.g. TrajectoryOnDisk)
+	
+	Args:
+		traj: (TrajectoryBase object, or iter of TrajStepBase) Steps to write
+		outPath: (str) Path to the output file
+ 
+	"""
+	with open(outPath,"wt") as f:
+		for idx,trajStep in enumerate(traj):
+			cartCoords = trajStep.unitCell.cartCoords
+			coords = [x[:3] for x in cartCoords]
+			elements = [x[-1] for x in cartCoords]
+			currStr = _getFileStrForSingleFrame(coords, trajStep.unitCell.lattVects, elements, step=trajStep.step, time=trajStep.time)
+			f.write( currStr if idx==0 else "\n" + currStr )
+
 
-	outStr = "\n".join(outList)
+def writeFramesToSimpleExtendedXyzFormat(outPath, coords, lattVects, elements, steps=None, times=None):
+	""" Writes frames held as arrays to an extended xyz file (same format as writeTrajToSimpleExtendedXyzFormat), one frame at a time. Avoids creating UnitCell/TrajStep objects for each frame
+	
+	Args:
+		outPath: (str) Path to the output file
+		coords: (nFrames x nAtoms x 3 array) Cartesian co-ordinates for each frame
+		lattVects: (nFrames x 3 x 3 array) Lattice vectors for each frame
+		elements: (iter of str) Element symbol for each atom; the same for each frame
+		steps: (iter of ints, Optional) Step number for each frame; None values (or steps=None) mean no step is written
+		times: (iter of floats, Optional) Time for each frame; None values (or times=None) mean no time is written
+ 
+	"""
+	nFrames = len(coords)
+	steps = [None for x in range(nFrames)] if steps is None else steps
+	times = [None for x in range(nFrames)] if times is None else times
 	with open(outPath,"wt") as f:
-		f.write(outStr)
+		for idx in range(nFrames):
+			currStr = _getFileStrForSingleFrame(coords[idx], lattVects[idx], elements, step=steps[idx], time=times[idx])
+			f.write( currStr if idx==0 else "\n" + currStr )
 
-def _getFileAsListForSingleTraj(traj):
-	outList = [ str( len(traj.unitCell.cartCoords) ) ]
+
+def _getFileStrForSingleFrame(coords, lattVects, elements, step=None, time=None):
+	outLines = [ str(len(elements)) ]
 
 	#Get comment line
 	lattVectStr = ""
-	for lVect in traj.unitCell.lattVects:
-		lattVectStr += " ".join([str(x) for x in lVect]) + " "
+	for lVect in lattVects:
+		lattVectStr += " ".join([str(float(x)) for x in lVect]) + " "
 
-	stepStr = " step={}".format(str(traj.step)) if traj.step is not None else ""
-	timeStr = " time={:.2f}".format(traj.time) if traj.time is not None else ""
+	stepStr = " step={}".format(str(step)) if step is not None else ""
+	timeStr = " time={:.2f}".format(time) if time is not None else ""
 	commentLine = "Lattice=\"{}\"".format(lattVectStr)
 	commentLine += " Properties=species:S:1:pos:R:3"
 	commentLine += stepStr + timeStr
-	outList.append(commentLine)
+	outLines.append(commentLine)
+
+	#Get the cart coords; formatted for the whole frame at once
+	if len(elements) > 0:
+		coordVals = np.asarray(coords, dtype=np.float64).reshape(-1,3).tolist()
+		atomFmt = "\n".join(["%s %.8f %.8f %.8f"]*len(elements))
+		outLines.append( atomFmt % tuple( it.chain.from_iterable([ele]+xyz for ele,xyz in zip(elements,coordVals)) ) )
 
-	#Get the cart coords
-	for coord in traj.unitCell.cartCoords:
-		currStr = "{} {:.8f} {:.8f} {:.8f}".format( coord[-1], *coord[0:3] )
-		outList.append(currStr)
+	return "\n".join(outLines)
 
-	return outList
 
 def readTrajFromSimpleExtendedXyzFormat(inpPath):
 	fileAsList = _readFileIntoList(inpPath)
@@ -101,6 +134,123 @@ def _parseExtendedXyzCommentLine(commentLine):
 	return outObj
 
 
+def readTrajFromSimpleExtendedXyzFormatVectorized(inpPath, start=0, stop=None, stride=1):
+	""" Faster version of readTrajFromSimpleExtendedXyzFormat which can also read a subset of frames. See iterFramesFromSimpleExtendedXyzFormat
+	
+	Args:
+		inpPath: (str) Path to the extended xyz file
+		start: (int) Index of the first frame to read
+		stop: (int, Optional) Frames with index >= stop are not read. Default is to read to the end of the file
+		stride: (int) Only read every stride-th frame from start
+			 
+	Returns
+		outTraj: (TrajectoryInMemory) Contains TrajStepBase objects; same as readTrajFromSimpleExtendedXyzFormat for the same frames
+ 
+	"""
+	outSteps = list()
+	for frame in iterFramesFromSimpleExtendedXyzFormat(inpPath, start=start, stop=stop, stride=stride):
+		unitCell = uCellHelp.UnitCell.fromLattVects(frame["lattVects"].tolist())
+		unitCell.cartCoords = [ xyz+[ele] for xyz,ele in zip(frame["coords"].tolist(), frame["elements"]) ]
+		outSteps.append( trajCore.TrajStepBase(unitCell=unitCell, step=frame["step"], time=frame["time"]) )
+	return trajCore.TrajectoryInMemory(outSteps)
+
+
+def readFramesFromSimpleExtendedXyzFormatToArrays(inpPath, start=0, stop=None, stride=1):
+	""" Reads frames from an extended xyz file into stacked arrays. See iterFramesFromSimpleExtendedXyzFormat
+	
+	Args:
+		inpPath: (str) Path to the extended xyz file
+		start: (int) Index of the first frame to read
+		stop: (int, Optional) Frames with index >= stop are not read. Default is to read to the end of the file
+		stride: (int) Only read every stride-th frame from start
+			 
+	Returns
+		outDict: (dict) Keys are "coords" (nFrames x nAtoms x 3 array), "lattVects" (nFrames x 3 x 3 array), "elements" (iter of str; one per atom), "steps" and "times" (iters with one value, possibly None, per frame)
+ 
+	Raises:
+		ValueError: If the atoms (elements/number) change between frames
+	"""
+	coords, lattVects, steps, times = list(), list(), list(), list()
+	elements = None
+	for frame in iterFramesFromSimpleExtendedXyzFormat(inpPath, start=start, stop=stop, stride=stride):
+		if elements is None:
+			elements = frame["elements"]
+		elif frame["elements"] != elements:
+			raise ValueError("Atoms differ between frames; cant stack into arrays")
+		coords.append(frame["coords"])
+		lattVects.append(frame["lattVects"])
+		steps.append(frame["step"])
+		times.append(frame["time"])
+
+	elements = list() if elements is None else elements
+	outCoords = np.array(coords) if len(coords)>0 else np.zeros( (0,0,3) )
+	outLattVects = np.array(lattVects) if len(lattVects)>0 else np.zeros( (0,3,3) )
+	return {"coords":outCoords, "lattVects":outLattVects, "elements":elements, "steps":steps, "times":times}
+
+
+def iterFramesFromSimpleExtendedXyzFormat(inpPath, start=0, stop=None, stride=1):
+	""" Iterates over frames in an extended xyz file (e.g. from writeTrajToSimpleExtendedXyzFormat). The atom block of each frame is parsed in bulk into arrays, and frames outside start/stop/stride are skipped without being parsed
+	
+	Args:
+		inpPath: (str) Path to the extended xyz file
+		start: (int) Index of the first frame to read
+		stop: (int, Optional) Frames with index >= stop are not read (and the file isnt read past them). Default is to read to the end of the file
+		stride: (int) Only read every stride-th frame from start
+
+	Yields
+		frame: (dict) Keys are "coords" (nAtoms x 3 array), "lattVects" (3x3 array), "elements" (iter of str), "step" (int or None) and "time" (float or None)
+ 
+	NOTES:
+		Only the first three columns after the species are read (i.e. Properties=species:S:1:pos:R:3 is assumed). Every atom line in a frame needs the same number of columns
+ 
+	"""
+	with open(inpPath,"rb") as f:
+		frameIdx = 0
+		for nAtomsLine in f:
+			if (stop is not None) and (frameIdx >= stop):
+				break
+			if nAtomsLine.strip() == b"":
+				continue
+			nAtoms = int(nAtomsLine)
+
+			#Skip frames without parsing them
+			if (frameIdx < start) or ( (frameIdx-start)%stride != 0 ):
+				for unused in it.islice(f, nAtoms+1):
+					pass
+				frameIdx += 1
+				continue
+
+			commentLine = f.readline().decode()
+			atomBlock = b"".join( it.islice(f, nAtoms) )
+			yield _getFrameDictFromCommentLineAndAtomBlock(commentLine, atomBlock, nAtoms)
+			frameIdx += 1
+
+
+_LATTICE_PATTERN = re.compile("Lattice=\"([^\"]*)\"")
+_STEP_PATTERN = re.compile("step=([0-9]+)")
+_TIME_PATTERN = re.compile("time=([0-9\\.]+)")
+
+def _getFrameDictFromCommentLineAndAtomBlock(commentLine, atomBlock, nAtoms):
+	#Comment line
+	lattVals = np.array(_LATTICE_PATTERN.search(commentLine).group(1).split(), dtype=np.float64)
+	assert len(lattVals)==9
+	stepMatches, timeMatches = _STEP_PATTERN.findall(commentLine), _TIME_PATTERN.findall(commentLine)
+	if len(stepMatches) > 1:
+		raise ValueError("Found {} matches for step on line {}".format(len(stepMatches), commentLine))
+	step = int(stepMatches[0]) if len(stepMatches)==1 else None
+	time = float(timeMatches[0]) if len(timeMatches)==1 else None
+
+	#Atom block; all tokens at once
+	if nAtoms == 0:
+		coords, elements = np.zeros( (0,3) ), list()
+	else:
+		tokens = np.array(atomBlock.split()).reshape(nAtoms,-1)
+		coords = tokens[:,1:4].astype(np.float64)
+		elements = [x.decode() for x in tokens[:,0].tolist()]
+
+	return {"coords":coords, "lattVects":lattVals.reshape(3,3), "elements":elements, "step":step, "time":time}
+
+
 def _readFileIntoList(inpPath):
 	with open(inpPath,"rt") as f:
 		fileAsList = f.readlines()
@@ -0,0 +1,58 @@
+""" Helpers for analysing trajectories using multiple processes. Frames are split into contiguous chunks which are analysed by separate worker processes; results for each chunk (e.g. bin counts) then need combining by the caller """
+
+import multiprocessing
+
+import numpy as np
+
+from . import traj_core as trajCoreHelp
+
+
+def getContiguousTrajChunks(inpTraj, nChunks):
+	""" Splits a trajectory into (up to) nChunks contiguous sub-trajectories of near-equal length
+
+	Args:
+		inpTraj: (TrajectoryBase object) Trajectories with getTrajFromIndices (e.g. TrajectoryOnDisk/TrajectoryBinary) give chunks which only hold frame offsets/indices; these are cheap to send to worker processes
+		nChunks: (int) Number of chunks to split into. Fewer are returned if there are fewer frames than this
+
+	Returns
+		outChunks: (iter of TrajectoryBase objects) In the same order as the frames in inpTraj
+
+	"""
+	nFrames = len(inpTraj.trajSteps)
+	nChunks = max(1, min(nChunks, nFrames))
+	boundaries = np.linspace(0, nFrames, nChunks+1).astype(int)
+
+	outChunks = list()
+	for startIdx, endIdx in zip(boundaries[:-1], boundaries[1:]):
+		try:
+			currChunk = inpTraj.getTrajFromIndices( range(startIdx,endIdx) )
+		except AttributeError:
+			currChunk = trajCoreHelp.TrajectoryInMemory( list(inpTraj.trajSteps[startIdx:endIdx]) )
+		outChunks.append(currChunk)
+
+	return outChunks
+
+
+def mapFunctOverTrajChunks(funct, inpTraj, nCores, nChunks=None, functArgs=None):
+	""" Calls funct(trajChunk, *functArgs) for each chunk of inpTraj using a pool of worker processes
+
+	Args:
+		funct: (function) Must be picklable (i.e. defined at module level). Its return value also needs to be picklable
+		inpTraj: (TrajectoryBase object)
+		nCores: (int) Number of processes to use
+		nChunks: (int, Optional) Number of chunks to split inpTraj into. Default is nCores
+		functArgs: (iter, Optional) Extra positional arguments passed to funct (the same for every chunk)
+
+	Returns
+		outVals: (iter) Return value of funct for each chunk, in frame order
+
+	"""
+	nChunks = nCores if nChunks is None else nChunks
+	functArgs = list() if functArgs is None else list(functArgs)
+	allArgs = [ [chunk] + functArgs for chunk in getContiguousTrajChunks(inpTraj, nChunks) ]
+
+	with multiprocessing.Pool(nCores) as pool:
+		outVals = pool.starmap(funct, allArgs)
+
+	return outVals
+
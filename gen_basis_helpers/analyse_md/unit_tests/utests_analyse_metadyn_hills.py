@@ -214,6 +214,60 @@ class TestGetPotObjForEachStepOverTime(unittest.TestCase):
 		self.assertEqual(expTimesVsHills, actTimesVsHills)
 
 
+class TestGetTimeVsPotAtValsIncremental(unittest.TestCase):
+
+	def setUp(self):
+		self.times = [2,3,1,3.0001,5]
+		self.positions = [ [3,4], [5,6], [7,8], [4,4], [2,1] ]
+		self.scales =  [ [4,5], [6,7], [8,9], [3,3], [2,2] ]
+		self.heights = [ [2,3], [4,5], [6,7], [1,2], [3,1] ]
+		self.inpVals = [ [1,1], [3,4], [6,2] ]
+
+		self.timeRange = None
+		self.minTimeDiff = 1e-3
+		self.timeTol = 1e-3
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		currKwargs = {"times":self.times, "positions":self.positions, "scales":self.scales, "heights":self.heights}
+		self.testObjA = tCode.MetadynHillsInfo(**currKwargs)
+
+	def _runTestFunct(self, **kwargs):
+		currKwargs = {"timeRange":self.timeRange, "timeTol":self.timeTol, "minTimeDiff":self.minTimeDiff}
+		currKwargs.update(kwargs)
+		return tCode.getTimeVsPotAtValsForEachHillAdded(self.testObjA, self.inpVals, **currKwargs)
+
+	def _checkExpAndActMatch(self, expVals, actVals):
+		self.assertEqual( [x[0] for x in expVals], [x[0] for x in actVals] )
+		for (unused,expData), (unused,actData) in it.zip_longest(expVals, actVals):
+			self.assertEqual( [x[0] for x in expData], [x[0] for x in actData] )
+			self.assertTrue( np.allclose( np.array([x[1] for x in expData]), np.array([x[1] for x in actData]) ) )
+
+	def testMatchesNonIncremental_fullRange(self):
+		expVals = self._runTestFunct()
+		actVals = self._runTestFunct(incremental=True)
+		self.assertEqual(4, len(actVals))
+		self._checkExpAndActMatch(expVals, actVals)
+
+	def testMatchesNonIncremental_limitedTimeRange(self):
+		self.timeRange = [1.4,4]
+		expVals = self._runTestFunct()
+		actVals = self._runTestFunct(incremental=True)
+		self._checkExpAndActMatch(expVals, actVals)
+
+	def testSnapshotStride(self):
+		expVals = self._runTestFunct()[::3]
+		actVals = self._runTestFunct(incremental=True, snapshotStride=3)
+		self._checkExpAndActMatch(expVals, actVals)
+
+	def testSmallChunksGiveSameVals(self):
+		expVals = [ [t,vals.copy()] for t,vals in tCode.iterTimeVsPotAtValsForEachHillAdded(self.testObjA, self.inpVals) ]
+		actVals = [ [t,vals.copy()] for t,vals in tCode.iterTimeVsPotAtValsForEachHillAdded(self.testObjA, self.inpVals, maxChunkElements=1) ]
+		self.assertEqual( [x[0] for x in expVals], [x[0] for x in actVals] )
+		for (unused,expData), (unused,actData) in it.zip_longest(expVals, actVals):
+			self.assertTrue( np.allclose(expData, actData) )
+
+
 class TestEvalPotOverTimeRangeHillsInfoObj(unittest.TestCase):
 
 	def setUp(self):
@@ -253,6 +307,12 @@ class TestEvalPotOverTimeRangeHillsInfoObj(unittest.TestCase):
 		actVals = self._runTestFunct()
 		[self.assertAlmostEqual(e,a) for e,a in it.zip_longest(expVals, actVals)]
 
+	def testExpectedSmallerTimeRange_incremental(self):
+		self.timeRange = [0.8,2.2]
+		expVals = [27.8511758765677, 39.5791113014523]
+		actVals = tCode.evalPotAddedOverTimeRangeForHillsInfoObj(self.testObjA, self.evalAtVals, timeRange=self.timeRange, timeTol=self.timeTol, incremental=True)
+		[self.assertAlmostEqual(e,a) for e,a in it.zip_longest(expVals, actVals)]
+
 
 class TestAddDimensionToMetadynHillsInstance(unittest.TestCase):
 
@@ -648,6 +708,90 @@ class TestGroupedMultiDimGaussHills(unittest.TestCase):
 		self.assertEqual(expOutVals, actOutVals)
 
 
+class TestArrayGroupedMultiDimGaussHills(unittest.TestCase):
+
+	def setUp(self):
+		self.heights = [ [4,2], [5,3], [1,6] ]
+		self.scales = [ [3,1], [4,2], [2,0.5] ]
+		self.hillPositions = [ [2,1], [3,0], [-1,2] ]
+		self.positions = [ [-1,0], [0,1], [1,2], [2.5,-0.5] ]
+		self.maxChunkElements = 2**22
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		currKwargs = {"heights":self.heights, "scales":self.scales, "positions":self.hillPositions}
+		self.testObjA = tCode.ArrayGroupedMultiDimGaussHills(maxChunkElements=self.maxChunkElements, **currKwargs)
+		self.multiDimHills = tCode._getIterOfMultiDimHills(self.heights, self.scales, self.hillPositions)
+		self.groupedHillsA = tCode.GroupedMultiDimGaussHills(self.multiDimHills)
+
+	def testValsMatchObjectBasedImplementation(self):
+		expVals = self.groupedHillsA.evalFunctAtVals(self.positions)
+		actVals = self.testObjA.evalFunctAtVals(self.positions)
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testContribsMatchObjectBasedImplementation(self):
+		expVals = self.groupedHillsA.getContribsAtPositions(self.positions)
+		actVals = self.testObjA.getContribsAtPositions(self.positions)
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testGradientMatchesObjectBasedImplementation_oneDim(self):
+		self.heights, self.scales, self.hillPositions = [[4],[5]], [[3],[4]], [[2],[3]]
+		self.positions = [[-1],[0],[1]]
+		self.createTestObjs()
+		expVals = self.groupedHillsA.evalGradientAtVals(self.positions)
+		actVals = self.testObjA.evalGradientAtVals(self.positions)
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testGradientMatchesFiniteDifferences_twoDim(self):
+		stepSize = 1e-5
+		expVals = list()
+		for pos in self.positions:
+			currGrad = list()
+			for dimIdx in range(2):
+				posA, posB = list(pos), list(pos)
+				posA[dimIdx] -= stepSize
+				posB[dimIdx] += stepSize
+				valA, valB = self.testObjA.evalFunctAtVals([posA,posB])
+				currGrad.append( (valB-valA)/(2*stepSize) )
+			expVals.append(currGrad)
+		actVals = self.testObjA.evalGradientAtVals(self.positions)
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testSmallChunksGiveSameResults(self):
+		expVals, expGrads = self.testObjA.evalFunctAtVals(self.positions), self.testObjA.evalGradientAtVals(self.positions)
+		self.maxChunkElements = 3
+		self.createTestObjs()
+		actVals, actGrads = self.testObjA.evalFunctAtVals(self.positions), self.testObjA.evalGradientAtVals(self.positions)
+		self.assertTrue( np.allclose(expVals, actVals) )
+		self.assertTrue( np.allclose(expGrads, actGrads) )
+
+	def testZeroScaleTreatedAsFlat(self):
+		self.heights, self.scales, self.hillPositions = [[4,1]], [[3,0]], [[2,0]]
+		self.createTestObjs()
+		expVals = tCode.OneDimGaussianHill(height=4, scale=3, pos=2).evalFunctAtVals( [x[0] for x in self.positions] )
+		actVals = self.testObjA.evalFunctAtVals(self.positions)
+		actGrads = self.testObjA.evalGradientAtVals(self.positions)
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+		self.assertTrue( np.allclose(np.zeros(len(self.positions)), actGrads[:,1]) )
+
+	def testNoHillsGivesZeros(self):
+		self.heights, self.scales, self.hillPositions = list(), list(), list()
+		self.createTestObjs()
+		actVals = self.testObjA.evalFunctAtVals(self.positions)
+		self.assertTrue( np.allclose(np.zeros(len(self.positions)), actVals) )
+
+	def testFromMultiDimHills(self):
+		expObj = self.testObjA
+		actObj = tCode.ArrayGroupedMultiDimGaussHills.fromMultiDimHills(self.multiDimHills)
+		self.assertEqual(expObj, actObj)
+
+	def testCreatedFromHillsInfoWithTimeRange(self):
+		hillsInfo = tCode.MetadynHillsInfo(times=[0,1,2], positions=self.hillPositions, scales=self.scales, heights=self.heights)
+		expObj = tCode.ArrayGroupedMultiDimGaussHills(heights=self.heights[:2], scales=self.scales[:2], positions=self.hillPositions[:2])
+		actObj = hillsInfo.createArrayGroupedHills(timeRange=[0,1])
+		self.assertEqual(expObj, actObj)
+
+
 class TestMultiDimGauHillFunction(unittest.TestCase):
 
 	def setUp(self):
@@ -779,6 +779,7 @@ class TestCountHBondsBetweenGenericGroups(unittest.TestCase):
 		#Misc
 		self.binResObj = None
 		self.primaryIndices = None
+		self.useNebLists = False
 
 		self.createTestObjs()
 
@@ -789,7 +790,8 @@ class TestCountHBondsBetweenGenericGroups(unittest.TestCase):
 
 		#Options object
 		currArgs = [self.binResObj, self.fromNonHyIndices, self.fromHyIndices, self.toNonHyIndices, self.toHyIndices]
-		currKwargs = {"acceptor":self.acceptor, "donor":self.donor, "maxOO":self.maxOO, "maxAngle":self.maxAngle, "primaryIndices":self.primaryIndices}
+		currKwargs = {"acceptor":self.acceptor, "donor":self.donor, "maxOO":self.maxOO, "maxAngle":self.maxAngle, "primaryIndices":self.primaryIndices,
+		              "useNebLists":self.useNebLists}
 		self.optsObj = distrOptObjHelp.CountHBondsBetweenGenericGroupsOptions(*currArgs, **currKwargs)
 
 #		#Get a sparse matrix populator + populate it
@@ -808,6 +810,14 @@ class TestCountHBondsBetweenGenericGroups(unittest.TestCase):
 		for expIter,actIter in it.zip_longest(expVals,actVals):
 			[self.assertAlmostEqual(exp,act) for exp,act in it.zip_longest(expIter,actIter)]
 
+	def testExpectedTotalHBonds_fromWater_nebLists(self):
+		self.useNebLists = True
+		self.createTestObjs()
+		expVals = [(2,)]
+		actVals = self._runTestFunct()
+		self.assertEqual(expVals, actVals)
+		self.assertNotIn("distMatrix", self.sparseCalculator.outDict)
+
 	def testExpectedDonorHBonds_fromWater(self):
 		self.acceptor = False
 		self.createTestObjs()
@@ -841,6 +851,16 @@ class TestCountHBondsBetweenGenericGroups(unittest.TestCase):
 		for expIter,actIter in it.zip_longest(expVals,actVals):
 			[self.assertAlmostEqual(exp,act) for exp,act in it.zip_longest(expIter,actIter)]
 
+	def testExpectedTotalHBonds_fromHF_nebListsWithPBCs(self):
+		self.fromNonHyIndices, self.fromHyIndices = [ [6] ], [ [7] ]
+		self.toNonHyIndices, self.toHyIndices = [ [0,1,2], [4] ], [ [], [3,5] ]
+		self.useNebLists = True
+		self.cartCoords = [ [x[0]-3.5, x[1], x[2], x[3]] for x in self.cartCoords ] #Puts HF on the far side of the boundary
+		self.createTestObjs()
+		expVals = [(1,)]
+		actVals = self._runTestFunct()
+		self.assertEqual(expVals, actVals)
+
 	def testRaises_twoNonHyPlusHyGroups(self):
 		""" Not suitable for this case, since code doesnt know which H is attached to which nonHyIdx """
 		self.toHyIndices[0] = [4]
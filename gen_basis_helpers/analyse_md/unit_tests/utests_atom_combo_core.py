@@ -165,6 +165,89 @@ class TestSparseMatrixPopulatorComposite(unittest.TestCase):
 		self.populatorB.populateMatrices.assert_called_with(self.inpGeom, testDict, self.level)
 
 
+class TestSparseMatrixCalculatorPlanned(unittest.TestCase):
+
+	def setUp(self):
+		self.lattParams, self.lattAngles = [10,10,10], [90,90,90]
+		self.cartCoords = [ [0.0,0.0,0.0,"O"], [0.96,0.0,0.0,"H"], [0.0,0.96,0.0,"H"],
+		                    [2.8,0.0,0.0,"O"], [3.2,0.9,0.0,"H"], [3.2,-0.9,0.0,"H"],
+		                    [9.0,0.0,0.0,"O"], [9.0,0.96,0.0,"H"], [9.0,0.0,0.96,"H"],
+		                    [0.0,0.0,8.0,"X"] ]
+		self.oxyIndices = [0,3,6]
+		self.hyIndices = [ [1,2], [4,5], [7,8] ]
+		self.distFilterIndices = [9]
+		self.distFilterVals = [ [0,2.5], [2.5,10] ]
+		self.triAtomIndices = [ [1,0,2], [4,3,5] ]
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.cellA = uCellHelp.UnitCell(lattParams=self.lattParams, lattAngles=self.lattAngles)
+		self.cellA.cartCoords = self.cartCoords
+
+		hBondArgs = [self.oxyIndices, self.hyIndices, self.distFilterIndices]
+		hBondPopulatorA = atomComboPopulators._DiscHBondCounterBetweenGroupsWithOxyDistFilterPopulator(*hBondArgs, self.distFilterVals)
+		hBondPopulatorB = atomComboPopulators._DiscHBondCounterBetweenGroupsWithOxyDistFilterPopulator(*hBondArgs, list(reversed(self.distFilterVals)))
+		anglePopulator = atomComboPopulators._TriAtomAnglesPopulator(self.triAtomIndices, level=1) #Same level as h-bond angles
+		distPopulator = atomComboPopulators._DistMatrixPopulator([1,4], [2,5])
+		compositePopulator = tCode._SparseMatrixPopulatorComposite([hBondPopulatorB, distPopulator])
+		self.populators = [hBondPopulatorA, anglePopulator, compositePopulator]
+
+		self.testObj = tCode._SparseMatrixCalculatorStandard(self.populators)
+		self.unplannedObj = tCode._SparseMatrixCalculatorStandard(copy.deepcopy(self.populators), planned=False)
+
+	def _getAngleIndicesSetOnUnplanned(self):
+		outIndices = list()
+		for populator in self.populators[:1] + self.populators[-1].populators[:1]:
+			populator.populateMatrices(self.cellA, self.unplannedObj.outDict, 1)
+			outIndices.extend( [tuple(x) for x in populator._getFullOutAngleIndicesRequired(self.cellA, self.unplannedObj.outDict)] )
+		return outIndices + [tuple(x) for x in self.triAtomIndices]
+
+	def testDistAndAngleMatricesMatchUnplanned(self):
+		self.testObj.calcMatricesForGeom(self.cellA)
+		self.unplannedObj.calcMatricesForGeom(self.cellA)
+		expDict, actDict = self.unplannedObj.outDict, self.testObj.outDict
+
+		self.assertTrue( np.allclose(expDict["distMatrix"], actDict["distMatrix"], equal_nan=True) )
+		expAngleIndices = self._getAngleIndicesSetOnUnplanned()
+		self.assertEqual( len(set(expAngleIndices)), len(actDict["angleMatrix"]) )
+		for currIdx in expAngleIndices:
+			self.assertAlmostEqual( expDict["angleMatrix"][currIdx], actDict["angleMatrix"][currIdx] )
+
+	def testAnglesCalculatedInSingleCall(self):
+		currPath = "gen_basis_helpers.analyse_md.calc_dists.getInterAtomicAnglesArrayForInpGeom"
+		with mock.patch(currPath, wraps=tCode.calcDistsHelp.getInterAtomicAnglesArrayForInpGeom) as mockedFunct:
+			self.testObj.calcMatricesForGeom(self.cellA)
+		self.assertEqual(1, mockedFunct.call_count)
+
+	def testDistBlocksWithSameFromIndicesMerged(self):
+		expBlocks = [ ([0,3,6], [0,3,6,9]), ([1,4], [2,5]) ]
+		inpBlocks = [ [[0,3,6],[0,3,6]], [[0,3,6],[9]], [[9],[0,3,6]], [[1,4],[2,5]], [[0,3,6],[9]] ]
+		actBlocks = tCode._getMergedDistIndexBlocks(inpBlocks, len(self.cartCoords))
+		self.assertEqual(expBlocks, actBlocks)
+
+
+class TestSparseAngleMatrix(unittest.TestCase):
+
+	def setUp(self):
+		self.nAtoms = 4
+		self.angleIndices = [ [0,1,2], [3,1,0] ]
+		self.angles = [104.5, 90.0]
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.testObj = tCode.SparseAngleMatrix(self.nAtoms)
+		self.testObj.addAngles(self.angleIndices, self.angles)
+
+	def testIndexingMatchesDenseMatrix(self):
+		self.testObj[(2,2,2)] = 45.0
+		expMatrix = np.full( (4,4,4), np.nan )
+		expMatrix[0][1][2], expMatrix[3][1][0], expMatrix[2][2][2] = 104.5, 90.0, 45.0
+		for idxA, idxB, idxC in it.product(range(4), range(4), range(4)):
+			expVal = expMatrix[idxA][idxB][idxC]
+			self.assertTrue( np.allclose(expVal, self.testObj[idxA][idxB][idxC], equal_nan=True) )
+			self.assertTrue( np.allclose(expVal, self.testObj[(idxA,idxB,idxC)], equal_nan=True) )
+		self.assertTrue( np.allclose(expMatrix, np.array(self.testObj), equal_nan=True) )
+
 
 if __name__ == "__main__":
     unittest.main()
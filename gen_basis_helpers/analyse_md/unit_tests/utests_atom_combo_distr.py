@@ -100,6 +100,15 @@ class TestGetMultipleCombinedDistrBins(unittest.TestCase):
 		actBins = self._runTestFunct()
 		self.assertEqual(expBins, actBins)
 
+	def testMultiProcessMatchesSerial(self):
+		otherCell = copy.deepcopy(self.cellA)
+		otherCell.cartCoords = [ [2,2,2,"Mg"], [2,5,2,"O"], [2,2,6,"O"], [8,2,4,"Mg"] ]
+		otherStep = trajCoreHelp.TrajStepFlexible(unitCell=otherCell)
+		self.trajA = trajCoreHelp.TrajectoryInMemory([self.stepA, otherStep, self.stepA])
+		expBins = self._runTestFunct()
+		actBins = tCode.getAtomicComboDistrBinsFromOptsObjs(self.trajA, self.optsObjs, nCores=2, nChunks=3)
+		self.assertEqual(expBins, actBins)
+
 
 class TestCheckIndicesConsistent(unittest.TestCase):
 
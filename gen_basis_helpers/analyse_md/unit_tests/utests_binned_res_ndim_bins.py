@@ -157,6 +157,47 @@ class TestNDimensionalBinObj(unittest.TestCase):
 
 		self.assertTrue( np.allclose(expCountsMatrix,actCountsMatrix) )
 
+	def testAddValsToBinCounts_outOfRangeAndNanIgnored(self):
+		valsToBin = [ [3, 4.5], [1.5, 6], [0.5, 4.5], [1.5, 2.9], [np.nan, 4.5], [1.5,3] ]
+		expCountsMatrix = copy.deepcopy(self.testObj.binVals["counts"])
+		expCountsMatrix[0][2] = 1
+		self.testObj.addBinValuesToCounts(valsToBin)
+		self.assertTrue( np.allclose(expCountsMatrix, self.testObj.binVals["counts"]) )
+
+	def testAddValsToBinCounts_emptyInput(self):
+		expCountsMatrix = copy.deepcopy(self.testObj.binVals["counts"])
+		self.testObj.addBinValuesToCounts( list() )
+		self.assertTrue( np.allclose(expCountsMatrix, self.testObj.binVals["counts"]) )
+
+	def testAddValsToBinCountsConsistentWithLoopBased_nonUniformEdges(self):
+		self.edgesA = [1, 1.2, 2, 3.5]
+		self.edgesB = [6, 5.9, 4, 3]
+		self.createTestObjs()
+		self._checkConsistentWithLoopBasedMethod( np.random.uniform(0.5, 6.5, size=(500,2)) )
+
+	def testAddValsToBinCountsConsistentWithLoopBased_uniformEdgesIncludingEdgeVals(self):
+		self.edgesA = np.linspace(0,3,31).tolist()
+		self.edgesB = np.linspace(6,-1,15).tolist()
+		self.createTestObjs()
+		valsToBin = np.random.uniform(-1.5, 6.5, size=(500,2))
+		valsToBin[:40,0], valsToBin[40:80,1] = np.random.choice(self.edgesA,40), np.random.choice(self.edgesB,40)
+		self._checkConsistentWithLoopBasedMethod(valsToBin)
+
+	def _checkConsistentWithLoopBasedMethod(self, valsToBin):
+		expObj = copy.deepcopy(self.testObj)
+		expObj._addBinValuesToCountsLoopBased(valsToBin)
+		self.testObj.addBinValuesToCounts(valsToBin)
+		self.assertEqual(expObj, self.testObj)
+
+	def testAddValsForMultipleFramesToBinCounts(self):
+		valsToBinA = [ [2.5,3.5], [1.2,5.5] ]
+		valsToBinB = [ [1.5,5.5] ]
+		expObj = copy.deepcopy(self.testObj)
+		expObj.addBinValuesToCounts(valsToBinA)
+		expObj.addBinValuesToCounts(valsToBinB)
+		self.testObj.addBinValuesForMultipleFramesToCounts( [valsToBinA, valsToBinB] )
+		self.assertEqual(expObj, self.testObj)
+
 	def testToAndFromDictConsistent(self):
 		self.testObj.binVals["counts"][0][0] += 2
 		outDict = self.testObj.toDict()
@@ -4,6 +4,8 @@ import itertools as it
 import unittest
 import unittest.mock as mock
 
+import numpy as np
+
 import plato_pylib.shared.ucell_class as uCellHelp
 
 import gen_basis_helpers.analyse_md.binned_res as binResHelp
@@ -66,6 +68,16 @@ class TestPopulateBinsWithRdfBetweenAtomGroups(unittest.TestCase):
 		tCode.populateRdfValsOnOptionObjs(self.trajA, [optsObj])
 		self.assertEqual(expBinObj, self.binResObjA)
 
+	def testMultiProcessMatchesSerial(self):
+		otherCell = copy.deepcopy(self.cellA)
+		otherCell.cartCoords = [ [5,5,5,"X"], [5,5,6,"Y"], [5,5,9,"Z"] ]
+		self.trajA = trajCoreHelp.TrajectoryInMemory([self.trajA.trajSteps[0], trajCoreHelp.TrajStepFlexible(unitCell=otherCell)])
+		self.binResObjA.binVals["counts"] = [1,1] #Checks counts get added to any already present
+		expBinObj = copy.deepcopy(self.binResObjA)
+		tCode._populateBinsWithRdfBetweenAtomGroups(self.trajA, [expBinObj], [self.indicesA], [self.indicesB])
+		tCode._populateBinsWithRdfBetweenAtomGroups(self.trajA, [self.binResObjA], [self.indicesA], [self.indicesB], nCores=2)
+		self.assertEqual(expBinObj, self.binResObjA)
+
 	#Note distances are 3,4
 	def testExpectedForMinVals(self):
 		self.binEdges = [0,3.5,5]
@@ -204,6 +216,45 @@ class TestRdfBinnerFixedIndices(unittest.TestCase):
 		self.assertEqual(expBinRes, actBinRes)
 
 
+class TestRadialBinValsFromSubDistMatrices(unittest.TestCase):
+
+	def setUp(self):
+		self.fullDistMatrix = [ [0,2,3],
+		                        [2,0,6],
+		                        [3,6,0] ]
+		self.rowIndices = [0,1,2]
+		self.colIndices = [0,1,2]
+		self.indicesA = [0,1,2]
+		self.indicesB = [0,1,2]
+		self.minDistAToB = False
+
+	def _runTestFunct(self):
+		fullMatrix = np.array(self.fullDistMatrix, dtype=float)
+		distMatrices = np.array( [ fullMatrix[self.rowIndices][:,self.colIndices] for x in range(2) ] )
+		currArgs = [distMatrices, self.rowIndices, self.colIndices, self.indicesA, self.indicesB]
+		return tCode._getRadialToBinValsFromSubDistMatrices(*currArgs, minDistAToB=self.minDistAToB)
+
+	def testConsistentWithFullDistMatrixFunct(self):
+		expVals = 2*tCode._getRadialToBinValsFromFullDistMatrix(self.fullDistMatrix, indicesA=self.indicesA, indicesB=self.indicesB)
+		actVals = self._runTestFunct()
+		self.assertEqual( sorted(expVals), sorted(actVals.tolist()) )
+
+	def testExpectedForSubMatrices(self):
+		self.rowIndices, self.colIndices = [0], [1,2]
+		self.indicesA, self.indicesB = [0], [1,2]
+		expVals = [2,3,2,3]
+		actVals = self._runTestFunct()
+		self.assertEqual( sorted(expVals), sorted(actVals.tolist()) )
+
+	def testExpectedMinDistAToB(self):
+		self.rowIndices, self.colIndices = [1,2], [0]
+		self.indicesA, self.indicesB = [1,2], [0]
+		self.minDistAToB = True
+		expVals = [2,3,2,3]
+		actVals = self._runTestFunct()
+		self.assertEqual( sorted(expVals), sorted(actVals.tolist()) )
+
+
 class TestExpectedBinValsFromFullDistMatrix(unittest.TestCase):
 
 	def setUp(self):
@@ -674,3 +674,36 @@ class TestCalcAnglesWithArbitraryVector(unittest.TestCase):
 
 
 
+
+class TestNearestImageVectorsTriclinic(unittest.TestCase):
+
+	def setUp(self):
+		self.lattParams, self.lattAngles = [10,11,12], [80,85,75]
+		self.cartCoords = [ [1,1,1,"A"], [9,2,11,"B"], [5,10,2,"C"], [2,9,10,"D"] ]
+		self.idxPairs = [ [0,1], [3,0], [2,3], [1,2] ]
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.cellA = uCellHelp.UnitCell(lattParams=self.lattParams, lattAngles=self.lattAngles)
+		self.cellA.cartCoords = self.cartCoords
+
+	def testLengthsMatchMinImageDistances(self):
+		distMatrix = tCode.calcDistanceMatrixForCell_minImageConv(self.cellA)
+		expDists = [ distMatrix[idxA][idxB] for idxA,idxB in self.idxPairs ]
+		actVects = tCode.getNearestImageVectorsForIdxPairs(self.cellA, self.idxPairs)
+		self.assertEqual( (len(self.idxPairs),3), actVects.shape )
+		self.assertTrue( np.allclose(np.array(expDists), np.linalg.norm(actVects,axis=1), atol=1e-4) )
+
+	def testNebCoordsArraysConsistentWithVectors(self):
+		coordsA, nebCoordsB = tCode.getNearestImageNebCoordsArrays(self.cellA, indicesA=[0,3], indicesB=[1,2])
+		expVects = tCode.getNearestImageVectorsForIdxPairs(self.cellA, [ [0,1], [0,2], [3,1], [3,2] ])
+		actVects = (nebCoordsB - coordsA[:,np.newaxis,:]).reshape(-1,3)
+		self.assertTrue( np.allclose(expVects, actVects) )
+
+	def testNebCoordsMatrixBasicConsistentWithArrays(self):
+		coordsA, nebCoordsB = tCode.getNearestImageNebCoordsArrays(self.cellA, indicesA=[1], indicesB=[0,2])
+		actMatrix = tCode.getNearestImageNebCoordsMatrixBasic(self.cellA, indicesA=[1], indicesB=[0,2])
+		self.assertEqual("B", actMatrix[0][1][0][-1])
+		self.assertEqual("C", actMatrix[0][1][1][-1])
+		self.assertTrue( np.allclose(nebCoordsB[0][1], np.array(actMatrix[0][1][1][:3])) )
+
@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+
+import gen_basis_helpers.shared.plane_equations as planeEqnHelp
+import gen_basis_helpers.analyse_md.calc_dists_batched as tCode
+
+
+class TestGetMDAnalysisDimsFromLattVects(unittest.TestCase):
+
+	def setUp(self):
+		self.lattVectsA = [ [10,0,0], [0,11,0], [0,0,12] ]
+		self.lattVectsB = [ [4,0,0], [-2, 2*np.sqrt(3), 0], [0,0,5] ]
+
+	def testExpectedForSingleOrthogonalCell(self):
+		expDims = [10,11,12,90,90,90]
+		actDims = tCode.getMDAnalysisDimsFromLattVectsArray(self.lattVectsA)
+		self.assertTrue( np.allclose(np.array(expDims), actDims) )
+
+	def testExpectedForMultipleFrames(self):
+		expDims = [ [10,11,12,90,90,90], [4,4,5,90,90,120] ]
+		actDims = tCode.getMDAnalysisDimsFromLattVectsArray([self.lattVectsA, self.lattVectsB])
+		self.assertTrue( np.allclose(np.array(expDims), actDims) )
+
+
+class TestCalcDistanceMatricesForFrames(unittest.TestCase):
+
+	def setUp(self):
+		self.coords = np.array( [ [ [1,1,1], [9,1,1], [5,5,5] ],
+		                          [ [1,1,1], [3,1,1], [1,1,8] ] ], dtype=float )
+		self.boxDims = [10,10,10,90,90,90]
+		self.indicesA = None
+		self.indicesB = None
+
+	def _runTestFunct(self, **kwargs):
+		return tCode.calcDistanceMatricesForFrames_minImageConv(self.coords, self.boxDims, indicesA=self.indicesA, indicesB=self.indicesB, **kwargs)
+
+	def testExpectedAllIndices(self):
+		expFrameA = [ [0, 2, np.sqrt(48)], [2, 0, np.sqrt(48)], [np.sqrt(48), np.sqrt(48), 0] ]
+		expFrameB = [ [0, 2, 3], [2, 0, np.sqrt(13)], [3, np.sqrt(13), 0] ]
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(np.array([expFrameA,expFrameB]), actVals) )
+
+	def testExpectedSubsetOfIndices(self):
+		self.indicesA, self.indicesB = [0], [1,2]
+		expVals = [ [[2, np.sqrt(48)]], [[2,3]] ]
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testOutArrayIsUsed(self):
+		self.indicesA, self.indicesB = [0], [1,2]
+		outArray = np.zeros( (2,1,2) )
+		actVals = self._runTestFunct(outArray=outArray)
+		self.assertIs(outArray, actVals)
+		self.assertAlmostEqual(3, outArray[1][0][1], places=5)
+
+	def testRaisesForWrongSizedOutArray(self):
+		with self.assertRaises(ValueError):
+			self._runTestFunct(outArray=np.zeros((2,2,2)))
+
+	def testChunkedIterConsistentWithSingleCall(self):
+		expVals = self._runTestFunct()
+		actVals = np.zeros( expVals.shape )
+		for startIdx, distMatrices in tCode.iterDistanceMatricesForFrames_minImageConv(self.coords, self.boxDims, chunkSize=1):
+			actVals[startIdx:startIdx+len(distMatrices)] = distMatrices
+		self.assertTrue( np.allclose(expVals, actVals) )
+
+
+class TestCalcDistancesFromABPlaneForFrames(unittest.TestCase):
+
+	def setUp(self):
+		self.coords = np.array( [ [ [5,5,9], [5,5,1], [6,6,3] ] ], dtype=float )
+		self.lattVects = [ [10,0,0], [0,10,0], [0,0,10] ]
+		self.planeEqn = planeEqnHelp.ThreeDimPlaneEquation(0,0,1,0)
+		self.indices = None
+
+	def _runTestFunct(self):
+		return tCode.calcDistancesFromABPlaneForFrames(self.coords, self.lattVects, self.planeEqn, indices=self.indices)
+
+	def testExpectedWithPBCs(self):
+		expVals = [ [1,1,3] ]
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testExpectedForShiftedPlaneSubsetOfIndices(self):
+		self.planeEqn = planeEqnHelp.ThreeDimPlaneEquation(0,0,1,2)
+		self.indices = [0,2]
+		expVals = [ [3,1] ]
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+
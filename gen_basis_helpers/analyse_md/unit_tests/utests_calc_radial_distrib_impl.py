@@ -4,6 +4,8 @@ import itertools as it
 import unittest
 import unittest.mock as mock
 
+import numpy as np
+
 import plato_pylib.shared.ucell_class as uCellHelp
 
 import gen_basis_helpers.analyse_md.binned_res as binResHelp
@@ -193,6 +195,18 @@ class TestPlanarRdfMultiBinnerFixedIndices(unittest.TestCase):
 		self.assertEqual(expBinsA, actBinsA)
 		self.assertEqual(expBinsB, actBinsB)
 
+	def testUpdateFromFramesConsistentWithTrajStep(self):
+		self._runTestFunct()
+		expBinsA, expBinsB = copy.deepcopy(self.binsA), copy.deepcopy(self.binsB)
+		self.createTestObjs()
+
+		coords = np.array( [ [x[:3] for x in self.cartCoordsA] ], dtype=float )
+		lattVects = np.array( [self.cellA.lattVects] )
+		self.testObj.updateCountsFromFrames(coords, lattVects)
+
+		self.assertEqual(expBinsA, self.binsA)
+		self.assertEqual(expBinsB, self.binsB)
+
 	def testRaisesForNonEqualParallelPlanes(self):
 		self.planeEqnB = planeEqnHelp.ThreeDimPlaneEquation(0,1,1,2)
 		self.createTestObjs()
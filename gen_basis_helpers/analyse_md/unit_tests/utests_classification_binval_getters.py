@@ -619,6 +619,7 @@ class TestClassifyByNumberNebsWithinDistance(unittest.TestCase):
 		self.minDist = 0.1
 		self.maxDist = 1
 		self.nNebs = [ [-0.1,0.1],[0.9,1.1] ]
+		self.useNebLists = False
 
 		self.createTestObjs()
 
@@ -629,7 +630,7 @@ class TestClassifyByNumberNebsWithinDistance(unittest.TestCase):
 
 		#Create an options object
 		currArgs = [self.binResObjs,self.fromIndices, self.toIndices]
-		currKwargs = {"maxDist":self.maxDist, "minDist":self.minDist,"nebRanges":self.nNebs}
+		currKwargs = {"maxDist":self.maxDist, "minDist":self.minDist,"nebRanges":self.nNebs, "useNebLists":self.useNebLists}
 		self.optObj = classDistrOptObjHelp.ClassifyByNumberNebsWithinDistanceOptsObj(*currArgs, **currKwargs)
 		
 		#Get sparse matrix populator + populate it
@@ -644,4 +645,11 @@ class TestClassifyByNumberNebsWithinDistance(unittest.TestCase):
 		actBinVals = self.testObj.getValsToBin(self.sparseMatrixCalculator)
 		self.assertEqual(expBinVals, actBinVals)
 
+	def testExpectedGeomA_nebLists(self):
+		self.useNebLists = True
+		self.createTestObjs()
+		expBinVals = [(1,2)]
+		actBinVals = self.testObj.getValsToBin(self.sparseMatrixCalculator)
+		self.assertEqual(expBinVals, actBinVals)
+
 
@@ -128,6 +128,22 @@ class TestGetClassDistrCountsOverTraj(unittest.TestCase):
 		self.assertEqual(expVals, actVals)
 
 
+class TestGetClassCountsAndTimeSeriesOverTraj_incremental(TestGetClassDistrCountsOverTraj):
+
+	def _runTestFunct(self):
+		return tCode.getClassCountsAndTimeSeriesOverTraj_incremental(self.traj, self.optObj)
+
+	def testExpectedValsA(self):
+		expCounts = np.array( [ (1,0,1), (0,1,1) ] )
+		actCounts, unused = self._runTestFunct()
+		self.assertTrue( np.array_equal(expCounts, actCounts) )
+
+	def testExpectedClassIndices(self):
+		expIndices = np.array( [ [0], [1] ] )
+		unused, actIndices = self._runTestFunct()
+		self.assertTrue( np.array_equal(expIndices, actIndices) )
+
+
 class TestFilteredClassDistrScatterData(unittest.TestCase):
 
 	def setUp(self):
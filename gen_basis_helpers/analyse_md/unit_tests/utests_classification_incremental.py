@@ -0,0 +1,144 @@
+import copy
+import unittest
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.classification_distr as classDistrHelp
+import gen_basis_helpers.analyse_md.classification_distr_opt_objs as classDistrOptObjs
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+
+import gen_basis_helpers.analyse_md.classification_incremental as tCode
+
+
+#Grid of water above a layer of "X" atoms, with random orientations; close enough that some h-bond
+def _getWaterGridCoords(randState, nWaterPerSide=3, spacing=2.9):
+	outCoords = [ [x,y,0.0,"X"] for x in np.arange(0,9,3.0) for y in np.arange(0,9,3.0) ]
+	for idxA in range(nWaterPerSide):
+		for idxB in range(nWaterPerSide):
+			for height in [2.5, 2.5+spacing]:
+				oxyPos = np.array([idxA*spacing, idxB*spacing, height]) + randState.uniform(-0.2,0.2,3)
+				outCoords.append( oxyPos.tolist() + ["O"] )
+				for hyVect in _getRandomWaterHyVects(randState):
+					outCoords.append( (oxyPos+hyVect).tolist() + ["H"] )
+	return outCoords
+
+
+def _getRandomWaterHyVects(randState):
+	rotMatrix, unused = np.linalg.qr( randState.normal(size=(3,3)) )
+	angle = np.radians(104.5/2)
+	vectA, vectB = 0.96*np.array([np.sin(angle),0,np.cos(angle)]), 0.96*np.array([-np.sin(angle),0,np.cos(angle)])
+	return [vectA @ rotMatrix, vectB @ rotMatrix]
+
+
+class TestIncrementalWaterClassifier(unittest.TestCase):
+
+	def setUp(self):
+		self.randState = np.random.RandomState(5)
+		self.lattParams, self.lattAngles = [9,9,20], [90,90,90]
+		self.coordsA = _getWaterGridCoords(self.randState)
+		self.nFrames = 4
+		self.displacement = 0.15
+
+		eles = [x[-1] for x in self.coordsA]
+		self.distFilterIndices = [idx for idx,ele in enumerate(eles) if ele=="X"]
+		self.oxyIndices = [idx for idx,ele in enumerate(eles) if ele=="O"]
+		self.hyIndices = [ [idx+1,idx+2] for idx in self.oxyIndices ]
+
+		self.distFilterRanges = [ [0,4], [0,4], [4,10], [0,10] ]
+		self.nDonorFilterRanges = [ [-0.1,1.1], [1.9,2.1], [-1,1000], [-1,1000] ]
+		self.nAcceptorFilterRanges = [ [-1,1000], [-1,1000], [-1,1000], [0.9,1.1] ]
+		self.nTotalFilterRanges = [ [-1,1000], [-1,1000], [1.9,10], [-1,1000] ]
+		self.skin = 0.0
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.traj = self._getTrajWithRandomDisplacements(self.coordsA, self.nFrames, self.displacement)
+		currArgs = [None, self.oxyIndices, self.hyIndices, self.distFilterIndices, self.distFilterRanges]
+		currKwargs = {"nDonorFilterRanges":self.nDonorFilterRanges, "nAcceptorFilterRanges":self.nAcceptorFilterRanges,
+		              "nTotalFilterRanges":self.nTotalFilterRanges}
+		self.optsObj = classDistrOptObjs.WaterCountTypesMinDistAndHBondSimpleOpts(*currArgs, **currKwargs)
+		self.testObj = tCode.IncrementalWaterClassifierMinDistAndNumberHBonds.fromWaterCountTypesOptsObj(self.optsObj, skin=self.skin)
+
+	def _getTrajWithRandomDisplacements(self, startCoords, nFrames, displacement):
+		outSteps, currCoords = list(), copy.deepcopy(startCoords)
+		for stepIdx in range(nFrames):
+			outSteps.append( trajCoreHelp.TrajStepFlexible(unitCell=self._getCellFromCoords(currCoords), step=stepIdx) )
+			currCoords = [ (np.array(x[:3]) + self.randState.uniform(-displacement,displacement,3)).tolist() + [x[-1]] for x in currCoords ]
+		return trajCoreHelp.TrajectoryInMemory(outSteps)
+
+	def _getCellFromCoords(self, coords):
+		outCell = uCellHelp.UnitCell(lattParams=self.lattParams, lattAngles=self.lattAngles)
+		outCell.cartCoords = coords
+		return outCell
+
+	def _getExpCountsFromNonIncrementalCode(self):
+		return np.array( classDistrHelp.getClassDistrCountsOverTraj(self.traj, self.optsObj) )
+
+	def _getActCounts(self):
+		return np.array( [np.sum(self.testObj.classifyGeom(step.unitCell), axis=0) for step in self.traj] )
+
+	def testCountsMatchNonIncrementalCode_zeroSkin(self):
+		expCounts = self._getExpCountsFromNonIncrementalCode()
+		actCounts = self._getActCounts()
+		self.assertTrue( np.any(expCounts[:,:2]>0) ) #Check the test is meaningful (h-bonds are actually found)
+		self.assertTrue( np.array_equal(expCounts, actCounts) )
+
+	def testNothingReEvaluatedForUnchangedGeom_zeroSkin(self):
+		cell = self.traj.trajSteps[0].unitCell
+		expMembership = self.testObj.classifyGeom(cell)
+		self.assertEqual(len(self.oxyIndices), self.testObj.nReEvaluated)
+		actMembership = self.testObj.classifyGeom(copy.deepcopy(cell))
+		self.assertEqual(0, self.testObj.nReEvaluated)
+		self.assertTrue( np.array_equal(expMembership, actMembership) )
+
+	def testSmallMovesWithinSkinNotReEvaluated(self):
+		self.skin, self.displacement = 0.5, 0.01
+		self.createTestObjs()
+		self._getActCounts()
+		self.assertEqual(0, self.testObj.nReEvaluated)
+
+	def testResetMeansAllReEvaluated(self):
+		self.skin, self.displacement = 0.5, 0.01
+		self.createTestObjs()
+		self._getActCounts()
+		self.testObj.reset()
+		self.testObj.classifyGeom(self.traj.trajSteps[-1].unitCell)
+		self.assertEqual(len(self.oxyIndices), self.testObj.nReEvaluated)
+
+	def testWaterMovingIntoRangeTriggersReEvaluation_largeSkin(self):
+		self.skin = 2.0
+		self.createTestObjs()
+		self.testObj.classifyGeom(self.traj.trajSteps[0].unitCell)
+
+		#Put water 0 directly next to water 1 (acting as an acceptor from it)
+		newCoords = copy.deepcopy(self.traj.trajSteps[0].unitCell.cartCoords)
+		oxyA, oxyB, hyB = [np.array(newCoords[idx][:3]) for idx in [self.oxyIndices[0], self.oxyIndices[1], self.hyIndices[1][0]]]
+		shiftVect = (oxyB + 2.8*(hyB-oxyB)/np.linalg.norm(hyB-oxyB)) - oxyA
+		for idx in [self.oxyIndices[0]] + self.hyIndices[0]:
+			newCoords[idx][:3] = (np.array(newCoords[idx][:3]) + shiftVect).tolist()
+		newCell = self._getCellFromCoords(newCoords)
+
+		self.testObj.classifyGeom(newCell)
+		expObj = tCode.IncrementalWaterClassifierMinDistAndNumberHBonds.fromWaterCountTypesOptsObj(self.optsObj)
+		expObj.classifyGeom(newCell)
+		self.assertTrue( self.testObj.nAcceptor[0] >= 1 )
+		self.assertTrue( np.array_equal(expObj.nAcceptor[:2], self.testObj.nAcceptor[:2]) )
+		self.assertTrue( np.array_equal(expObj.nDonor[:2], self.testObj.nDonor[:2]) )
+
+	def testRaisesForInconsistentRangeLengths(self):
+		self.nTotalFilterRanges = self.nTotalFilterRanges[:2]
+		with self.assertRaises(ValueError):
+			self.createTestObjs()
+
+
+class TestGetClassIndicesFromClassMembership(unittest.TestCase):
+
+	def testExpectedA(self):
+		classMembership = [ [False,True,True], [False,False,False], [True,False,True] ]
+		expVals = np.array([1,-1,0])
+		actVals = tCode.getClassIndicesFromClassMembership(classMembership)
+		self.assertTrue( np.array_equal(expVals, actVals) )
+		self.assertEqual(np.int8, actVals.dtype)
+
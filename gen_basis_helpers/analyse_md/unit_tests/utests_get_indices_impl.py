@@ -176,6 +176,31 @@ class TestGetWaterMoleculeIndicesStandard(unittest.TestCase):
 		actOutput = self._runTestFunct()
 		self.assertEqual(expOutput,actOutput)
 
+	def testExpected_oxygenWithThreeHydrogen(self):
+		self.coordsA.append( [5,5,4,"H"] )
+		self.createTestObjs()
+		expOutput = list()
+		actOutput = self._runTestFunct()
+		self.assertEqual(expOutput, actOutput)
+
+	def testIndexArraysOverTraj_skinReused(self):
+		self.skin = 0.5
+		kwargDict = {"minOH":self.minOH, "maxOH":self.maxOH, "minAngle":self.minAngle, "maxAngle":self.maxAngle, "skin":self.skin}
+		self.testObjA = tCode.GetWaterMoleculeIndicesFromGeomStandard(**kwargDict)
+
+		#Second step the water moves slightly; third step one H moves far away
+		movedCoords = [ [x+0.1 for x in coord[:3]] + [coord[-1]] for coord in self.coordsA ]
+		brokenCoords = [list(x) for x in movedCoords]
+		brokenCoords[1][:3] = [1,6,6]
+		cells = [self.cellA, _getCellFromLattAndCoords(self.lattParams, self.lattAngles, movedCoords),
+		         _getCellFromLattAndCoords(self.lattParams, self.lattAngles, brokenCoords)]
+		inpTraj = [ mock.Mock(unitCell=cell) for cell in cells ]
+
+		actOutput = tCode.getMoleculeIndexArraysOverTraj(inpTraj, self.testObjA)
+		self.assertEqual( [ [[0,1,2]], [[0,1,2]], [] ], [x.tolist() for x in actOutput] )
+		self.assertEqual( (0,3), actOutput[-1].shape )
+		self.assertEqual(2, self.testObjA._nebPairList.nSearches)
+
 
 class TestGetHydroxylIndicesStandard(unittest.TestCase):
 
@@ -620,3 +645,9 @@ def _loadExpectedHydroxylIndices_singleMgLayerHydroxylatedWithWaterMonolayer():
 	               [19,20], [21,22], [23,24], [25,26] ]
 	return outIndices
 
+
+def _getCellFromLattAndCoords(lattParams, lattAngles, cartCoords):
+	outCell = uCellHelp.UnitCell(lattParams=lattParams, lattAngles=lattAngles)
+	outCell.cartCoords = cartCoords
+	return outCell
+
@@ -2,6 +2,7 @@
 
 import copy
 import itertools as it
+import os
 import unittest
 import unittest.mock as mock
 
@@ -60,6 +61,44 @@ class TestGetTrajSampledEveryNSteps(unittest.TestCase):
 		with self.assertRaises(ValueError):
 			self._runTestFunct()
 
+class TestManipTrajOnDisk(unittest.TestCase):
+
+	def setUp(self):
+		self.unitCellA = uCellHelp.UnitCell(lattParams=[10,10,10],lattAngles=[90,90,90])
+		self.steps = [0,1,2,3,4,5,6]
+		self.times = [0,2,4,6,8,10,12]
+		self.fileNameA = "temp_manip_traj_on_disk.traj"
+		self.createTestObjs()
+
+	def tearDown(self):
+		os.remove(self.fileNameA)
+
+	def createTestObjs(self):
+		trajSteps = [trajHelp.TrajStepFlexible(step=s, time=t, unitCell=self.unitCellA) for s,t in zip(self.steps,self.times)]
+		trajHelp.dumpTrajObjToFile(trajHelp.TrajectoryInMemory(trajSteps), self.fileNameA)
+		self.inpTrajA = trajHelp.TrajectoryOnDisk(self.fileNameA)
+
+	def testSampledEveryNSteps(self):
+		expSteps = [0,3,6]
+		outTraj = tCode.getTrajSampledEveryNSteps(self.inpTrajA, 3)
+		actSteps = [x.step for x in outTraj]
+		self.assertIsInstance(outTraj, trajHelp.TrajectoryOnDisk)
+		self.assertEqual(expSteps, actSteps)
+
+	def testSampledEveryNSteps_inPlace(self):
+		expSteps = [0,2,4,6]
+		tCode.getTrajSampledEveryNSteps(self.inpTrajA, 2, inPlace=True, createView=False)
+		actSteps = [x.step for x in self.inpTrajA]
+		self.assertEqual(expSteps, actSteps)
+
+	def testTrajBetweenTimes(self):
+		expSteps = [2,3,4]
+		outTraj = tCode.getTrajBetweenTimes(self.inpTrajA, minTime=4, maxTime=8)
+		actSteps = [x.step for x in outTraj]
+		self.assertIsInstance(outTraj, trajHelp.TrajectoryOnDisk)
+		self.assertEqual(expSteps, actSteps)
+
+
 class TestGetTrajSplitIntoPieces(unittest.TestCase):
 
 	def setUp(self):
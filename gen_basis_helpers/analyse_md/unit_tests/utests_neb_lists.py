@@ -43,3 +43,110 @@ class TestGetUniqueNeighbourLists(unittest.TestCase):
 		actNebLists = tCode.getNeighbourListsForInpCell_imagesMappedToCentral(self.cellA, self.cutoff)
 		self.assertEqual(expNebLists,actNebLists)
 
+
+class TestGetNebPairsWithinCutoff(unittest.TestCase):
+
+	def setUp(self):
+		self.cutoff = 1.5
+		self.lattParams = [10,10,10]
+		self.lattAngles = [90,90,90]
+		self.coords = [ [5,5,9.5,"X"],
+		                [5,5,0.5,"Y"],
+		                [5,5,2,"Z"] ]
+		self.indicesA = None
+		self.indicesB = None
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.cellA = uCellHelp.UnitCell(lattParams=self.lattParams, lattAngles=self.lattAngles)
+		self.cellA.cartCoords = self.coords
+
+	def _runTestFunct(self):
+		currKwargs = {"indicesA":self.indicesA, "indicesB":self.indicesB}
+		pairsA, pairsB, dists = tCode.getNebPairsWithinCutoffForInpCell(self.cellA, self.cutoff, **currKwargs)
+		return sorted( [ (int(a),int(b),round(float(d),5)) for a,b,d in zip(pairsA,pairsB,dists) ] )
+
+	def testExpectedPairs_withPBCs(self):
+		self.indicesA, self.indicesB = [0], [1,2]
+		expPairs = [ (0,1,1.0) ]
+		actPairs = self._runTestFunct()
+		self.assertEqual(expPairs, actPairs)
+
+	def testExpectedPairs_allIndicesIncludesSelfPairs(self):
+		self.cutoff = 1.6
+		expPairs = [ (0,0,0.0), (0,1,1.0), (1,0,1.0), (1,1,0.0), (1,2,1.5), (2,1,1.5), (2,2,0.0) ]
+		actPairs = self._runTestFunct()
+		self.assertEqual(expPairs, actPairs)
+
+
+class TestNebPairListWithSkin(unittest.TestCase):
+
+	def setUp(self):
+		self.cutoff = 1.6
+		self.skin = 2.0
+		self.lattParams, self.lattAngles = [10,10,10], [90,90,90]
+		self.coords = [ [5,5,9.5,"X"],
+		                [5,5,0.5,"Y"],
+		                [5,5,2,"Z"] ]
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.cellA = self._getCell(self.coords)
+		self.testObj = tCode.NebPairListWithSkin(self.cutoff, skin=self.skin)
+
+	def _getCell(self, coords):
+		outCell = uCellHelp.UnitCell(lattParams=self.lattParams, lattAngles=self.lattAngles)
+		outCell.cartCoords = coords
+		return outCell
+
+	def _getPairs(self, inpCell, **kwargs):
+		pairsA, pairsB, dists = self.testObj.getPairsForInpCell(inpCell, **kwargs)
+		return sorted( [ (int(a),int(b),round(float(d),5)) for a,b,d in zip(pairsA,pairsB,dists) ] )
+
+	def _getExpPairs(self, inpCell, **kwargs):
+		pairsA, pairsB, dists = tCode.getNebPairsWithinCutoffForInpCell(inpCell, self.cutoff, **kwargs)
+		return sorted( [ (int(a),int(b),round(float(d),5)) for a,b,d in zip(pairsA,pairsB,dists) ] )
+
+	def testSmallMoveReusesListAndGivesExpectedPairs(self):
+		self._getPairs(self.cellA)
+		movedCell = self._getCell( [ [5,5,9.5,"X"], [5,5,0.5,"Y"], [5,5,1.05,"Z"] ] ) #Z moves into range of X
+		expPairs = self._getExpPairs(movedCell)
+		actPairs = self._getPairs(movedCell)
+		self.assertEqual(expPairs, actPairs)
+		self.assertTrue( (0,2,1.55) in actPairs )
+		self.assertEqual(1, self.testObj.nSearches)
+
+	def testLargeMoveMeansNewSearch(self):
+		self._getPairs(self.cellA)
+		movedCell = self._getCell( [ [5,5,9.5,"X"], [5,5,0.5,"Y"], [5,5,5,"Z"] ] )
+		expPairs = self._getExpPairs(movedCell)
+		actPairs = self._getPairs(movedCell)
+		self.assertEqual(expPairs, actPairs)
+		self.assertEqual(2, self.testObj.nSearches)
+
+	def testDiffIndicesMeansNewSearch(self):
+		self._getPairs(self.cellA, indicesA=[0], indicesB=[1,2])
+		expPairs = self._getExpPairs(self.cellA, indicesA=[1], indicesB=[0,2])
+		actPairs = self._getPairs(self.cellA, indicesA=[1], indicesB=[0,2])
+		self.assertEqual(expPairs, actPairs)
+		self.assertEqual(2, self.testObj.nSearches)
+
+
+class TestSparseDistMatrix(unittest.TestCase):
+
+	def setUp(self):
+		self.testObj = tCode.SparseDistMatrix()
+		self.testObj.addPairs([0,1], [2,3], [1.5,2.5])
+
+	def testIndexingLikeFullMatrix(self):
+		self.assertAlmostEqual(1.5, self.testObj[0][2])
+		self.assertAlmostEqual(1.5, self.testObj[2][0])
+		self.assertEqual(float("inf"), self.testObj[0][3])
+		self.assertEqual([2.5, float("inf")], self.testObj[3][[1,2]].tolist())
+
+	def testGetNebIndicesAndDists(self):
+		expIndices, expDists = [2], [1.5]
+		actIndices, actDists = self.testObj.getNebIndicesAndDists(0)
+		self.assertEqual(expIndices, actIndices)
+		self.assertEqual(expDists, actDists)
+
@@ -73,6 +73,29 @@ class TestGetSimpleCentralWindowAverageFromIter(unittest.TestCase):
 		actVals = self._runTestFunct()
 		self.assertEqual(expVals, actVals)
 
+class TestGetBlockingStatsFromThermoData(unittest.TestCase):
+
+	def setUp(self):
+		self.temp = [2, 3, -9, -2, 6, 5, 2, -1, 5]
+		self.step = [x for x in range(len(self.temp))]
+		self.props = ["temp","step"]
+		self.startIdx = 1
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		thermoDataDict = {"step":self.step, "time":self.step, "temp":self.temp}
+		self.thermoDataObjA = thermoDataHelp.ThermoDataStandard(thermoDataDict)
+
+	def testMatchesSingleSeriesStats(self):
+		actDict = tCode.getBlockingStatsFromThermoData(self.thermoDataObjA, self.props, startIdx=self.startIdx)
+		for propIdx, prop in enumerate(self.props):
+			expDicts = tCode.statsHelp.getStatsFromBlockingDataUpToMaxOrder(self.thermoDataObjA.dataDict[prop][self.startIdx:], 10)
+			self.assertEqual( len(expDicts), len(actDict["order"]) )
+			for orderIdx, expDict in enumerate(expDicts):
+				self.assertAlmostEqual( expDict["mean"], actDict["mean"][propIdx][orderIdx] )
+				self.assertAlmostEqual( expDict["mean_std_dev"], actDict["mean_std_dev"][propIdx][orderIdx] )
+
+
 class TestGetMovingAverageFromThermoData(unittest.TestCase):
 
 
@@ -30,6 +30,12 @@ class TestThermoDataReadWrite(unittest.TestCase):
 		actObj = tCode.readThermoDataFromFile(self.tempFileA)
 		self.assertEqual(expObj,actObj)
 
+	def testReadAndWriteConsistent_compressed(self):
+		expObj = self.testObjA
+		tCode.dumpStandardThermoDataToFile(self.testObjA, self.tempFileA, compress=True)
+		actObj = tCode.readThermoDataFromFile(self.tempFileA)
+		self.assertEqual(expObj,actObj)
+
 class TestThermoDataStandard(unittest.TestCase):
 
 	def setUp(self):
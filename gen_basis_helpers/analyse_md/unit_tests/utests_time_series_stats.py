@@ -0,0 +1,145 @@
+import unittest
+
+import numpy as np
+
+import gen_basis_helpers.analyse_md.std_stats as stdStatsHelp
+import gen_basis_helpers.analyse_md.time_series_stats as tCode
+
+
+#AR(1) process; x[t] = phi*x[t-1] + noise. Exact integrated correlation time is (1+phi)/(1-phi)
+def _getAROneSeries(randState, phi, nPoints, nSeries=1):
+	noise = randState.normal(size=(nSeries,nPoints))
+	outVals = np.zeros( (nSeries,nPoints) )
+	outVals[:,0] = noise[:,0]
+	for idx in range(1,nPoints):
+		outVals[:,idx] = phi*outVals[:,idx-1] + noise[:,idx]
+	return outVals
+
+
+class TestGetBlockingStats(unittest.TestCase):
+
+	def setUp(self):
+		self.inpVals = [2, 3, -9, -2, 6, 5, 2, -1, 5, 1, 8, -4, 6, -6, -1, -6, 4]
+		self.maxOrder = None
+
+	def _runTestFunct(self, inpVals):
+		return tCode.getBlockingStats(inpVals, maxOrder=self.maxOrder)
+
+	def _checkMatchesListVersion(self, inpVals, actDict):
+		expDicts = stdStatsHelp.getStatsFromBlockingDataUpToMaxOrder(inpVals, 100 if self.maxOrder is None else self.maxOrder)
+		self.assertEqual( len(expDicts), len(actDict["order"]) )
+		for idx,expDict in enumerate(expDicts):
+			self.assertEqual(expDict["order"], actDict["order"][idx])
+			for key in ["mean", "mean_std_dev", "mean_std_dev_std_dev"]:
+				self.assertAlmostEqual(expDict[key], actDict[key][idx])
+
+	def testOneDimMatchesListVersion(self):
+		self._checkMatchesListVersion( self.inpVals, self._runTestFunct(self.inpVals) )
+
+	def testOneDimMatchesListVersion_maxOrderSet(self):
+		self.maxOrder = 1
+		self._checkMatchesListVersion( self.inpVals, self._runTestFunct(self.inpVals) )
+
+	def testMultipleSeriesMatchSingle(self):
+		seriesB = [2*x+1 for x in self.inpVals]
+		actDict = self._runTestFunct( [self.inpVals, seriesB] )
+		for idx,series in enumerate([self.inpVals, seriesB]):
+			self._checkMatchesListVersion(series, {key:(val[idx] if np.ndim(val)==2 else val) for key,val in actDict.items()})
+
+	def testExpectedNumberBlocks(self):
+		expVals = [17, 8, 4, 2]
+		actVals = self._runTestFunct(self.inpVals)["n_blocks"]
+		self.assertEqual(expVals, actVals.tolist())
+
+
+class TestOnlineBlockingStats(unittest.TestCase):
+
+	def setUp(self):
+		self.randState = np.random.RandomState(2)
+		self.nSeries, self.nPoints = 3, 203
+		self.maxOrder = None
+		self.inpData = self.randState.normal(size=(self.nSeries, self.nPoints))
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.testObj = tCode.OnlineBlockingStats(self.nSeries, maxOrder=self.maxOrder)
+
+	def _checkMatchesBatch(self, nPoints):
+		expDict = tCode.getBlockingStats(self.inpData[:,:nPoints], maxOrder=self.maxOrder)
+		actDict = self.testObj.getBlockingStats()
+		self.assertEqual(expDict.keys(), actDict.keys())
+		for key in expDict.keys():
+			self.assertTrue( np.allclose(expDict[key], actDict[key]) )
+
+	def testMatchesBatch_unevenChunks(self):
+		chunkEdges = [0, 1, 2, 7, 8, 50, 51, 128, 203]
+		for startIdx, endIdx in zip(chunkEdges[:-1], chunkEdges[1:]):
+			self.testObj.update( self.inpData[:,startIdx:endIdx] )
+			if endIdx > 2:
+				self._checkMatchesBatch(endIdx)
+		self.assertEqual(self.nPoints, self.testObj.nPoints)
+
+	def testMatchesBatch_singleSteps_maxOrderSet(self):
+		self.maxOrder = 2
+		self.createTestObjs()
+		for idx in range(self.nPoints):
+			self.testObj.update( self.inpData[:,idx] )
+		self._checkMatchesBatch(self.nPoints)
+
+	def testRaisesForWrongNumberOfSeries(self):
+		with self.assertRaises(ValueError):
+			self.testObj.update( self.inpData[:2] )
+
+	def testRaisesWhenNoData(self):
+		with self.assertRaises(ValueError):
+			self.testObj.getBlockingStats()
+
+
+class TestAutocorrelationAndCorrelationTimes(unittest.TestCase):
+
+	def setUp(self):
+		self.randState = np.random.RandomState(4)
+
+	def testAcfMatchesDirectSum(self):
+		inpVals = self.randState.normal(size=(2,50))
+		maxLag = 10
+		actVals = tCode.getAutocorrelationFunctions(inpVals, maxLag=maxLag)
+		for seriesIdx in range(2):
+			centred = inpVals[seriesIdx] - np.mean(inpVals[seriesIdx])
+			expVals = np.array([np.sum(centred[:50-lag]*centred[lag:]) for lag in range(maxLag+1)]) / np.sum(centred**2)
+			self.assertTrue( np.allclose(expVals, actVals[seriesIdx]) )
+
+	def testCorrTimesForAROneProcess(self):
+		phis = [0.0, 0.8]
+		inpVals = np.concatenate( [_getAROneSeries(self.randState, phi, 20000) for phi in phis] )
+		expVals = [ (1+phi)/(1-phi) for phi in phis ]
+		actVals = tCode.getIntegratedCorrelationTimes(inpVals)
+		for expVal, actVal in zip(expVals, actVals):
+			self.assertTrue( abs(expVal-actVal)/expVal < 0.15 )
+
+	def testStandardErrorUsesCorrTimes(self):
+		inpVals = self.randState.normal(size=100)
+		expVal = np.sqrt( np.var(inpVals)*4/100 )
+		actVal = tCode.getStandardErrorsFromCorrelationTimes(inpVals, corrTimes=[4])
+		self.assertAlmostEqual(expVal, actVal)
+
+
+class TestGetCentralWindowAverages(unittest.TestCase):
+
+	def setUp(self):
+		self.inpVals = [ [1,2,3,4,5,6,7,8,10], [2,4,6,8,10,12,14,16,20] ]
+		self.widthEachSide = 2
+
+	def testExpectedValsTwoSeries(self):
+		expRow = [np.nan, np.nan, 15/5, 20/5, 25/5, 30/5, 36/5, np.nan, np.nan]
+		expVals = np.array( [expRow, [2*x for x in expRow]] )
+		actVals = tCode.getCentralWindowAverages(self.inpVals, self.widthEachSide)
+		self.assertTrue( np.allclose(expVals, actVals, equal_nan=True) )
+
+	def testAllFillValsWhenTooShort(self):
+		actVals = tCode.getCentralWindowAverages([1,2,3], self.widthEachSide, fillVal=-1)
+		self.assertEqual([-1,-1,-1], actVals.tolist())
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.traj_core as trajHelp
+import gen_basis_helpers.analyse_md.traj_io as trajIoHelp
+import gen_basis_helpers.analyse_md.traj_binary as tCode
+
+
+class TestBinaryTrajReadWrite(unittest.TestCase):
+
+	def setUp(self):
+		self.lattParamsA, self.lattParamsB = [7,8,9], [4,5,6]
+		self.coordsA = [ [1,2,3,"Mg"], [4,5,6,"O"] ]
+		self.coordsB = [ [2,2,2,"Mg"], [3,3,3,"O"] ]
+		self.stepA, self.stepB = 4, 8
+		self.timeA, self.timeB = 12, 24
+		self.velsA = [ [1,1,1], [2,2,2] ]
+		self.outDir = "temp_binary_traj"
+		self.tempTrajPath = "temp_file_for_binary.traj"
+		self.createTestObjs()
+
+	def tearDown(self):
+		shutil.rmtree(self.outDir, ignore_errors=True)
+		for path in [self.tempTrajPath]:
+			if os.path.exists(path):
+				os.remove(path)
+
+	def createTestObjs(self):
+		cellA = uCellHelp.UnitCell(lattParams=self.lattParamsA, lattAngles=[90,90,90])
+		cellB = uCellHelp.UnitCell(lattParams=self.lattParamsB, lattAngles=[90,90,90])
+		cellA.cartCoords, cellB.cartCoords = self.coordsA, self.coordsB
+		extraAttrDict = {"velocities":{"value":self.velsA, "cmpType":"numericalArray"}}
+		self.trajStepA = trajHelp.TrajStepFlexible(unitCell=cellA, step=self.stepA, time=self.timeA, extraAttrDict=extraAttrDict)
+		self.trajStepB = trajHelp.TrajStepFlexible(unitCell=cellB, step=self.stepB, time=self.timeB)
+		self.testTrajA = trajHelp.TrajectoryInMemory([self.trajStepA, self.trajStepB])
+
+	def _dumpAndRead(self):
+		tCode.dumpTrajObjToBinaryFormat(self.testTrajA, self.outDir)
+		return tCode.readTrajFromBinaryFormat(self.outDir)
+
+	def testWriteAndReadLeadToSameTraj(self):
+		expTraj = self.testTrajA
+		actTraj = self._dumpAndRead().toTrajInMemory()
+		self.assertEqual(expTraj, actTraj)
+
+	def testExpectedCoordsArray(self):
+		expCoords = np.array( [ [x[:3] for x in self.coordsA], [x[:3] for x in self.coordsB] ] )
+		outTraj = self._dumpAndRead()
+		self.assertTrue( np.allclose(expCoords, outTraj.coords) )
+		self.assertTrue( np.allclose(expCoords[1], outTraj.getCoordsForFrame(1)) )
+
+	def testElementsStoredOnce(self):
+		outTraj = self._dumpAndRead()
+		self.assertEqual( ["Mg","O"], outTraj.elements )
+
+	def testExtraAttrPresenceArray(self):
+		outTraj = self._dumpAndRead()
+		actVals, actPresent = outTraj.getExtraAttrArray("velocities")
+		self.assertEqual([True,False], actPresent.tolist())
+		self.assertTrue( np.allclose(np.array(self.velsA), actVals[0]) )
+		self.assertTrue( np.all(np.isnan(actVals[1])) )
+
+	def testExtraAttrNoneOnFirstStep(self):
+		self.trajStepA.velocities = None
+		self.trajStepB.addExtraAttrDict( {"velocities":{"value":self.velsA, "cmpType":"numericalArray"}} )
+		outTraj = self._dumpAndRead()
+		actVals, actPresent = outTraj.getExtraAttrArray("velocities")
+		self.assertEqual([False,True], actPresent.tolist())
+		self.assertTrue( np.all(np.isnan(actVals[0])) )
+		self.assertTrue( np.allclose(np.array(self.velsA), actVals[1]) )
+
+	def testSlicingGivesExpectedSteps(self):
+		outTraj = self._dumpAndRead()[1:]
+		self.assertEqual(1, len(outTraj))
+		self.assertEqual(self.trajStepB, outTraj[0])
+
+	def testRaisesIfElementsChange(self):
+		self.coordsB = [ [2,2,2,"O"], [3,3,3,"O"] ]
+		self.createTestObjs()
+		with self.assertRaises(ValueError):
+			tCode.dumpTrajObjToBinaryFormat(self.testTrajA, self.outDir)
+
+	def testConvertToExtendedXyzAndBack(self):
+		tCode.dumpTrajObjToBinaryFormat(self.testTrajA, self.outDir)
+		tCode.convertBinaryFormatToSimpleExtendedXyz(self.outDir, self.tempTrajPath)
+		shutil.rmtree(self.outDir)
+		tCode.convertSimpleExtendedXyzToBinaryFormat(self.tempTrajPath, self.outDir)
+		expTraj = trajIoHelp.readTrajFromSimpleExtendedXyzFormat(self.tempTrajPath)
+		actTraj = tCode.readTrajFromBinaryFormat(self.outDir).toTrajInMemory()
+		self.assertEqual(expTraj, actTraj)
+		self.assertEqual([self.stepA, self.stepB], [x.step for x in actTraj])
+
+	def testConvertFromTrajFileAndBack(self):
+		trajHelp.dumpTrajObjToFile(self.testTrajA, self.tempTrajPath)
+		tCode.convertTrajFileToBinaryFormat(self.tempTrajPath, self.outDir)
+		os.remove(self.tempTrajPath)
+		tCode.convertBinaryFormatToTrajFile(self.outDir, self.tempTrajPath)
+		expTraj = self.testTrajA
+		actTraj = trajHelp.readTrajObjFromFileToTrajectoryInMemory(self.tempTrajPath)
+		self.assertEqual(expTraj, actTraj)
+
+
@@ -0,0 +1,95 @@
+
+import os
+import shutil
+import unittest
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.traj_core as trajHelp
+import gen_basis_helpers.analyse_md.traj_compressed as tCode
+
+
+class TestCompressedTrajReadWrite(unittest.TestCase):
+
+	def setUp(self):
+		self.nSteps = 7
+		self.framesPerChunk = 3
+		self.coords = [ [1,2,3,"Mg"], [4,5,6,"O"] ]
+		self.velsA = [ [1,1,1], [2,2,2] ]
+		self.outDir = "temp_compressed_traj"
+		self.tempTrajPath = "temp_file_for_compressed.traj"
+		self.createTestObjs()
+
+	def tearDown(self):
+		shutil.rmtree(self.outDir, ignore_errors=True)
+		if os.path.exists(self.tempTrajPath):
+			os.remove(self.tempTrajPath)
+
+	#Every step differs (coords/cell/time) and only some steps have velocities
+	def createTestObjs(self):
+		trajSteps = list()
+		for idx in range(self.nSteps):
+			currCell = uCellHelp.UnitCell(lattParams=[7+idx,8,9], lattAngles=[90,90,90])
+			currCell.cartCoords = [ [x+0.1*idx for x in coord[:3]] + [coord[-1]] for coord in self.coords ]
+			extraAttrDict = {"velocities":{"value":self.velsA, "cmpType":"numericalArray"}} if idx%2==0 else None
+			trajSteps.append( trajHelp.TrajStepFlexible(unitCell=currCell, step=2*idx, time=10*idx, extraAttrDict=extraAttrDict) )
+		self.testTrajA = trajHelp.TrajectoryInMemory(trajSteps)
+
+	def _dumpAndRead(self, **kwargs):
+		tCode.dumpTrajObjToCompressedFormat(self.testTrajA, self.outDir, framesPerChunk=self.framesPerChunk)
+		return tCode.readTrajFromCompressedFormat(self.outDir, **kwargs)
+
+	def testWriteAndReadLeadToSameTraj(self):
+		expTraj = self.testTrajA
+		actTraj = self._dumpAndRead()
+		self.assertEqual(expTraj, actTraj)
+
+	def testExpectedManifest(self):
+		self._dumpAndRead()
+		manifest = tCode.readCompressedTrajManifest(self.outDir)
+		self.assertEqual(self.nSteps, manifest["nSteps"])
+		self.assertEqual( ["Mg","O"], manifest["elements"] )
+		self.assertEqual( [0,3,6], [x["startFrame"] for x in manifest["chunks"]] )
+		self.assertEqual( [0,30,60], [x["minTime"] for x in manifest["chunks"]] )
+		self.assertEqual( [4,10,12], [x["lastStep"] for x in manifest["chunks"]] )
+
+	def testReadSubsetOfFrames_orderKept(self):
+		frameIndices = [5,0,-1]
+		expTraj = trajHelp.TrajectoryInMemory( [self.testTrajA.trajSteps[idx] for idx in frameIndices] )
+		actTraj = self._dumpAndRead(frameIndices=frameIndices)
+		self.assertEqual(expTraj, actTraj)
+
+	def testReadBetweenTimes(self):
+		expTraj = trajHelp.TrajectoryInMemory( self.testTrajA.trajSteps[2:5] )
+		actTraj = self._dumpAndRead(minTime=20, maxTime=45)
+		self.assertEqual(expTraj, actTraj)
+
+	def testOnlyRequiredChunksRead(self):
+		self._dumpAndRead()
+		os.remove( os.path.join(self.outDir, "chunk_00000.npz") )
+		expTraj = trajHelp.TrajectoryInMemory( self.testTrajA.trajSteps[3:5] )
+		actTraj = tCode.readTrajFromCompressedFormat(self.outDir, frameIndices=[3,4])
+		self.assertEqual(expTraj, actTraj)
+
+	def testRaisesForCorruptChunk(self):
+		self._dumpAndRead()
+		with open( os.path.join(self.outDir,"chunk_00001.npz"), "ab" ) as f:
+			f.write(b"extra")
+		with self.assertRaises(ValueError):
+			tCode.readTrajFromCompressedFormat(self.outDir)
+
+	def testConvertFromTrajFile(self):
+		trajHelp.dumpTrajObjToFile(self.testTrajA, self.tempTrajPath)
+		tCode.convertTrajFileToCompressedFormat(self.tempTrajPath, self.outDir, framesPerChunk=2)
+		actTraj = tCode.readTrajFromCompressedFormat(self.outDir)
+		self.assertEqual(self.testTrajA, actTraj)
+
+	def testRaisesIfAtomsChange(self):
+		self.testTrajA.trajSteps[4].unitCell.cartCoords = [ [1,2,3,"Mg"] ]
+		with self.assertRaises(ValueError):
+			tCode.dumpTrajObjToCompressedFormat(self.testTrajA, self.outDir)
+
+
+if __name__ == "__main__":
+	unittest.main()
+
@@ -40,6 +40,73 @@ class TestTrajInMemoryReadWrite(unittest.TestCase):
 		self.assertEqual(expObj,actObj)
 
 
+class TestTrajOnDisk(unittest.TestCase):
+
+	def setUp(self):
+		self.unitCellA = uCellHelp.UnitCell(lattParams=[10,10,10],lattAngles=[90,90,90])
+		self.steps = [0,5,10,15,20]
+		self.times = [0,1,2,3,4]
+		self.fileNameA = "temp_file_on_disk_a.traj"
+		self.createTestObjs()
+
+	def tearDown(self):
+		os.remove(self.fileNameA)
+
+	def createTestObjs(self):
+		self.trajSteps = [tCode.TrajStepFlexible(time=t, step=s, unitCell=self.unitCellA) for s,t in zip(self.steps,self.times)]
+		self.trajInMemA = tCode.TrajectoryInMemory(self.trajSteps)
+		tCode.dumpTrajObjToFile(self.trajInMemA, self.fileNameA)
+		self.testObjA = tCode.readTrajObjFromFileToTrajectoryOnDisk(self.fileNameA)
+
+	def testIterMatchesInMemoryTraj(self):
+		expObj = self.trajInMemA
+		actObj = self.testObjA.toTrajInMemory()
+		self.assertEqual(expObj, actObj)
+
+	def testLenMatchesNumberOfSteps(self):
+		self.assertEqual( len(self.steps), len(self.testObjA) )
+		self.assertEqual( len(self.steps), len(self.testObjA.trajSteps) )
+
+	def testRandomAccessA(self):
+		expStep = self.trajSteps[3]
+		actStep = self.testObjA[3]
+		self.assertEqual(expStep, actStep)
+
+	def testNegativeIndexGivesFinalStep(self):
+		expStep = self.trajSteps[-1]
+		actStep = self.testObjA[-1]
+		self.assertEqual(expStep, actStep)
+
+	def testSlicingGivesExpectedSteps(self):
+		expSteps = self.steps[1::2]
+		outTraj = self.testObjA[1::2]
+		actSteps = [x.step for x in outTraj]
+		self.assertIsInstance(outTraj, tCode.TrajectoryOnDisk)
+		self.assertEqual(expSteps, actSteps)
+
+	def testGetTrajFromIndices(self):
+		expSteps = [self.steps[idx] for idx in [4,0]]
+		actSteps = [x.step for x in self.testObjA.getTrajFromIndices([4,0])]
+		self.assertEqual(expSteps, actSteps)
+
+	def testSettingTrajStepsFromSlice(self):
+		expSteps = self.steps[:2]
+		self.testObjA.trajSteps = self.testObjA.trajSteps[:2]
+		actSteps = [x.step for x in self.testObjA]
+		self.assertEqual(expSteps, actSteps)
+
+	def testModifyingStepDoesntAlterTrajectory(self):
+		outStep = self.testObjA[0]
+		outStep.step = 1000
+		self.assertEqual(self.steps[0], self.testObjA[0].step)
+
+	def testIndexIgnoresBlankLines(self):
+		with open(self.fileNameA,"at") as f:
+			f.write("\n")
+		outObj = tCode.TrajectoryOnDisk(self.fileNameA)
+		self.assertEqual( len(self.steps), len(outObj) )
+
+
 class TestTrajInMemory(unittest.TestCase):
 	
 	def setUp(self):
@@ -3,6 +3,8 @@ import os
 import unittest
 import unittest.mock as mock
 
+import numpy as np
+
 import plato_pylib.shared.ucell_class as uCellHelp
 
 import gen_basis_helpers.analyse_md.traj_core as trajHelp
@@ -40,6 +42,73 @@ class TestDumpExtendedXYZ(unittest.TestCase):
 		self.assertEqual(expTraj,actTraj)
 
 
+class TestReadWriteExtendedXyzVectorized(unittest.TestCase):
+
+	def setUp(self):
+		self.nSteps = 5
+		self.coordsA = [ [1,2,3,"Mg"], [4,5,6,"O"] ]
+		self.tempPath, self.tempPathB = "temp_file_vect.exyz", "temp_file_vect_b.exyz"
+		self.createTestObjs()
+
+	def tearDown(self):
+		for path in [self.tempPath, self.tempPathB]:
+			if os.path.exists(path):
+				os.remove(path)
+
+	def createTestObjs(self):
+		trajSteps = list()
+		for idx in range(self.nSteps):
+			currCell = uCellHelp.UnitCell(lattParams=[7+idx,8,9], lattAngles=[90,90,90])
+			currCell.cartCoords = [ [x[0]+idx, x[1], x[2], x[3]] for x in self.coordsA ]
+			trajSteps.append( trajHelp.TrajStepBase(unitCell=currCell, step=idx, time=idx*0.5) )
+		self.testTrajA = trajHelp.TrajectoryInMemory(trajSteps)
+		tCode.writeTrajToSimpleExtendedXyzFormat(self.testTrajA, self.tempPath)
+
+	def testMatchesStandardReader(self):
+		expTraj = tCode.readTrajFromSimpleExtendedXyzFormat(self.tempPath)
+		actTraj = tCode.readTrajFromSimpleExtendedXyzFormatVectorized(self.tempPath)
+		self.assertEqual(expTraj, actTraj)
+
+	def testMatchesStandardReader_fileWithoutStepsOrTimes(self):
+		with open(self.tempPath,"wt") as f:
+			f.write(_loadTestExtendedXYZStrA())
+		expTraj = tCode.readTrajFromSimpleExtendedXyzFormat(self.tempPath)
+		actTraj = tCode.readTrajFromSimpleExtendedXyzFormatVectorized(self.tempPath)
+		self.assertEqual(expTraj, actTraj)
+
+	def testFrameSubset(self):
+		expTraj = trajHelp.TrajectoryInMemory( self.testTrajA.trajSteps[1:4:2] )
+		actTraj = tCode.readTrajFromSimpleExtendedXyzFormatVectorized(self.tempPath, start=1, stop=4, stride=2)
+		self.assertEqual(expTraj, actTraj)
+
+	def testReadToArrays(self):
+		outDict = tCode.readFramesFromSimpleExtendedXyzFormatToArrays(self.tempPath, stride=2)
+		self.assertEqual( (3,2,3), outDict["coords"].shape )
+		self.assertEqual( ["Mg","O"], outDict["elements"] )
+		self.assertEqual( [0,2,4], outDict["steps"] )
+		self.assertTrue( np.allclose(np.array([6,5,6]), outDict["coords"][1][1]) )
+		self.assertTrue( np.allclose(np.array([9,0,0]), outDict["lattVects"][1][0]) )
+
+	def testWrittenStrAsExpected(self):
+		currArgs = [self.tempPathB, [[[1,2,3],[4,5,6]]], [[[7,0,0],[0,8,0],[0,0,9]]], ["Mg","O"]]
+		tCode.writeFramesToSimpleExtendedXyzFormat(*currArgs, steps=[4], times=[12])
+		expStr = "2\nLattice=\"7.0 0.0 0.0 0.0 8.0 0.0 0.0 0.0 9.0 \" Properties=species:S:1:pos:R:3 step=4 time=12.00\n"
+		expStr += "Mg 1.00000000 2.00000000 3.00000000\nO 4.00000000 5.00000000 6.00000000"
+		with open(self.tempPathB,"rt") as f:
+			actStr = f.read()
+		self.assertEqual(expStr, actStr)
+
+	def testWriteFromArraysMatchesWriteFromTraj(self):
+		arrays = tCode.readFramesFromSimpleExtendedXyzFormatToArrays(self.tempPath)
+		currArgs = [self.tempPathB, arrays["coords"], arrays["lattVects"], arrays["elements"]]
+		tCode.writeFramesToSimpleExtendedXyzFormat(*currArgs, steps=arrays["steps"], times=arrays["times"])
+		with open(self.tempPath,"rt") as f:
+			expStr = f.read()
+		with open(self.tempPathB,"rt") as f:
+			actStr = f.read()
+		self.assertEqual(expStr, actStr)
+
+
 class TestParseExtendedXYZ(unittest.TestCase):
 
 	def setUp(self):
@@ -0,0 +1,38 @@
+import unittest
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+import gen_basis_helpers.analyse_md.traj_parallel as tCode
+
+
+class TestGetContiguousTrajChunks(unittest.TestCase):
+
+	def setUp(self):
+		self.nSteps = 5
+		self.nChunks = 2
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		trajSteps = list()
+		for idx in range(self.nSteps):
+			currCell = uCellHelp.UnitCell(lattParams=[10,10,10], lattAngles=[90,90,90])
+			currCell.cartCoords = [ [idx,0,0,"X"] ]
+			trajSteps.append( trajCoreHelp.TrajStepFlexible(unitCell=currCell, step=idx) )
+		self.trajA = trajCoreHelp.TrajectoryInMemory(trajSteps)
+
+	def _runTestFunct(self):
+		return tCode.getContiguousTrajChunks(self.trajA, self.nChunks)
+
+	def testChunksCoverAllStepsInOrder(self):
+		expSteps = [x.step for x in self.trajA]
+		actChunks = self._runTestFunct()
+		actSteps = [x.step for chunk in actChunks for x in chunk]
+		self.assertEqual(self.nChunks, len(actChunks))
+		self.assertEqual(expSteps, actSteps)
+
+	def testFewerChunksWhenMoreChunksThanSteps(self):
+		self.nChunks = 8
+		actChunks = self._runTestFunct()
+		self.assertEqual( [1 for x in range(self.nSteps)], [len(x.trajSteps) for x in actChunks] )
+
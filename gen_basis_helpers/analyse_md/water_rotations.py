@@ -204,17 +204,14 @@ def _getWaterStandardRotationMatricesFromInpCell(inpCell, waterIndices):
 #		ohVectors.append( [vectA,vectB] )
 
 
-	#NOTE: SOME VERY inefficient function reuse in getNearestImageNeb thing
-#	#x.2) We just do nearest image co-ords one at a time to get the vectors
+	#x.2) Get all the O-H nearest image vectors in one call; ordered [OHa, OHb] for each water
+	idxPairs = [ [ [oxyIdx,hyIdxA], [oxyIdx,hyIdxB] ] for oxyIdx, hyIdxA, hyIdxB in orderedIndices ]
+	allVects = calcDistsHelp.getNearestImageVectorsForIdxPairs(inpCell, [x for x in it.chain(*idxPairs)]).tolist()
+
 	ohVectors = list()
-	cartCoords = inpCell.cartCoords
-	for waterIdxList in orderedIndices:
-		oxyIdx, hyIdxA, hyIdxB = waterIdxList
-		oxyCoord = cartCoords[oxyIdx]
-		nearestCoordA = calcDistsHelp.getNearestImageNebCoordsBasic(inpCell, oxyCoord, cartCoords[hyIdxA])
-		nearestCoordB = calcDistsHelp.getNearestImageNebCoordsBasic(inpCell, oxyCoord, cartCoords[hyIdxB])
-		vectA = vectHelp.getUnitVectorFromInpVector([ y-x for x,y in zip(oxyCoord, nearestCoordA[:3])])
-		vectB = vectHelp.getUnitVectorFromInpVector([ y-x for x,y in zip(oxyCoord, nearestCoordB[:3])])
+	for idx in range(len(orderedIndices)):
+		vectA = vectHelp.getUnitVectorFromInpVector(allVects[2*idx])
+		vectB = vectHelp.getUnitVectorFromInpVector(allVects[(2*idx)+1])
 		ohVectors.append( [vectA,vectB] )
 
 	#3) Get the rotation matrices from the oh vectors
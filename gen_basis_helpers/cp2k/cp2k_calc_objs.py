@@ -5,9 +5,11 @@ import pathlib
 import types
 
 import plato_pylib.parseOther.parse_cp2k_files as parseCP2K
-import plato_pylib.parseOther.parse_cube_files as parseCubeHelp
 
+from ..misc import cube_file_io as cubeIOHelp
+from ..shared import job_scheduler as jobSchedHelp
 from ..shared import method_objs as methodObjs
+from ..shared import parse_cache as parseCacheHelp
 from . import cp2k_file_helpers as pyCP2KHelpers
 from . import parse_md_files as parseMdHelp
 from . import parse_neb_files as parseNebHelp
@@ -17,11 +19,14 @@ from . import parse_pdos_files as parsePdosHelp
 #NOTE: Loads of descriptors are added below (at the bottom of the file)
 class CP2KCalcObj(methodObjs.CalcMethod):
 
-	def __init__(self, pycp2kObj, basePath=None, saveRestartFile=True, md=False, postWriteHooks=None, runType=None):
+	def __init__(self, pycp2kObj, basePath=None, saveRestartFile=True, md=False, postWriteHooks=None, runType=None, useParseCache=False, nCores=1, skipRunIfComplete=False):
 		""" Initializer
 		
 		Args:
 			postWriteHooks: (iter of f(instance)) These are called by writeFile after the main file is written. Original use is for copying restart files to a target folder
+			useParseCache: (Bool) If True then parsedFile results are cached on disk (in parseCachePath) and re-used until any of the output files change. See shared.parse_cache
+			nCores: (int) Number of cores to run on. If >1 runComm uses mpirun with the parallel (popt) executable
+			skipRunIfComplete: (Bool) If True shellJob is skipped (by job_scheduler) when outputIsComplete() is True; i.e. a finished output file newer than the current input file already exists
 				 
 		"""
 		self.cp2kObj = pycp2kObj
@@ -33,6 +38,9 @@ class CP2KCalcObj(methodObjs.CalcMethod):
 		self.md = md
 		self.postWriteHooks = list() if postWriteHooks is None else list(postWriteHooks)
 		self.runType = runType
+		self.useParseCache = useParseCache
+		self._nCores = nCores
+		self.skipRunIfComplete = skipRunIfComplete
 	
 	def writeFile(self):
 		self.cp2kObj.project_name = os.path.split(self.basePath)[1]
@@ -46,13 +54,17 @@ class CP2KCalcObj(methodObjs.CalcMethod):
 	def outFilePath(self):
 		return self.basePath + ".cpout"
 
+	@property
+	def inpFilePath(self):
+		return self.basePath + ".inp"
+
 	@property
 	def outGeomPath(self):
 		return self.basePath + "-pos-1.xyz"
 	
 	@property
 	def nCores(self):
-		return 1 #I only implement the serial version. Error should occur if trying to set this
+		return self._nCores #Set in the initializer only. Error should occur if trying to set this
 	
 	@property
 	def runComm(self):
@@ -60,13 +72,61 @@ class CP2KCalcObj(methodObjs.CalcMethod):
 		inpFolder= os.path.abspath(os.path.split(self.basePath)[0] )
 		inpFName = baseName + ".inp"
 		outFName = os.path.split(self.outFilePath)[1]
-		commFmt = "cd {};cp2k.sopt {}>{}"
+		if self.nCores == 1:
+			commFmt = "cd {};cp2k.sopt {}>{}"
+		else:
+			commFmt = "cd {};" + "mpirun -np {} cp2k.popt".format(self.nCores) + " {}>{}"
 		if self.saveRestartFile is not True:
 			commFmt += ";rm {}-RESTART.kp*".format(baseName)
 		return commFmt.format(inpFolder, inpFName, outFName)
+
+	@property
+	def shellJob(self):
+		""" job_scheduler.ShellJob for runComm; this uses nCores and (if skipRunIfComplete is True) is skipped when outputIsComplete() """
+		completedChecker = self.outputIsComplete if self.skipRunIfComplete else None
+		return jobSchedHelp.ShellJob(self.runComm, nCores=self.nCores, completedChecker=completedChecker)
+
+	def outputIsComplete(self):
+		""" Returns True if the *.cpout file exists, cp2k finished writing it (i.e. it ends with the "PROGRAM ENDED AT" line) and it was written after the current input file. The last condition means re-writing the input (e.g. with new basis coefficients) always leads to a re-run """
+		try:
+			with open(self.outFilePath, "rb") as f:
+				f.seek(0, os.SEEK_END)
+				f.seek( max(0, f.tell()-4096) )
+				endBytes = f.read()
+			outModTime = os.stat(self.outFilePath).st_mtime_ns
+		except FileNotFoundError:
+			return False
+
+		if os.path.exists(self.inpFilePath) and (outModTime <= os.stat(self.inpFilePath).st_mtime_ns):
+			return False
+		return b"PROGRAM ENDED AT" in endBytes
 	
+	@property
+	def parseCachePath(self):
+		return self.basePath + parseCacheHelp.CACHE_FILE_EXT
+
 	@property
 	def parsedFile(self):
+		if self.useParseCache:
+			runType = "md" if self.md else self.runType
+			return parseCacheHelp.getCachedOrParsedValue(self.parseCachePath, self._getPathsParsedFileDependsOn(), self._getParsedFileUncached, key=runType)
+		return self._getParsedFileUncached()
+
+	#Conservative; ALL files in the work folder (and any run_N folders) rather than only those actually parsed
+	def _getPathsParsedFileDependsOn(self):
+		workFolder = os.path.split(self.outFilePath)[0]
+		if not os.path.isdir(workFolder):
+			return list()
+
+		outPaths = list()
+		runDirs = [os.path.join(workFolder,x) for x in sorted(os.listdir(workFolder)) if self._checkStringMatchesRunFormat(x)]
+		for folder in [workFolder] + [x for x in runDirs if os.path.isdir(x)]:
+			currPaths = [os.path.join(folder,x) for x in sorted(os.listdir(folder)) if not x.endswith(parseCacheHelp.CACHE_FILE_EXT)]
+			outPaths.extend( [x for x in currPaths if os.path.isfile(x)] )
+
+		return outPaths
+
+	def _getParsedFileUncached(self):
 		#Figure out runType
 		if self.md:
 			runType = "md"
@@ -190,7 +250,7 @@ class CP2KCalcObj(methodObjs.CalcMethod):
 		expPath = os.path.splitext(self.outFilePath)[0] + "-ELECTRON_DENSITY-1_0.cube"
 
 		try:
-			parsedCubeFile = parseCubeHelp.parseCubeFile(expPath) 
+			parsedCubeFile = cubeIOHelp.parseCubeFile(expPath)
 		except FileNotFoundError:
 			pass
 		else:
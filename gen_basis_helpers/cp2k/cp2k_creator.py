@@ -129,6 +129,9 @@ class CP2KCalcObjFactoryStandard(BaseCP2KCalcObjFactory):
 	registeredKwargs.add("mdStartTime")
 	registeredKwargs.add("mdStartStep")
 	registeredKwargs.add("dftPrintDensityCube")
+	registeredKwargs.add("useParseCache")
+	registeredKwargs.add("nCores")
+	registeredKwargs.add("skipRunIfComplete")
 
 	def __init__(self,**kwargs):
 		""" Initializer for CP2K calc-object factory
@@ -247,7 +250,10 @@ class CP2KCalcObjFactoryStandard(BaseCP2KCalcObjFactory):
 		else:
 			runType = None
 
-		outputObj = calcObjs.CP2KCalcObj(basicObj, basePath=self._getPathToPassCalcObj(), saveRestartFile=keepRestartFile, postWriteHooks=postWriteHooks, runType=runType)
+		useParseCache = False if self.useParseCache is None else self.useParseCache
+		nCores = 1 if self.nCores is None else self.nCores
+		skipRunIfComplete = False if self.skipRunIfComplete is None else self.skipRunIfComplete
+		outputObj = calcObjs.CP2KCalcObj(basicObj, basePath=self._getPathToPassCalcObj(), saveRestartFile=keepRestartFile, postWriteHooks=postWriteHooks, runType=runType, useParseCache=useParseCache, nCores=nCores, skipRunIfComplete=skipRunIfComplete)
 		return outputObj
 
 	#TODO: I should probably be using the calcObj paths here, but this way was just easier to unit test initially
@@ -2,6 +2,7 @@
 import copy
 import itertools as it
 import math
+import types
 
 import numpy as np
 
@@ -53,15 +54,21 @@ def parseMdInfoFromMultipleCpoutAndXyzPaths(cpoutPaths, xyzPaths, tempKindPaths=
 
 	return outDict
 
-def parseFullMdInfoFromCpoutAndXyzFilePaths(cpoutPath, xyzPath, tempKindPath=None, velocityPath=None, forcePath=None):
+def parseFullMdInfoFromCpoutAndXyzFilePaths(cpoutPath, xyzPath, tempKindPath=None, velocityPath=None, forcePath=None, outTrajPath=None):
 	""" Description of function
 	
 	Args:
 		cpoutPath: (str) Path to *.cpout file
 		xyzPath: (str) Path to *.xyz file
 		tempKindPath: (str, optional) Path to a file containing atomic temperature for each kind of atom
+		velocityPath: (str, optional) Path to file containing velocities as dumped by motion section
+		forcePath: (str, optional) Path to file containing forces as dumped by motion section
+		outTrajPath: (str, optional) If set, all files are parsed one step at a time and the trajectory is written straight to this path (format defined by traj_core.dumpTrajObjToFile). outDict["trajectory"] is then a TrajectoryOnDisk and memory use doesnt grow with the number of atoms/steps (except for thermo data). Only "trajectory" and "thermo_data" are present in outDict in this case
  
 	"""
+	if outTrajPath is not None:
+		return _parseFullMdInfoFromCpoutAndXyzFilePaths_streaming(cpoutPath, xyzPath, outTrajPath, tempKindPath=tempKindPath, velocityPath=velocityPath, forcePath=forcePath)
+
 	outDict = parseCpoutForMDJob(cpoutPath)
 	outSteps = parseCp2kMdXyzFile(xyzPath)
 
@@ -124,6 +131,165 @@ def _getMergedTrajectoryFromParsedCpoutAndXyz(parsedCpout, parsedXyz):
 
 
 
+def _parseFullMdInfoFromCpoutAndXyzFilePaths_streaming(cpoutPath, xyzPath, outTrajPath, tempKindPath=None, velocityPath=None, forcePath=None):
+	#Get thermo info and write the trajectory one step at a time
+	cpoutInfo = parseCpoutForMDJobStreaming(cpoutPath)
+	trajStepIter = _iterMergedTrajStepsFromParsedCpoutAndXyzPaths(cpoutInfo, xyzPath, velocityPath=velocityPath, forcePath=forcePath)
+	trajHelp.dumpTrajObjToFile(trajStepIter, outTrajPath)
+	outDict = {"trajectory": trajHelp.readTrajObjFromFileToTrajectoryOnDisk(outTrajPath), "thermo_data":cpoutInfo["thermo_data"]}
+
+	#If step 0 is in the xyz then we need to add the initial thermal info
+	firstStep = outDict["trajectory"][0] if len(outDict["trajectory"])>0 else None
+	if (firstStep is not None) and (firstStep.step == 0):
+		for key in outDict["thermo_data"].dataDict:
+			outDict["thermo_data"].dataDict[key].insert(0, cpoutInfo["init_thermo_dict"][key])
+
+	#If tempKindPath is present, then parse it and add to the thermo data object
+	if tempKindPath is not None:
+		parsedTempKind = parseAtomTempFile(tempKindPath)
+		idxToLabelDict = _getKindIdxToSymbolDict( [ x[-1] for x in firstStep.unitCell.cartCoords] ) 
+		_addAtomicTempsToThermoDataObj(parsedTempKind, outDict["thermo_data"], idxToLabelDict=idxToLabelDict)
+
+	assert outDict["thermo_data"].dataListLengthsAllEqual
+
+	return outDict
+
+
+def iterTrajStepsFromCpoutAndXyzFilePaths(cpoutPath, xyzPath, velocityPath=None, forcePath=None):
+	""" Iterates over trajectory steps for an MD run, combining info from the *.cpout and *.xyz files. Position, velocity and force files are read in lockstep, one step at a time, so memory use doesnt depend on the length of the trajectory
+	
+	Args:
+		cpoutPath: (str) Path to *.cpout file
+		xyzPath: (str) Path to *.xyz file containing positions
+		velocityPath: (str, optional) Path to file containing velocities as dumped by motion section (basically an xyz format)
+		forcePath: (str, optional) Path to file containing forces as dumped by motion section (basically an xyz format)
+
+	Yields
+		trajStep: (TrajStepFlexible) One per step present in both the xyz and cpout files (in order). Same as the steps in outDict["trajectory"] from parseFullMdInfoFromCpoutAndXyzFilePaths
+ 
+	"""
+	cpoutInfo = parseCpoutForMDJobStreaming(cpoutPath)
+	for trajStep in _iterMergedTrajStepsFromParsedCpoutAndXyzPaths(cpoutInfo, xyzPath, velocityPath=velocityPath, forcePath=forcePath):
+		yield trajStep
+
+
+#Relies on step numbers being in order; matching follows _getMergedTrajectoryFromParsedCpoutAndXyz and _getValuesOfXyzParsedDictsForTrajSteps
+def _iterMergedTrajStepsFromParsedCpoutAndXyzPaths(cpoutInfo, xyzPath, velocityPath=None, forcePath=None):
+	mdSteps = cpoutInfo["md_steps"]
+	extraAttrMatchers = list()
+	if velocityPath is not None:
+		extraAttrMatchers.append( ["velocities", _XyzDictStepMatcher(iterCp2kMdXyzFile(velocityPath))] )
+	if forcePath is not None:
+		extraAttrMatchers.append( ["forces", _XyzDictStepMatcher(iterCp2kMdXyzFile(forcePath))] )
+
+	idxCpout = 0
+	for idxXyz, xyzDict in enumerate(iterCp2kMdXyzFile(xyzPath)):
+		#Get the cell/step/time; step 0 info comes from the md initialisation section
+		if (idxXyz==0) and (xyzDict["step"]==0):
+			currCell, currStep, currTime = copy.deepcopy(cpoutInfo["init_md_cell"]), 0, 0
+		else:
+			while (idxCpout<len(mdSteps)) and (mdSteps[idxCpout][0] != xyzDict["step"]):
+				idxCpout += 1
+			if idxCpout == len(mdSteps):
+				break
+			currStep, currTime, currLattParams = mdSteps[idxCpout]
+			currCell = copy.deepcopy(cpoutInfo["init_md_cell"])
+			if currLattParams is not None:
+				currCell.setLattParams(currLattParams)
+
+		currCell.cartCoords = xyzDict["coords"]
+		outStep = trajHelp.TrajStepFlexible(unitCell=currCell, step=currStep, time=currTime)
+
+		for attr, matcher in extraAttrMatchers:
+			currVals = matcher.getCoordsForStep(currStep)
+			currVals = None if currVals is None else [x[:3] for x in currVals]
+			outStep.addExtraAttrDict({attr: {"value":currVals, "cmpType":"numericalArray"}})
+
+		yield outStep
+
+
+class _XyzDictStepMatcher():
+	""" Gets values from an iter of parsed xyz dicts (see parseCp2kMdXyzFile) for a series of increasing step numbers; consuming the iter as it goes """
+
+	def __init__(self, xyzDictIter):
+		self._xyzDictIter = iter(xyzDictIter)
+		self._currDict = next(self._xyzDictIter, None)
+
+	def getCoordsForStep(self, step):
+		""" Returns "coords" for step if present, else None. Steps must be requested in ascending order """
+		while (self._currDict is not None) and (self._currDict["step"] < step):
+			self._currDict = next(self._xyzDictIter, None)
+
+		if (self._currDict is not None) and (self._currDict["step"] == step):
+			outVals = self._currDict["coords"]
+			self._currDict = next(self._xyzDictIter, None)
+			return outVals
+
+		return None
+
+
+def parseCpoutForMDJobStreaming(outFile):
+	""" Parses the MD information from a *.cpout file one line at a time (only lines for the current section are held in memory). Much lower memory use than parseCpoutForMDJob for large files, but only MD info is parsed and no per-step geometries are created
+	
+	Args:
+		outFile: (str) Path to *.cpout file
+			 
+	Returns
+		outDict: (dict) Keys are "thermo_data" (ThermoDataStandard), "init_md_cell" (UnitCell with no atoms), "init_thermo_dict" (thermo info for step 0) and "md_steps". "md_steps" is a list with [step, time, lattParams] for each step; lattParams is None if the cell wasnt printed for a step
+ 
+	"""
+	possibleKeysThermo = ["ePot", "eKinetic", "pressure", "step", "time", "temp"]
+	initSectionHolder = types.SimpleNamespace(outDict=dict())
+	thermoArrays, mdSteps = None, list()
+
+	for sectionType, parsedDict in _iterMdSectionDictsFromCpout(outFile):
+		if sectionType == "init":
+			_mdInitSectionParseDictHandler(initSectionHolder, parsedDict)
+		elif sectionType == "step":
+			if thermoArrays is None:
+				thermoArrays = {key:list() for key in possibleKeysThermo if key in parsedDict.keys()}
+			for key in parsedDict.keys():
+				if key in possibleKeysThermo:
+					thermoArrays[key].append( parsedDict[key] )
+			mdSteps.append( [parsedDict["step"], parsedDict["time"], parsedDict.get("lattParams",None)] )
+
+	outDict = {"thermo_data":thermoDataHelp.ThermoDataStandard(thermoArrays), "md_steps":mdSteps}
+	outDict["init_md_cell"] = initSectionHolder.outDict["init_md_cell"]
+	outDict["init_thermo_dict"] = initSectionHolder.outDict["init_thermo_dict"]
+	return outDict
+
+
+def _iterMdSectionDictsFromCpout(inpPath):
+	""" Yields [sectionType, parsedDict] for each md section of a *.cpout file, where sectionType is "init" or "step". Lines for each section are collected then parsed with the same functions as parseCpoutForMDJob """
+	with open(inpPath,"rt") as f:
+		currLine = f.readline()
+		while currLine:
+			nextLine = None
+			if "GO CP2K GO" in currLine:
+				sectionLines = [currLine] + _readLinesUntilMatch(f, lambda x: "GO CP2K GO" in x)
+				yield "init", _parseMDInitSection(sectionLines, 0)[0]
+			elif "MD_INI| MD initialization" in currLine:
+				sectionLines, nextLine = [currLine], f.readline()
+				while nextLine and ("MD_INI" in nextLine):
+					sectionLines.append(nextLine)
+					nextLine = f.readline()
+				yield "init", _parseMDInitSection_secondFmt(sectionLines, 0)[0]
+			elif ("STEP NUMBER" in currLine) or ("Step number" in currLine):
+				sectionLines = [currLine] + _readLinesUntilMatch(f, lambda x: "*********" in x)
+				yield "step", _parseMdStepInfo(sectionLines, 0)[0]
+
+			currLine = f.readline() if nextLine is None else nextLine
+
+
+def _readLinesUntilMatch(fileObj, matchFunct):
+	outLines = list()
+	for line in iter(fileObj.readline, ""):
+		outLines.append(line)
+		if matchFunct(line):
+			break
+	return outLines
+
+
 def parseCpoutForMDJob(outFile, parser=None, raiseIfTerminateFlagMissing=False):
 	parser = _getStandardCpoutMDParser() if parser is None else parser
 	if raiseIfTerminateFlagMissing is False:
@@ -365,7 +531,7 @@ def parseCp2kMdXyzFile(inpXyz):
 	lineIdx = 0
 	outDicts = list()
 	while lineIdx < len(fileAsList):
-		if fileAsList[lineIdx].split() == "":
+		if fileAsList[lineIdx].strip() == "":
 			lineIdx += 1
 		else:
 			lineIdx, currDict = _parseSingleStepXyz(fileAsList, lineIdx)
@@ -383,6 +549,55 @@ def parseCp2kMdXyzFile(inpXyz):
 	return outDicts[startIdx:]
 
 
+def iterCp2kMdXyzFile(inpXyz):
+	""" Iterates over the steps in a CP2K MD *.xyz file (positions/velocities/forces); reading one step at a time. Like parseCp2kMdXyzFile, only steps from the last md-run are included when multiple runs have appended to the same file
+	
+	Args:
+		inpXyz: (str) Path to the *.xyz file
+			 
+	Yields
+		stepDict: (dict) Keys are "step", "time" and "coords". Same format as elements of parseCp2kMdXyzFile output
+ 
+	NOTES:
+		The file is read twice; once (only parsing the step numbers) to find where the last md-run starts and once to parse the steps
+ 
+	"""
+	startOffset = _getByteOffsetOfLastRunInCp2kMdXyzFile(inpXyz)
+	with open(inpXyz,"rb") as f:
+		f.seek(startOffset)
+		for nAtomsLine in f:
+			if nAtomsLine.strip() == b"":
+				continue
+			nAtoms = int(nAtomsLine)
+			stepLines = [nAtomsLine.decode()] + [f.readline().decode() for idx in range(nAtoms+1)]
+			unused, currDict = _parseSingleStepXyz(stepLines, 0)
+			yield currDict
+
+
+def _getByteOffsetOfLastRunInCp2kMdXyzFile(inpXyz):
+	#Adjacent step numbers not increasing is generally the sign of two jobs appending
+	outOffset, currOffset, prevStep = 0, 0, None
+	with open(inpXyz,"rb") as f:
+		while True:
+			nAtomsLine = f.readline()
+			if nAtomsLine == b"":
+				break
+			if nAtomsLine.strip() == b"":
+				currOffset += len(nAtomsLine)
+				continue
+			headerLine = f.readline()
+			currStep = int( headerLine.decode().strip().replace(","," ").replace("="," ").split()[1] )
+			if (prevStep is not None) and (currStep <= prevStep):
+				outOffset = currOffset
+			prevStep = currStep
+
+			currOffset += len(nAtomsLine) + len(headerLine)
+			for idx in range( int(nAtomsLine) ):
+				currOffset += len(f.readline())
+
+	return outOffset
+
+
 def _readFileIntoList(inpPath):
 	with open(inpPath,"rt") as f:
 		outList = f.readlines()
@@ -1,11 +1,19 @@
 
 import copy
+import os
+import shutil
+import sys
+import tempfile
+import types
 
 import unittest
 import unittest.mock as mock
 
 import gen_basis_helpers.cp2k.cp2k_calc_objs as tCode
 import gen_basis_helpers.cp2k.method_register as methReg
+import gen_basis_helpers.shared.calc_runners as calcRunners
+import gen_basis_helpers.shared.job_scheduler as jobSchedHelp
+import gen_basis_helpers.workflows.total_energies as totEnergyFlows
 
 
 class DudCP2KObj(tCode.CP2KCalcObj):
@@ -133,3 +141,222 @@ class TestCP2KCalcObjParsing(unittest.TestCase):
 		mockedCPOutParser.side_effect = lambda *args:{"unitCell":expUCell}
 		parsedFile = self.testCalcObjA.parsedFile
 
+
+class TestCP2KCalcObjParseCache(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.basePath = os.path.join(self.workFolder, "calc_a")
+		self.useParseCache = True
+		self.expParsedObj = types.SimpleNamespace(energy=4)
+		self.createTestObjs()
+		self._writeCpoutFile("fake_cpout_contents")
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def createTestObjs(self):
+		self.testCalcObjA = tCode.CP2KCalcObj(mock.Mock(), self.basePath, useParseCache=self.useParseCache)
+
+	def _writeCpoutFile(self, contents):
+		with open(self.testCalcObjA.outFilePath, "wt") as f:
+			f.write(contents)
+
+	def _getParsedFileWithMockedParser(self, nTimes):
+		with mock.patch.object(tCode.CP2KCalcObj, "_getParsedFileUncached") as mockedParser:
+			mockedParser.return_value = self.expParsedObj
+			outVals = [self.testCalcObjA.parsedFile for x in range(nTimes)]
+		return outVals, mockedParser
+
+	def testParsedOnceWhenUsingCache(self):
+		actVals, mockedParser = self._getParsedFileWithMockedParser(3)
+		self.assertEqual(1, mockedParser.call_count)
+		self.assertEqual( [self.expParsedObj for x in range(3)], actVals )
+		self.assertTrue( os.path.exists(self.testCalcObjA.parseCachePath) )
+
+	def testParsedEachTimeWithoutCache(self):
+		self.useParseCache = False
+		self.createTestObjs()
+		unused, mockedParser = self._getParsedFileWithMockedParser(3)
+		self.assertEqual(3, mockedParser.call_count)
+
+	def testReparsedWhenOutputFileChanges(self):
+		self._getParsedFileWithMockedParser(1)
+		self._writeCpoutFile("different_fake_cpout_contents")
+		unused, mockedParser = self._getParsedFileWithMockedParser(1)
+		self.assertEqual(1, mockedParser.call_count)
+
+	def testReparsedWhenRunFolderFileAdded(self):
+		self._getParsedFileWithMockedParser(1)
+		os.mkdir( os.path.join(self.workFolder, "run_1") )
+		with open( os.path.join(self.workFolder, "run_1", "calc_a.cpout"), "wt" ) as f:
+			f.write("fake_contents")
+		unused, mockedParser = self._getParsedFileWithMockedParser(1)
+		self.assertEqual(1, mockedParser.call_count)
+
+
+class TestCP2KCalcObjShellJob(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.basePath = os.path.join(self.workFolder, "calc_a")
+		self.nCores = 1
+		self.createTestObjs()
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def createTestObjs(self):
+		self.testCalcObjA = tCode.CP2KCalcObj(mock.Mock(), self.basePath, nCores=self.nCores)
+
+	def _writeCpoutFile(self, contents):
+		with open(self.testCalcObjA.outFilePath, "wt") as f:
+			f.write(contents)
+
+	def _writeInpFile(self):
+		with open(self.testCalcObjA.inpFilePath, "wt") as f:
+			f.write("fake input")
+
+	def testExpectedRunComm_serial(self):
+		expComm = "cd {};cp2k.sopt calc_a.inp>calc_a.cpout".format(self.workFolder)
+		self.assertEqual(expComm, self.testCalcObjA.runComm)
+
+	def testExpectedRunComm_parallel(self):
+		self.nCores = 4
+		self.createTestObjs()
+		expComm = "cd {};mpirun -np 4 cp2k.popt calc_a.inp>calc_a.cpout".format(self.workFolder)
+		self.assertEqual(expComm, self.testCalcObjA.runComm)
+		self.assertEqual(4, self.testCalcObjA.shellJob.nCores)
+
+	def testOutputIsComplete(self):
+		self.assertFalse( self.testCalcObjA.outputIsComplete() )
+		self._writeCpoutFile("some output\n")
+		self.assertFalse( self.testCalcObjA.outputIsComplete() )
+		self._writeCpoutFile("some output\n PROGRAM ENDED AT    2020-01-01 00:00:00.000\n")
+		self.assertTrue( self.testCalcObjA.outputIsComplete() )
+
+	def testOutputNotCompleteIfOlderThanInput(self):
+		self._writeCpoutFile("some output\n PROGRAM ENDED AT    2020-01-01 00:00:00.000\n")
+		self._writeInpFile()
+		outModTime = os.stat(self.testCalcObjA.outFilePath).st_mtime_ns
+		os.utime(self.testCalcObjA.inpFilePath, ns=(outModTime+10**9, outModTime+10**9))
+		self.assertFalse( self.testCalcObjA.outputIsComplete() )
+
+	def testCompletedCheckerOnlySetIfSkipRunIfComplete(self):
+		self.assertEqual(None, self.testCalcObjA.shellJob.completedChecker)
+		self.testCalcObjA.skipRunIfComplete = True
+		self._writeCpoutFile("some output\n PROGRAM ENDED AT    2020-01-01 00:00:00.000\n")
+		self.assertTrue( self.testCalcObjA.shellJob.completedChecker() )
+
+	def testShellJobIsRunCommString(self):
+		self.assertEqual(self.testCalcObjA.runComm, self.testCalcObjA.shellJob)
+
+
+#Stands in for cp2k.sopt/cp2k.popt; sleeps then writes start/end times and a "PROGRAM ENDED AT" line to stdout. Each run is logged to {logPath}
+_FAKE_CP2K_STR = """#!{exePath}
+import sys, time
+with open("{logPath}", "at") as f:
+	f.write(sys.argv[1] + "\\n")
+startTime = time.time()
+time.sleep({sleepTime})
+print(startTime, time.time())
+print(" PROGRAM ENDED AT")
+"""
+
+#Drops the "-np N" arguments and runs the rest
+_FAKE_MPIRUN_STR = """#!/bin/sh
+shift 2
+exec "$@"
+"""
+
+
+class TestCP2KCalcObjsRunThroughWorkflowsWithScheduler(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.logPath = os.path.join(self.workFolder, "runs.log")
+		self._writeFakeExecutables()
+		self.labels = ["calc_a", "calc_b", "calc_c"]
+		self.nCoresEach = 2
+		self.nCoresTotal = 4
+		self.skipRunIfComplete = False
+		self.createTestObjs()
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def _writeFakeExecutables(self):
+		binFolder = os.path.join(self.workFolder, "bin")
+		os.mkdir(binFolder)
+		fakeCP2KStr = _FAKE_CP2K_STR.format(exePath=sys.executable, logPath=self.logPath, sleepTime=0.3)
+		for fileName, fileStr in [ ["cp2k.sopt",fakeCP2KStr], ["cp2k.popt",fakeCP2KStr], ["mpirun",_FAKE_MPIRUN_STR] ]:
+			currPath = os.path.join(binFolder, fileName)
+			with open(currPath, "wt") as f:
+				f.write(fileStr)
+			os.chmod(currPath, 0o755)
+
+		envPatcher = mock.patch.dict(os.environ, {"PATH": binFolder + os.pathsep + os.environ.get("PATH","")})
+		envPatcher.start()
+		self.addCleanup(envPatcher.stop)
+
+	def createTestObjs(self):
+		self.inpObjs = list()
+		for label in self.labels:
+			pyCP2KObj = mock.Mock()
+			pyCP2KObj.write_input_file.side_effect = lambda obj=pyCP2KObj: _writeFakeInpFile(obj)
+			currKwargs = {"nCores":self.nCoresEach, "skipRunIfComplete":self.skipRunIfComplete}
+			calcObj = tCode.CP2KCalcObj(pyCP2KObj, os.path.join(self.workFolder, label), **currKwargs)
+			workflow = totEnergyFlows.TotalEnergyWorkflow(calcObj)
+			self.inpObjs.append( calcRunners.StandardInputObj(workflow, label, mapFunction=_getStartAndEndTimesFromStdInpObj) )
+		self.scheduler = jobSchedHelp.AsyncShellJobScheduler(self.nCoresTotal)
+
+	def _runTestFunct(self):
+		return calcRunners.createOutputObjsUsingScheduler(self.inpObjs, self.scheduler)
+
+	def _getNumbRuns(self):
+		if not os.path.exists(self.logPath):
+			return 0
+		with open(self.logPath, "rt") as f:
+			return len(f.readlines())
+
+	def testRunCommsCarryCores(self):
+		self.assertEqual( [[self.nCoresEach] for x in self.labels], [[job.nCores for job in x.runComms] for x in self.inpObjs] )
+
+	def testAllRunAndCoreLimitRespected(self):
+		outObjs = self._runTestFunct()
+		times = [outObj.data[0] for outObj in outObjs]
+		maxOverlapping = max([ len([1 for start,end in times if start <= currStart < end]) for currStart,unused in times ])
+		self.assertEqual( len(self.labels), self._getNumbRuns() )
+		self.assertEqual( self.nCoresTotal//self.nCoresEach, maxOverlapping )
+
+	def testCompleteOutputsRerunByDefault(self):
+		self._runTestFunct()
+		self._runTestFunct()
+		self.assertEqual( 2*len(self.labels), self._getNumbRuns() )
+
+	def testCompleteOutputsSkippedIfRequested(self):
+		self.skipRunIfComplete = True
+		self.createTestObjs()
+		self._runTestFunct()
+		self._runTestFunct()
+		self.assertEqual( len(self.labels), self._getNumbRuns() )
+
+	#e.g. new basis coefficients in a fit; the outputs from the old coefficients are complete but shouldnt be used
+	def testRewrittenInputsRerunWhenSkippingComplete(self):
+		self.skipRunIfComplete = True
+		self.createTestObjs()
+		self._runTestFunct()
+		self.inpObjs[1].workflow.calcObj.writeFile()
+		self._runTestFunct()
+		self.assertEqual( len(self.labels)+1, self._getNumbRuns() )
+
+
+def _writeFakeInpFile(pyCP2KObj):
+	with open(os.path.join(pyCP2KObj.working_directory, pyCP2KObj.project_name + ".inp"), "wt") as f:
+		f.write("fake input")
+
+
+def _getStartAndEndTimesFromStdInpObj(stdInpObj):
+	with open(stdInpObj.workflow.calcObj.outFilePath, "rt") as f:
+		return [float(x) for x in f.readline().strip().split()]
+
@@ -1,6 +1,7 @@
 
 import copy
 import itertools as it
+import os
 import unittest
 import unittest.mock as mock
 import types
@@ -307,6 +308,115 @@ class TestParseVelocitiesAndAddToTrajFile(unittest.TestCase):
 
 
 
+class TestParseCp2kMdFullStreaming(unittest.TestCase):
+
+	def setUp(self):
+		self.cpoutPath, self.xyzPath = "_temp_stream_md.cpout", "_temp_stream_md_pos.xyz"
+		self.velPath, self.outTrajPath = "_temp_stream_md_vel.xyz", "_temp_stream_md.traj"
+		self.cpoutStr = _getCpoutStrForStreamingTestA()
+		self.xyzStr = _getPosXyzStrForStreamingTestA()
+		self.velStr = _getVelXyzStrForStreamingTestA()
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		for path, fileStr in it.zip_longest([self.cpoutPath, self.xyzPath, self.velPath], [self.cpoutStr, self.xyzStr, self.velStr]):
+			with open(path,"wt") as f:
+				f.write(fileStr)
+
+	def tearDown(self):
+		for path in [self.cpoutPath, self.xyzPath, self.velPath, self.outTrajPath]:
+			if os.path.exists(path):
+				os.remove(path)
+
+	def testXyzIterMatchesFullParse(self):
+		with mock.patch("gen_basis_helpers.cp2k.parse_md_files._readFileIntoList") as mockedReadFileIntoList:
+			mockedReadFileIntoList.side_effect = lambda *args,**kwargs: self.xyzStr.split("\n")
+			expDicts = tCode.parseCp2kMdXyzFile(self.xyzPath)
+		actDicts = [x for x in tCode.iterCp2kMdXyzFile(self.xyzPath)]
+		self.assertEqual( [0,1,2], [x["step"] for x in actDicts] )
+		self.assertEqual(expDicts, actDicts)
+
+	def testExpectedTrajSteps(self):
+		actSteps = [x for x in tCode.iterTrajStepsFromCpoutAndXyzFilePaths(self.cpoutPath, self.xyzPath, velocityPath=self.velPath)]
+		self.assertEqual( [0,1,2], [x.step for x in actSteps] )
+		self.assertEqual( [0,0.5,1.0], [x.time for x in actSteps] )
+		self.assertAlmostEqual( 6.03, actSteps[2].unitCell.getLattParamsList()[0] )
+		self.assertEqual( [[1,1,1],[2,2,2]], actSteps[0].velocities )
+		self.assertIsNone( actSteps[1].velocities )
+
+	def testStreamingMatchesInMemoryParse(self):
+		expDict = tCode.parseFullMdInfoFromCpoutAndXyzFilePaths(self.cpoutPath, self.xyzPath, velocityPath=self.velPath)
+		actDict = tCode.parseFullMdInfoFromCpoutAndXyzFilePaths(self.cpoutPath, self.xyzPath, velocityPath=self.velPath, outTrajPath=self.outTrajPath)
+		self.assertEqual(expDict["thermo_data"], actDict["thermo_data"])
+		self.assertEqual(expDict["trajectory"], actDict["trajectory"].toTrajInMemory())
+
+
+def _getCpoutStrForStreamingTestA():
+	return """ Some header info
+ ******************************** GO CP2K GO! **********************************
+ INITIAL POTENTIAL ENERGY[hartree]     =                     -0.176102449402E+01
+ INITIAL KINETIC ENERGY[hartree]       =                      0.142506690448E-02
+ INITIAL TEMPERATURE[K]                =                                 300.000
+ INITIAL PRESSURE[bar]                 =                      0.783325915339E+04
+ INITIAL CELL LNTHS[bohr]   =      0.6040000E+01   0.6040000E+01   0.9770000E+01
+ INITIAL CELL ANGLS[deg]    =      0.9000000E+02   0.9000000E+02   0.1200000E+03
+ ******************************** GO CP2K GO! **********************************
+ SCF stuff we dont care about
+ *******************************************************************************
+ ENSEMBLE TYPE                =                                            NPT_I
+ STEP NUMBER                  =                                                1
+ TIME [fs]                    =                                         0.500000
+ POTENTIAL ENERGY[hartree]    =         -0.176102057981E+01  -0.176102057981E+01
+ KINETIC ENERGY [hartree]     =          0.142604641825E-02   0.142604641825E-02
+ TEMPERATURE [K]              =                     300.206              300.206
+ PRESSURE [bar]               =          0.806499998740E+04   0.806499998740E+04
+ CELL LNTHS[bohr]             =    0.6038771E+01   0.6038771E+01   0.9768012E+01
+ *******************************************************************************
+ More SCF stuff
+ *******************************************************************************
+ ENSEMBLE TYPE                =                                            NPT_I
+ STEP NUMBER                  =                                                2
+ TIME [fs]                    =                                         1.000000
+ POTENTIAL ENERGY[hartree]    =         -0.176101613342E+01  -0.176101835661E+01
+ KINETIC ENERGY [hartree]     =          0.142659934591E-02   0.142632288208E-02
+ TEMPERATURE [K]              =                     300.323              300.265
+ PRESSURE [bar]               =          0.829617125241E+04   0.818058561990E+04
+ CELL LNTHS[bohr]             =    0.6030000E+01   0.6030000E+01   0.9766037E+01
+ *******************************************************************************
+"""
+
+def _getPosXyzStrForStreamingTestA():
+	return """       2
+ i =        1, time =        0.500, E =        -1.7610217358
+ Mg         5.0067115483        0.0018448598        0.0036115223
+ Mg        -0.0067115636        1.8434995966        2.5814191416
+       2
+ i =        0, time =        0.000, E =        -1.7610217358
+ Mg         0.0067115483        0.0018448598        0.0036115223
+ Mg        -0.0067115636        1.8434995966        2.5814191416
+       2
+ i =        1, time =        0.500, E =        -1.7610194305
+ Mg         0.0083879577        0.0023044814        0.0045100468
+ Mg        -0.0083879729        1.8430399749        2.5805206170
+
+       2
+ i =        2, time =        1.000, E =        -1.7610164892
+ Mg         0.0100632990        0.0027633584        0.0054058351
+ Mg        -0.0100633140        1.8425810978        2.5796248286
+"""
+
+def _getVelXyzStrForStreamingTestA():
+	return """       2
+ i =        0, time =        0.000, E =        -1.7610217358
+ Mg         1.0000000000        1.0000000000        1.0000000000
+ Mg         2.0000000000        2.0000000000        2.0000000000
+       2
+ i =        2, time =        1.000, E =        -1.7610164892
+ Mg         3.0000000000        3.0000000000        3.0000000000
+ Mg         4.0000000000        4.0000000000        4.0000000000
+"""
+
+
 def _getFileStrForTwoXyzStepsA():
 	return """      3
  i =     1684, time =      842.000, E =      -551.1892718614
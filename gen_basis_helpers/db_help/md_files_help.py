@@ -1,4 +1,5 @@
 
+import concurrent.futures
 import os
 import pathlib
 import re
@@ -6,6 +7,7 @@ import shutil
 
 from ..analyse_md import analyse_metadyn_hills as aMetadynHillsHelp
 from ..analyse_md import thermo_data as thermoDataHelp
+from ..analyse_md import traj_compressed as trajCompressedHelp
 from ..analyse_md import traj_core as trajHelp
 from ..misc import shared_io as ioHelp
 
@@ -21,9 +23,36 @@ def getMdThermoObjFromBaseDbFolderAndRecord(baseDbFolder, inpRecord):
 	thermoPath = getMdFilePathFromRecord(baseDbFolder, inpRecord, "md_thermo_filename")
 	return thermoDataHelp.readThermoDataFromFile(thermoPath)
 
-def getMdTrajInMemFromBaseDbFolderAndRecord(baseDbFolder, inpRecord):
+def getMdTrajInMemFromBaseDbFolderAndRecord(baseDbFolder, inpRecord, frameIndices=None, minTime=None, maxTime=None):
+	""" Gets the trajectory (or a subset of frames) for an MD-database record. Works for both the json-lines and compressed (directory) formats
+	
+	Args:
+		baseDbFolder: (str) Path to the base database_input folder
+		inpRecord: (dict) MD-database record, should have partly been generated with getOutDictForMDFromStdOutObj_simple
+		frameIndices: (iter of ints, Optional) Indices (NOT step numbers) of frames to load. Default is all
+		minTime: (float, Optional) Only load frames with time >= minTime
+		maxTime: (float, Optional) Only load frames with time <= maxTime
+
+	Returns
+		trajObj: (TrajectoryInMemory)
+
+	NOTES:
+		For the compressed format the manifest is used to only decompress chunks holding the requested frames. For json-lines only the requested frames are decoded, though the whole file still needs scanning
+
+	"""
 	trajPath = getMdFilePathFromRecord(baseDbFolder, inpRecord, "md_traj_filename")
-	return trajHelp.readTrajObjFromFileToTrajectoryInMemory(trajPath)
+	if os.path.isdir(trajPath):
+		return trajCompressedHelp.readTrajFromCompressedFormat(trajPath, frameIndices=frameIndices, minTime=minTime, maxTime=maxTime)
+
+	if (frameIndices is None) and (minTime is None) and (maxTime is None):
+		return trajHelp.readTrajObjFromFileToTrajectoryInMemory(trajPath)
+
+	outTraj = trajHelp.readTrajObjFromFileToTrajectoryOnDisk(trajPath)
+	outTraj = outTraj if frameIndices is None else outTraj.getTrajFromIndices(frameIndices)
+	outSteps = [step for step in outTraj]
+	if (minTime is not None) or (maxTime is not None):
+		outSteps = [step for step in outSteps if trajCompressedHelp._timeInRange(step.time, minTime, maxTime)]
+	return trajHelp.TrajectoryInMemory(outSteps)
 
 def getMdFilePathFromRecord(baseDbFolder, inpRecord, key):
 	""" Gets a full path to an MD-file (e.g. traj-dump, thermo-dump etc) 
@@ -41,7 +70,7 @@ def getMdFilePathFromRecord(baseDbFolder, inpRecord, key):
 	mdFileFolder = os.path.join( baseDbFolder, inpRecord["db_ext_path"], inpRecord["md_path_ext"] )
 	return os.path.join(mdFileFolder, inpRecord[key])
 
-def getOutDictForMDFromStdOutObj_simple(startDir, stdOutObj, writeFiles=True, maxNumbWfnBackups=10):
+def getOutDictForMDFromStdOutObj_simple(startDir, stdOutObj, writeFiles=True, maxNumbWfnBackups=10, **dumperKwargs):
 	""" Get output dictionary (to dump to database) and write relevant files from parsed dict
 	
 	Args:
@@ -49,12 +78,13 @@ def getOutDictForMDFromStdOutObj_simple(startDir, stdOutObj, writeFiles=True, ma
 		stdOutObj: () Standard output object containing data for a single MD run. Restricted to the "parsedOutFile" type here, meaning data will be contained 
 		writeFiles: (Bool, optional) If True then trajectory and restart files will be written. Information on paths will be contained in outDict
 		maxNumbWfnBackups: (int, optional) The maximum number of *.wfn files which will be written. 1 means just the *.wfn, 2 gets the *.wfn.bak-1 etc.
+		dumperKwargs: Passed to MDFilesFromOutObjsFileDumperStandard (e.g. storageFormat="compressed")
  
 	Returns
 		outDict: (dict) contains information on file paths containg MD run results (e.g. temperatures, trajectory)
  
 	"""
-	dumper = MDFilesFromOutObjsFileDumperStandard(copyWfnFile=writeFiles, copyRestartFile=writeFiles, maxNumbWfnBackups=maxNumbWfnBackups)
+	dumper = MDFilesFromOutObjsFileDumperStandard(copyWfnFile=writeFiles, copyRestartFile=writeFiles, maxNumbWfnBackups=maxNumbWfnBackups, **dumperKwargs)
 	outDict = dumper.dumpFiles(stdOutObj, startDir)
 	return outDict
 
@@ -63,40 +93,71 @@ class MDFilesFromOutObjsFileDumperStandard():
 
 	"""
 
-	def __init__(self, copyWfnFile=True, copyRestartFile=True, maxNumbWfnBackups=10):
+	def __init__(self, copyWfnFile=True, copyRestartFile=True, maxNumbWfnBackups=10, storageFormat="jsonl", alsoWriteJsonLines=False,
+	             framesPerChunk=trajCompressedHelp.DEFAULT_FRAMES_PER_CHUNK, nCopyThreads=4, verifyCopies=True):
 		""" Initializer
 		
 		Args:
 			copyWfnFile: (Bool) If True copy wfn files over to the database dir
 			copyRestartFiel: (Bool) If True copy restart files over to the database dir
 			maxNumbWfnBackups: (int) Maximum number of *.wfn.bak* wfn files to copy to the database. Multiple files are used when we try to extrapolate the next wfn based on the previous values; so a certain number may be neccesary when restarting MD runs
+			storageFormat: (str) "jsonl" writes the trajectory as json-lines (traj_core.dumpTrajObjToFile) and thermo data as json. "compressed" writes the trajectory in the chunked format of traj_compressed (with a manifest allowing subsets to be loaded) and gzips the thermo data
+			alsoWriteJsonLines: (Bool) If True (and storageFormat="compressed") also write the json-lines trajectory/json thermo files; their names are recorded under "md_traj_jsonl_filename" and "md_thermo_json_filename"
+			framesPerChunk: (int) Number of frames in each compressed trajectory block
+			nCopyThreads: (int) Number of files (e.g. wfn backups) copied at the same time
+			verifyCopies: (Bool) If True compare sha256 checksums of each copied file with the original; checksums are recorded under "md_file_checksums" in the output dict
 				 
 		"""
 		self.copyWfnFile = copyWfnFile
 		self.copyRestartFile = copyRestartFile
 		self.maxNumbWfnBackups = maxNumbWfnBackups
+		self.storageFormat = storageFormat
+		self.alsoWriteJsonLines = alsoWriteJsonLines
+		self.framesPerChunk = framesPerChunk
+		self.nCopyThreads = nCopyThreads
+		self.verifyCopies = verifyCopies
+		self._parsedFileCache = dict()
 
 	def dumpFiles(self, stdOutObj, startDir):
-		outDict = self._getFilePathExtensionDict(stdOutObj)
-		if self.copyRestartFile:
-			self._copyRestartFiles(startDir, outDict)
-		if self.copyWfnFile:
-			self._dumpMdFiles(stdOutObj, startDir, outDict)
+		#Accessing parsedFile can mean re-parsing the whole MD run; so its only done once per call (see _getParsedFile)
+		self._parsedFileCache = dict()
+		try:
+			outDict = self._getFilePathExtensionDict(stdOutObj)
+			if self.copyRestartFile:
+				self._copyRestartFiles(startDir, outDict)
+			if self.copyWfnFile:
+				self._dumpMdFiles(stdOutObj, startDir, outDict)
+		finally:
+			self._parsedFileCache = dict()
 		return outDict
 
+	def _getParsedFile(self, stdOutObj):
+		assert len(stdOutObj.data[0])==1
+		if id(stdOutObj) not in self._parsedFileCache:
+			self._parsedFileCache[id(stdOutObj)] = stdOutObj.data[0][0].parsedFile
+		return self._parsedFileCache[id(stdOutObj)]
+
 	def _dumpMdFiles(self, stdOutObj, startDir, pathExtDict):
 		#Get thermo data and trajectory objects
-		assert len(stdOutObj.data[0])==1
-		thermoObj = stdOutObj.data[0][0].parsedFile.thermo_data
-		trajObj = stdOutObj.data[0][0].parsedFile.trajectory
+		parsedFile = self._getParsedFile(stdOutObj)
+		thermoObj = parsedFile.thermo_data
+		trajObj = parsedFile.trajectory
 		outFolder = os.path.join(startDir, pathExtDict["md_path_ext"])
-		outThermoPath = os.path.join(outFolder, "out_thermo.thermo")
-		outTrajPath = os.path.join(outFolder, "out_traj.traj")
+		outThermoPath = os.path.join(outFolder, pathExtDict["md_thermo_filename"])
+		outTrajPath = os.path.join(outFolder, pathExtDict["md_traj_filename"])
 
 		pathlib.Path(outFolder).mkdir(parents=True,exist_ok=True)
 
-		trajHelp.dumpTrajObjToFile(trajObj, outTrajPath)
-		thermoDataHelp.dumpStandardThermoDataToFile(thermoObj, outThermoPath)
+		if self.storageFormat == "jsonl":
+			trajHelp.dumpTrajObjToFile(trajObj, outTrajPath)
+			thermoDataHelp.dumpStandardThermoDataToFile(thermoObj, outThermoPath)
+			return None
+
+		trajCompressedHelp.dumpTrajObjToCompressedFormat(trajObj, outTrajPath, framesPerChunk=self.framesPerChunk)
+		thermoDataHelp.dumpStandardThermoDataToFile(thermoObj, outThermoPath, compress=True)
+		if self.alsoWriteJsonLines:
+			trajHelp.dumpTrajObjToFile(trajObj, os.path.join(outFolder, pathExtDict["md_traj_jsonl_filename"]))
+			thermoDataHelp.dumpStandardThermoDataToFile(thermoObj, os.path.join(outFolder, pathExtDict["md_thermo_json_filename"]))
 
 	#startDir will be where we dump the main *.json file
 	def _copyRestartFiles(self, startDir, pathExtDict):
@@ -104,32 +165,57 @@ class MDFilesFromOutObjsFileDumperStandard():
 		outDir = os.path.join(startDir, pathExtDict["md_path_ext"])
 		pathlib.Path(outDir).mkdir(parents=True,exist_ok=True)
 
+		fileNames = list()
 		if pathExtDict.get("restart_filename", None) is not None:
-			currFileName = pathExtDict["restart_filename"]
-			shutil.copy2( os.path.join(runDir, currFileName), os.path.join(outDir, currFileName) )
+			fileNames.append( pathExtDict["restart_filename"] )
 
 		if pathExtDict.get("wfn_filename", None) is not None and self.copyWfnFile:
-			self._copyWfnRestartFiles(runDir, outDir, pathExtDict["wfn_filename"])
+			fileNames.extend( self._getWfnRestartFileNamesToCopy(runDir, pathExtDict["wfn_filename"]) )
 
-	def _copyWfnRestartFiles(self, runDir, outDir, baseFileName):
+		#All files are copied at the same time; checksums go in pathExtDict (in place) so they end up in the database record
+		checksums = self._copyFilesConcurrently(runDir, outDir, fileNames)
+		if self.verifyCopies and len(checksums)>0:
+			pathExtDict["md_file_checksums"] = checksums
+
+	def _getWfnRestartFileNamesToCopy(self, runDir, baseFileName):
 		if self.maxNumbWfnBackups < 1:
-			return None
+			return list()
 		elif self.maxNumbWfnBackups == 1:
-			shutil.copy2( os.path.join(runDir, baseFileName), os.path.join(outDir, baseFileName) )
+			return [baseFileName]
 		else:
 			#ALWAYS copy over the first file
-			shutil.copy2( os.path.join(runDir, baseFileName), os.path.join(outDir, baseFileName) )
+			outNames = [baseFileName]
 
-			#Figure out other names to copy and do so
+			#Figure out other names to copy
 			otherNames = [x for x in os.listdir(runDir) if "bak" in x and ".wfn" in x]
 			wfnNamesVsIdx = [ [x, self._getWfnBackupIdx(x)] for x in otherNames ]
 			sortedOtherWfnNames = [ x[0] for x in sorted(wfnNamesVsIdx,key=lambda x:x[1]) ]
 			numbWfnFiles = len(sortedOtherWfnNames) + 1
 			maxNumbWfnFiles = numbWfnFiles if numbWfnFiles<self.maxNumbWfnBackups else self.maxNumbWfnBackups
-			outWfnNames = [sortedOtherWfnNames[idx] for idx,unused in enumerate(range(1,maxNumbWfnFiles))]
-			for outName in outWfnNames:
-				shutil.copy2( os.path.join(runDir, outName), os.path.join(outDir, outName) )
+			outNames.extend( [sortedOtherWfnNames[idx] for idx,unused in enumerate(range(1,maxNumbWfnFiles))] )
+			return outNames
+
+	def _copyFilesConcurrently(self, runDir, outDir, fileNames):
+		""" Copies runDir/fileName to outDir/fileName for each of fileNames using a pool of threads (copying is I/O bound). Returns dict of fileName:sha256 (empty if self.verifyCopies is False) """
+		inpPaths = [os.path.join(runDir, x) for x in fileNames]
+		outPaths = [os.path.join(outDir, x) for x in fileNames]
+		nThreads = max(1, min(self.nCopyThreads, len(fileNames)))
+		with concurrent.futures.ThreadPoolExecutor(max_workers=nThreads) as executor:
+			checksums = list( executor.map(self._copyFileAndGetChecksum, inpPaths, outPaths) )
+
+		if not self.verifyCopies:
+			return dict()
+		return {fileName:checksum for fileName,checksum in zip(fileNames, checksums)}
+
+	def _copyFileAndGetChecksum(self, inpPath, outPath):
+		shutil.copy2(inpPath, outPath)
+		if not self.verifyCopies:
+			return None
 
+		inpChecksum, outChecksum = trajCompressedHelp.getSha256ForFile(inpPath), trajCompressedHelp.getSha256ForFile(outPath)
+		if inpChecksum != outChecksum:
+			raise IOError("Checksum mismatch after copying {} to {}".format(inpPath, outPath))
+		return inpChecksum
 
 	def _getWfnBackupIdx(self, wfnName):
 		pattern = ".bak-[0-9]*"
@@ -146,12 +232,20 @@ class MDFilesFromOutObjsFileDumperStandard():
 		assert len(stdOutObj.label)==1
 		keys = [getattr(stdOutObj.label[0],x) for x in ["eleKey","structKey","methodKey"]]
 		outDict["md_path_ext"] = os.path.join(*keys)
-		outDict["md_thermo_filename"] = "out_thermo.thermo"
-		outDict["md_traj_filename"] = "out_traj.traj"
+		if self.storageFormat == "jsonl":
+			outDict["md_thermo_filename"] = "out_thermo.thermo"
+			outDict["md_traj_filename"] = "out_traj.traj"
+		elif self.storageFormat == "compressed":
+			outDict["md_thermo_filename"] = "out_thermo.thermo.gz"
+			outDict["md_traj_filename"] = "out_traj_compressed"
+			if self.alsoWriteJsonLines:
+				outDict["md_thermo_json_filename"] = "out_thermo.thermo"
+				outDict["md_traj_jsonl_filename"] = "out_traj.traj"
+		else:
+			raise ValueError("{} is an invalid value for storageFormat".format(self.storageFormat))
 
 		#names of restart files
-		assert len(stdOutObj.data[0])==1
-		runDir = stdOutObj.data[0][0].parsedFile.finalRunFolder
+		runDir = self._getParsedFile(stdOutObj).finalRunFolder
 		outDict["final_run_dir"] = runDir
 
 		fileNames = os.listdir(runDir)
@@ -1,10 +1,16 @@
 
 import os
+import shutil
+import tempfile
 import types
 import unittest
 import unittest.mock as mock
 
+import plato_pylib.shared.ucell_class as uCellHelp
+
 import gen_basis_helpers.analyse_md.analyse_metadyn_hills as aMetadynHillsHelp
+import gen_basis_helpers.analyse_md.thermo_data as thermoDataHelp
+import gen_basis_helpers.analyse_md.traj_core as trajHelp
 import gen_basis_helpers.shared.calc_runners as calcRunnersHelp
 import gen_basis_helpers.shared.label_objs as labelHelp
 
@@ -112,6 +118,7 @@ class TestGetStdMdFilesOutputDictFromStdInpCreatorAndOutput(unittest.TestCase):
 		self.copyWfnFiles = True
 		self.copyRestartFiles = True
 		self.maxNumbWfnBackups = 1
+		self.verifyCopies = False #copy2 is mocked in these tests, so there are no files to checksum
 
 		self.createTestObjs()
 
@@ -124,7 +131,8 @@ class TestGetStdMdFilesOutputDictFromStdInpCreatorAndOutput(unittest.TestCase):
 		self.dataA = [types.SimpleNamespace(parsedFile=types.SimpleNamespace(**self.dataDictA))]
 		self.stdOutObjA = calcRunnersHelp.StandardOutputObj(self.dataA, self.labelA)
 
-		currKwargs = {"copyWfnFile":self.copyWfnFiles, "copyRestartFile":self.copyRestartFiles, "maxNumbWfnBackups":self.maxNumbWfnBackups}
+		currKwargs = {"copyWfnFile":self.copyWfnFiles, "copyRestartFile":self.copyRestartFiles, "maxNumbWfnBackups":self.maxNumbWfnBackups,
+		              "verifyCopies":self.verifyCopies}
 		self.testObjA = tCode.MDFilesFromOutObjsFileDumperStandard(**currKwargs)
 		self.expPathExtA = os.path.join(self.eleKey, self.structKey, self.methodKey)
 
@@ -204,39 +212,144 @@ class TestGetStdMdFilesOutputDictFromStdInpCreatorAndOutput(unittest.TestCase):
 		self.assertEqual(expPathExtDict, actPathExtDict)
 
 
-	@mock.patch("gen_basis_helpers.db_help.md_files_help.shutil.copy2")
 	@mock.patch("gen_basis_helpers.db_help.md_files_help.os.listdir")
-	def testCopyWfnRestart_multipleBackupFilesReqd(self, mockListDir, mockCopy):
+	def testWfnRestartNamesToCopy_multipleBackupFilesReqd(self, mockListDir):
 		runDir = "fake_run_dir"
-		outDir = "fake_out_dir"
 		baseFileName = "fake_file.wfn"
 		mockDirContents = [baseFileName, baseFileName+".bak-2", baseFileName+".bak-1", baseFileName+".bak-3"]
 		mockListDir.side_effect = lambda *args, **kwargs: mockDirContents
 
 		self.testObjA.maxNumbWfnBackups = 2
-		self.testObjA._copyWfnRestartFiles(runDir, outDir, baseFileName)
-
-		mockCopy.assert_any_call( os.path.join(runDir,baseFileName), os.path.join(outDir,baseFileName) )
-		mockCopy.assert_any_call( os.path.join(runDir,baseFileName+".bak-1"), os.path.join(outDir,baseFileName+".bak-1") )
-		with self.assertRaises(AssertionError):
-			mockCopy.assert_any_call( os.path.join(runDir,baseFileName+".bak-2"), os.path.join(outDir, baseFileName+".bak-2") )
+		expNames = [baseFileName, baseFileName+".bak-1"]
+		actNames = self.testObjA._getWfnRestartFileNamesToCopy(runDir, baseFileName)
+		self.assertEqual(expNames, actNames)
 
 
-	@mock.patch("gen_basis_helpers.db_help.md_files_help.shutil.copy2")
 	@mock.patch("gen_basis_helpers.db_help.md_files_help.os.listdir")
-	def testCopyWfnRestart_reqdNumberFilesGreaterThanActual(self, mockListDir, mockCopy):
+	def testWfnRestartNamesToCopy_reqdNumberFilesGreaterThanActual(self, mockListDir):
 		runDir = "fake_run_dir"
-		outDir = "fake_out_dir"
 		baseFileName = "fake_file.wfn"
 		mockDirContents = [baseFileName, baseFileName+".bak-2", baseFileName+".bak-1"]
 		mockListDir.side_effect = lambda *args, **kwargs: mockDirContents
 
 		self.testObjA.maxNumbWfnBackups = 10
-		self.testObjA._copyWfnRestartFiles(runDir, outDir, baseFileName)
+		expNames = [baseFileName, baseFileName+".bak-1", baseFileName+".bak-2"]
+		actNames = self.testObjA._getWfnRestartFileNamesToCopy(runDir, baseFileName)
+		self.assertEqual(expNames, actNames)
+
+	@mock.patch("gen_basis_helpers.db_help.md_files_help.pathlib")
+	@mock.patch("gen_basis_helpers.db_help.md_files_help.shutil.copy2")
+	@mock.patch("gen_basis_helpers.db_help.md_files_help.os.listdir")
+	def testCopyRestartFiles_wfnBackupsLimited(self, mockListDir, mockCopy, mockPathlib):
+		startDir = "fake_dir"
+		pathExtDict = self._loadExpPathExtDictA()
+		wfnName = pathExtDict["wfn_filename"]
+		mockDirContents = [wfnName, wfnName+".bak-2", wfnName+".bak-1", wfnName+".bak-3"]
+		mockListDir.side_effect = lambda *args, **kwargs: mockDirContents
+
+		self.testObjA.maxNumbWfnBackups = 2
+		self.testObjA._copyRestartFiles(startDir, pathExtDict)
+
+		outDir = os.path.join(startDir, self.expPathExtA)
+		mockCopy.assert_any_call( os.path.join(self.runFolder,wfnName), os.path.join(outDir,wfnName) )
+		mockCopy.assert_any_call( os.path.join(self.runFolder,wfnName+".bak-1"), os.path.join(outDir,wfnName+".bak-1") )
+		with self.assertRaises(AssertionError):
+			mockCopy.assert_any_call( os.path.join(self.runFolder,wfnName+".bak-2"), os.path.join(outDir,wfnName+".bak-2") )
+
+
+#Records how many times parsedFile is accessed (for real output objects each access may mean re-parsing the run)
+class _CountingParsedFileHolder():
+
+	def __init__(self, parsedFile):
+		self._parsedFile = parsedFile
+		self.nAccesses = 0
+
+	@property
+	def parsedFile(self):
+		self.nAccesses += 1
+		return self._parsedFile
+
+
+class TestDumpFilesToDisk(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.runFolder = os.path.join(self.workFolder, "run_folder")
+		self.dbExtPath = "db_ext"
+		self.storageFormat = "compressed"
+		self.alsoWriteJsonLines = True
+		self.maxNumbWfnBackups = 2
+		self.runFileNames = ["inp-1.restart", "inp-RESTART.wfn", "inp-RESTART.wfn.bak-1", "inp-RESTART.wfn.bak-2"]
+		self.createTestObjs()
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def createTestObjs(self):
+		os.makedirs(self.runFolder, exist_ok=True)
+		for idx,fileName in enumerate(self.runFileNames):
+			with open(os.path.join(self.runFolder,fileName), "wt") as f:
+				f.write("file contents {}".format(idx))
+
+		trajSteps = list()
+		for idx in range(5):
+			currCell = uCellHelp.UnitCell(lattParams=[5,5,5], lattAngles=[90,90,90])
+			currCell.cartCoords = [ [0,0,0.1*idx,"O"], [1,1,1,"H"] ]
+			trajSteps.append( trajHelp.TrajStepFlexible(unitCell=currCell, step=idx, time=0.5*idx) )
+		self.trajA = trajHelp.TrajectoryInMemory(trajSteps)
+		self.thermoA = thermoDataHelp.ThermoDataStandard({"step":[0,1,2], "time":[0,0.5,1.0], "temp":[300,301,302]})
+
+		parsedFile = types.SimpleNamespace(thermo_data=self.thermoA, trajectory=self.trajA, finalRunFolder=self.runFolder)
+		self.dataHolder = _CountingParsedFileHolder(parsedFile)
+		label = labelHelp.StandardLabel(eleKey="ele", structKey="struct", methodKey="method")
+		self.stdOutObjA = calcRunnersHelp.StandardOutputObj([self.dataHolder], label)
+
+	def _runTestFunct(self):
+		currKwargs = {"maxNumbWfnBackups":self.maxNumbWfnBackups, "storageFormat":self.storageFormat,
+		              "alsoWriteJsonLines":self.alsoWriteJsonLines, "framesPerChunk":2}
+		outDict = tCode.getOutDictForMDFromStdOutObj_simple( os.path.join(self.workFolder,self.dbExtPath), self.stdOutObjA, **currKwargs )
+		outDict["db_ext_path"] = self.dbExtPath
+		return outDict
 
-		mockCopy.assert_any_call( os.path.join(runDir, baseFileName), os.path.join(outDir, baseFileName) )
-		mockCopy.assert_any_call( os.path.join(runDir, baseFileName+".bak-1"), os.path.join(outDir, baseFileName+".bak-1") )
-		mockCopy.assert_any_call( os.path.join(runDir, baseFileName+".bak-2"), os.path.join(outDir, baseFileName+".bak-2") )
+	def testParsedFileOnlyAccessedOnce(self):
+		self._runTestFunct()
+		self.assertEqual(1, self.dataHolder.nAccesses)
+
+	def testChecksumsRecordedForCopiedFiles(self):
+		outDict = self._runTestFunct()
+		expFileNames = sorted(self.runFileNames[:3])
+		self.assertEqual( expFileNames, sorted(outDict["md_file_checksums"].keys()) )
+		copiedPath = tCode.getMdFilePathFromRecord(self.workFolder, outDict, "wfn_filename")
+		self.assertTrue( os.path.exists(copiedPath) )
+
+	def testReadTrajAndThermoFromRecord_compressed(self):
+		outDict = self._runTestFunct()
+		self.assertEqual( self.trajA, tCode.getMdTrajInMemFromBaseDbFolderAndRecord(self.workFolder, outDict) )
+		self.assertEqual( self.thermoA, tCode.getMdThermoObjFromBaseDbFolderAndRecord(self.workFolder, outDict) )
+
+	def testReadTrajSubsetsFromRecord_bothFormats(self):
+		outDict = self._runTestFunct()
+		jsonlRecord = dict(outDict)
+		jsonlRecord["md_traj_filename"] = outDict["md_traj_jsonl_filename"]
+		expTraj = trajHelp.TrajectoryInMemory( [self.trajA.trajSteps[idx] for idx in [3,1]] )
+		for record in [outDict, jsonlRecord]:
+			actTraj = tCode.getMdTrajInMemFromBaseDbFolderAndRecord(self.workFolder, record, frameIndices=[3,1,4], maxTime=1.6)
+			self.assertEqual(expTraj, actTraj)
+
+	def testReadTrajSubsetsFromRecord_stepWithoutTimeKeptForFrameIndices(self):
+		self.trajA.trajSteps[2].time = None
+		outDict = self._runTestFunct()
+		jsonlRecord = dict(outDict)
+		jsonlRecord["md_traj_filename"] = outDict["md_traj_jsonl_filename"]
+		expTraj = trajHelp.TrajectoryInMemory( [self.trajA.trajSteps[idx] for idx in [2,0]] )
+		for record in [outDict, jsonlRecord]:
+			actTraj = tCode.getMdTrajInMemFromBaseDbFolderAndRecord(self.workFolder, record, frameIndices=[2,0])
+			self.assertEqual(expTraj, actTraj)
+
+	def testRaisesForUnknownStorageFormat(self):
+		self.storageFormat = "fake_format"
+		with self.assertRaises(ValueError):
+			self._runTestFunct()
 
 
 class TestDumpMetadynHillsFile(unittest.TestCase):
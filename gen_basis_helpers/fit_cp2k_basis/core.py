@@ -76,7 +76,7 @@ class ObjFunctCalculatorStandard():
 	"""Objective function object; Callable as __call__(self, coeffs) and returns the objective function for the given set of coefficients
 
 	"""
-	def __init__(self, objs, coeffUpdater, nCores=1, weights=None, observers=None):
+	def __init__(self, objs, coeffUpdater, nCores=1, weights=None, observers=None, scheduler=None, evalStore=None):
 		""" Initializer
 		
 		Args:
@@ -85,6 +85,8 @@ class ObjFunctCalculatorStandard():
 			nCores: (int) Number of cores to use for shell comms (generally meaning the running-jobs part)
 			weights: (Optional, iter of floats) default is all ones. Multiple the objective values from objs by these weights
 			observers: (Optional, list of ObjFunctObserver objects) List of observers. These are updated with the current objective function after every call to this objective function
+			scheduler: (Optional, shared.job_scheduler.AsyncShellJobScheduler) If set, this is used to run the shell comms (nCores is then ignored) and output for each obj is parsed as soon as its jobs finish. Jobs use the cores requested by each calculation (e.g. CP2KCalcObj nCores). Complete outputs are only skipped if the calculation object asks for it, and never when they are older than the (re-written) input file
+			evalStore: (Optional, obj_funct_store.ObjFunctEvalStore) If set, objective function values are looked up here (using the TRANSFORMED coefficients) before running any calculations, and new values are added to it. Coefficients are still passed to coeffUpdater either way
  
 		"""
 		self.objs = list(objs)
@@ -92,6 +94,8 @@ class ObjFunctCalculatorStandard():
 		self.nCores = nCores
 		self.weights = list(weights) if weights is not None else [1 for x in self.objs]
 		self.observers = list(observers) if observers is not None else list()
+		self.scheduler = scheduler
+		self.evalStore = evalStore
 
 	def addObjValObserver(self, observer):
 		self.observers.append(observer)
@@ -100,6 +104,32 @@ class ObjFunctCalculatorStandard():
 		for x in self.observers:
 			x.updateObjVal(objVal)
 
+	#Optional part of the observer interface; so plain updateObjVal observers still work
+	def _updateObserversEvalStoreStatus(self, isHit):
+		for x in self.observers:
+			updateFunct = getattr(x, "updateEvalStoreStatus", None)
+			if updateFunct is not None:
+				updateFunct(isHit)
+
+	def _getTransformedCoeffs(self, coeffs):
+		try:
+			transformFunct = self.coeffUpdater._transformCoeffs
+		except AttributeError:
+			return coeffs
+		return transformFunct(coeffs)
+
+	#Returns None if theres no evalStore, or coeffs arent in it. Observers are told about hits/misses
+	def _getObjValFromEvalStore(self, coeffs):
+		if self.evalStore is None:
+			return None
+		outVal = self.evalStore.lookup( self._getTransformedCoeffs(coeffs) )
+		self._updateObserversEvalStoreStatus(outVal is not None)
+		return outVal
+
+	def _addObjValToEvalStore(self, coeffs, objVal):
+		if self.evalStore is not None:
+			self.evalStore.add( self._getTransformedCoeffs(coeffs), objVal )
+
 	def _updateCoeffs(self, coeffs):
 		self.coeffUpdater(coeffs)
 
@@ -113,6 +143,12 @@ class ObjFunctCalculatorStandard():
 		objFunctVals = self._getObjFunctVals()
 		return self._combineObjFunctVals(objFunctVals)
 
+	#Runs the shell comms AND gets the objective function; parsing each obj while jobs for others are still running
+	def _calcTotalObjFunctUsingScheduler(self):
+		outputObjs = calcRunners.createOutputObjsUsingScheduler(self.objs, self.scheduler)
+		objFunctVals = [x.objFunct for outObj in outputObjs for x in outObj.data]
+		return self._combineObjFunctVals(objFunctVals)
+
 	def _getObjFunctVals(self):
 		outVals = list()
 		for x in self.objs:
@@ -126,11 +162,129 @@ class ObjFunctCalculatorStandard():
 
 	def __call__(self, coeffs):
 		self._updateCoeffs(coeffs)
-		self._doPreRunShellComms()
-		outVal = self._calcTotalObjFunct()
+		outVal = self._getObjValFromEvalStore(coeffs)
+		if outVal is None:
+			if self.scheduler is None:
+				self._doPreRunShellComms()
+				outVal = self._calcTotalObjFunct()
+			else:
+				outVal = self._calcTotalObjFunctUsingScheduler()
+			self._addObjValToEvalStore(coeffs, outVal)
 		self._updateObservers(outVal)
 		return outVal
 
+class BatchedObjFunctCalculator():
+	"""Evaluates the objective function for many sets of coefficients at once; callable as __call__(coeffsBatch) and returns a list of objective function values. Each candidate set of coefficients is evaluated by a separate ObjFunctCalculatorStandard ("slot"), each of which must use its own basis file and work folders. Jobs for all slots are run together in one pool
+
+	"""
+	def __init__(self, objFuncts, nCores=1, scheduler=None, failedRetVal=None):
+		""" Initializer
+		
+		Args:
+			objFuncts: (iter of ObjFunctCalculatorStandard) One per slot. These MUST NOT share basis files or work folders (else candidates will overwrite each other)
+			nCores: (int) Number of cores to use for running jobs (for all slots combined). Ignored if scheduler is set
+			scheduler: (Optional, shared.job_scheduler.AsyncShellJobScheduler) If set, used to run the jobs for all slots; output for each obj is parsed as soon as its jobs finish
+			failedRetVal: (Optional, float) If set, this is returned for any candidate where running/parsing raises an error; else errors are raised
+ 
+		"""
+		self.objFuncts = list(objFuncts)
+		self.nCores = nCores
+		self.scheduler = scheduler
+		self.failedRetVal = failedRetVal
+
+	@classmethod
+	def fromObjFunctFactory(cls, createObjFunct, nSlots, **kwargs):
+		""" Alternative initializer
+		
+		Args:
+			createObjFunct: (f(slotIdx)->ObjFunctCalculatorStandard) Each returned object needs its own basis file/work folders (e.g. using slotIdx in the folder name)
+			nSlots: (int) Number of candidate coefficient sets to evaluate at once
+			kwargs: Passed to the initializer
+
+		"""
+		return cls([createObjFunct(idx) for idx in range(nSlots)], **kwargs)
+
+	@property
+	def nSlots(self):
+		return len(self.objFuncts)
+
+	def __call__(self, coeffsBatch):
+		""" Gets the objective function for each set of coefficients in coeffsBatch
+		
+		Args:
+			coeffsBatch: (iter of iters) Each entry is one set of coefficients. If there are more than nSlots then they are evaluated nSlots at a time
+				 
+		Returns
+			outVals: (list of floats) Objective function value for each set of coefficients
+ 
+		"""
+		coeffsBatch, outVals = list(coeffsBatch), list()
+		for startIdx in range(0, len(coeffsBatch), self.nSlots):
+			outVals.extend( self._evalForSlots(coeffsBatch[startIdx:startIdx+self.nSlots]) )
+		return outVals
+
+	def _evalForSlots(self, coeffsBatch):
+		objFuncts = self.objFuncts[:len(coeffsBatch)]
+		outVals = list()
+		for objFunct, coeffs in zip(objFuncts, coeffsBatch):
+			objFunct._updateCoeffs(coeffs)
+			outVals.append( objFunct._getObjValFromEvalStore(coeffs) )
+
+		#Run jobs for ALL slots (which werent in an evalStore) in one pool, then combine into one value per slot
+		slotIndices = [idx for idx,val in enumerate(outVals) if val is None]
+		inpObjsPerSlot = [ [_ErrorCatchingInpObj(x, self.failedRetVal is not None) for x in objFuncts[idx].objs] for idx in slotIndices ]
+		allInpObjs = [x for inpObjs in inpObjsPerSlot for x in inpObjs]
+		if self.scheduler is None:
+			allRunComms = [comm for x in allInpObjs for comm in x.runComms]
+			self._runCommsCatchingErrorsIfRequested(allRunComms)
+			allOutputObjs = [x.createOutputObj() for x in allInpObjs]
+		else:
+			allOutputObjs = calcRunners.createOutputObjsUsingScheduler(allInpObjs, self.scheduler)
+
+		startIdx = 0
+		for slotIdx, inpObjs in zip(slotIndices, inpObjsPerSlot):
+			objFunct = objFuncts[slotIdx]
+			currOutputObjs = allOutputObjs[startIdx:startIdx+len(inpObjs)]
+			startIdx += len(inpObjs)
+			if any([x is None for x in currOutputObjs]):
+				outVals[slotIdx] = self.failedRetVal
+			else:
+				outVals[slotIdx] = objFunct._combineObjFunctVals( [x.objFunct for outObj in currOutputObjs for x in outObj.data] )
+				objFunct._addObjValToEvalStore(coeffsBatch[slotIdx], outVals[slotIdx])
+
+		for objFunct, objVal in zip(objFuncts, outVals):
+			objFunct._updateObservers(objVal)
+
+		return outVals
+
+	def _runCommsCatchingErrorsIfRequested(self, runComms):
+		try:
+			jobRunHelp.executeRunCommsParralel(runComms, self.nCores, quiet=True, noCommsOk=True)
+		except Exception:
+			if self.failedRetVal is None:
+				raise
+
+
+#Wraps an input object so that errors in createOutputObj lead to None being returned (if catchErrors is True)
+class _ErrorCatchingInpObj():
+
+	def __init__(self, inpObj, catchErrors):
+		self.inpObj = inpObj
+		self.catchErrors = catchErrors
+
+	@property
+	def runComms(self):
+		return self.inpObj.runComms
+
+	def createOutputObj(self, **kwargs):
+		if not self.catchErrors:
+			return self.inpObj.createOutputObj(**kwargs)
+		try:
+			return self.inpObj.createOutputObj(**kwargs)
+		except Exception:
+			return None
+
+
 class ObjFunctObserver():
 	"""Class can act as an observer for ObjFunctCalculatorStandard, since it implements an updateObjVal method
 
@@ -138,6 +292,33 @@ class ObjFunctObserver():
 	def updateObjVal(self, objVal):
 		raise NotImplementedError("")
 
+	def updateEvalStoreStatus(self, isHit):
+		""" Called (before updateObjVal) when the objective function uses an evalStore; isHit is True if the value was found in the store (i.e. no calculations were run). Default is to do nothing """
+		pass
+
+
+class EvalStoreHitMissCounter(ObjFunctObserver):
+	"""Observer which counts how often objective function values were found in (hits) or missing from (misses) the evalStore of an ObjFunctCalculatorStandard
+
+	"""
+	def __init__(self):
+		self.nHits = 0
+		self.nMisses = 0
+
+	@property
+	def hitRate(self):
+		nTotal = self.nHits + self.nMisses
+		return self.nHits/nTotal if nTotal>0 else None
+
+	def updateObjVal(self, objVal):
+		pass
+
+	def updateEvalStoreStatus(self, isHit):
+		if isHit:
+			self.nHits += 1
+		else:
+			self.nMisses += 1
+
 
 
 
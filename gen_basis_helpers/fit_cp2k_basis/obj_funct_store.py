@@ -0,0 +1,128 @@
+""" On-disk store of objective function evaluations. This lets ObjFunctCalculatorStandard skip re-running calculations for coefficients it has seen before (e.g. during line searches, the final evaluation after a fit, or after restarting a killed fit) """
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+class ObjFunctEvalStore():
+	""" Stores objective function values for sets of (transformed) coefficients in a json-lines file. Each line is one evaluation; entries are only ever appended, so the file is always readable even if a process is killed mid-write (any partially written final line is ignored)
+
+	"""
+	def __init__(self, filePath, workflowKey="", absTol=1e-10):
+		""" Initializer
+
+		Args:
+			filePath: (str) Path to the store file. Created when the first value is added; existing entries are loaded on initialisation
+			workflowKey: (str) Identifies the set of workflows (and weights) the objective function is for. Only entries with the same key are used, so one file can be shared between different fits. See getWorkflowKeyForObjFunct
+			absTol: (float) Coefficients match a stored entry if every element differs by <= absTol
+
+		"""
+		self.filePath = filePath
+		self.workflowKey = workflowKey
+		self.absTol = absTol
+		self._coeffsArrays, self._objVals = dict(), dict() #Keys are the number of coefficients
+		self._loadFromFile()
+
+	def __len__(self):
+		return sum([len(x) for x in self._objVals.values()])
+
+	def lookup(self, coeffs):
+		""" Gets a stored objective function value for coeffs (within tolerance)
+
+		Args:
+			coeffs: (iter, may be nested) Coefficients; these are flattened before comparing
+
+		Returns
+			objVal: (float or None) The stored value (for the closest match if more than one is within tolerance). None if there are no matches
+
+		"""
+		coeffs = _getFlatCoeffsArray(coeffs)
+		storedCoeffs = self._coeffsArrays.get(len(coeffs))
+		if (storedCoeffs is None) or (len(storedCoeffs)==0):
+			return None
+
+		maxDiffs = np.max( np.abs(storedCoeffs - coeffs), axis=1 )
+		bestIdx = np.argmin(maxDiffs)
+		if maxDiffs[bestIdx] > self.absTol:
+			return None
+		return self._objVals[len(coeffs)][bestIdx]
+
+	def add(self, coeffs, objVal):
+		""" Adds an evaluation to the store (and appends it to the file)
+
+		Args:
+			coeffs: (iter, may be nested) Coefficients; these are flattened before storing
+			objVal: (float) The objective function value
+
+		"""
+		coeffs = _getFlatCoeffsArray(coeffs)
+		self._addToMemory(coeffs, float(objVal))
+		outDict = {"key":self.workflowKey, "coeffs":coeffs.tolist(), "objVal":float(objVal)}
+		with open(self.filePath, "at") as f:
+			f.write( json.dumps(outDict) + "\n" )
+			f.flush()
+			os.fsync(f.fileno())
+
+	def _addToMemory(self, coeffs, objVal):
+		nCoeffs = len(coeffs)
+		currArray = self._coeffsArrays.get(nCoeffs, np.zeros((0,nCoeffs)))
+		self._coeffsArrays[nCoeffs] = np.concatenate([currArray, coeffs[np.newaxis,:]])
+		self._objVals.setdefault(nCoeffs, list()).append(objVal)
+
+	def _loadFromFile(self):
+		if not os.path.exists(self.filePath):
+			return
+
+		allCoeffs, allVals = list(), list()
+		with open(self.filePath, "rt") as f:
+			for line in f:
+				try:
+					currDict = json.loads(line)
+				except json.JSONDecodeError:
+					continue #e.g. line truncated when a process was killed
+				if currDict.get("key") == self.workflowKey:
+					allCoeffs.append( np.array(currDict["coeffs"], dtype=float) )
+					allVals.append( currDict["objVal"] )
+
+		for nCoeffs in set([len(x) for x in allCoeffs]):
+			indices = [idx for idx,x in enumerate(allCoeffs) if len(x)==nCoeffs]
+			self._coeffsArrays[nCoeffs] = np.array( [allCoeffs[idx] for idx in indices] ).reshape(-1,nCoeffs)
+			self._objVals[nCoeffs] = [allVals[idx] for idx in indices]
+
+
+def getWorkflowKeyForObjFunct(objFunct):
+	""" Gets a key identifying the set of workflows (via their labels) and weights for an ObjFunctCalculatorStandard; for use with ObjFunctEvalStore
+
+	Args:
+		objFunct: (ObjFunctCalculatorStandard) All objs need a label attribute
+
+	Returns
+		outKey: (str) Hash based on the labels and weights
+
+	"""
+	labelStrs = [repr(label) for obj in objFunct.objs for label in obj.label]
+	outStr = json.dumps( {"labels":labelStrs, "weights":[float(x) for x in objFunct.weights]}, sort_keys=True )
+	return hashlib.sha1(outStr.encode()).hexdigest()
+
+
+def _getFlatCoeffsArray(coeffs):
+	outVals = list()
+	_appendFlattenedVals(coeffs, outVals)
+	return np.array(outVals, dtype=float)
+
+
+def _appendFlattenedVals(inpVal, outList):
+	try:
+		iter(inpVal)
+	except TypeError:
+		outList.append(inpVal)
+		return
+	if isinstance(inpVal, str):
+		outList.append(inpVal) #Will cause an error when converting to float, rather than infinite recursion
+		return
+	for x in inpVal:
+		_appendFlattenedVals(x, outList)
+
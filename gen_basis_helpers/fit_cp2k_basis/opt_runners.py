@@ -1,6 +1,8 @@
 
 import types
-from scipy.optimize import minimize
+
+import numpy as np
+from scipy.optimize import minimize, differential_evolution
 
 from . import core as coreHelp
 
@@ -57,6 +59,90 @@ def carryOutOptimisationBasicOptions(objectiveFunct,startCoeffs, method=None, **
 	output = types.SimpleNamespace(optRes=fitRes, transformedCoeffs=transformedCoeffObserver.coeffs )
 	return output
 
+def carryOutDifferentialEvolutionBatched(batchedObjFunct, bounds, **kwargs):
+	""" Driver to minimize an objective function using scipy's differential evolution (a population-based optimiser); the whole population is evaluated at once for each generation
+	
+	Args:
+		batchedObjFunct: (BatchedObjFunctCalculator) Objective function which evaluates many sets of coefficients at once. Setting nSlots equal to the population size (popsize*nCoeffs in scipy) means each generation is one batch of jobs
+		bounds: (iter of len-2 iters) [min,max] for each coefficient
+		kwargs: These are all passed to scipy.optimize.differential_evolution (e.g. popsize, maxiter, seed, init)
+	
+	Returns
+		output: output.optRes contains the output from differential_evolution; output.transformedCoeffs contains the final coefficients in the input format
+
+	NOTES:
+		vectorized=True and updating="deferred" are always passed to differential_evolution; these are what allow the population to be evaluated in one batch
+	
+	"""
+	def _evalPopulation(coeffsArray):
+		#scipy passes an (nCoeffs x nCandidates) array
+		return np.array( batchedObjFunct( [x.tolist() for x in np.atleast_2d(coeffsArray.T)] ) )
+
+	fitRes = differential_evolution(_evalPopulation, bounds, vectorized=True, updating="deferred", **kwargs)
+	return _getOutputFromFinalCoeffsForBatchedObjFunct(batchedObjFunct, fitRes)
+
+
+def carryOutOptimisationBatchedFiniteDiffGrads(batchedObjFunct, startCoeffs, method="L-BFGS-B", stepSize=1e-4, centralDiff=False, **kwargs):
+	""" Driver to minimize an objective function using scipy.minimize with a gradient-based method. Gradients are calculated with finite differences; the objective function at all displaced coefficients is evaluated in one batch
+	
+	Args:
+		batchedObjFunct: (BatchedObjFunctCalculator) Objective function which evaluates many sets of coefficients at once. nSlots should ideally be nCoeffs+1 (or 2*nCoeffs+1 for centralDiff)
+		startCoeffs: (iter) Starting values for the optimisation parameters
+		method: (str) Passed to scipy.minimize as method=method. Must be a method which uses gradients
+		stepSize: (float) Displacement used for finite differences
+		centralDiff: (Bool) If True use central differences (more accurate; twice as many evaluations) rather than forward differences
+		kwargs: These are all passed to scipy.minimize
+	
+	Returns
+		output: output.optRes contains the output from the scipy.minimize function; output.transformedCoeffs contains the final coefficients in the input format
+	
+	"""
+	def _getValAndGrad(coeffs):
+		return getObjFunctAndFiniteDiffGradBatched(batchedObjFunct, coeffs, stepSize=stepSize, centralDiff=centralDiff)
+
+	fitRes = minimize(_getValAndGrad, startCoeffs, method=method, jac=True, **kwargs)
+	return _getOutputFromFinalCoeffsForBatchedObjFunct(batchedObjFunct, fitRes)
+
+
+def getObjFunctAndFiniteDiffGradBatched(batchedObjFunct, coeffs, stepSize=1e-4, centralDiff=False):
+	""" Gets the objective function and its gradient (from finite differences) at coeffs, with all required evaluations done in one batch
+	
+	Args:
+		batchedObjFunct: (f(iter of coeffs)->iter of vals) e.g. BatchedObjFunctCalculator
+		coeffs: (iter of floats) Coefficients to get the gradient at
+		stepSize: (float) Displacement used for finite differences
+		centralDiff: (Bool) If True use central differences rather than forward differences
+
+	Returns
+		objVal: (float) Objective function at coeffs
+		grad: (np array) Gradient with respect to each coefficient
+ 
+	"""
+	coeffs = np.array(coeffs, dtype=float)
+	displacements = stepSize*np.identity(len(coeffs))
+	allCoeffs = [coeffs] + [coeffs+x for x in displacements]
+	if centralDiff:
+		allCoeffs += [coeffs-x for x in displacements]
+
+	allVals = np.array( batchedObjFunct([x.tolist() for x in allCoeffs]), dtype=float )
+	objVal, forwardVals = allVals[0], allVals[1:len(coeffs)+1]
+	if centralDiff:
+		grad = (forwardVals - allVals[len(coeffs)+1:]) / (2*stepSize)
+	else:
+		grad = (forwardVals - objVal) / stepSize
+
+	return objVal, grad
+
+
+#Run once more with the final coefficients (in the first slot) to get the optimised parameters; should also write tables as a side effect
+def _getOutputFromFinalCoeffsForBatchedObjFunct(batchedObjFunct, fitRes):
+	transformedCoeffObserver = _TransformedCoeffsObserver()
+	finalObjFunct = batchedObjFunct.objFuncts[0]
+	finalObjFunct.coeffUpdater.addObserver(transformedCoeffObserver)
+	batchedObjFunct( [list(fitRes.x)] )
+	return types.SimpleNamespace(optRes=fitRes, transformedCoeffs=transformedCoeffObserver.coeffs)
+
+
 class _TransformedCoeffsObserver(coreHelp.CoeffObserver):
 
 	def __init__(self):
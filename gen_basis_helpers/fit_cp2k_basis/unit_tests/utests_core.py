@@ -68,6 +68,50 @@ class TestObjFunctCalculator(unittest.TestCase):
 		actVals = self.testObjA._getObjFunctVals()
 		self.assertEqual(expVals, actVals)
 
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.calcRunners.createOutputObjsUsingScheduler")
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.ObjFunctCalculatorStandard._doPreRunShellComms")
+	def testSchedulerUsedWhenSet(self, mockedPreRunComms, mockedCreateOutputs):
+		expVals = [2,3]
+		outputObjA = types.SimpleNamespace(data=[types.SimpleNamespace(objFunct=expVals[0])])
+		outputObjB = types.SimpleNamespace(data=[types.SimpleNamespace(objFunct=expVals[1])])
+		mockedCreateOutputs.side_effect = lambda *args, **kwargs: [outputObjA, outputObjB]
+		self.testObjA.scheduler = mock.Mock()
+		actVal = self.testObjA([1,2])
+		mockedCreateOutputs.assert_called_with(self.objs, self.testObjA.scheduler)
+		mockedPreRunComms.assert_not_called()
+		self.assertEqual(sum(expVals), actVal)
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.ObjFunctCalculatorStandard._calcTotalObjFunct")
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.ObjFunctCalculatorStandard._doPreRunShellComms")
+	def testEvalStoreHitSkipsCalcs(self, mockedPreRunComms, mockedCalcObjFunct):
+		self.coeffUpdaterA._transformCoeffs.side_effect = lambda coeffs: [2*x for x in coeffs]
+		self.testObjA.evalStore = mock.Mock()
+		self.testObjA.evalStore.lookup.side_effect = lambda coeffs: 7
+		counter = tCode.EvalStoreHitMissCounter()
+		self.testObjA.addObjValObserver(counter)
+		actVal = self.testObjA([1,2])
+		self.testObjA.evalStore.lookup.assert_called_with([2,4])
+		self.coeffUpdaterA.assert_called_with([1,2])
+		mockedPreRunComms.assert_not_called()
+		mockedCalcObjFunct.assert_not_called()
+		self.assertEqual(7, actVal)
+		self.assertEqual([1,0], [counter.nHits, counter.nMisses])
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.ObjFunctCalculatorStandard._calcTotalObjFunct")
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.ObjFunctCalculatorStandard._doPreRunShellComms")
+	def testEvalStoreMissAddsVal(self, mockedPreRunComms, mockedCalcObjFunct):
+		self.coeffUpdaterA._transformCoeffs.side_effect = lambda coeffs: [2*x for x in coeffs]
+		mockedCalcObjFunct.side_effect = lambda: 5
+		self.testObjA.evalStore = mock.Mock()
+		self.testObjA.evalStore.lookup.side_effect = lambda coeffs: None
+		counter = tCode.EvalStoreHitMissCounter()
+		self.testObjA.addObjValObserver(counter)
+		actVal = self.testObjA([1,2])
+		self.testObjA.evalStore.add.assert_called_with([2,4], 5)
+		self.assertEqual(5, actVal)
+		self.assertEqual([0,1], [counter.nHits, counter.nMisses])
+		self.assertEqual(0, counter.hitRate)
+
 	def testCombineObjFunct(self):
 		testInput = [3,4]
 		expOutput = sum(testInput)
@@ -100,4 +144,91 @@ class TestObjFunctCalculator(unittest.TestCase):
 	
 
 
+class TestBatchedObjFunctCalculator(unittest.TestCase):
+
+	def setUp(self):
+		self.nSlots = 2
+		self.nCores = 3
+		self.failedRetVal = None
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.slotCoeffs = [None for x in range(self.nSlots)]
+		self.objFuncts = [self._createObjFunctForSlot(idx) for idx in range(self.nSlots)]
+		self.testObjA = tCode.BatchedObjFunctCalculator(self.objFuncts, nCores=self.nCores, failedRetVal=self.failedRetVal)
+
+	#Objective function for each slot is sum(coeffs) for objA and 2*sum(coeffs) for objB; using whatever coeffs were last sent to that slot
+	def _createObjFunctForSlot(self, slotIdx):
+		coeffUpdater = mock.Mock( side_effect=lambda coeffs: self.slotCoeffs.__setitem__(slotIdx, coeffs) )
+		objA, objB = mock.Mock(), mock.Mock()
+		objA.runComms, objB.runComms = ["comm_a_{}".format(slotIdx)], ["comm_b_{}".format(slotIdx)]
+		objA.createOutputObj.side_effect = lambda: self._getOutputObj( sum(self.slotCoeffs[slotIdx]) )
+		objB.createOutputObj.side_effect = lambda: self._getOutputObj( 2*sum(self.slotCoeffs[slotIdx]) )
+		return tCode.ObjFunctCalculatorStandard([objA,objB], coeffUpdater)
+
+	def _getOutputObj(self, objVal):
+		return types.SimpleNamespace( data=[types.SimpleNamespace(objFunct=objVal)] )
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.jobRunHelp.executeRunCommsParralel")
+	def testExpectedValsForSingleBatch(self, mockedRunner):
+		coeffsBatch = [ [1,2], [3,4] ]
+		expVals = [9, 21]
+		actVals = self.testObjA(coeffsBatch)
+		self.assertEqual(expVals, actVals)
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.jobRunHelp.executeRunCommsParralel")
+	def testAllSlotsShareOneJobPool(self, mockedRunner):
+		expComms = ["comm_a_0", "comm_b_0", "comm_a_1", "comm_b_1"]
+		self.testObjA( [[1,2],[3,4]] )
+		mockedRunner.assert_called_once_with(expComms, self.nCores, quiet=True, noCommsOk=True)
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.jobRunHelp.executeRunCommsParralel")
+	def testMoreCandidatesThanSlots(self, mockedRunner):
+		coeffsBatch = [ [1], [2], [3] ]
+		expVals = [3, 6, 9]
+		actVals = self.testObjA(coeffsBatch)
+		self.assertEqual(expVals, actVals)
+		self.assertEqual(2, mockedRunner.call_count)
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.jobRunHelp.executeRunCommsParralel")
+	def testObserversUpdatedForEachSlot(self, mockedRunner):
+		observerA, observerB = mock.Mock(), mock.Mock()
+		self.objFuncts[0].addObjValObserver(observerA)
+		self.objFuncts[1].addObjValObserver(observerB)
+		self.testObjA( [[1,2],[3,4]] )
+		observerA.updateObjVal.assert_called_with(9)
+		observerB.updateObjVal.assert_called_with(21)
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.jobRunHelp.executeRunCommsParralel")
+	def testFailedRetValUsedForFailedCandidate(self, mockedRunner):
+		self.failedRetVal = 1e6
+		self.createTestObjs()
+		self.objFuncts[1].objs[0].createOutputObj.side_effect = ValueError("")
+		expVals = [9, self.failedRetVal]
+		actVals = self.testObjA( [[1,2],[3,4]] )
+		self.assertEqual(expVals, actVals)
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.jobRunHelp.executeRunCommsParralel")
+	def testErrorRaisedWithoutFailedRetVal(self, mockedRunner):
+		self.objFuncts[1].objs[0].createOutputObj.side_effect = ValueError("")
+		with self.assertRaises(ValueError):
+			self.testObjA( [[1,2],[3,4]] )
+
+	@mock.patch("gen_basis_helpers.fit_cp2k_basis.core.jobRunHelp.executeRunCommsParralel")
+	def testEvalStoreUsedForEachSlot(self, mockedRunner):
+		for objFunct in self.objFuncts:
+			objFunct.coeffUpdater._transformCoeffs.side_effect = lambda coeffs: coeffs
+		self.objFuncts[0].evalStore = mock.Mock()
+		self.objFuncts[0].evalStore.lookup.side_effect = lambda coeffs: 4
+		self.objFuncts[1].evalStore = mock.Mock()
+		self.objFuncts[1].evalStore.lookup.side_effect = lambda coeffs: None
+		actVals = self.testObjA( [[1,2],[3,4]] )
+		self.assertEqual([4,21], actVals)
+		mockedRunner.assert_called_once_with(["comm_a_1","comm_b_1"], self.nCores, quiet=True, noCommsOk=True)
+		self.objFuncts[1].evalStore.add.assert_called_with([3,4], 21)
+
+	def testSchedulerUsedWhenSet(self):
+		self.testObjA.scheduler = types.SimpleNamespace(iterCompletedJobs=lambda jobs: iter(list(jobs)))
+		actVals = self.testObjA( [[1,2],[3,4]] )
+		self.assertEqual([9,21], actVals)
 
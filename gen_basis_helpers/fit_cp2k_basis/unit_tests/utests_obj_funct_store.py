@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import types
+import unittest
+
+import gen_basis_helpers.shared.label_objs as labelHelp
+import gen_basis_helpers.fit_cp2k_basis.obj_funct_store as tCode
+
+
+class TestObjFunctEvalStore(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.filePath = os.path.join(self.workFolder, "obj_funct_evals.jsonl")
+		self.workflowKey = "key_a"
+		self.absTol = 1e-6
+		self.createTestObjs()
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def createTestObjs(self):
+		self.testObjA = tCode.ObjFunctEvalStore(self.filePath, workflowKey=self.workflowKey, absTol=self.absTol)
+
+	def testLookupReturnsNoneWhenEmpty(self):
+		self.assertIsNone( self.testObjA.lookup([1,2]) )
+
+	def testLookupWithinTolerance(self):
+		self.testObjA.add([1,2], 5)
+		self.assertEqual( 5, self.testObjA.lookup([1+1e-7, 2]) )
+		self.assertIsNone( self.testObjA.lookup([1+1e-5, 2]) )
+
+	def testLookupGivesClosestMatch(self):
+		self.absTol = 1
+		self.createTestObjs()
+		self.testObjA.add([1,2], 5)
+		self.testObjA.add([1.5,2], 6)
+		self.assertEqual(6, self.testObjA.lookup([1.4,2]))
+
+	def testDiffNumberOfCoeffsDontMatch(self):
+		self.testObjA.add([1,2], 5)
+		self.assertIsNone( self.testObjA.lookup([1,2,3]) )
+
+	def testNestedCoeffsFlattened(self):
+		self.testObjA.add([[1,2],[3]], 5)
+		self.assertEqual(5, self.testObjA.lookup([1,2,3]))
+
+	def testValuesPersistAcrossInstances(self):
+		self.testObjA.add([1,2], 5)
+		self.testObjA.add([3,4], 6)
+		self.createTestObjs()
+		self.assertEqual(2, len(self.testObjA))
+		self.assertEqual( [5,6], [self.testObjA.lookup([1,2]), self.testObjA.lookup([3,4])] )
+
+	def testDiffWorkflowKeysIgnored(self):
+		self.testObjA.add([1,2], 5)
+		self.workflowKey = "key_b"
+		self.createTestObjs()
+		self.assertIsNone( self.testObjA.lookup([1,2]) )
+
+	def testTruncatedFinalLineIgnored(self):
+		self.testObjA.add([1,2], 5)
+		with open(self.filePath, "at") as f:
+			f.write('{"key": "key_a", "coeffs": [3,')
+		self.createTestObjs()
+		self.assertEqual(1, len(self.testObjA))
+		self.assertEqual(5, self.testObjA.lookup([1,2]))
+
+
+class TestGetWorkflowKeyForObjFunct(unittest.TestCase):
+
+	def setUp(self):
+		self.labelA = labelHelp.StandardLabel(eleKey="Mg", structKey="hcp", methodKey="meth_a")
+		self.labelB = labelHelp.StandardLabel(eleKey="Mg", structKey="fcc", methodKey="meth_a")
+		self.weights = [1,2]
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		objs = [types.SimpleNamespace(label=[self.labelA]), types.SimpleNamespace(label=[self.labelB])]
+		self.objFunctA = types.SimpleNamespace(objs=objs, weights=self.weights)
+
+	def testSameKeyForEquivalentObjFuncts(self):
+		keyA = tCode.getWorkflowKeyForObjFunct(self.objFunctA)
+		self.labelA = labelHelp.StandardLabel(eleKey="Mg", structKey="hcp", methodKey="meth_a")
+		self.createTestObjs()
+		keyB = tCode.getWorkflowKeyForObjFunct(self.objFunctA)
+		self.assertEqual(keyA, keyB)
+
+	def testDiffKeyForDiffWeights(self):
+		keyA = tCode.getWorkflowKeyForObjFunct(self.objFunctA)
+		self.weights = [1,3]
+		self.createTestObjs()
+		keyB = tCode.getWorkflowKeyForObjFunct(self.objFunctA)
+		self.assertNotEqual(keyA, keyB)
+
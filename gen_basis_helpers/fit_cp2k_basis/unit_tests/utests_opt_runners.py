@@ -3,6 +3,8 @@ import types
 import unittest
 import unittest.mock as mock
 
+import numpy as np
+
 import gen_basis_helpers.fit_cp2k_basis.core as coreHelp
 
 import gen_basis_helpers.fit_cp2k_basis.opt_runners as tCode
@@ -41,3 +43,50 @@ class TestBasicOptRunner(unittest.TestCase):
 		self.assertEqual(rawCoeffs, actOutput.transformedCoeffs)
 
 
+class TestBatchedOptRunners(unittest.TestCase):
+
+	def setUp(self):
+		self.minPos = [1.0, -2.0]
+		self.transformerA = lambda x:[a*2 for a in x]
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		coeffUpdater = coreHelp.CoeffUpdaterStandard(transformer=self.transformerA)
+		self.batchedObjFunct = mock.Mock( side_effect=self._evalBatch )
+		self.batchedObjFunct.objFuncts = [ types.SimpleNamespace(coeffUpdater=coeffUpdater) ]
+		self.evalBatches = list()
+
+	#Quadratic with a minimum at self.minPos; also tells the coeffUpdater about the first set of coeffs (as the real objective function would)
+	def _evalBatch(self, coeffsBatch):
+		self.evalBatches.append(coeffsBatch)
+		self.batchedObjFunct.objFuncts[0].coeffUpdater(coeffsBatch[0])
+		return [ sum([(a-b)**2 for a,b in zip(coeffs,self.minPos)]) for coeffs in coeffsBatch ]
+
+	def testFiniteDiffGradExpected_forward(self):
+		coeffs, stepSize = [2.0, 1.0], 1e-6
+		expVal, expGrad = 10.0, [2.0, 6.0]
+		actVal, actGrad = tCode.getObjFunctAndFiniteDiffGradBatched(self.batchedObjFunct, coeffs, stepSize=stepSize)
+		self.assertAlmostEqual(expVal, actVal)
+		self.assertTrue( np.allclose(np.array(expGrad), actGrad, atol=1e-4) )
+		self.assertEqual(1, len(self.evalBatches))
+		self.assertEqual(3, len(self.evalBatches[0]))
+
+	def testFiniteDiffGradExpected_central(self):
+		coeffs = [2.0, 1.0]
+		expGrad = [2.0, 6.0]
+		unused, actGrad = tCode.getObjFunctAndFiniteDiffGradBatched(self.batchedObjFunct, coeffs, stepSize=1e-2, centralDiff=True)
+		self.assertTrue( np.allclose(np.array(expGrad), actGrad) )
+		self.assertEqual(5, len(self.evalBatches[0]))
+
+	def testFiniteDiffGradOptimiserFindsMinimum(self):
+		actOutput = tCode.carryOutOptimisationBatchedFiniteDiffGrads(self.batchedObjFunct, [0,0], stepSize=1e-6)
+		self.assertTrue( np.allclose(np.array(self.minPos), actOutput.optRes.x, atol=1e-3) )
+		self.assertTrue( np.allclose(np.array(self.transformerA(self.minPos)), np.array(actOutput.transformedCoeffs), atol=1e-3) )
+
+	def testDifferentialEvolutionFindsMinimum(self):
+		bounds = [ [-5,5], [-5,5] ]
+		actOutput = tCode.carryOutDifferentialEvolutionBatched(self.batchedObjFunct, bounds, seed=4, popsize=10, polish=False, tol=1e-8)
+		self.assertTrue( np.allclose(np.array(self.minPos), actOutput.optRes.x, atol=1e-2) )
+		self.assertTrue( np.allclose(np.array(self.transformerA(self.minPos)), np.array(actOutput.transformedCoeffs), atol=2e-2) )
+		self.assertTrue( all([len(x)>1 for x in self.evalBatches[:-1]]) ) #Whole populations evaluated at once
+
@@ -1,16 +1,18 @@
 import math
-import copy
-import itertools as it
-import time
+import mmap
+import os
+
+import numpy as np
 
 from ..analyse_md import thermo_data as thermoDataObjs
 from ..analyse_md import traj_core as trajObjHelp
-from concurrent import futures
 
 import multiprocessing
 
 import plato_pylib.shared.ucell_class as uCellHelp
 
+_TIMESTEP_HEADER = b"ITEM: TIMESTEP"
+
 def parseLammpsLogFile(inpPath):
 	fileAsList = _getFileAsListFromInpPath(inpPath)
 
@@ -74,7 +76,7 @@ def _parseThermoSection(fileAsList, lineIdx):
 	return lineIdx, outObj
 
 
-def getTrajectoryFromLammpsDumpFile(inpFile, timeStep=None, typeIdxToEle=None, nCores=1):
+def getTrajectoryFromLammpsDumpFile(inpFile, timeStep=None, typeIdxToEle=None, nCores=1, stride=1):
 	""" Parses the trajectory from a lammps file into a TrajectoryInMemory object. MUST BE ATOMS format
 	
 	Args:
@@ -82,175 +84,126 @@ def getTrajectoryFromLammpsDumpFile(inpFile, timeStep=None, typeIdxToEle=None, n
 		timeStep: (float, Optional) Time for one step. Needed to figure out the simulation time at any trajectory step, default is to just set that value to None
 		typeIdxToEle: (dict) Keys are str versions of integers (e.g. str(4)) while values are the elements those integers correspond to in the dump file
 		nCores: (int) Number of cores to parralelise over
+		stride: (int) Only parse every stride-th frame (starting with the first)
 
 	Returns
 		outTraj: (TrajectoryInMemory obj) Contains trajectory info
+
+	NOTES:
+		The file is memory-mapped and only the byte offsets of each frame are found in the main process; each worker parses its frames directly from the file and sends back numpy arrays
  
 	"""
-	fileAsList = _getFileAsListFromInpPath(inpFile)
-	typeIdxToEleToUse = {int(k):v for k,v in typeIdxToEle.items()} if typeIdxToEle is not None else None
-
-	#Remove any blank lines at the end of fileAsList:
-	nBlankLines = 0
-	for idx,line in enumerate(fileAsList[-1:0]):
-		strippedLine = line.strip()
-		if line=="":
-			break
-		else:
-			nBlankLines += 1
-	fileAsList = fileAsList[:-1-nBlankLines]
-
-	#TEMPORARY: Figure out all the lines containing cartesian co-ordinates and unit-cell params
-	lineIdx = 0 
-	startSectionIndices = list()
-	while lineIdx <len(fileAsList):
-		line = fileAsList[lineIdx]
-		if "ITEM: TIMESTEP" in line:
-			startSectionIndices.append(lineIdx) 
-		lineIdx += 1
-
-	#TEMPORARY: Parse the individual start indices
-	nSteps = len(startSectionIndices)
-	trajStepIndices = [x for x in range(nSteps)]
-	endSectionIndices = [x for x in startSectionIndices[1:]] + [len(fileAsList)]
-	fileSlices = [ copy.deepcopy(fileAsList[sIdx:eIdx]) for sIdx,eIdx in zip(startSectionIndices,endSectionIndices) ]
-	outTrajSteps = [None]*nSteps
-
-	#Parrelel attempt B: Chunk the work into 1/nCore chunks based on the number of fileSlices:
-	chunkSize = int(nSteps/nCores) if nSteps>nCores else 1
+	frameRanges = _getFrameByteRangesFromDumpFile(inpFile)[::stride]
 
 	if nCores==1:
-		outList = list()
-		inpArg = zip(trajStepIndices,fileSlices)
-		output = _parseNSections(inpArg)
-
-		for (idx,val) in output:
-			outTrajSteps[idx] = val
-		outObj = trajObjHelp.TrajectoryInMemory(outTrajSteps)
-
-#	if nCores==1:
-#		outObjs = list()
-#		lineIdx = 1 #Start +1 from the "ITEM: TIMESTEP" part
-#		while lineIdx < len(fileAsList):
-#			lineIdx, currObj = _parseNextSectionDumpFile(fileAsList, lineIdx) #Ends on ITEM:TIMESTEP
-#			outObjs.append(currObj)
-#			lineIdx += 1
-#		outObj = trajObjHelp.TrajectoryInMemory(outObjs)
-
-
-	if nCores>1:
-		print("RUNNING CHUNKSIZE>1 CODE")
-		allInpArgs = zip(trajStepIndices,fileSlices)
-		batchedArgs = _splitIterableIntoBatchesOfSizeN(allInpArgs, chunkSize)
-		outList, tempList = list(), list()
-		with multiprocessing.Pool(nCores) as pool:
-			output = pool.map(_parseNSections,batchedArgs)
-
-		for x in output:
-			outList.extend(x)
-
-		for (idx,val) in outList:
-			outTrajSteps[idx] = val
-		outObj = trajObjHelp.TrajectoryInMemory(outTrajSteps)
-
-	#Put the time on each trajectory step if we know it
-	if timeStep is not None:	
-		for step in outObj:
-			step.time = step.step*timeStep
-
-	if typeIdxToEleToUse is not None:
-		for step in outObj:
-			currCartCoords = step.unitCell.cartCoords
-			for idx,coord in enumerate(currCartCoords):
-				currCartCoords[idx][-1] = typeIdxToEleToUse[ int(currCartCoords[idx][-1]) ]
-			step.unitCell.cartCoords = currCartCoords
-
-	return outObj
-
-
-
-#Function for splitting iterable into batches
-def _splitIterableIntoBatchesOfSizeN(iterable, batchSize, pad=False, fillvalue=None):
-	"grouper(3, 'ABCDEFG', 'x') --> ABC DEF Gxx"
-	args = [iter(iterable)] * batchSize
-	if pad:
-		return it.zip_longest(fillvalue=fillvalue, *args)
+		frameBlocks = _parseFrameBlocksFromByteRanges( (inpFile,frameRanges) )
 	else:
-		return zip(*args)
-
+		chunkSize = math.ceil( len(frameRanges)/nCores ) if len(frameRanges)>0 else 1
+		allInpArgs = [ (inpFile, frameRanges[idx:idx+chunkSize]) for idx in range(0,len(frameRanges),chunkSize) ]
+		with multiprocessing.Pool(nCores) as pool:
+			output = pool.map(_parseFrameBlocksFromByteRanges, allInpArgs)
+		frameBlocks = [x for currBlocks in output for x in currBlocks]
 
-#Function allows each processor to parse multiple-sections, which should be cheaper than constantly switching jobs
-def _parseNSections(allInpArgs):
-	#	stepIdx, fileSlice = allInpArgs
-#	time.sleep(2)
+	outSteps = [_getTrajStepFromFrameBlock(x, timeStep=timeStep, typeIdxToEle=typeIdxToEle) for x in frameBlocks]
+	return trajObjHelp.TrajectoryInMemory(outSteps)
 
 
-	outList = list()
-	for currArgs in allInpArgs:
-		currRes = _parseSingleSection(currArgs)
-		outList.append(currRes)
+def iterTrajStepsFromLammpsDumpFile(inpFile, timeStep=None, typeIdxToEle=None, stride=1):
+	""" Generator yielding TrajStepBase objects from a lammps dump file one at a time; meaning trajectories too large for memory can be analysed. See getTrajectoryFromLammpsDumpFile for the meaning of the arguments
 
-	#Temp: Testing why we dont get a speedup (suspect its largely a memory issue)
-#	for i in range(100*len(outList)):
-#		math.factorial(2000)
+	Yields
+		trajStep: (TrajStepBase) Info for one frame
 
+	"""
+	with open(inpFile,"rb") as f:
+		if os.fstat(f.fileno()).st_size==0:
+			return
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mappedFile:
+			for idx, (startIdx,endIdx) in enumerate(_iterFrameByteRangesFromMappedFile(mappedFile)):
+				if idx%stride != 0:
+					continue
+				frameBlock = _getFrameBlockFromBytes(mappedFile[startIdx:endIdx])
+				yield _getTrajStepFromFrameBlock(frameBlock, timeStep=timeStep, typeIdxToEle=typeIdxToEle)
+
+
+def _getFrameByteRangesFromDumpFile(inpPath):
+	with open(inpPath,"rb") as f:
+		if os.fstat(f.fileno()).st_size==0:
+			return list()
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mappedFile:
+			return [x for x in _iterFrameByteRangesFromMappedFile(mappedFile)]
+
+
+#Yields (startIdx, endIdx) for each frame; each starts at an "ITEM: TIMESTEP" line
+def _iterFrameByteRangesFromMappedFile(mappedFile):
+	startIdx = _findNextFrameStart(mappedFile, 0)
+	while startIdx != -1:
+		nextIdx = _findNextFrameStart(mappedFile, startIdx+1)
+		endIdx = len(mappedFile) if nextIdx==-1 else nextIdx
+		yield startIdx, endIdx
+		startIdx = nextIdx
+
+
+def _findNextFrameStart(mappedFile, startIdx):
+	outIdx = mappedFile.find(_TIMESTEP_HEADER, startIdx)
+	while (outIdx > 0) and (mappedFile[outIdx-1:outIdx] != b"\n"):
+		outIdx = mappedFile.find(_TIMESTEP_HEADER, outIdx+1)
+	return outIdx
 
-	return outList
 
 #Defining outside function scope makes it picklable
-def _parseSingleSection(inpArgs):
-	sIdx, fileSlice = inpArgs
-	lineIdx = 0
-#		outTrajSteps[sIdx] = _getTrajStepFromFileAsListAndLineIdx(fileAsList, lIdx)
-#		outTrajSteps[sIdx] = _getTrajStepFromFileAsListAndLineIdx(fileSlice, 0)
-	outStep =  _getTrajStepFromFileAsListAndLineIdx(fileSlice, 0)
-	return (sIdx, outStep)
-
-
-
-
-
-def _parseNextSectionDumpFile(fileAsList, lineIdx):
-	stepNumber = int(fileAsList[lineIdx].strip())
-	while lineIdx<len(fileAsList):
-		line = fileAsList[lineIdx]
+def _parseFrameBlocksFromByteRanges(inpArgs):
+	inpPath, frameRanges = inpArgs
+	if len(frameRanges)==0:
+		return list()
+	with open(inpPath,"rb") as f:
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mappedFile:
+			return [_getFrameBlockFromBytes(mappedFile[sIdx:eIdx]) for sIdx,eIdx in frameRanges]
+
+
+#Returns (step, lattVects, xyz, atomTypes); xyz is an nAtoms x 3 array and atomTypes a list of str, both sorted by atom id
+def _getFrameBlockFromBytes(frameBytes):
+	atomsIdx = frameBytes.find(b"ITEM: ATOMS")
+	if atomsIdx == -1:
+		raise ValueError("No ITEM: ATOMS section found in dump file frame")
+	atomsEndLineIdx = frameBytes.find(b"\n", atomsIdx)
+	atomsEndLineIdx = len(frameBytes) if atomsEndLineIdx==-1 else atomsEndLineIdx
+
+	headerLines = frameBytes[:atomsIdx].decode().split("\n")
+	step, nAtoms, lattVects = None, None, None
+	for lineIdx,line in enumerate(headerLines):
 		if "ITEM: TIMESTEP" in line:
-			break
+			step = int( headerLines[lineIdx+1].strip() )
+		elif "ITEM: NUMBER OF ATOMS" in line:
+			nAtoms = int( headerLines[lineIdx+1].strip() )
 		elif "ITEM: BOX" in line:
-			outCell = _getEmptyCellFromBoxSectionOfDumpFile(fileAsList, lineIdx)
-			lineIdx += 1
-		elif "ITEM: ATOMS" in line:
-			lineIdx, cartCoords = _getCartCoordsFromDumpSection(fileAsList, lineIdx+1)
-		else:
-			lineIdx += 1
+			lattVects = _getLattVectsFromBoxSectionOfDumpFile(headerLines, lineIdx)
 
-	outCell.cartCoords = cartCoords
-	trajStepObj = trajObjHelp.TrajStepBase(unitCell=outCell, step=stepNumber)
+	atomTokens = frameBytes[atomsEndLineIdx:].split()
+	if (nAtoms is None) or (nAtoms==0) or (len(atomTokens)%nAtoms != 0):
+		raise ValueError("Cant split {} values in ITEM: ATOMS section between {} atoms".format(len(atomTokens), nAtoms))
+	atomVals = np.array(atomTokens).reshape(nAtoms,-1)
 
+	sortIndices = np.argsort( atomVals[:,0].astype(int), kind="stable" )
+	xyz = atomVals[:,-3:][sortIndices].astype(float)
+	atomTypes = [x.decode() for x in atomVals[:,1][sortIndices]]
 
-	return lineIdx,trajStepObj
+	return step, lattVects, xyz, atomTypes
 
-def _getTrajStepFromFileAsListAndLineIdx(fileAsList, lineIdx):
-	lineIdx += 1 #input is the line containing "ITEM: TIMESTEP". Whereas we want the line one after that
-	stepNumber = int(fileAsList[lineIdx].strip())
-	while lineIdx<len(fileAsList):
-		line = fileAsList[lineIdx]
-		if "ITEM: TIMESTEP" in line:
-			break
-		elif "ITEM: BOX" in line:
-			outCell = _getEmptyCellFromBoxSectionOfDumpFile(fileAsList, lineIdx)
-			lineIdx += 1
-		elif "ITEM: ATOMS" in line:
-			lineIdx, cartCoords = _getCartCoordsFromDumpSection(fileAsList, lineIdx+1)
-		else:
-			lineIdx += 1
 
-	outCell.cartCoords = cartCoords
-	trajStepObj = trajObjHelp.TrajStepBase(unitCell=outCell, step=stepNumber)
-	return trajStepObj
+def _getTrajStepFromFrameBlock(frameBlock, timeStep=None, typeIdxToEle=None):
+	step, lattVects, xyz, atomTypes = frameBlock
+	if typeIdxToEle is not None:
+		typeIdxToEleToUse = {int(k):v for k,v in typeIdxToEle.items()}
+		atomTypes = [typeIdxToEleToUse[int(x)] for x in atomTypes]
+
+	outCell = uCellHelp.UnitCell.fromLattVects(lattVects)
+	outCell.cartCoords = [coords + [atomType] for coords,atomType in zip(xyz.tolist(), atomTypes)]
+	time = None if timeStep is None else step*timeStep
+	return trajObjHelp.TrajStepBase(unitCell=outCell, step=step, time=time)
 
 
-def _getEmptyCellFromBoxSectionOfDumpFile(fileAsList, lineIdx):
+def _getLattVectsFromBoxSectionOfDumpFile(fileAsList, lineIdx):
 	if len(fileAsList[lineIdx].split()) != 9:
 		raise ValueError("Seems like current file is not triclinic; cant parse orthogonal cells at the moment")
 
@@ -269,30 +222,7 @@ def _getEmptyCellFromBoxSectionOfDumpFile(fileAsList, lineIdx):
 	             [xy     , yHi-yLo, 0      ],
 	             [xz     , yz     , zHi-zLo] ]
 
-	return uCellHelp.UnitCell.fromLattVects(outVects)
-
-def _getCartCoordsFromDumpSection(fileAsList, lineIdx):
-	#1) Get the full cart-coords assuming they are ordered by atomId
-	cartCoords, atomIds = list(), list()
-	while lineIdx<len(fileAsList):
-		if "ITEM" in fileAsList[lineIdx]:
-			break
-
-		splitLine = fileAsList[lineIdx].strip().split()
-		atomIds.append( int(splitLine[0]) )
-		eleVal = str( splitLine[1] )
-		currXyz = [float(x) for x in splitLine[-3:]]
-		currCoords = currXyz + [eleVal]
-		cartCoords.append(currCoords)
-		lineIdx += 1
-
-	#2) Get output coordinates by 
-	outCartCoords = [list() for x in cartCoords]
-	for inpIdx,currId in enumerate(atomIds):
-		outCartCoords[currId-1] = cartCoords[inpIdx]
-
-	lineIdx -= 1
-	return lineIdx, outCartCoords
+	return outVects
 
 def _getFileAsListFromInpPath(inpPath):
 	with open(inpPath,"rt") as f:
@@ -1,7 +1,9 @@
 
+import os
+import shutil
+import tempfile
 import plato_pylib.shared.ucell_class as uCellHelp
 import unittest
-import unittest.mock as mock
 
 import gen_basis_helpers.analyse_md.traj_core as trajObjHelp
 import gen_basis_helpers.lammps_interface.lammps_parsers as tCode
@@ -9,39 +11,68 @@ import gen_basis_helpers.lammps_interface.lammps_parsers as tCode
 class TestParseLammpsDumpFile(unittest.TestCase):
 
 	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.dumpPath = os.path.join(self.workFolder, "dump.lammpstrj")
 		self.timeStep = None
 		self.typeIdxToEle = None
 		self.createTestObjs()
 
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
 	def createTestObjs(self):
-		self.dumpFileAsListA = _loadSmallFullFileStrA().split("\n")
+		with open(self.dumpPath,"wt") as f:
+			f.write( _loadSmallFullFileStrA() )
 		self._loadExpectedObjsForFullStrA()
 
-	@mock.patch("gen_basis_helpers.lammps_interface.lammps_parsers._getFileAsListFromInpPath")
-	def testExpectedTrajA(self, mockGetFileAsList):
-		mockGetFileAsList.side_effect = lambda *args: self.dumpFileAsListA
-		actTrajObj = tCode.getTrajectoryFromLammpsDumpFile("fake_file_path")
+	def testExpectedTrajA(self):
+		actTrajObj = tCode.getTrajectoryFromLammpsDumpFile(self.dumpPath)
 		expTrajObj = self.expTrajObjA
 		self.assertEqual(expTrajObj,actTrajObj)
 
-	@mock.patch("gen_basis_helpers.lammps_interface.lammps_parsers._getFileAsListFromInpPath")
-	def testExpectedTrajA_withTimeSteps(self, mockGetFileAsList):
+	def testExpectedTrajA_withTimeSteps(self):
 		self.timeStep = 1
 		self.createTestObjs()
-		mockGetFileAsList.side_effect = lambda *args: self.dumpFileAsListA
-		actTrajObj = tCode.getTrajectoryFromLammpsDumpFile("fake_file_path", timeStep=self.timeStep, nCores=2)
+		actTrajObj = tCode.getTrajectoryFromLammpsDumpFile(self.dumpPath, timeStep=self.timeStep, nCores=2)
 		expTrajObj = self.expTrajObjA
 		self.assertEqual(expTrajObj, actTrajObj)
 
-	@mock.patch("gen_basis_helpers.lammps_interface.lammps_parsers._getFileAsListFromInpPath")
-	def testExpectedTrajA_withEleKeys(self, mockedGetFileAsList):
+	def testExpectedTrajA_withEleKeys(self):
 		self.typeIdxToEle = { "1":"Mg", "2": "O"}
 		self.createTestObjs()
-		mockedGetFileAsList.side_effect = lambda *args: self.dumpFileAsListA
-		actTrajObj = tCode.getTrajectoryFromLammpsDumpFile("fake_file_path", typeIdxToEle=self.typeIdxToEle)
+		actTrajObj = tCode.getTrajectoryFromLammpsDumpFile(self.dumpPath, typeIdxToEle=self.typeIdxToEle)
 		expTrajObj = self.expTrajObjA
 		self.assertEqual(expTrajObj, actTrajObj)
-	
+
+	def testExpectedTrajA_atomsOutOfOrder(self):
+		fileAsList = _loadSmallFullFileStrA().split("\n")
+		fileAsList[9], fileAsList[12] = fileAsList[12], fileAsList[9]
+		with open(self.dumpPath,"wt") as f:
+			f.write( "\n".join(fileAsList) )
+		actTrajObj = tCode.getTrajectoryFromLammpsDumpFile(self.dumpPath)
+		self.assertEqual(self.expTrajObjA, actTrajObj)
+
+	def testExpectedTrajA_withStride(self):
+		actTrajObj = tCode.getTrajectoryFromLammpsDumpFile(self.dumpPath, stride=2, nCores=2)
+		expTrajObj = trajObjHelp.TrajectoryInMemory([self.trajStepA])
+		self.assertEqual(expTrajObj, actTrajObj)
+
+	def testIterTrajStepsMatchesFullTraj(self):
+		self.timeStep, self.typeIdxToEle = 2, { "1":"Mg", "2": "O"}
+		self.createTestObjs()
+		actSteps = [x for x in tCode.iterTrajStepsFromLammpsDumpFile(self.dumpPath, timeStep=self.timeStep, typeIdxToEle=self.typeIdxToEle)]
+		self.assertEqual(self.expTrajObjA, trajObjHelp.TrajectoryInMemory(actSteps))
+
+	def testIterTrajStepsWithStride(self):
+		actSteps = [x for x in tCode.iterTrajStepsFromLammpsDumpFile(self.dumpPath, stride=2)]
+		self.assertEqual([self.trajStepA], actSteps)
+
+	def testEmptyFileGivesEmptyTraj(self):
+		with open(self.dumpPath,"wt") as f:
+			f.write("")
+		self.assertEqual(0, len(tCode.getTrajectoryFromLammpsDumpFile(self.dumpPath).trajSteps))
+		self.assertEqual(list(), [x for x in tCode.iterTrajStepsFromLammpsDumpFile(self.dumpPath)])
+
 	def _loadExpectedObjsForFullStrA(self):
 		lattVectsBoth = [ [9.63    , 0      , 0       ],
 		                  [-4.81018, 8.33982, 0       ],
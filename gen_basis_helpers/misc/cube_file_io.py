@@ -0,0 +1,318 @@
+""" Streaming reader for gaussian cube files (e.g. CP2K electron densities). The volumetric data is parsed in chunks straight into numpy arrays (optionally a memory-mapped .npy sidecar written on first read), and reductions such as planar averages can be calculated in a single pass without holding the full grid in memory """
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from ..shared import parse_cache as parseCacheHelp
+
+
+SIDECAR_EXT = ".grid.npy"
+SIDECAR_META_EXT = ".grid.json"
+_DEFAULT_MAX_CHUNK_VALS = 2**22
+
+
+def parseCubeFile(inpPath, dtype=np.float64, useSidecar=False):
+	""" Parses a cube file into a dictionary with the data grid as a numpy array
+
+	Args:
+		inpPath: (str) Path to the cube file
+		dtype: (numpy dtype) Type used for the data grid; np.float32 halves the memory needed
+		useSidecar: (Bool) If True the data grid is a read-only memory-map of a .npy sidecar file (written next to inpPath on first read; re-written if the cube file changes)
+
+	Returns
+		outDict: (dict) Header keys from readCubeFileHeader plus "data_grid" (n_x x n_y x n_z array; with an extra final dimension if there are multiple values per point)
+
+	"""
+	outDict = readCubeFileHeader(inpPath)
+	outDict["data_grid"] = getCubeDataArrayFromFile(inpPath, dtype=dtype, useSidecar=useSidecar)
+	return outDict
+
+
+def readCubeFileHeader(inpPath):
+	""" Reads only the header (everything before the volumetric data) of a cube file
+
+	Args:
+		inpPath: (str) Path to the cube file
+
+	Returns
+		outDict: (dict) Keys are "comments" (first 2 lines), "origin", "n_x"/"n_y"/"n_z", "step_x"/"step_y"/"step_z", "atomic_numbers", "atomic_charges", "atomic_coords", "n_vals_per_point" and "data_offset" (byte offset of the volumetric data)
+
+	NOTES:
+		Values are as in the file; lengths are normally bohr (a negative number of points in the file means angstrom, but only the absolute value is stored here)
+
+	"""
+	with open(inpPath, "rb") as f:
+		comments = [f.readline().decode().rstrip("\n") for x in range(2)]
+		atomLine = f.readline().split()
+		nAtoms, origin = int(atomLine[0]), [float(x) for x in atomLine[1:4]]
+		nValsPerPoint = int(atomLine[4]) if len(atomLine)>4 else 1
+
+		outDict = {"comments":comments, "origin":origin}
+		for label in ["x","y","z"]:
+			currLine = f.readline().split()
+			outDict["n_"+label] = abs(int(currLine[0]))
+			outDict["step_"+label] = [float(x) for x in currLine[1:4]]
+
+		atomicNumbers, atomicCharges, atomicCoords = list(), list(), list()
+		for unused in range(abs(nAtoms)):
+			currLine = f.readline().split()
+			atomicNumbers.append( int(currLine[0]) )
+			atomicCharges.append( float(currLine[1]) )
+			atomicCoords.append( [float(x) for x in currLine[2:5]] )
+
+		#Negative number of atoms means an extra line giving the number of values (e.g. orbitals) at each point
+		if nAtoms < 0:
+			nValsPerPoint = int(f.readline().split()[0])
+
+		outDict.update( {"atomic_numbers":atomicNumbers, "atomic_charges":atomicCharges, "atomic_coords":atomicCoords} )
+		outDict["n_vals_per_point"] = nValsPerPoint
+		outDict["data_offset"] = f.tell()
+
+	return outDict
+
+
+def getCubeDataArrayFromFile(inpPath, dtype=np.float64, useSidecar=False, header=None):
+	""" Gets the volumetric data from a cube file as a numpy array. Data is parsed in chunks into a preallocated array, so peak memory is roughly the size of the output
+
+	Args:
+		inpPath: (str) Path to the cube file
+		dtype: (numpy dtype) Type of the output array
+		useSidecar: (Bool) If True return a read-only memory-map of a .npy sidecar file (written on first read; re-written if the cube file changes)
+		header: (Optional, dict) Output of readCubeFileHeader; read from the file if not passed
+
+	Returns
+		outArray: (n_x x n_y x n_z np array) Extra final dimension if there are multiple values per point
+
+	"""
+	header = readCubeFileHeader(inpPath) if header is None else header
+	if useSidecar:
+		return _getSidecarMemmap(inpPath, header, dtype)
+
+	outArray = np.empty( _getGridShape(header), dtype=dtype )
+	_streamCubeDataIntoArray(inpPath, header, outArray)
+	return outArray
+
+
+def iterCubeDataSlices(inpPath, dtype=np.float64, maxChunkVals=_DEFAULT_MAX_CHUNK_VALS, useSidecar=False, header=None):
+	""" Iterates over the volumetric data in a cube file in blocks of consecutive slices along the first grid vector (the slowest varying index in the file)
+
+	Args:
+		inpPath: (str) Path to the cube file
+		dtype: (numpy dtype) Type of the yielded arrays
+		maxChunkVals: (int) Approximate maximum number of values in each block (at least one slice is always yielded)
+		useSidecar: (Bool) If True read slices from the memory-mapped sidecar file (creating it if needed) rather than parsing text
+		header: (Optional, dict) Output of readCubeFileHeader
+
+	Yields
+		startIdx: (int) Index (along the first grid vector) of the first slice in the block
+		block: (nSlices x n_y x n_z np array) Extra final dimension if there are multiple values per point
+
+	"""
+	header = readCubeFileHeader(inpPath) if header is None else header
+	gridShape = _getGridShape(header)
+	valsPerSlice = int(np.prod(gridShape[1:]))
+	nSlicesPerChunk = max(1, maxChunkVals//valsPerSlice)
+
+	if useSidecar:
+		dataArray = _getSidecarMemmap(inpPath, header, dtype)
+		for startIdx in range(0, gridShape[0], nSlicesPerChunk):
+			yield startIdx, np.asarray(dataArray[startIdx:startIdx+nSlicesPerChunk])
+		return
+
+	with open(inpPath, "rb") as f:
+		f.seek(header["data_offset"])
+		for startIdx in range(0, gridShape[0], nSlicesPerChunk):
+			nSlices = min(nSlicesPerChunk, gridShape[0]-startIdx)
+			currVals = _readValsFromFileObj(f, nSlices*valsPerSlice, inpPath)
+			yield startIdx, currVals.astype(dtype, copy=False).reshape( (nSlices,) + gridShape[1:] )
+
+
+def applyReducersToCubeFile(inpPath, reducers, dtype=np.float64, maxChunkVals=_DEFAULT_MAX_CHUNK_VALS, useSidecar=False):
+	""" Calculates reductions (e.g. planar averages) of the volumetric data in a cube file in a single pass, without holding the full grid in memory
+
+	Args:
+		inpPath: (str) Path to the cube file
+		reducers: (iter of reducer objects) e.g. CubePlanarAverage; each needs reset(header), update(startIdx, block) and getResult() methods
+		dtype: (numpy dtype) Type used for the data blocks
+		maxChunkVals: (int) Approximate maximum number of values held in memory at once
+		useSidecar: (Bool) If True read from the memory-mapped sidecar file (see iterCubeDataSlices)
+
+	Returns
+		outVals: (list) getResult() for each reducer
+
+	"""
+	header = readCubeFileHeader(inpPath)
+	for reducer in reducers:
+		reducer.reset(header)
+
+	for startIdx, block in iterCubeDataSlices(inpPath, dtype=dtype, maxChunkVals=maxChunkVals, useSidecar=useSidecar, header=header):
+		for reducer in reducers:
+			reducer.update(startIdx, block)
+
+	return [reducer.getResult() for reducer in reducers]
+
+
+class CubePlanarAverage():
+	""" Reducer giving the average value over each plane perpendicular to one grid index (e.g. axis=2 gives the density as a function of height for CP2K cubes of surfaces)
+
+	"""
+	def __init__(self, axis=2):
+		""" Initializer
+
+		Args:
+			axis: (int) The grid index (0,1,2) the averages are a function of
+
+		"""
+		self.axis = axis
+
+	def reset(self, header):
+		gridShape = _getGridShape(header)
+		self._sums = np.zeros( (gridShape[self.axis],) + gridShape[3:] )
+		self._nPerPlane = int(np.prod(gridShape[:3])) // gridShape[self.axis]
+
+	def update(self, startIdx, block):
+		sumAxes = tuple( [idx for idx in range(3) if idx!=self.axis] )
+		if self.axis == 0:
+			self._sums[startIdx:startIdx+len(block)] += np.sum(block, axis=sumAxes, dtype=np.float64)
+		else:
+			self._sums += np.sum(block, axis=sumAxes, dtype=np.float64)
+
+	def getResult(self):
+		""" Returns len-n array of planar averages (with an extra final dimension if there are multiple values per point) """
+		return self._sums / self._nPerPlane
+
+
+class CubeLineProfile():
+	""" Reducer giving the values along a line parallel to one grid vector (i.e. two grid indices fixed)
+
+	"""
+	def __init__(self, axis, fixedIndices):
+		""" Initializer
+
+		Args:
+			axis: (int) The grid index (0,1,2) which varies along the line
+			fixedIndices: (len-2 int iter) Values of the other two grid indices (in order)
+
+		"""
+		self.axis = axis
+		self.fixedIndices = list(fixedIndices)
+
+	def reset(self, header):
+		gridShape = _getGridShape(header)
+		self._vals = np.full( (gridShape[self.axis],) + gridShape[3:], np.nan )
+
+	def update(self, startIdx, block):
+		otherAxes = [idx for idx in range(3) if idx!=self.axis]
+		blockIndices = [slice(None), slice(None), slice(None)]
+		for axis, idx in zip(otherAxes, self.fixedIndices):
+			blockIndices[axis] = idx
+
+		if self.axis == 0:
+			self._vals[startIdx:startIdx+len(block)] = block[tuple(blockIndices)]
+		elif startIdx <= self.fixedIndices[0] < startIdx+len(block):
+			blockIndices[0] = self.fixedIndices[0] - startIdx
+			self._vals[:] = block[tuple(blockIndices)]
+
+	def getResult(self):
+		""" Returns len-n array of values along the line """
+		return self._vals
+
+
+class CubeSlabIntegral():
+	""" Reducer giving the integral of the data over a slab of voxels (between two values of one grid index); e.g. the number of electrons in a region of a CP2K electron density cube
+
+	"""
+	def __init__(self, axis=2, startIdx=0, endIdx=None):
+		""" Initializer
+
+		Args:
+			axis: (int) The grid index (0,1,2) used to define the slab
+			startIdx: (int) First index in the slab
+			endIdx: (Optional, int) Index one past the end of the slab (i.e. python slice convention). Default is the end of the grid
+
+		"""
+		self.axis = axis
+		self.startIdx = startIdx
+		self.endIdx = endIdx
+
+	def reset(self, header):
+		gridShape = _getGridShape(header)
+		self._voxelVolume = abs( np.linalg.det( np.array([header[key] for key in ["step_x","step_y","step_z"]]) ) )
+		self._total = np.zeros( gridShape[3:] )
+
+	def update(self, startIdx, block):
+		blockIndices = [slice(None), slice(None), slice(None)]
+		if self.axis == 0:
+			blockIndices[0] = slice( max(self.startIdx-startIdx,0), None if self.endIdx is None else max(self.endIdx-startIdx,0) )
+		else:
+			blockIndices[self.axis] = slice(self.startIdx, self.endIdx)
+		self._total += np.sum(block[tuple(blockIndices)], axis=(0,1,2), dtype=np.float64)
+
+	def getResult(self):
+		""" Returns the integral (float, or array if there are multiple values per point) """
+		return self._total*self._voxelVolume if self._total.ndim>0 else float(self._total*self._voxelVolume)
+
+
+def _getGridShape(header):
+	gridShape = tuple( [header[key] for key in ["n_x","n_y","n_z"]] )
+	return gridShape if header["n_vals_per_point"]==1 else gridShape + (header["n_vals_per_point"],)
+
+
+def _streamCubeDataIntoArray(inpPath, header, outArray, maxChunkVals=_DEFAULT_MAX_CHUNK_VALS):
+	flatOut = outArray.reshape(-1)
+	with open(inpPath, "rb") as f:
+		f.seek(header["data_offset"])
+		for startIdx in range(0, len(flatOut), maxChunkVals):
+			nVals = min(maxChunkVals, len(flatOut)-startIdx)
+			flatOut[startIdx:startIdx+nVals] = _readValsFromFileObj(f, nVals, inpPath)
+
+
+#np.fromfile parses whitespace separated text in C and leaves the file positioned after the last value read
+def _readValsFromFileObj(fileObj, nVals, inpPath):
+	outVals = np.fromfile(fileObj, dtype=np.float64, count=nVals, sep=" ")
+	if len(outVals) != nVals:
+		raise ValueError("Expected {} more values in {}; found {}".format(nVals, inpPath, len(outVals)))
+	return outVals
+
+
+def _getSidecarMemmap(inpPath, header, dtype):
+	dataPath, metaPath = inpPath + SIDECAR_EXT, inpPath + SIDECAR_META_EXT
+	fingerprints = parseCacheHelp.getFileFingerprints([inpPath], hashFiles=False)
+	expMeta = {"fingerprints":fingerprints, "dtype":np.dtype(dtype).str}
+
+	try:
+		with open(metaPath, "rt") as f:
+			isValid = json.load(f) == json.loads(json.dumps(expMeta))
+	except (OSError, ValueError):
+		isValid = False
+
+	if (not isValid) or (not os.path.exists(dataPath)):
+		_writeSidecarFiles(inpPath, header, dtype, dataPath, metaPath, expMeta)
+
+	return np.load(dataPath, mmap_mode="r")
+
+
+#Both files are written to temporary paths then renamed; so other processes never see partially written files
+def _writeSidecarFiles(inpPath, header, dtype, dataPath, metaPath, metaDict):
+	folder = os.path.split( os.path.abspath(dataPath) )[0]
+	fileDescriptor, tempPath = tempfile.mkstemp(dir=folder, prefix=".tmp_", suffix=SIDECAR_EXT)
+	os.close(fileDescriptor)
+	try:
+		outArray = np.lib.format.open_memmap(tempPath, mode="w+", dtype=dtype, shape=_getGridShape(header))
+		_streamCubeDataIntoArray(inpPath, header, outArray)
+		outArray.flush()
+		del outArray
+		os.replace(tempPath, dataPath)
+	except BaseException:
+		if os.path.exists(tempPath):
+			os.remove(tempPath)
+		raise
+
+	fileDescriptor, tempPath = tempfile.mkstemp(dir=folder, prefix=".tmp_", suffix=SIDECAR_META_EXT)
+	with os.fdopen(fileDescriptor, "wt") as f:
+		json.dump(metaDict, f)
+	os.replace(tempPath, metaPath)
+
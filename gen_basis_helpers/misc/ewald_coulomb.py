@@ -0,0 +1,363 @@
+""" Array-based Coulomb interactions between point or (spherical Gaussian) smeared charges. Periodic images are included with Ewald summation, and interaction energies between two groups of atoms can be calculated for every frame in a trajectory """
+
+import math
+
+import numpy as np
+import scipy.special
+import MDAnalysis.lib.distances as distLib
+
+from ..analyse_md import mdanalysis_interface as mdAnalysisInter
+
+
+def getEwaldInteractionMatrix(inpGeom, charges, indicesA, indicesB, exponents=None, distLenConv=1, accuracy=1e-8, realSpaceCutoff=None):
+	""" Gets the matrix of periodic (Ewald summed) Coulomb interactions between atoms in indicesA and indicesB. Results are in atomic-style units (e^2 per unit length); so Hartree if distances (after applying distLenConv) are in bohr
+
+	Args:
+		inpGeom: (plato_pylib UnitCell object) Contains the geometry
+		charges: (iter of floats) Charges for ALL atoms in the geometry. Units should be elementary charge
+		indicesA: (iter of ints) Indices for the first dimension of the matrix
+		indicesB: (iter of ints) Indices for the second dimension of the matrix
+		exponents: (Optional, iter of floats) Exponents for ALL atoms; charge distributions are (exponent/pi)^{3/2} * e^{-exponent*r^2}. Units are 1/length^2 (length AFTER applying distLenConv). Default of None means point charges
+		distLenConv: (float) We multiply all distances by this value. If input geometry is in angstrom this should usually be set to the angstrom->bohr conversion
+		accuracy: (float) Approximate relative accuracy of the Ewald sum. Used to set the splitting parameter and cutoffs
+		realSpaceCutoff: (Optional, float) Cutoff for the real-space part of the Ewald sum (same units as scaled distances). Default is half the smallest perpendicular width of the cell
+
+	Returns
+		outMatrix: (len(indicesA) x len(indicesB) np array) Interaction energies. Entries where both indices refer to the same atom contain its interaction with its own periodic images (for point charges the interaction with the charge itself is excluded; for smeared charges the interaction of the Gaussian with itself is excluded)
+
+	NOTES:
+		a) The k=0 term is omitted (equivalent to adding a neutralising background); so the total energy from the matrix is only physically meaningful for neutral cells. Group-group interactions are still well defined if the cell is neutral overall
+		b) Pairs of different point charges on top of each other give infinite interaction energies
+
+	"""
+	coordsA, coordsB, lattVects = _getScaledCoordArraysAndLattVects(inpGeom, indicesA, indicesB, distLenConv)
+	gammas = None if exponents is None else getSmearedPairGammas(exponents, indicesA, indicesB)
+	potentials = EwaldPairPotentials(lattVects, accuracy=accuracy, realSpaceCutoff=realSpaceCutoff, minGamma=_getMinGamma(gammas))
+	potMatrix = potentials.getPotentialMatrix(coordsA, coordsB, gammas=gammas, sameAtom=_getSameAtomMatrix(indicesA, indicesB))
+	return _getChargeProductMatrix(charges, indicesA, indicesB)*potMatrix
+
+
+def getEwaldInteractionEnergy(inpGeom, charges, indicesA, indicesB, exponents=None, distLenConv=1, eConv=1, accuracy=1e-8, realSpaceCutoff=None):
+	""" Gets the periodic (Ewald summed) Coulomb interaction energy between atoms in indicesA and indicesB. See getEwaldInteractionMatrix for details of most arguments
+
+	Args:
+		eConv: (float) We multiply the energy by this. Default units are e^2 per unit length (i.e. Hartree if scaled distances are in bohr)
+
+	Returns
+		outEnergy: (float) The interaction energy between atoms in indicesA and indicesB. Pairs present in both orders (e.g. if indicesA and indicesB are the same) are only counted once
+
+	"""
+	args = [inpGeom, charges, indicesA, indicesB]
+	kwargs = {"exponents":exponents, "distLenConv":distLenConv, "accuracy":accuracy, "realSpaceCutoff":realSpaceCutoff}
+	interMatrix = getEwaldInteractionMatrix(*args, **kwargs)
+	return eConv*getGroupEnergyFromInteractionMatrix(interMatrix, indicesA, indicesB)
+
+
+def getGroupInteractionEnergiesOverTraj(inpTraj, charges, indicesA, indicesB, exponents=None, distLenConv=1, coulombConst=1, ewaldSum=True, accuracy=1e-8, realSpaceCutoff=None):
+	""" Gets the Coulomb interaction energy between atoms in indicesA and indicesB for every frame in a trajectory. Ewald set-up (k-vectors and real-space image shifts) is only redone when the cell changes
+
+	Args:
+		inpTraj: (TrajectoryBase object) Contains the geometries
+		charges: (iter of floats, or nFrames x nAtoms array) Charges for ALL atoms; either fixed or for each frame
+		indicesA: (iter of ints) Indices for the first group
+		indicesB: (iter of ints) Indices for the second group
+		exponents: (Optional, iter of floats) Exponents of Gaussian charge distributions for ALL atoms (see getEwaldInteractionMatrix). Default of None means point charges
+		distLenConv: (float) We multiply all distances by this value
+		coulombConst: (float) Coulombs constant in the units wanted; we multiply all energies by this. e.g. 1 for Hartree with distances in bohr, ~14.3996 for eV with distances in angstrom
+		ewaldSum: (Bool) If True use Ewald summation; if False use the minimum image convention
+		accuracy: (float) Approximate relative accuracy of the Ewald sum
+		realSpaceCutoff: (Optional, float) Cutoff for the real-space part of the Ewald sum (see getEwaldInteractionMatrix)
+
+	Returns
+		outEnergies: (len-nFrames np array) Interaction energy between the groups for each frame. Pairs present in both orders are only counted once
+
+	"""
+	indicesA, indicesB = list(indicesA), list(indicesB)
+	gammas = None if exponents is None else getSmearedPairGammas(exponents, indicesA, indicesB)
+	sameAtom = _getSameAtomMatrix(indicesA, indicesB)
+	weights = _getPairWeightsMatrix(indicesA, indicesB)
+	inBothA, inBothB = np.isin(indicesA, indicesB), np.isin(indicesB, indicesA)
+	chargesArray = np.array(charges, dtype=np.float64)
+
+	outEnergies, potentials = list(), None
+	for frameIdx, trajStep in enumerate(inpTraj):
+		inpGeom = trajStep.unitCell
+		coordsA, coordsB, lattVects = _getScaledCoordArraysAndLattVects(inpGeom, indicesA, indicesB, distLenConv)
+		currCharges = chargesArray[frameIdx] if chargesArray.ndim==2 else chargesArray
+		chargesA, chargesB = currCharges[indicesA], currCharges[indicesB]
+
+		if ewaldSum:
+			if (potentials is None) or (not np.array_equal(potentials.lattVects, lattVects)):
+				potentials = EwaldPairPotentials(lattVects, accuracy=accuracy, realSpaceCutoff=realSpaceCutoff, minGamma=_getMinGamma(gammas))
+			currKwargs = {"gammas":gammas, "sameAtom":sameAtom, "inBothA":inBothA, "inBothB":inBothB}
+			outEnergies.append( potentials.getGroupInteractionEnergy(coordsA, coordsB, chargesA, chargesB, **currKwargs) )
+		else:
+			dims = mdAnalysisInter.getMDAnalysisDimsFromUCellObj(inpGeom, dtype=np.float64)
+			dims[:3] *= distLenConv
+			potMatrix = getMinImagePotentialMatrix(coordsA, coordsB, dims, gammas=gammas)
+			outEnergies.append( _getWeightedSumOfFiniteVals(weights, np.outer(chargesA, chargesB)*potMatrix) )
+
+	return coulombConst*np.array(outEnergies)
+
+
+def getGroupEnergyFromInteractionMatrix(interMatrix, indicesA, indicesB):
+	""" Sums an interaction matrix to get the energy between groups. Pairs present in both orders (i.e. [idxA,idxB] and [idxB,idxA]) are weighted by 0.5 so they are only counted once, and non-finite values (e.g. nan/inf from an atom interacting with itself) are ignored
+
+	Args:
+		interMatrix: (len(indicesA) x len(indicesB) array) Pairwise interaction energies
+		indicesA: (iter of ints) Atom indices for the first dimension of interMatrix
+		indicesB: (iter of ints) Atom indices for the second dimension of interMatrix
+
+	Returns
+		outEnergy: (float) The summed interaction energy
+
+	"""
+	if (len(indicesA)==0) or (len(indicesB)==0):
+		return 0
+	return _getWeightedSumOfFiniteVals( _getPairWeightsMatrix(indicesA, indicesB), np.array(interMatrix, dtype=np.float64) )
+
+
+def getMinImagePotentialMatrix(coordsA, coordsB, dims, gammas=None, minDist=1e-9):
+	""" Gets the Coulomb potential (per unit charge product) between two sets of co-ordinates using the minimum image convention
+
+	Args:
+		coordsA: (nA x 3 array)
+		coordsB: (nB x 3 array)
+		dims: (len-6 iter) MDAnalysis style box dimensions
+		gammas: (Optional, nA x nB array) Smearing parameters from getSmearedPairGammas. Default of None means point charges
+		minDist: (float) Pairs closer than this are treated as the same atom; values are inf for point charges and nan for smeared charges (matching the non-array functions)
+
+	Returns
+		potMatrix: (nA x nB np array) 1/r for point charges, erf(gamma*r)/r for smeared charges
+
+	"""
+	dists = distLib.distance_array( np.array(coordsA, dtype=np.float64), np.array(coordsB, dtype=np.float64), box=dims )
+	with np.errstate(divide="ignore", invalid="ignore"):
+		if gammas is None:
+			return np.where(dists<minDist, np.inf, 1/dists)
+		return np.where(dists<minDist, np.nan, scipy.special.erf(gammas*dists)/dists)
+
+
+def getSmearedPairGammas(exponents, indicesA, indicesB):
+	""" Gets sqrt( (alphaA*alphaB)/(alphaA+alphaB) ) for each pair; the interaction between two Gaussian charge distributions separated by r is then erf(gamma*r)/r
+
+	Args:
+		exponents: (iter of floats) Exponents for ALL atoms
+		indicesA: (iter of ints)
+		indicesB: (iter of ints)
+
+	Returns
+		gammas: (len(indicesA) x len(indicesB) np array)
+
+	"""
+	exponents = np.array(exponents, dtype=np.float64)
+	expA, expB = exponents[list(indicesA)][:,np.newaxis], exponents[list(indicesB)][np.newaxis,:]
+	return np.sqrt( (expA*expB) / (expA+expB) )
+
+
+class EwaldPairPotentials():
+	""" Calculates Ewald-summed Coulomb potentials (per unit charge product) between atoms in a fixed periodic cell. Creating the object sets up the k-vectors and real-space image shifts, so it should be reused for frames with the same cell
+
+	The real-space part is summed explicitly over nearby images (only evaluating terms within the cutoff), while the reciprocal-space part is done with matrix products of exp(ik.r) terms; or structure factors when only a group-group energy is needed
+	"""
+
+	def __init__(self, lattVects, accuracy=1e-8, realSpaceCutoff=None, minGamma=None):
+		""" Initializer
+
+		Args:
+			lattVects: (3x3 array) Lattice vectors (rows)
+			accuracy: (float) Approximate relative accuracy; terms smaller than this are neglected
+			realSpaceCutoff: (Optional, float) Cutoff for real-space terms. The splitting parameter is chosen such that erfc(beta*cutoff) ~ accuracy. Default is half the smallest perpendicular width of the cell
+			minGamma: (Optional, float) The smallest smearing parameter that will be used with this object. Needed to make sure the real-space corrections for smeared charges are summed over enough images
+
+		"""
+		self.lattVects = np.array(lattVects, dtype=np.float64)
+		self.accuracy = accuracy
+		self.volume = abs(np.linalg.det(self.lattVects))
+		self.recipVects = 2*math.pi*np.linalg.inv(self.lattVects).T
+
+		logTerm = math.sqrt( -math.log(accuracy) )
+		perpWidths = self.volume / np.linalg.norm( np.cross(self.lattVects[[1,2,0]], self.lattVects[[2,0,1]]), axis=1 )
+		self.realSpaceCutoff = 0.5*min(perpWidths) if realSpaceCutoff is None else realSpaceCutoff
+		self.beta = logTerm / self.realSpaceCutoff
+		self.kCutoff = 2*self.beta*logTerm
+
+		self._maxImageDist = self.realSpaceCutoff if minGamma is None else max(self.realSpaceCutoff, logTerm/minGamma)
+		self._imageShifts = self._getImageShifts(perpWidths, self._maxImageDist)
+		self._maxKIndices, self._kIndices, self._kFactors = self._getHalfSpaceKIndicesAndFactors()
+
+	def _getImageShifts(self, perpWidths, maxDist):
+		#Pair vectors are wrapped into [-0.5,0.5) fractional co-ordinates first; hence the extra 0.5
+		nImages = [ math.ceil(maxDist/width + 0.5) for width in perpWidths ]
+		ranges = [ np.arange(-n, n+1) for n in nImages ]
+		fractShifts = np.array( np.meshgrid(*ranges, indexing="ij") ).reshape(3,-1).T
+		fractShifts = fractShifts[ np.argsort(np.sum(np.abs(fractShifts),axis=1), kind="stable") ] #Zero shift first
+		return fractShifts @ self.lattVects
+
+	def _getHalfSpaceKIndicesAndFactors(self):
+		maxIndices = [ math.ceil(self.kCutoff*np.linalg.norm(vect)/(2*math.pi)) for vect in self.lattVects ]
+		ranges = [ np.arange(-n, n+1) for n in maxIndices ]
+		kIndices = np.array( np.meshgrid(*ranges, indexing="ij") ).reshape(3,-1).T
+
+		#Only keep one of each +k/-k pair (and drop k=0); the factor of 2 accounts for the other half
+		firstNonZero = np.take_along_axis( kIndices, np.argmax(kIndices!=0, axis=1)[:,np.newaxis], axis=1 )[:,0]
+		kIndices = kIndices[firstNonZero>0]
+		kSq = np.sum( (kIndices @ self.recipVects)**2, axis=1 )
+		useVects = kSq <= self.kCutoff**2
+		kIndices, kSq = kIndices[useVects], kSq[useVects]
+
+		kFactors = 2*(4*math.pi/self.volume) * np.exp( -kSq/(4*self.beta**2) ) / kSq
+		return maxIndices, kIndices, kFactors
+
+	def getPotentialMatrix(self, coordsA, coordsB, gammas=None, sameAtom=None):
+		""" Gets the Ewald-summed potential matrix between two sets of co-ordinates
+
+		Args:
+			coordsA: (nA x 3 array) Cartesian co-ordinates
+			coordsB: (nB x 3 array) Cartesian co-ordinates
+			gammas: (Optional, nA x nB array) Smearing parameters for each pair (see getSmearedPairGammas). Default of None means point charges
+			sameAtom: (Optional, nA x nB bool array) True where the pair is one atom interacting with itself; these give the interaction with periodic images only. Default is all False
+
+		Returns
+			potMatrix: (nA x nB np array) Multiply by charge products to get interaction energies
+
+		"""
+		coordsA, coordsB, sameAtom = self._getCoordArraysAndSameAtomMatrix(coordsA, coordsB, sameAtom)
+		outMatrix = self._getNonRecipSpaceMatrix(coordsA, coordsB, gammas, sameAtom)
+		outMatrix += self._getRecipSpaceMatrix(coordsA, coordsB)
+		return outMatrix
+
+	def getGroupInteractionEnergy(self, coordsA, coordsB, chargesA, chargesB, gammas=None, sameAtom=None, inBothA=None, inBothB=None):
+		""" Gets the interaction energy between two groups of charges. Equivalent to summing getPotentialMatrix multiplied by charge products, but the reciprocal-space part is done using structure factors (O(nA+nB) per k-vector, rather than O(nA*nB))
+
+		Args:
+			coordsA: (nA x 3 array) Cartesian co-ordinates
+			coordsB: (nB x 3 array) Cartesian co-ordinates
+			chargesA: (len-nA iter of floats)
+			chargesB: (len-nB iter of floats)
+			gammas: (Optional, nA x nB array) Smearing parameters for each pair (see getSmearedPairGammas). Default of None means point charges
+			sameAtom: (Optional, nA x nB bool array) True where the pair is one atom interacting with itself
+			inBothA: (Optional, len-nA bool iter) True for atoms in group A which are also in group B. Pairs with inBothA[i] and inBothB[j] both True are present in both orders, so get weighted by 0.5. Default is all False
+			inBothB: (Optional, len-nB bool iter) True for atoms in group B which are also in group A
+
+		Returns
+			outEnergy: (float) The interaction energy (non-finite pair terms are ignored, as in getGroupEnergyFromInteractionMatrix)
+
+		"""
+		coordsA, coordsB, sameAtom = self._getCoordArraysAndSameAtomMatrix(coordsA, coordsB, sameAtom)
+		chargesA, chargesB = np.array(chargesA, dtype=np.float64), np.array(chargesB, dtype=np.float64)
+		halfWeightA = np.zeros(len(coordsA)) if inBothA is None else 0.5*np.array(inBothA, dtype=np.float64)
+		halfWeightB = np.zeros(len(coordsB)) if inBothB is None else np.array(inBothB, dtype=np.float64)
+
+		#Everything except reciprocal space terms
+		weights = 1 - np.outer(halfWeightA, halfWeightB)
+		nonRecipMatrix = np.outer(chargesA, chargesB)*self._getNonRecipSpaceMatrix(coordsA, coordsB, gammas, sameAtom)
+		outEnergy = _getWeightedSumOfFiniteVals(weights, nonRecipMatrix)
+
+		#Reciprocal space; weights are 1 - outer(halfWeightA,halfWeightB) so need two sets of structure factors
+		structFactorsA = self._getStructureFactors(coordsA, np.array([chargesA, chargesA*halfWeightA]))
+		structFactorsB = self._getStructureFactors(coordsB, np.array([chargesB, chargesB*halfWeightB]))
+		recipTerms = np.real( structFactorsA*np.conjugate(structFactorsB) )
+		outEnergy += np.sum( self._kFactors*(recipTerms[0]-recipTerms[1]) )
+
+		return float(outEnergy)
+
+	def _getCoordArraysAndSameAtomMatrix(self, coordsA, coordsB, sameAtom):
+		coordsA, coordsB = np.array(coordsA, dtype=np.float64).reshape(-1,3), np.array(coordsB, dtype=np.float64).reshape(-1,3)
+		sameAtom = np.zeros( (len(coordsA),len(coordsB)), dtype=bool ) if sameAtom is None else np.array(sameAtom, dtype=bool)
+		return coordsA, coordsB, sameAtom
+
+	def _getNonRecipSpaceMatrix(self, coordsA, coordsB, gammas, sameAtom):
+		outMatrix = self._getRealSpaceMatrix(coordsA, coordsB, gammas, sameAtom)
+		outMatrix -= math.pi / (self.volume*self.beta**2)
+		if gammas is not None:
+			outMatrix += math.pi / (self.volume*gammas**2)
+		return outMatrix
+
+	def _getRealSpaceMatrix(self, coordsA, coordsB, gammas, sameAtom):
+		diffVects = coordsB[np.newaxis,:,:] - coordsA[:,np.newaxis,:]
+		fractDiffs = diffVects @ np.linalg.inv(self.lattVects)
+		diffVects -= np.round(fractDiffs) @ self.lattVects
+
+		#Work on flattened arrays so erfc only gets evaluated for pairs within the cutoff
+		outMatrix = np.zeros( diffVects.shape[:2] )
+		flatOutVals = outMatrix.reshape(-1)
+		flatGammas = None if gammas is None else np.broadcast_to(gammas, outMatrix.shape).reshape(-1)
+		for shift in self._imageShifts:
+			distsSq = np.sum( (diffVects + shift)**2, axis=2 ).reshape(-1)
+			flatIndices = np.nonzero( distsSq <= self._maxImageDist**2 )[0]
+			if len(flatIndices)==0:
+				continue
+
+			dists = np.sqrt(distsSq[flatIndices])
+			overlapping = dists < 1e-12
+			safeDists = np.where(overlapping, 1, dists)
+			currVals = scipy.special.erfc(self.beta*safeDists) / safeDists
+			if gammas is not None:
+				currVals -= scipy.special.erfc(flatGammas[flatIndices]*safeDists) / safeDists
+
+			if np.any(overlapping):
+				overlapLimits = self._getOverlapLimits(gammas, sameAtom).reshape(-1)[flatIndices]
+				currVals = np.where(overlapping, overlapLimits, currVals)
+			flatOutVals[flatIndices] += currVals
+
+		return outMatrix
+
+	#Values of the real-space terms as r->0. Same-atom pairs exclude the (point or Gaussian) charge interacting with itself
+	def _getOverlapLimits(self, gammas, sameAtom):
+		selfVals = np.full( sameAtom.shape, -2*self.beta/math.sqrt(math.pi) )
+		if gammas is None:
+			return np.where(sameAtom, selfVals, np.inf)
+		return np.where(sameAtom, selfVals, selfVals + 2*gammas/math.sqrt(math.pi))
+
+	def _getRecipSpaceMatrix(self, coordsA, coordsB):
+		phaseFactorsA, phaseFactorsB = self._getPhaseFactors(coordsA), self._getPhaseFactors(coordsB)
+		outMatrix  = (phaseFactorsA.real*self._kFactors) @ phaseFactorsB.real.T
+		outMatrix += (phaseFactorsA.imag*self._kFactors) @ phaseFactorsB.imag.T
+		return outMatrix
+
+	#sum_i charges[i]*exp(i*k.r_i) for each k-vector; chargeSets is nSets x nAtoms
+	def _getStructureFactors(self, coords, chargeSets):
+		return chargeSets @ self._getPhaseFactors(coords)
+
+	#exp(i*k.r) for each atom/k-vector. Built from products of exp(i*m*b_d.r) along each reciprocal vector, which is much cheaper than calculating cos/sin for every element
+	def _getPhaseFactors(self, coords):
+		fractPhases = coords @ self.recipVects.T
+		outVals = np.ones( (len(coords),len(self._kIndices)), dtype=np.complex128 )
+		for dim in range(3):
+			maxIdx = self._maxKIndices[dim]
+			currFactors = np.exp( 1j*np.outer(fractPhases[:,dim], np.arange(-maxIdx, maxIdx+1)) )
+			outVals *= currFactors[:, self._kIndices[:,dim]+maxIdx]
+		return outVals
+
+
+def _getScaledCoordArraysAndLattVects(inpGeom, indicesA, indicesB, distLenConv):
+	cartCoords = np.array( [x[:3] for x in inpGeom.cartCoords], dtype=np.float64 ).reshape(-1,3)
+	coordsA, coordsB = cartCoords[list(indicesA)], cartCoords[list(indicesB)]
+	return distLenConv*coordsA, distLenConv*coordsB, distLenConv*np.array(inpGeom.lattVects, dtype=np.float64)
+
+
+def _getChargeProductMatrix(charges, indicesA, indicesB):
+	charges = np.array(charges, dtype=np.float64)
+	return np.outer(charges[list(indicesA)], charges[list(indicesB)])
+
+
+def _getSameAtomMatrix(indicesA, indicesB):
+	return np.array(indicesA, dtype=int).reshape(-1)[:,np.newaxis] == np.array(indicesB, dtype=int).reshape(-1)[np.newaxis,:]
+
+
+def _getPairWeightsMatrix(indicesA, indicesB):
+	inB = np.isin(indicesA, indicesB)[:,np.newaxis]
+	inA = np.isin(indicesB, indicesA)[np.newaxis,:]
+	return np.where(inA & inB, 0.5, 1.0)
+
+
+def _getWeightedSumOfFiniteVals(weights, inpMatrix):
+	return float( np.sum( np.where(np.isfinite(inpMatrix), weights*inpMatrix, 0) ) )
+
+
+def _getMinGamma(gammas):
+	if (gammas is None) or (np.size(gammas)==0):
+		return None
+	return float(np.min(gammas))
+
@@ -3,7 +3,6 @@ import itertools as it
 
 import numpy as np
 
-import gen_basis_helpers.shared.simple_vector_maths as vectHelp
 
 def getCubeDataObjFromDictSimple(cubeDict):
 	""" Returns a CubeDataSimple instance (useful for various analysis) from cubeDict (standard parsed format)
@@ -46,6 +45,9 @@ class CubeDataSimple():
 		#Deal with equality attrs
 		self._arrayAttrs = ["vectors", "values", "origin"]
 
+		#Centres are cached; the key makes sure they get recalculated if the geometry is changed
+		self._centresCache = (None, None)
+
 	@property
 	def lenEachDim(self):
 		""" Gets us the number of cells in each dimension; returns a list """
@@ -66,91 +68,141 @@ class CubeDataSimple():
 		""" Gets array of centres for the geometric "cubes" up to three-dimensions
 				 
 		Returns
-			outCentres: (iter of len-n iters) Each element contains the central position of the parallelotope represented by the relevant cell in values. e.g. outCentres[2][1][0] gives the centre for self.values[2][1][0]
+			outCentres: (np array) Each element contains the central position of the parallelotope represented by the relevant cell in values. e.g. outCentres[2][1][0] gives the centre for self.values[2][1][0]
+	 
+		NOTES:
+			The array is cached (and re-used until vectors/origin/grid shape change), so shouldnt be modified in place
 	 
 		"""
-		edges = np.array(self.edges)
-		outCentres = np.zeros( tuple( list(edges.shape[:-2]) + [3] ) )
-
-		for comboIdx in np.ndindex( tuple(outCentres.shape[:-1]) ):
-			startVertex, endVertex = edges[tuple(comboIdx)][0], edges[tuple(comboIdx)][-1]
-			outCentre = [ start + (0.5*(end-start)) for start,end in it.zip_longest(startVertex,endVertex)]
-			outCentres[tuple(comboIdx)] = outCentre
-
-
-		return outCentres
-
+		cacheKey = self._getGeomCacheKey()
+		if self._centresCache[0] != cacheKey:
+			self._centresCache = (cacheKey, self.getPositionsForFractIndices( self._getGridIndexArrays(offset=0.5) ))
+		return self._centresCache[1]
 
 	@property
 	def edges(self):
 		""" Gets array of edges for the geometric "cubes" (really paralellotopes in the general case) up to three-dimensions
 				 
 		Returns
-			outEdges: (iter of len-n iters) Each element contains edges for the cube represented by the relevant cell in values. e.g. outEdges[2][1][0] gives the edges for self.values[2][1][0]
+			outEdges: (np array) Each element contains edges for the cube represented by the relevant cell in values. e.g. outEdges[2][1][0] gives the edges for self.values[2][1][0]
 
 		Edges:
 			a) Each element in outEdges returns an iter; length depends on len(self.vectors) and is 2^{n} (1-d has 2 edges, 2-d has 4 edges, 3-d has 8 edges)
 	 		b) Each co-ordinate is a len-3 iter [x,y,z]
 			c) The order of elements is left->right (vectA), lower->upper(vectB), bottom->above(vectC).
 			For example, for the 3-d case the first four elements are for the bottom of the paralelotope, while the latter four are the top of the paralellotope (they are the first four plus self.vectors[-1]). Of the first four elements, the first two are the origin and origin+vectA. The second two are just vectB+ the value in the first two. 
+
+		NOTES:
+			This is 2^{n} times larger than centres so isnt cached; use getPositionsForFractIndices directly if only some positions are needed
 		"""
+		startPositions = self.getPositionsForFractIndices( self._getGridIndexArrays(offset=0) )
+		cornerOffsets = _getCornerOffsets(len(self.vectors)) @ self._getVectorsArray()
+		return startPositions[...,np.newaxis,:] + cornerOffsets
 
-		#Initialise the output
-		nDims = len(self.vectors)
-		edgesPer = 2**(len(self.vectors))
+	def getPositionsForFractIndices(self, fractIndices):
+		""" Gets cartesian positions for (continuous) grid indices; position = origin + sum_i fractIndices[i]*vectors[i]. Hence integer values are voxel corners while voxel centres are at integer+0.5
+		
+		Args:
+			fractIndices: (... x nDims array) Grid indices; any leading shape
+				 
+		Returns
+			outPositions: (... x 3 np array) Cartesian co-ordinates
+	 
+		"""
+		fractIndices = np.array(fractIndices, dtype=np.float64)
+		return np.array(self.origin, dtype=np.float64) + fractIndices @ self._getVectorsArray()
 
-		nIndicesAll = list()
+	def getFractIndicesForPoints(self, inpPoints):
+		""" Gets the (continuous) grid indices for cartesian points; the inverse of getPositionsForFractIndices. Uses the (pseudo-)inverse of the voxel vectors, so each point is O(1)
+		
+		Args:
+			inpPoints: (... x 3 array) Cartesian co-ordinates; any leading shape
+				 
+		Returns
+			fractIndices: (... x nDims np array) Point lies within voxel floor(fractIndices) if all values are between 0 and lenEachDim. For fewer than three dimensions this is the projection of the point onto the grid plane/line
+	 
+		"""
+		inpPoints = np.array(inpPoints, dtype=np.float64)
+		return (inpPoints - np.array(self.origin, dtype=np.float64)) @ np.linalg.pinv( self._getVectorsArray() )
 
-		nIndicesAll.append( len(self.values) ) #1-d; always present 
-		if nDims >=2:
-			nIndicesAll.append( len(self.values[0]) )
-		if nDims>=3:
-			nIndicesAll.append( len(self.values[0][0]) )
+	def getIndicesClosestToPoints(self, inpPoints):
+		""" Gets the index of the voxel whose centre is closest to each input point. Vectorised equivalent of getIdxClosestToInpPointForCubeDataObj
 		
-		outEdges = np.zeros( (*nIndicesAll, edgesPer, 3) )
-
-		#combo index will be nDims long, specifying the cell position in terms of the self.vectors
-		for comboIdx in np.ndindex( outEdges.shape[:-2] ):
-			#Get the current start position
-			startPos = [x for x in self.origin]
-			for idx, nSteps in enumerate(comboIdx):
-				currVector = self.vectors[idx]
-				startPos = [x+(t*nSteps) for x,t in it.zip_longest(startPos, currVector)]
-
-			#Setup curr edges
-			currEdges = list()
-
-			#Get edges along vectA (ALWAYS runs)
-			posLeftLowerBelow = [x for x in startPos]
-			posRightLowerBelow = [x+t for x,t in it.zip_longest(startPos, self.vectors[0])]
-			currEdges.append( posLeftLowerBelow)
-			currEdges.append( posRightLowerBelow)
-
-			#If >=2 dim we get previous translated along vectB
-			if nDims>=2:
-				posLeftUpperBelow = [x+t for x,t in it.zip_longest(startPos, self.vectors[1])]
-				posRightUpperBelow = [x+t for x,t in it.zip_longest(posRightLowerBelow, self.vectors[1])]
-				currEdges.append( posLeftUpperBelow )
-				currEdges.append( posRightUpperBelow )
-
-			#If 3 dim we get previous translated along vectC
-			if nDims>=3:
-				posLeftLowerAbove = [x+t for x,t in it.zip_longest(posLeftLowerBelow, self.vectors[2])]
-				posLeftUpperAbove = [x+t for x,t in it.zip_longest(posLeftUpperBelow, self.vectors[2])]
-				posRightLowerAbove = [x+t for x,t in it.zip_longest(posRightLowerBelow, self.vectors[2])]
-				posRightUpperAbove = [x+t for x,t in it.zip_longest(posRightUpperBelow, self.vectors[2])]
-			
-				currEdges.append( posLeftLowerAbove )
-				currEdges.append( posRightLowerAbove )
-				currEdges.append( posLeftUpperAbove )
-				currEdges.append( posRightUpperAbove )
-
-			outEdges[comboIdx] = currEdges
-
-		return outEdges
-
-#		return outEdges.tolist()
+		Args:
+			inpPoints: (... x 3 array) Cartesian co-ordinates; any leading shape
+				 
+		Returns
+			outIndices: (... x nDims int np array) Index of the voxel with the closest centre
+	 
+		NOTES:
+			a) Uses a local search starting from the voxel containing the point (found from the fractional indices). The search can stop at a local minimum on skewed grids, so every voxel that could be closer than the best found (a box of indices bounded using the pseudo-inverse of the vectors) is then checked. This only checks a few voxels per point, rather than all of them
+			b) Points outside the grid get the closest voxel on the grid boundary. Ties go to the lowest index
 
+		"""
+		inpPoints = np.array(inpPoints, dtype=np.float64)
+		leadShape, nDims = inpPoints.shape[:-1], len(self.vectors)
+		flatPoints = inpPoints.reshape(-1,3)
+		lenEachDim = np.array(self.lenEachDim[:nDims])
+
+		#Start from the voxel containing the point, then move to the closest neighbouring centre until nothing changes. Inside the grid this
+		#is almost always a single step; more are only needed for points outside skewed grids
+		currIndices = np.clip( np.floor(self.getFractIndicesForPoints(flatPoints)).astype(int), 0, lenEachDim-1 )
+		neighbourOffsets = np.array( [x for x in it.product([-1,0,1], repeat=nDims)] )
+		for unused in range( int(np.sum(lenEachDim)) ):
+			candidates = np.clip( currIndices[:,np.newaxis,:] + neighbourOffsets[np.newaxis,:,:], 0, lenEachDim-1 )
+			distsSq = np.sum( (self.getPositionsForFractIndices(candidates+0.5) - flatPoints[:,np.newaxis,:])**2, axis=2 )
+			bestIndices = candidates[ np.arange(len(candidates)), np.argmin(distsSq, axis=1) ] #Candidates are in C-order, so ties go to the lowest index
+			if np.array_equal(bestIndices, currIndices):
+				break
+			currIndices = bestIndices
+
+		currIndices = self._getIndicesClosestToPointsInBoundingWindows(flatPoints, currIndices)
+		return currIndices.reshape( tuple(leadShape) + (nDims,) )
+
+	#Any centre closer than the current best (distance d) has fract-index within d*|column of pinv(vectors)| of the point in each dimension. The
+	#+-1 neighbourhood was already checked, so only points whose window extends beyond it need looking at again
+	def _getIndicesClosestToPointsInBoundingWindows(self, flatPoints, currIndices, maxChunkVals=2**20):
+		lenEachDim = np.array(self.lenEachDim[:len(self.vectors)])
+		bestDists = np.sqrt( np.sum( (self.getPositionsForFractIndices(currIndices+0.5) - flatPoints)**2, axis=1 ) )
+		idxRadii = bestDists[:,np.newaxis] * np.linalg.norm( np.linalg.pinv(self._getVectorsArray()), axis=0 )[np.newaxis,:]
+		idxRadii = idxRadii*(1+1e-8) + 1e-8 #Tolerance for rounding errors
+		centreFractIndices = self.getFractIndicesForPoints(flatPoints) - 0.5
+		lowerIndices = np.clip( np.ceil(centreFractIndices-idxRadii).astype(int), 0, lenEachDim-1 )
+		upperIndices = np.clip( np.floor(centreFractIndices+idxRadii).astype(int), 0, lenEachDim-1 )
+		lowerIndices, upperIndices = np.minimum(lowerIndices, currIndices), np.maximum(upperIndices, currIndices)
+
+		outIndices = np.array(currIndices)
+		toCheck = np.nonzero( np.any( (lowerIndices<currIndices-1) | (upperIndices>currIndices+1), axis=1 ) )[0]
+		windowLens = upperIndices - lowerIndices + 1
+
+		#Points with similar sized windows are done together (padded to the largest window in each group and masked)
+		toCheck = toCheck[ np.argsort(np.prod(windowLens[toCheck], axis=1), kind="stable") ]
+		startIdx = 0
+		while startIdx < len(toCheck):
+			nPoints = max( 1, maxChunkVals//int(np.prod(windowLens[toCheck[startIdx]])) )
+			currPointIndices = toCheck[startIdx:startIdx+nPoints]
+			maxLens = np.max(windowLens[currPointIndices], axis=0)
+			offsets = np.stack( np.meshgrid(*[np.arange(x) for x in maxLens], indexing="ij"), axis=-1 ).reshape(-1,len(maxLens))
+			candidates = lowerIndices[currPointIndices][:,np.newaxis,:] + offsets[np.newaxis,:,:]
+			valid = np.all( candidates<=upperIndices[currPointIndices][:,np.newaxis,:], axis=2 )
+			distsSq = np.sum( (self.getPositionsForFractIndices(candidates+0.5) - flatPoints[currPointIndices][:,np.newaxis,:])**2, axis=2 )
+			distsSq[~valid] = np.inf
+			outIndices[currPointIndices] = candidates[ np.arange(len(candidates)), np.argmin(distsSq, axis=1) ] #C-order, so ties go to the lowest index
+			startIdx += nPoints
+
+		return outIndices
+
+	def _getVectorsArray(self):
+		return np.array(self.vectors, dtype=np.float64).reshape(-1,3)
+
+	#Grid indices (+offset) for every voxel; shape is lenEachDim + [nDims]
+	def _getGridIndexArrays(self, offset=0):
+		nDims = len(self.vectors)
+		ranges = [ np.arange(nVals)+offset for nVals in self.lenEachDim[:nDims] ]
+		return np.stack( np.meshgrid(*ranges, indexing="ij"), axis=-1 )
+
+	def _getGeomCacheKey(self):
+		return ( self._getVectorsArray().tobytes(), np.array(self.origin, dtype=np.float64).tobytes(), tuple(self.lenEachDim) )
 
 	def __eq__(self, other):
 		#Treat most attrs just as np arrays
@@ -219,7 +271,10 @@ def getLowerDimCubeData_keepSingleIdxForRemovedDims(inpCubeData, keepDims, useId
 			idxInUseIdx += 1
 
 	#Figure out the output grid vals and vectors
-	outGridVals = ( np.array( inpCubeData.values) [tuple(outSlice)] ).tolist()
+	#Arrays (e.g. from cube_file_io) stay as views rather than getting copied into nested lists
+	outGridVals = np.asarray(inpCubeData.values)[tuple(outSlice)]
+	if not isinstance(inpCubeData.values, np.ndarray):
+		outGridVals = outGridVals.tolist()
 	outVectors = [vect for vect,boolVal in it.zip_longest(inpCubeData.vectors,keepBools) if boolVal]
 
 	#Create the output object
@@ -244,25 +299,58 @@ def getIdxClosestToInpPointForCubeDataObj(inpPoint, inpDataObj):
 		a) I havent properly tested the equi-distant edge case. It should prioritise high indices by default
 
 	"""
-	centres = np.array(inpDataObj.centres)
-
-	#1) Find the distances from centres to each 
-	allIndices = [tuple(comboIdx) for comboIdx in np.ndindex(centres.shape[:-1])]
-	distMatrix = np.zeros( centres.shape[:-1] ) #centres final index is a len-3 array; whereas we only want a float for the dist
-
-	for comboIdx in allIndices:
-		currCentre = centres[comboIdx]
-		distMatrix[comboIdx] = vectHelp.getDistTwoVectors(currCentre, inpPoint)
+	outIdx = inpDataObj.getIndicesClosestToPoints([inpPoint])[0]
+	return tuple([int(x) for x in outIdx])
 
-	#Loop over the matrix to find the index of the minimum
-	outIdx = tuple([0 for x in range(len(distMatrix.shape))])
-	outDist = distMatrix[outIdx]
 
-	for comboIdx in allIndices:
-		if distMatrix[comboIdx]<outDist:
-			outIdx = comboIdx
-			outDist = distMatrix[comboIdx]
-
-	return outIdx
+def getInterpolatedValsAtPointsForCubeDataObj(inpPoints, inpDataObj, periodic=False, fillValue=np.nan):
+	""" Gets values at (many) input points by multilinear (e.g. trilinear for 3-d data) interpolation between voxel centres
+	
+	Args:
+		inpPoints: (... x 3 array) Cartesian co-ordinates; any leading shape (e.g. nFrames x nAtoms x 3 for every atom in a trajectory)
+		inpDataObj: (CubeDataSimple)
+		periodic: (Bool) If True the grid is treated as periodic (e.g. for cube files covering a full simulation cell); points outside the grid are wrapped back in and values interpolated across the boundary
+		fillValue: (float) Value used for points outside the grid when periodic=False
+ 
+	Returns
+		outVals: (np array) Shape is the leading shape of inpPoints (plus any trailing dimensions in values beyond the number of vectors)
+ 
+	NOTES:
+		a) Values are taken to be at voxel centres (as in CubeDataSimple.centres). For non-periodic grids, points between the outermost centres and the grid edge get the value from the closest centre(s)
+		b) For fewer than three dimensions, points are projected onto the grid plane/line first
 
+	"""
+	inpPoints = np.array(inpPoints, dtype=np.float64)
+	leadShape, nDims = inpPoints.shape[:-1], len(inpDataObj.vectors)
+	lenEachDim = np.array(inpDataObj.lenEachDim[:nDims])
+	values = np.asarray(inpDataObj.values, dtype=np.float64)
+	valsPerVoxel = values.reshape( tuple(lenEachDim) + (-1,) )
+
+	#Continuous indices relative to voxel centres
+	fractIndices = inpDataObj.getFractIndicesForPoints(inpPoints.reshape(-1,3))
+	if periodic:
+		centreIndices = np.mod(fractIndices-0.5, lenEachDim)
+		outside = np.zeros(len(fractIndices), dtype=bool)
+	else:
+		outside = np.any( (fractIndices<0) | (fractIndices>lenEachDim), axis=1 )
+		centreIndices = np.clip(fractIndices-0.5, 0, lenEachDim-1)
+
+	lowerIndices = np.floor(centreIndices).astype(int)
+	fractParts = centreIndices - lowerIndices
+
+	#Sum contributions from the 2^nDims surrounding centres
+	outVals = np.zeros( (len(fractIndices), valsPerVoxel.shape[-1]) )
+	for corner in _getCornerOffsets(nDims).astype(int):
+		cornerIndices = lowerIndices + corner
+		cornerIndices = np.mod(cornerIndices, lenEachDim) if periodic else np.minimum(cornerIndices, lenEachDim-1)
+		weights = np.prod( np.where(corner==1, fractParts, 1-fractParts), axis=1 )
+		outVals += weights[:,np.newaxis] * valsPerVoxel[ tuple(cornerIndices.T) ]
+
+	outVals[outside] = fillValue
+	return outVals.reshape( tuple(leadShape) + values.shape[nDims:] )
+
+
+#Offsets of the 2^{nDims} corners of a voxel, in the same order as CubeDataSimple.edges (first dimension changes fastest)
+def _getCornerOffsets(nDims):
+	return np.array( [ [ (cornerIdx >> dim) & 1 for dim in range(nDims)] for cornerIdx in range(2**nDims) ], dtype=np.float64 )
 
@@ -48,6 +48,9 @@ def getGaussianBroadenedPdosFromFragmentsSimple(pdosFragments, fragNames, xVals,
 	Returns
 		outSpectrum: (sim_xps GenSpectraOutputStandard object) Contains data on each individual pdos contribution and (less useful here) their sum. Individual contribs can be searched by using their fragName and (if separateShells=True) their breakdownHeaders
  
+	NOTES:
+		This evaluates the broadening function for each peak at each x-value in turn; pdos_broadening.getBroadenedPdosFromFragments gives the same spectra as numpy arrays and is much faster for many fragments/frames
+
 	"""
 	#Step 1 = get the full fragment objects
 	allFrags = list()
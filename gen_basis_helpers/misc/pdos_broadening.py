@@ -0,0 +1,200 @@
+
+""" Array-based broadening of (partial) density of states. Eigenvalues, breakdowns and occupancies are handled as (stacked) matrices so many fragments/shells/frames are broadened together; either by direct evaluation of the kernel or by binning delta functions onto a uniform grid and convolving with the kernel via FFT """
+
+import itertools as it
+
+import numpy as np
+
+
+def getBroadenedSpectraFromArrays(xVals, eigenVals, intensities, fwhm, occs=None, kernel="gaussian", method=None, maxChunkVals=2**22):
+	""" Broadens sets of delta functions (e.g. eigenvalues weighted by pdos breakdowns) with a normalised kernel
+
+	Args:
+		xVals: (iter of floats) The x-values to evaluate at. Must be evenly spaced to use method="fft"
+		eigenVals: (... x nEig array) Position of each delta function; any leading dimensions (e.g. frames or fragments) are batch dimensions
+		intensities: (... x nEig x nSeries array) Weight of each delta function for each output series (e.g. pdos breakdowns for each shell)
+		fwhm: (float) Full width at half maximum of the broadening function
+		occs: (... x nEig array, optional) If set the intensities are multiplied by these (e.g. for occupied-only dos)
+		kernel: (str) "gaussian" or "lorentzian". Both are normalised to unit area (same as the sim_xps broadening functions)
+		method: (str or None) "direct" evaluates the kernel for every (x, eigenvalue) pair and is exact. "fft" bins delta functions onto the grid and convolves; much faster for large grids/many eigenvalues. None means use "fft" if xVals are evenly spaced with spacing well below fwhm (less than fwhm/5) and "direct" otherwise
+		maxChunkVals: (int) Roughly the max number of intermediate values (kernel values for "direct", FFT coefficients for "fft") held in memory at once
+
+	Returns
+		outSpectra: (... x nSeries x nX np array) The broadened spectra for each series in each batch entry
+
+	Raises:
+		ValueError: If kernel or method are unknown or method="fft" is requested for unevenly spaced xVals
+
+	NOTES:
+		a) Eigenvalues with zero intensity contribute nothing; so ragged inputs (e.g. frames with different numbers of eigenvalues) can be padded with zeros
+		b) With method="fft" each delta function is split between its two nearest grid points (which keeps its area and centre), so the grid spacing should be well below fwhm for close agreement with method="direct" (errors scale as spacing^2). Delta functions further than the kernel cutoff (10 sigma for gaussians, the grid width for lorentzians) from the grid are ignored, which only matters for long Lorentzian tails
+
+	"""
+	xVals = np.asarray(xVals, dtype=np.float64)
+	eigenVals = np.asarray(eigenVals, dtype=np.float64)
+	intensities = np.asarray(intensities, dtype=np.float64)
+	if occs is not None:
+		intensities = intensities*np.asarray(occs, dtype=np.float64)[...,np.newaxis]
+	kernelFunct, kernelCutoff = _getKernelFunctAndCutoff(kernel, fwhm)
+
+	#Flatten any batch dimensions
+	batchShape, (nEig, nSeries) = eigenVals.shape[:-1], intensities.shape[-2:]
+	eigenVals = eigenVals.reshape( (-1,nEig) )
+	intensities = np.broadcast_to(intensities, batchShape + (nEig,nSeries)).reshape( (-1,nEig,nSeries) )
+
+	evenlySpaced = _isEvenlySpaced(xVals)
+	method = _getDefaultMethod(xVals, fwhm, evenlySpaced) if method is None else method
+	if method == "direct":
+		outSpectra = _getBroadenedSpectraDirect(xVals, eigenVals, intensities, kernelFunct, maxChunkVals)
+	elif method == "fft":
+		if not evenlySpaced:
+			raise ValueError("method=\"fft\" requires evenly spaced xVals")
+		outSpectra = _getBroadenedSpectraFFT(xVals, eigenVals, intensities, kernelFunct, kernelCutoff, maxChunkVals)
+	else:
+		raise ValueError("{} is an invalid value for method".format(method))
+
+	return outSpectra.reshape( batchShape + (nSeries,len(xVals)) )
+
+
+def getPdosArraysFromFragments(pdosFragments, multByOcc=False, separateShells=False):
+	""" Gets stacked eigenvalue/intensity arrays from pdos fragments for use with getBroadenedSpectraFromArrays
+
+	Args:
+		pdosFragments: (iter of PdosFragmentStandard objects) These may come from different frames (i.e. have different eigenvalues and numbers of eigenvalues)
+		multByOcc: (Bool) Whether to multiply intensities by occupancies
+		separateShells: (Bool) If True each breakdown (e.g. s,p,d) is a separate series; else the breakdowns are summed into one series
+
+	Returns
+		eigenVals: (nFrags x nEig np array) Eigenvalues for each fragment; zero padded where a fragment has fewer than nEig eigenvalues
+		intensities: (nFrags x nEig x nSeries np array) Weights for each eigenvalue. Padded entries (both eigenvalues and breakdowns) are zero
+
+	"""
+	nFrags = len(pdosFragments)
+	nEig = max( [len(frag.eigenValues) for frag in pdosFragments] ) if nFrags>0 else 0
+	nSeries = max( [len(frag.breakdowns[0]) for frag in pdosFragments if len(frag.breakdowns)>0], default=1 ) if separateShells else 1
+
+	eigenVals, intensities = np.zeros( (nFrags,nEig) ), np.zeros( (nFrags,nEig,nSeries) )
+	for fragIdx, frag in enumerate(pdosFragments):
+		currNEig = len(frag.eigenValues)
+		if currNEig == 0:
+			continue
+		eigenVals[fragIdx,:currNEig] = frag.eigenValues
+		breakdowns = np.array(frag.breakdowns, dtype=np.float64)
+		if separateShells:
+			intensities[fragIdx,:currNEig,:breakdowns.shape[1]] = breakdowns
+		else:
+			intensities[fragIdx,:currNEig,0] = np.sum(breakdowns, axis=1)
+
+		if multByOcc:
+			intensities[fragIdx,:currNEig] *= np.array(frag.occs, dtype=np.float64)[:,np.newaxis]
+
+	return eigenVals, intensities
+
+
+def getBroadenedPdosFromFragments(pdosFragments, xVals, fwhm, kernel="gaussian", multByOcc=False, separateShells=False, method=None):
+	""" Gets broadened partial density of states for many fragments at once (array-based equivalent of pdos_analysis.getGaussianBroadenedPdosFromFragmentsSimple)
+
+	Args:
+		pdosFragments: (iter of PdosFragmentStandard objects)
+		xVals: (iter of floats) The x-values to evaluate at
+		fwhm: (float) The width of the broadening function
+		kernel: (str) "gaussian" or "lorentzian"
+		multByOcc: (Bool) Whether to multiply intensities by occupancies
+		separateShells: (Bool) Whether to split the pdos fragments into separate shells (s,p,d) or treat them all together
+		method: (str or None) See getBroadenedSpectraFromArrays
+
+	Returns
+		outSpectra: (nFrags x nSeries x nX np array) nSeries is 1 if separateShells=False; else its the max number of breakdowns (ordered as in breakdownHeaders). The total for each fragment is outSpectra.sum(axis=1) while the sum over e.g. frames is outSpectra.sum(axis=0)
+
+	"""
+	eigenVals, intensities = getPdosArraysFromFragments(pdosFragments, multByOcc=multByOcc, separateShells=separateShells)
+	return getBroadenedSpectraFromArrays(xVals, eigenVals, intensities, fwhm, kernel=kernel, method=method)
+
+
+def _getBroadenedSpectraDirect(xVals, eigenVals, intensities, kernelFunct, maxChunkVals):
+	nBatch, nEig, nSeries = intensities.shape
+	outSpectra = np.zeros( (nBatch,nSeries,len(xVals)) )
+	chunkSize = max( 1, maxChunkVals//max(1,len(xVals)) )
+	for batchIdx, startIdx in it.product( range(nBatch), range(0,nEig,chunkSize) ):
+		endIdx = startIdx + chunkSize
+		kernelVals = kernelFunct( xVals[:,np.newaxis] - eigenVals[batchIdx,np.newaxis,startIdx:endIdx] )
+		outSpectra[batchIdx] += (kernelVals @ intensities[batchIdx,startIdx:endIdx]).T
+	return outSpectra
+
+
+#Deltas are binned (linear split between neighbouring points) onto the grid extended by nPad points each side (kernel cutoff, at most the grid width); then convolved with the kernel via FFT
+def _getBroadenedSpectraFFT(xVals, eigenVals, intensities, kernelFunct, kernelCutoff, maxChunkVals):
+	nBatch, nEig, nSeries = intensities.shape
+	nX = len(xVals)
+	if nX < 2:
+		return _getBroadenedSpectraDirect(xVals, eigenVals, intensities, kernelFunct, maxChunkVals)
+
+	#spacing is negative for descending grids; index maths below works for either sign but the padding needs the magnitude
+	spacing = (xVals[-1]-xVals[0]) / (nX-1)
+	nPad = nX if np.isinf(kernelCutoff) else min( nX, int(np.ceil(kernelCutoff/abs(spacing)))+1 )
+	nGrid = nX + 2*nPad
+
+	#1) Bin all delta functions for all batches/series with a single bincount
+	fractIdx = (eigenVals - xVals[0])/spacing + nPad
+	lowerIdx = np.floor(fractIdx).astype(np.int64)
+	upperFract = fractIdx - lowerIdx
+	batchIdx, eigIdx = np.nonzero( (lowerIdx>=0) & (lowerIdx<nGrid-1) )
+
+	useLower, useUpperFract = lowerIdx[batchIdx,eigIdx][:,np.newaxis], upperFract[batchIdx,eigIdx][:,np.newaxis]
+	rowOffsets = ( (batchIdx*nSeries)[:,np.newaxis] + np.arange(nSeries)[np.newaxis,:] ) * nGrid
+	currWeights = intensities[batchIdx,eigIdx]
+	binIndices = np.concatenate( [(rowOffsets + useLower).ravel(), (rowOffsets + useLower + 1).ravel()] )
+	binWeights = np.concatenate( [(currWeights*(1-useUpperFract)).ravel(), (currWeights*useUpperFract).ravel()] )
+	binnedVals = np.bincount(binIndices, weights=binWeights, minlength=nBatch*nSeries*nGrid).reshape( (nBatch*nSeries,nGrid) )
+
+	#2) Linear convolution via zero-padded FFTs. Kernel covers offsets between the binning grid and output grid (index maxOffset is zero offset)
+	maxOffset = nX + nPad - 1
+	kernelVals = kernelFunct( np.arange(-maxOffset, maxOffset+1)*spacing )
+	fftLen = _getFastFFTLen( nGrid + len(kernelVals) - 1 )
+	kernelFFT = np.fft.rfft(kernelVals, n=fftLen)
+
+	#Output grid point j is binning grid point j+nPad; rows done in chunks to limit memory
+	startIdx = nPad + maxOffset
+	outSpectra = np.zeros( (nBatch*nSeries,nX) )
+	rowsPerChunk = max(1, maxChunkVals//fftLen)
+	for rowIdx in range(0, nBatch*nSeries, rowsPerChunk):
+		currRows = slice(rowIdx, rowIdx+rowsPerChunk)
+		convVals = np.fft.irfft( np.fft.rfft(binnedVals[currRows], n=fftLen, axis=1)*kernelFFT, n=fftLen, axis=1 )
+		outSpectra[currRows] = convVals[:, startIdx:startIdx+nX]
+
+	return outSpectra.reshape( (nBatch,nSeries,nX) )
+
+
+#Returns the (unit area) kernel function and the distance beyond which its negligible (inf if it never is, e.g. lorentzian tails)
+def _getKernelFunctAndCutoff(kernel, fwhm):
+	if kernel == "gaussian":
+		sigma = fwhm / (2*np.sqrt(2*np.log(2)))
+		prefactor = 1 / (sigma*np.sqrt(2*np.pi))
+		return (lambda x: prefactor*np.exp( -(x**2)/(2*sigma**2) )), 10*sigma
+	elif kernel == "lorentzian":
+		hwhm = 0.5*fwhm
+		return (lambda x: (hwhm/np.pi) / (x**2 + hwhm**2)), np.inf
+	raise ValueError("{} is an invalid value for kernel".format(kernel))
+
+
+#FFT binning errors grow quickly once the spacing is a sizeable fraction of fwhm, so only use it by default for fine grids
+def _getDefaultMethod(xVals, fwhm, evenlySpaced, maxSpacingFract=0.2):
+	if (not evenlySpaced) or (len(xVals) < 2):
+		return "direct"
+	spacing = abs(xVals[-1]-xVals[0]) / (len(xVals)-1)
+	return "fft" if (spacing > 0) and (spacing < maxSpacingFract*fwhm) else "direct"
+
+
+def _isEvenlySpaced(xVals):
+	if len(xVals) < 3:
+		return True
+	diffs = np.diff(xVals)
+	return bool( np.allclose(diffs, diffs[0], rtol=1e-6, atol=0) )
+
+
+def _getFastFFTLen(minLen):
+	outLen = 1
+	while outLen < minLen:
+		outLen *= 2
+	return outLen
+
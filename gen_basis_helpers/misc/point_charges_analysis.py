@@ -1,9 +1,8 @@
 
-import itertools as it
-
 import numpy as np
 
 from ..analyse_md import calc_dists as calcDistsHelp
+from . import ewald_coulomb as ewaldHelp
 
 def getCoulombEnergyBetweenIndicesForPointCharges(inpGeom, charges, indicesA, indicesB, lenConv=1):
 	""" Gets the interaction energy between groups of point charges by using Coulombs law. By default we assume geometry using angstrom while charges are in units of elementary charge
@@ -23,21 +22,28 @@ def getCoulombEnergyBetweenIndicesForPointCharges(inpGeom, charges, indicesA, in
 
 	"""
 
-	#Calculate the interactions
+	#Calculate the interactions; pairs present in both orders only get counted once
 	coulombMatrix = getCoulombEnergyInteractionMatrix(inpGeom, charges, indicesA, indicesB, lenConv=lenConv)
-	interactionMatrix = np.where( np.isinf(coulombMatrix), 0, coulombMatrix)
+	return ewaldHelp.getGroupEnergyFromInteractionMatrix(coulombMatrix, indicesA, indicesB)
 
-	outSum = 0
-	allIdxPairs = [list(x) for x in it.product(indicesA,indicesB)]
 
-	#The index checking gets a bit slow
-	for idxA, idxB in np.ndindex(interactionMatrix.shape):
-		if (idxA in indicesA) and (idxA in indicesB) and (idxB in indicesA) and (idxB in indicesB):
-			outSum += 0.5*interactionMatrix[idxA][idxB]
-		else:
-			outSum += interactionMatrix[idxA][idxB]
+def getEwaldCoulombEnergyBetweenIndicesForPointCharges(inpGeom, charges, indicesA, indicesB, lenConv=1, accuracy=1e-8):
+	""" Periodic version of getCoulombEnergyBetweenIndicesForPointCharges; interactions are summed over all periodic images using Ewald summation
+	
+	Args:
+		inpGeom: (plato_pylib UnitCell Object) Contains the geometry
+		charges: (iter of floats) Elementary charges for ALL atoms in the geometry
+		indicesA: (iter of ints)
+		indicesB: (iter of ints)
+		lenConv: (float) Conversion factor for length; default is angstrom
+		accuracy: (float) Approximate relative accuracy of the Ewald sum
+ 
+	Returns
+		outEnergy: (float) Coulombic interaction energy between indicesA and indicesB. Default units are eV
 
-	return outSum
+	"""
+	coulombMatrix = getEwaldCoulombEnergyInteractionMatrix(inpGeom, charges, indicesA, indicesB, lenConv=lenConv, accuracy=accuracy)
+	return ewaldHelp.getGroupEnergyFromInteractionMatrix(coulombMatrix, indicesA, indicesB)
 
 
 #Tested indirectly with getCoulombEnergyBetweenIndicesForPointCharges
@@ -60,33 +66,43 @@ def getCoulombEnergyInteractionMatrix(inpGeom, charges, indicesA, indicesB, lenC
 	"""
 	#Get distance and charge matrices needed
 	distMatrix = calcDistsHelp.calcDistanceMatrixForCell_minImageConv(inpGeom, indicesA=indicesA, indicesB=indicesB)
-	chargesA = [ charges[idx] for idx in indicesA ]
-	chargesB = [ charges[idx] for idx in indicesB ]
-
-	chargesMatrix = np.zeros( list(distMatrix.shape) + [2] )
-	for idxA, idxB in np.ndindex( distMatrix.shape[:2] ):
-		chargesMatrix[idxA][idxB] = [chargesA[idxA], chargesB[idxB]]
+	chargesArray = np.array(charges, dtype=np.float64)
+	chargeProducts = np.outer( chargesArray[list(indicesA)], chargesArray[list(indicesB)] )
 
 	#
 	minVal = 1e-9
-	outMatrix = np.zeros( np.array(distMatrix).shape )
-	for idx in np.ndindex(outMatrix.shape):
-		qA, qB = chargesA[idx[0]], chargesB[idx[1]]
-		if distMatrix[idx] < minVal:
-			outMatrix[idx] = np.inf
-		else:
-			outMatrix[idx] = getCoulombEnergyTwoPointsStandard(qA, qB, distMatrix[idx], lenConv=lenConv)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		outMatrix = getCoulombEnergyTwoPointsStandard(chargeProducts, 1, distMatrix, lenConv=lenConv)
+	outMatrix = np.where(distMatrix<minVal, np.inf, outMatrix)
 
 	return outMatrix
 
 
+def getEwaldCoulombEnergyInteractionMatrix(inpGeom, charges, indicesA, indicesB, lenConv=1, accuracy=1e-8):
+	""" Periodic version of getCoulombEnergyInteractionMatrix; interactions are summed over all periodic images using Ewald summation (see ewald_coulomb.getEwaldInteractionMatrix)
+	
+	Args:
+		inpGeom: (plato_pylib UnitCell Object) Contains the geometry
+		charges: (iter of floats) Elementary charges for ALL atoms in the geometry
+		indicesA: (iter of ints)
+		indicesB: (iter of ints)
+		lenConv: (float) Conversion factor for length; default is angstrom
+		accuracy: (float) Approximate relative accuracy of the Ewald sum
+ 
+	Returns
+		outMatrix; (NxM matrix) Contains Coulombic interaction energies between indicesA and indicesB. Entries for an atom with itself contain the interaction with its own periodic images
+ 
+	"""
+	interMatrix = ewaldHelp.getEwaldInteractionMatrix(inpGeom, charges, indicesA, indicesB, accuracy=accuracy)
+	return getCoulombEnergyTwoPointsStandard(interMatrix, 1, 1, lenConv=lenConv)
+
 def getCoulombEnergyTwoPointsStandard(qA, qB, dist, lenConv=1, energyConv=1):
 	""" Gets the energy between charges at two points separated by dist, using Coulombs law
 	
 	Args:
-		qA: (float) The charge on point A. Units=elementary charge
-		qB: (float) The charge on point B. Units=elementary charge
-		dist: (float) The distance between points A and B
+		qA: (float or array) The charge on point A. Units=elementary charge
+		qB: (float or array) The charge on point B. Units=elementary charge
+		dist: (float or array) The distance between points A and B
 		lenConv: (float) Conversion factor for length; default is angstrom
 		energyConv: (float) Conversion factor for energy; default is eV
  
@@ -1,12 +1,13 @@
 
-import itertools as it
 import math
 
 import numpy as np
+import scipy.special
 
 import plato_pylib.shared.unit_convs as uConvHelp
 
 import gen_basis_helpers.analyse_md.calc_dists as calcDistHelp
+import gen_basis_helpers.misc.ewald_coulomb as ewaldHelp
 
 
 
@@ -66,20 +67,37 @@ def getCoulombInteractionEnergyStandard(inpGeom, exponentDict, charges, indicesA
 	cartCoords = inpGeom.cartCoords
 	exponents = [ exponentDict[coord[-1]] for coord in cartCoords ]
 	coulombInteractionMatrix = getCoulombInteractionMatrix(inpGeom, exponents, charges, indicesA, indicesB, distLenConv=distLenConv)
-	interactionMatrix = np.where( np.isnan(coulombInteractionMatrix), 0, coulombInteractionMatrix)
-
-	#Add all interactions up
-	outSum = 0
-	allIdxPairs = [list(x) for x in it.product(indicesA,indicesB)]
-	for idxA, idxB in np.ndindex(interactionMatrix.shape):
-		if [indicesB[idxB],indicesA[idxA]] in allIdxPairs:
-			outSum += 0.5*interactionMatrix[idxA][idxB]
-		else:
-			outSum += interactionMatrix[idxA][idxB]
 
+	#Add all interactions up; pairs present in both orders only get counted once
+	outSum = ewaldHelp.getGroupEnergyFromInteractionMatrix(coulombInteractionMatrix, indicesA, indicesB)
 	return outSum*eConv
 
 
+def getEwaldCoulombInteractionEnergy(inpGeom, exponentDict, charges, indicesA, indicesB, distLenConv=1, eConv=1, accuracy=1e-8):
+	""" Gets Coulombic interaction energy between indicesA and indicesB, including all periodic images via Ewald summation. Same interface as getCoulombInteractionEnergyStandard (which uses the minimum image convention)
+	
+	Args:
+		inpGeom: (plato_pylib UnitCell object) Contains the geometry
+		exponentDict: (dict) Keys are element/kind symbols. Values are what we put in (exponent/pi)^{3/2} * e^{-exponent*r^2} charge distribution
+		charges: (iter of floats) Atomic charges; units should be elementary charge
+		indicesA: (iter of ints) Indices in group A
+		indicesB: (iter of ints) Indices in group B
+		distLenConv: (float) We multiply all distances by this value. If input geometry is in angstrom this should usually be set to the angstrom->bohr conversion
+		eConv: (float) Default units are generally going to be Hartree
+		accuracy: (float) Approximate relative accuracy of the Ewald sum
+ 
+	Returns
+		outVal: (float) The total interaction energy between atoms in indicesA and indicesB
+
+	NOTES:
+		Atoms in both groups also interact with their own periodic images; see ewald_coulomb.getEwaldInteractionMatrix
+ 
+	"""
+	exponents = [ exponentDict[coord[-1]] for coord in inpGeom.cartCoords ]
+	currKwargs = {"exponents":exponents, "distLenConv":distLenConv, "eConv":eConv, "accuracy":accuracy}
+	return ewaldHelp.getEwaldInteractionEnergy(inpGeom, charges, indicesA, indicesB, **currKwargs)
+
+
 #0.5*sum(Matrix) is the interaction energy
 def getCoulombInteractionMatrix(inpGeom, exponents, charges, indicesA, indicesB, distLenConv=1, minDist=1e-6):
 	""" Calculates Coulombic energy between relevant atoms. Generally expect this to give results in atomic units (Hartree). Uses q_A*q_B*getIntegralTwoSphericalGaussianSmearedDensities(dist, alphaA, alphaB) to get the pairwise energies
@@ -100,28 +118,38 @@ def getCoulombInteractionMatrix(inpGeom, exponents, charges, indicesA, indicesB,
 		outMatrix: (NxN np array) This contains the interaction energies between atoms in indicesA and indicesB
  
 	"""
-	#
-	distMatrix = calcDistHelp.calcDistanceMatrixForCell_minImageConv(inpGeom, indicesA=indicesA, indicesB=indicesB)
-	exponentsA = [exponents[idx] for idx in indicesA]
-	exponentsB = [exponents[idx] for idx in indicesB]
-	chargesA = [charges[idx] for idx in indicesA]
-	chargesB = [charges[idx] for idx in indicesB]
-
-	#
-	distMatrixIndices =  [idx for idx in np.ndindex(distMatrix.shape)]
-	outMatrix = np.zeros( (len(indicesA),len(indicesB)) )
-
-	for arrayIdx in distMatrixIndices:
-		idxA, idxB = arrayIdx
-		currDist = distMatrix[idxA][idxB]*distLenConv
-		alphaA, alphaB = exponentsA[idxA], exponentsB[idxB]
-		chargeA, chargeB = chargesA[idxA], chargesB[idxB]
-		currIntegral = getIntegralTwoSphericalGaussianSmearedDensities(currDist, alphaA, alphaB)
-		outMatrix[idxA][idxB] = chargeA*chargeB*currIntegral
+	distMatrix = calcDistHelp.calcDistanceMatrixForCell_minImageConv(inpGeom, indicesA=indicesA, indicesB=indicesB)*distLenConv
+	gammas = ewaldHelp.getSmearedPairGammas(exponents, indicesA, indicesB)
+	chargesArray = np.array(charges, dtype=np.float64)
+	chargeProducts = np.outer( chargesArray[list(indicesA)], chargesArray[list(indicesB)] )
+
+	#Zero distances give nan (0/0)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		outMatrix = chargeProducts*scipy.special.erf(gammas*distMatrix) / distMatrix
 
 	return outMatrix
 
 
+def getEwaldCoulombInteractionMatrix(inpGeom, exponents, charges, indicesA, indicesB, distLenConv=1, accuracy=1e-8):
+	""" Periodic version of getCoulombInteractionMatrix; interactions are summed over all periodic images using Ewald summation (see ewald_coulomb.getEwaldInteractionMatrix)
+	
+	Args:
+		inpGeom: (plato_pylib UnitCell object) Contains the geometry
+		exponents: (iter of floats) Charges distrib. are described by (exponent/pi)^{3/2} * e^{-exponent*r^2}. These should generally be in atomic units (bohr)
+		charges: (iter of floats) Atomic charges; units should be elementary charge
+		indicesA: (iter of ints) Indices for the first dimension of the matrix
+		indicesB: (iter of ints) Indices for the second dimension of the matrix
+		distLenConv: (float) We multiply all distances by this value
+		accuracy: (float) Approximate relative accuracy of the Ewald sum
+
+	Returns
+		outMatrix: (len(indicesA) x len(indicesB) np array) Interaction energies. Unlike getCoulombInteractionMatrix, entries for an atom with itself are finite (they contain the interaction with its own periodic images)
+ 
+	"""
+	currKwargs = {"exponents":exponents, "distLenConv":distLenConv, "accuracy":accuracy}
+	return ewaldHelp.getEwaldInteractionMatrix(inpGeom, charges, indicesA, indicesB, **currKwargs)
+
+
 def getIntegralTwoSphericalGaussianSmearedDensities(dist, alphaA, alphaB):
 	""" Calculates the Hartree integral ( c_1c_2  \int \\fract{\\rho(r)\\rho(r')}{|r-r'|} dr dr' ) for two charge densities described by single spherical Gaussian functions. Used to get hartree energy by multiplying by q_{A}q_{B}. Note c_1 and c_2 are the coefficients which lead to the Gaussians being normalised; so (alpha/pi)^{3/2}
 
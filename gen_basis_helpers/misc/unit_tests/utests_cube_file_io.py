@@ -0,0 +1,144 @@
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import gen_basis_helpers.misc.cube_file_io as tCode
+
+
+#Writes values the same way CP2K does; 6 per line with a new line started for each (x,y) pair
+def _writeCubeFile(outPath, dataGrid, origin, steps, atomNumbers, atomCoords, nValsLine=None):
+	nAtoms = len(atomNumbers) if nValsLine is None else -1*len(atomNumbers)
+	outStr = "Test cube file\nSecond comment line\n"
+	outStr += "{} {} {} {}\n".format(nAtoms, *origin)
+	for nPoints, step in zip(dataGrid.shape[:3], steps):
+		outStr += "{} {} {} {}\n".format(nPoints, *step)
+	for atNumber, coord in zip(atomNumbers, atomCoords):
+		outStr += "{} 0.0 {} {} {}\n".format(atNumber, *coord)
+	if nValsLine is not None:
+		outStr += nValsLine + "\n"
+
+	for idxX in range(dataGrid.shape[0]):
+		for idxY in range(dataGrid.shape[1]):
+			lineVals = dataGrid[idxX][idxY].reshape(-1)
+			for startIdx in range(0, len(lineVals), 6):
+				outStr += " ".join( ["{:13.5E}".format(x) for x in lineVals[startIdx:startIdx+6]] ) + "\n"
+
+	with open(outPath, "wt") as f:
+		f.write(outStr)
+
+
+class TestReadCubeFiles(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.cubePath = os.path.join(self.workFolder, "test-ELECTRON_DENSITY-1_0.cube")
+		self.dataGrid = np.random.RandomState(3).uniform(size=(4,3,8))
+		self.origin = [0.0, 0.5, 1.0]
+		self.steps = [ [0.5,0.0,0.0], [0.1,0.4,0.0], [0.0,0.0,0.25] ]
+		self.atomNumbers = [12, 8]
+		self.atomCoords = [ [0.0,0.0,0.0], [1.0,1.5,2.0] ]
+		self.nValsLine = None
+		self.createTestObjs()
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def createTestObjs(self):
+		_writeCubeFile(self.cubePath, self.dataGrid, self.origin, self.steps, self.atomNumbers, self.atomCoords, nValsLine=self.nValsLine)
+
+	def testExpectedHeader(self):
+		actHeader = tCode.readCubeFileHeader(self.cubePath)
+		self.assertEqual( [4,3,8], [actHeader[key] for key in ["n_x","n_y","n_z"]] )
+		self.assertEqual( self.steps, [actHeader[key] for key in ["step_x","step_y","step_z"]] )
+		self.assertEqual(self.origin, actHeader["origin"])
+		self.assertEqual(self.atomNumbers, actHeader["atomic_numbers"])
+		self.assertEqual(self.atomCoords, actHeader["atomic_coords"])
+		self.assertEqual(1, actHeader["n_vals_per_point"])
+
+	def testDataGridMatches_float32(self):
+		actDict = tCode.parseCubeFile(self.cubePath, dtype=np.float32)
+		self.assertEqual(np.float32, actDict["data_grid"].dtype)
+		self.assertTrue( np.allclose(self.dataGrid, actDict["data_grid"], rtol=1e-4) )
+
+	def testSlicesMatchFullGrid_smallChunks(self):
+		expGrid = tCode.getCubeDataArrayFromFile(self.cubePath)
+		slices = [ (startIdx, block) for startIdx, block in tCode.iterCubeDataSlices(self.cubePath, maxChunkVals=50) ]
+		self.assertEqual( [0,2], [startIdx for startIdx,unused in slices] )
+		self.assertTrue( np.array_equal(expGrid, np.concatenate([block for unused,block in slices])) )
+
+	def testSidecarWrittenAndReusedThenUpdated(self):
+		expGrid = tCode.getCubeDataArrayFromFile(self.cubePath)
+		actGridA = tCode.getCubeDataArrayFromFile(self.cubePath, useSidecar=True)
+		self.assertTrue( os.path.exists(self.cubePath + tCode.SIDECAR_EXT) )
+		self.assertIsInstance(actGridA, np.memmap)
+		self.assertTrue( np.array_equal(expGrid, actGridA) )
+
+		#Changing the cube file (different size) should lead to the sidecar being replaced
+		self.dataGrid = self.dataGrid[:2]
+		self.createTestObjs()
+		actGridB = tCode.getCubeDataArrayFromFile(self.cubePath, useSidecar=True)
+		self.assertEqual( (2,3,8), actGridB.shape )
+
+	def testMultipleValsPerPoint(self):
+		self.dataGrid = np.random.RandomState(4).uniform(size=(2,3,4,2))
+		self.nValsLine = "2 5 6"
+		self.createTestObjs()
+		actDict = tCode.parseCubeFile(self.cubePath)
+		self.assertEqual(2, actDict["n_vals_per_point"])
+		self.assertTrue( np.allclose(self.dataGrid, actDict["data_grid"]) )
+
+	def testRaisesForTruncatedFile(self):
+		with open(self.cubePath, "rt") as f:
+			fileLines = f.readlines()
+		with open(self.cubePath, "wt") as f:
+			f.write( "".join(fileLines[:-3]) )
+		with self.assertRaises(ValueError):
+			tCode.getCubeDataArrayFromFile(self.cubePath)
+
+
+class TestCubeReducers(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.cubePath = os.path.join(self.workFolder, "test.cube")
+		self.dataGrid = np.random.RandomState(5).uniform(size=(5,4,7))
+		self.steps = [ [0.5,0.0,0.0], [0.1,0.4,0.0], [0.0,0.0,0.25] ]
+		_writeCubeFile(self.cubePath, self.dataGrid, [0,0,0], self.steps, [1], [[0,0,0]])
+		self.fullGrid = tCode.getCubeDataArrayFromFile(self.cubePath)
+		self.voxelVolume = 0.5*0.4*0.25
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def _runTestFunct(self, reducers, useSidecar=False):
+		return tCode.applyReducersToCubeFile(self.cubePath, reducers, maxChunkVals=60, useSidecar=useSidecar)
+
+	def testPlanarAverages(self):
+		reducers = [tCode.CubePlanarAverage(axis=axis) for axis in range(3)]
+		expVals = [ np.mean(self.fullGrid, axis=(1,2)), np.mean(self.fullGrid, axis=(0,2)), np.mean(self.fullGrid, axis=(0,1)) ]
+		actVals = self._runTestFunct(reducers)
+		for expVal, actVal in zip(expVals, actVals):
+			self.assertTrue( np.allclose(expVal, actVal) )
+
+	def testLineProfiles(self):
+		reducers = [tCode.CubeLineProfile(0,[1,2]), tCode.CubeLineProfile(1,[3,6]), tCode.CubeLineProfile(2,[4,0])]
+		expVals = [ self.fullGrid[:,1,2], self.fullGrid[3,:,6], self.fullGrid[4,0,:] ]
+		actVals = self._runTestFunct(reducers, useSidecar=True)
+		for expVal, actVal in zip(expVals, actVals):
+			self.assertTrue( np.allclose(expVal, actVal) )
+
+	def testSlabIntegrals(self):
+		reducers = [tCode.CubeSlabIntegral(axis=0, startIdx=1, endIdx=4), tCode.CubeSlabIntegral(axis=2, startIdx=3)]
+		expVals = [ self.voxelVolume*np.sum(self.fullGrid[1:4]), self.voxelVolume*np.sum(self.fullGrid[:,:,3:]) ]
+		actVals = self._runTestFunct(reducers)
+		self.assertAlmostEqual(expVals[0], actVals[0])
+		self.assertAlmostEqual(expVals[1], actVals[1])
+
+
+if __name__ == "__main__":
+	unittest.main()
+
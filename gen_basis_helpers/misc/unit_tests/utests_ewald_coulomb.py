@@ -0,0 +1,154 @@
+
+import copy
+import itertools as it
+import unittest
+
+import numpy as np
+
+import plato_pylib.shared.ucell_class as uCellHelp
+
+import gen_basis_helpers.analyse_md.traj_core as trajCoreHelp
+import gen_basis_helpers.misc.smeared_charges_analysis as smearedHelp
+
+import gen_basis_helpers.misc.ewald_coulomb as tCode
+
+
+#Brute force sum in reciprocal space only (converges fine for diffuse Gaussians)
+def _getPureRecipSpaceSmearedMatrix(inpCell, charges, exponents, maxIdx=14):
+	lattVects = np.array(inpCell.lattVects)
+	volume = abs(np.linalg.det(lattVects))
+	kIndices = np.array( list(it.product(range(-maxIdx,maxIdx+1), repeat=3)) )
+	kVects = kIndices[np.any(kIndices!=0,axis=1)] @ (2*np.pi*np.linalg.inv(lattVects).T)
+	kSq = np.sum(kVects**2, axis=1)
+	coords = np.array( [x[:3] for x in inpCell.cartCoords] )
+
+	nAtoms = len(coords)
+	gammas = tCode.getSmearedPairGammas(exponents, range(nAtoms), range(nAtoms))
+	outMatrix = np.zeros( (nAtoms,nAtoms) )
+	for idxA, idxB in it.product(range(nAtoms), repeat=2):
+		recipTerms = np.exp( -kSq/(4*gammas[idxA][idxB]**2) ) * np.cos(kVects @ (coords[idxB]-coords[idxA])) / kSq
+		selfTerm = 2*gammas[idxA][idxB]/np.sqrt(np.pi) if idxA==idxB else 0
+		outMatrix[idxA][idxB] = charges[idxA]*charges[idxB]*( (4*np.pi/volume)*np.sum(recipTerms) - selfTerm )
+	return outMatrix
+
+
+class TestEwaldInteractionMatrix(unittest.TestCase):
+
+	def setUp(self):
+		self.lattParams, self.lattAngles = [4,5,6], [80,95,100]
+		self.cartCoords = [ [0.5,1.2,3.1,"X"], [2.9,0.3,1.1,"Y"], [3.5,3.9,5.2,"X"], [1.1,2.2,0.4,"Z"] ]
+		self.charges = [0.5, -0.3, 0.2, -0.6]
+		self.exponents = [0.6, 0.3, 0.9, 0.45]
+		self.indicesA, self.indicesB = [0,1,2,3], [0,1,2,3]
+		self.realSpaceCutoff = None
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.cellA = uCellHelp.UnitCell(lattParams=self.lattParams, lattAngles=self.lattAngles)
+		self.cellA.cartCoords = self.cartCoords
+
+	def _runTestFunct(self):
+		currKwargs = {"exponents":self.exponents, "realSpaceCutoff":self.realSpaceCutoff}
+		return tCode.getEwaldInteractionMatrix(self.cellA, self.charges, self.indicesA, self.indicesB, **currKwargs)
+
+	def testSmearedMatchesPureRecipSpaceSum(self):
+		expMatrix = _getPureRecipSpaceSmearedMatrix(self.cellA, self.charges, self.exponents)
+		actMatrix = self._runTestFunct()
+		self.assertTrue( np.allclose(expMatrix, actMatrix, atol=1e-7) )
+
+	def testIndependentOfRealSpaceCutoff_pointCharges(self):
+		self.exponents = None
+		expMatrix = self._runTestFunct()
+		self.realSpaceCutoff = 7
+		actMatrix = self._runTestFunct()
+		self.assertTrue( np.allclose(expMatrix, actMatrix, atol=1e-7) )
+
+	def testSubsetOfIndices(self):
+		expMatrix = self._runTestFunct()[[2,1]][:,[0,3,2]]
+		self.indicesA, self.indicesB = [2,1], [0,3,2]
+		actMatrix = self._runTestFunct()
+		self.assertTrue( np.allclose(expMatrix, actMatrix) )
+
+	def testMadelungConstantRockSalt(self):
+		self.lattParams, self.lattAngles = [2,2,2], [90,90,90]
+		self.cartCoords = [ [x,y,z,"X"] for x,y,z in it.product([0,1],repeat=3) ]
+		self.charges = [ 1 if (sum(x[:3])%2==0) else -1 for x in self.cartCoords ]
+		self.exponents = None
+		self.createTestObjs()
+
+		allIndices = [idx for idx in range(8)]
+		expVal = -1.747564594633*4 #4 ion pairs with nearest neighbour distance of 1
+		actVal = tCode.getEwaldInteractionEnergy(self.cellA, self.charges, allIndices, allIndices)
+		self.assertAlmostEqual(expVal, actVal, places=6)
+
+
+class TestGetGroupEnergyFromInteractionMatrix(unittest.TestCase):
+
+	def setUp(self):
+		self.interMatrix = [ [1,2,np.nan], [3,4,5] ]
+		self.indicesA = [4,2]
+		self.indicesB = [1,4,2]
+
+	def _runTestFunct(self):
+		return tCode.getGroupEnergyFromInteractionMatrix(self.interMatrix, self.indicesA, self.indicesB)
+
+	def testPairsInBothOrdersCountedOnce(self):
+		expVal = 1 + 0.5*2 + 3 + 0.5*4 + 0.5*5
+		actVal = self._runTestFunct()
+		self.assertAlmostEqual(expVal, actVal)
+
+	def testZeroForEmptyGroup(self):
+		self.interMatrix, self.indicesA = np.zeros((0,3)), list()
+		self.assertEqual(0, self._runTestFunct())
+
+
+class TestGroupInteractionEnergiesOverTraj(unittest.TestCase):
+
+	def setUp(self):
+		self.randState = np.random.RandomState(7)
+		self.lattParams, self.lattAngles = [7,8,9], [90,90,110]
+		self.eles = ["O","H","H","Mg","O","H"]
+		self.exponentDict = {"O":0.5, "H":0.8, "Mg":0.3}
+		self.charges = [-0.8, 0.4, 0.4, 1.2, -1.0, -0.2]
+		self.indicesA, self.indicesB = [0,1,2], [2,3,4,5]
+		self.distLenConv = 1.5
+		self.nFrames = 3
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		trajSteps = list()
+		for stepIdx in range(self.nFrames):
+			currCell = uCellHelp.UnitCell(lattParams=self.lattParams, lattAngles=self.lattAngles)
+			currCell.fractCoords = [ self.randState.uniform(size=3).tolist() + [ele] for ele in self.eles ]
+			trajSteps.append( trajCoreHelp.TrajStepFlexible(unitCell=currCell, step=stepIdx) )
+		self.traj = trajCoreHelp.TrajectoryInMemory(trajSteps)
+		self.exponents = [ self.exponentDict[ele] for ele in self.eles ]
+
+	def _runTestFunct(self, **kwargs):
+		currKwargs = {"exponents":self.exponents, "distLenConv":self.distLenConv}
+		currKwargs.update(kwargs)
+		return tCode.getGroupInteractionEnergiesOverTraj(self.traj, self.charges, self.indicesA, self.indicesB, **currKwargs)
+
+	def testMatchesSingleGeomFunctions_ewald(self):
+		expVals = [ smearedHelp.getEwaldCoulombInteractionEnergy(step.unitCell, self.exponentDict, self.charges, self.indicesA, self.indicesB, distLenConv=self.distLenConv, eConv=2)
+		            for step in self.traj ]
+		actVals = self._runTestFunct(coulombConst=2)
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testMatchesSingleGeomFunctions_minImage(self):
+		expVals = [ smearedHelp.getCoulombInteractionEnergyStandard(step.unitCell, self.exponentDict, self.charges, self.indicesA, self.indicesB, distLenConv=self.distLenConv)
+		            for step in self.traj ]
+		actVals = self._runTestFunct(ewaldSum=False)
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testChargesForEachFrame(self):
+		frameCharges = [ [x*(idx+1) for x in self.charges] for idx in range(self.nFrames) ]
+		unscaledVals = self._runTestFunct(exponents=None)
+		expVals = np.array( [val*((idx+1)**2) for idx,val in enumerate(unscaledVals)] )
+		actVals = tCode.getGroupInteractionEnergiesOverTraj(self.traj, frameCharges, self.indicesA, self.indicesB, distLenConv=self.distLenConv)
+		self.assertTrue( np.allclose(expVals, actVals) )
+
+
+if __name__ == "__main__":
+	unittest.main()
+
@@ -5,6 +5,8 @@ import unittest.mock as mock
 
 import numpy as np
 
+import plato_pylib.shared.ucell_class as uCellHelp
+
 import gen_basis_helpers.misc.manip_cube_data as tCode
 
 
@@ -159,6 +161,19 @@ class TestCubeDataProps(unittest.TestCase):
 		
 		self.assertTrue( np.allclose( np.array(expCentresTot), np.array(actCentresTot) ) )
 
+	def testCentresUpdatedWhenVectorsModified(self):
+		unused = self.testObjA.centres
+		self.vectC[-1] = 3.0
+		expCentre = [0.2, 0.35, 1.5]
+		actCentre = self.testObjA.centres[0][0][0]
+		self.assertTrue( np.allclose(expCentre, actCentre) )
+
+	def testFractIndicesRoundTrip(self):
+		expIndices = [ [0.5,1.2,0.1], [-1,3,2.5] ]
+		positions = self.testObjA.getPositionsForFractIndices(expIndices)
+		actIndices = self.testObjA.getFractIndicesForPoints(positions)
+		self.assertTrue( np.allclose(np.array(expIndices), actIndices) )
+
 
 class TestGetCubeIdxClosestToPoint(unittest.TestCase):
 
@@ -205,6 +220,81 @@ class TestGetCubeIdxClosestToPoint(unittest.TestCase):
 		actIdx = self._runTestFunct()
 		self.assertEqual( expIdx, actIdx )
 
+	def testExpectedCaseD_pointOutsideGrid(self):
+		self.inpPoint = [-3.0, 2.0, 0.0]
+		expIdx = (0,1)
+		actIdx = self._runTestFunct()
+		self.assertEqual( expIdx, actIdx )
+
+	def testBatchedMatchesSinglePoints(self):
+		inpPoints = [ [0,0,0], [0.65,1.0,0.0], [1.8,0.3,0.0], [-3.0,2.0,0.0] ]
+		expIndices = [ [0,0], [1,1], [2,0], [0,1] ]
+		actIndices = self.testObjA.getIndicesClosestToPoints(inpPoints)
+		self.assertEqual( expIndices, actIndices.tolist() )
+
+	#Local searches can stop at the wrong voxel for skewed/anisotropic cells, so check random triclinic grids against a full scan
+	def testBatchedMatchesBruteForce_skewedGrids(self):
+		randState = np.random.RandomState(5)
+		for unused in range(20):
+			cell = uCellHelp.UnitCell( lattParams=randState.uniform(3,8,3).tolist(), lattAngles=randState.uniform(55,125,3).tolist() )
+			shape = tuple( randState.randint(3,13,3) )
+			cellVects = np.array(cell.lattVects)
+			testObj = tCode.CubeDataSimple( (cellVects/np.array(shape)[:,np.newaxis]).tolist(), np.zeros(shape) )
+			inpPoints = randState.uniform(-0.5,1.5,(200,3)) @ cellVects
+
+			distsSq = np.sum( (inpPoints[:,np.newaxis,:] - testObj.centres.reshape(-1,3)[np.newaxis,:,:])**2, axis=2 )
+			expIndices = np.array( np.unravel_index(np.argmin(distsSq, axis=1), shape) ).T
+			actIndices = testObj.getIndicesClosestToPoints(inpPoints)
+			self.assertTrue( np.array_equal(expIndices, actIndices) )
+
+
+class TestGetInterpolatedValsAtPoints(unittest.TestCase):
+
+	def setUp(self):
+		self.vectors = [ [0.5,0.0,0.0], [0.1,0.4,0.0], [0.0,0.05,0.3] ]
+		self.origin = [1,1,1]
+		self.shape = (4,5,6)
+		self.periodic = False
+		self.fillValue = np.nan
+		self.linearFunct = lambda x: 2*x[...,0] - x[...,1] + 3*x[...,2]
+		self._createTestObjs()
+
+	def _createTestObjs(self):
+		self.testObj = tCode.CubeDataSimple(self.vectors, np.zeros(self.shape), origin=self.origin)
+		self.testObj.values = self.linearFunct( self.testObj.centres )
+
+	def _runTestFunct(self, inpPoints):
+		currKwargs = {"periodic":self.periodic, "fillValue":self.fillValue}
+		return tCode.getInterpolatedValsAtPointsForCubeDataObj(inpPoints, self.testObj, **currKwargs)
+
+	def testLinearFunctionReproducedExactly(self):
+		fractIndices = [ [0.5,0.5,0.5], [1.2,3.7,2.1], [3.4,0.9,5.5] ]
+		inpPoints = self.testObj.getPositionsForFractIndices(fractIndices)
+		expVals = self.linearFunct(inpPoints)
+		actVals = self._runTestFunct(inpPoints)
+		self.assertTrue( np.allclose(expVals, actVals) )
+
+	def testOutputShapeMatchesLeadingShape(self):
+		inpPoints = self.testObj.getPositionsForFractIndices( np.full((3,2,3), 1.5) )
+		actVals = self._runTestFunct(inpPoints)
+		self.assertEqual( (3,2), actVals.shape )
+
+	def testFillValueOutsideGrid(self):
+		self.fillValue = -5
+		inpPoints = self.testObj.getPositionsForFractIndices( [[-0.1,1,1], [1.2,1.3,1.4]] )
+		actVals = self._runTestFunct(inpPoints)
+		self.assertEqual(-5, actVals[0])
+		self.assertNotEqual(-5, actVals[1])
+
+	def testPeriodicInterpolatesAcrossBoundary(self):
+		self.periodic = True
+		self.testObj.values = np.zeros(self.shape)
+		self.testObj.values[0], self.testObj.values[-1] = 2, 4
+		inpPoints = self.testObj.getPositionsForFractIndices( [[0,1,1], [4,1,1], [-4,1,1]] )
+		expVals = [3,3,3]
+		actVals = self._runTestFunct(inpPoints)
+		self.assertTrue( np.allclose(expVals, actVals) )
+
 
 class TestGetLowerDimensionCubeData_keepSingleBinIdx(unittest.TestCase):
 
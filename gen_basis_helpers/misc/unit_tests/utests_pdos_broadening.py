@@ -0,0 +1,145 @@
+
+import unittest
+
+import numpy as np
+
+import gen_basis_helpers.cp2k.parse_pdos_files as parsePdosHelp
+import gen_basis_helpers.misc.pdos_broadening as tCode
+
+
+def _getGauVals(xVals, centre, fwhm):
+	sigma = fwhm / (2*np.sqrt(2*np.log(2)))
+	return np.exp( -((np.array(xVals)-centre)**2)/(2*sigma**2) ) / (sigma*np.sqrt(2*np.pi))
+
+
+class TestBroadenedSpectraFromArrays(unittest.TestCase):
+
+	def setUp(self):
+		self.randState = np.random.RandomState(2)
+		self.xVals = np.linspace(-6, 4, 801)
+		self.eigenVals = self.randState.uniform(-9, 7, size=(3,40))
+		self.intensities = self.randState.uniform(size=(3,40,2))
+		self.fwhm = 0.6
+		self.occs = None
+		self.kernel = "gaussian"
+		self.method = None
+
+	def _runTestFunct(self):
+		currKwargs = {"occs":self.occs, "kernel":self.kernel, "method":self.method}
+		return tCode.getBroadenedSpectraFromArrays(self.xVals, self.eigenVals, self.intensities, self.fwhm, **currKwargs)
+
+	def testDirectMatchesExplicitSum(self):
+		self.method = "direct"
+		self.occs = self.randState.uniform(size=(3,40))
+		expVals = np.zeros( (3,2,len(self.xVals)) )
+		for batchIdx in range(3):
+			for eigIdx in range(40):
+				currGau = _getGauVals(self.xVals, self.eigenVals[batchIdx][eigIdx], self.fwhm)
+				for seriesIdx in range(2):
+					currWeight = self.intensities[batchIdx][eigIdx][seriesIdx]*self.occs[batchIdx][eigIdx]
+					expVals[batchIdx][seriesIdx] += currWeight*currGau
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(expVals, actVals) )
+
+	def testFFTMatchesDirect_gaussian(self):
+		self.method = "direct"
+		expVals = self._runTestFunct()
+		self.method = "fft"
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(expVals, actVals, rtol=0, atol=1e-3*np.max(expVals)) )
+
+	def testFFTMatchesDirect_lorentzian(self):
+		self.kernel = "lorentzian"
+		self.method = "direct"
+		expVals = self._runTestFunct()
+		self.method = None
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(expVals, actVals, rtol=0, atol=1e-3*np.max(expVals)) )
+
+	def testFFTMatchesDirect_descendingGrid(self):
+		self.xVals = np.linspace(5, -10, 1501)
+		self.eigenVals, self.intensities = np.array([[4.9, -9.95, 6.0]]), np.ones( (1,3,1) )
+		self.fwhm = 0.5
+		self.method = "direct"
+		expVals = self._runTestFunct()
+		self.method = "fft"
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(expVals, actVals, rtol=0, atol=1e-3*np.max(expVals)) )
+
+	def testDefaultMethodMatchesDirectForCoarseGrid(self):
+		self.xVals = np.linspace(-10, 5, 3)
+		self.eigenVals, self.intensities = np.array([[-2.3, 4.6]]), np.ones( (1,2,1) )
+		self.fwhm = 0.5
+		self.method = "direct"
+		expVals = self._runTestFunct()
+		self.method = None
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(expVals, actVals) )
+
+	def testBatchDimensionsKept(self):
+		self.eigenVals, self.intensities = self.eigenVals.reshape( (3,1,40) ), self.intensities.reshape( (3,1,40,2) )
+		expVals = [ tCode.getBroadenedSpectraFromArrays(self.xVals, eigs, iVals, self.fwhm) for eigs, iVals in zip(self.eigenVals, self.intensities) ]
+		actVals = self._runTestFunct()
+		self.assertEqual( (3,1,2,len(self.xVals)), actVals.shape )
+		self.assertTrue( np.allclose(np.array(expVals), actVals) )
+
+	def testUnevenGridUsesDirectAndFFTRaises(self):
+		self.xVals = [-1.0, 0.0, 0.5, 2.0]
+		expVals = np.array( [ [ sum([ iVal*_getGauVals(self.xVals, eig, self.fwhm) for eig,iVal in zip(eigs, iVals[:,idx]) ]) for idx in range(2) ]
+		                      for eigs, iVals in zip(self.eigenVals, self.intensities) ] )
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(expVals, actVals) )
+
+		self.method = "fft"
+		with self.assertRaises(ValueError):
+			self._runTestFunct()
+
+	def testRaisesForUnknownKernel(self):
+		self.kernel = "fake_kernel"
+		with self.assertRaises(ValueError):
+			self._runTestFunct()
+
+
+class TestBroadenedPdosFromFragments(unittest.TestCase):
+
+	def setUp(self):
+		self.xVals = np.linspace(-3, 3, 61)
+		self.fwhm = 0.5
+		self.multByOcc = False
+		self.separateShells = False
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		kwargsA = {"eigenValues":[-1.0,0.5,2.0], "occs":[2,2,0], "breakdowns":[ [0.1,0.2], [0.3,0.4], [0.5,0.6] ], "breakdownHeaders":["s","p"]}
+		kwargsB = {"eigenValues":[-0.5,1.0], "occs":[1,0.5], "breakdowns":[ [0.7], [0.8] ], "breakdownHeaders":["s"]}
+		self.fragA, self.fragB = parsePdosHelp.PdosFragmentStandard(**kwargsA), parsePdosHelp.PdosFragmentStandard(**kwargsB)
+
+	def _runTestFunct(self):
+		currKwargs = {"multByOcc":self.multByOcc, "separateShells":self.separateShells, "method":"direct"}
+		return tCode.getBroadenedPdosFromFragments([self.fragA, self.fragB], self.xVals, self.fwhm, **currKwargs)
+
+	def _getExpSpectrum(self, frag, shellIdx=None):
+		outVals = np.zeros( len(self.xVals) )
+		for eig, occ, breakdown in zip(frag.eigenValues, frag.occs, frag.breakdowns):
+			weight = sum(breakdown) if shellIdx is None else breakdown[shellIdx]
+			weight = weight*occ if self.multByOcc else weight
+			outVals += weight*_getGauVals(self.xVals, eig, self.fwhm)
+		return outVals
+
+	def testMergedShells_multByOcc(self):
+		self.multByOcc = True
+		expVals = np.array( [ [self._getExpSpectrum(self.fragA)], [self._getExpSpectrum(self.fragB)] ] )
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(expVals, actVals) )
+
+	def testSeparateShells_zeroPaddedForMissingShells(self):
+		self.separateShells = True
+		expVals = np.array( [ [self._getExpSpectrum(self.fragA,0), self._getExpSpectrum(self.fragA,1)],
+		                      [self._getExpSpectrum(self.fragB,0), np.zeros(len(self.xVals))] ] )
+		actVals = self._runTestFunct()
+		self.assertTrue( np.allclose(expVals, actVals) )
+
+
+if __name__ == "__main__":
+	unittest.main()
+
@@ -96,6 +96,24 @@ class TestEstimateCoulombEnergyBetweenIndicesInGeom(unittest.TestCase):
 		actInt = self._runTestFunct()
 		self.assertAlmostEqual(expInt,actInt)
 
+	def testExpectedIntEnergy_partiallyOverlappingIndices(self):
+		self.indicesA = [0,1]
+		self.indicesB = [1,2,3]
+		intAB, intAC, intAD = -0.71998, 0.959973333333333, 0.287992
+		intBC, intBD = -0.431988, -0.431988
+		expInt = intAB + intAC + intAD + intBC + intBD
+		actInt = self._runTestFunct()
+		self.assertAlmostEqual(expInt,actInt)
+
+	def testEwaldVersionTendsToMinImageForNeutralPairInLargeCell(self):
+		self.lattParams = [500,500,500]
+		self.charges = [0.5, -0.5, 0.3, -0.3]
+		self.indicesA, self.indicesB = [0,1], [2,3]
+		self.createTestObjs()
+		expInt = self._runTestFunct()
+		actInt = tCode.getEwaldCoulombEnergyBetweenIndicesForPointCharges(self.cellA, self.charges, self.indicesA, self.indicesB, lenConv=self.lenConv)
+		self.assertAlmostEqual(expInt, actInt, places=5)
+
 class TestCoulombEnergyFromDistsAndCharges(unittest.TestCase):
 
 	def setUp(self):
@@ -3,6 +3,7 @@
 """ Purpose of these classes is to provide a standard way of running any calculation sets """
 
 
+from . import job_scheduler as jobSchedHelp
 from . import misc_utils as misc
 
 class BaseStandardInputObj():
@@ -177,3 +178,37 @@ class StandardMapFunction():
 	def __call__(self, stdInpObj):
 		raise NotImplementedError("")
 
+
+def createOutputObjsUsingScheduler(inpObjs, scheduler, mapFunction=None):
+	""" Runs the runComms for a set of input objects using a job scheduler. Each output object is created as soon as all runComms for its input object have finished (i.e. while other jobs may still be running), so parsing overlaps with running calculations
+
+	Args:
+		inpObjs: (iter of BaseStandardInputObj objects) runComms can be strings or job_scheduler.ShellJob objects
+		scheduler: (job_scheduler.AsyncShellJobScheduler) Anything with an equivalent iterCompletedJobs method is fine
+		mapFunction: (Optional, f(inputObject)) Passed to createOutputObj for each input object if set
+			 
+	Returns
+		outObjs: (list of BaseStandardOutputObj) One per input object, same order as inpObjs
+
+	NOTES:
+		Failed jobs are not treated specially; createOutputObj is still called (and will generally raise when parsing the output)
+ 
+	"""
+	inpObjs = list(inpObjs)
+	kwargDict = dict() if mapFunction is None else {"mapFunction":mapFunction}
+	jobsPerObj = [jobSchedHelp.getShellJobsFromRunComms(x.runComms) for x in inpObjs]
+	nJobsLeft = [len(x) for x in jobsPerObj]
+	objIdxFromJobId = { id(job):idx for idx,jobs in enumerate(jobsPerObj) for job in jobs }
+
+	outObjs = [None for x in inpObjs]
+	for idx in [idx for idx,nJobs in enumerate(nJobsLeft) if nJobs==0]:
+		outObjs[idx] = inpObjs[idx].createOutputObj(**kwargDict)
+
+	for job in scheduler.iterCompletedJobs( [job for jobs in jobsPerObj for job in jobs] ):
+		idx = objIdxFromJobId[id(job)]
+		nJobsLeft[idx] -= 1
+		if nJobsLeft[idx] == 0:
+			outObjs[idx] = inpObjs[idx].createOutputObj(**kwargDict)
+
+	return outObjs
+
@@ -0,0 +1,265 @@
+""" Asynchronous scheduler for running shell commands (e.g. preRunShellComms of workflows) on a single node. Commands can request a number of cores and an amount of memory, can depend on other commands and can be skipped if their outputs are already complete. Completed jobs are streamed back as they finish, so (for example) output files can be parsed while other jobs are still running """
+
+import asyncio
+import queue
+import subprocess
+import threading
+
+
+STATUS_PENDING = "pending"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+STATUS_DEPENDENCY_FAILED = "dependencyFailed"
+
+_SUCCESS_STATUSES = {STATUS_COMPLETED, STATUS_SKIPPED}
+_FAILED_STATUSES = {STATUS_FAILED, STATUS_DEPENDENCY_FAILED}
+
+
+class ShellJob(str):
+	""" Represents a single shell command along with the resources it needs. The status/returnCode attributes are set by the scheduler after running
+
+	NOTES:
+		This is a str subclass (the value is comm), so code expecting plain run commands (e.g. preRunShellComms passed to plato_pylib job runners) still works. Pickling gives a plain str
+
+	"""
+
+	def __new__(cls, comm, *args, **kwargs):
+		return super().__new__(cls, comm)
+
+	def __init__(self, comm, nCores=1, memory=0, dependencies=None, completedChecker=None):
+		""" Initializer
+
+		Args:
+			comm: (str) Command to run; passed to the shell
+			nCores: (int) Number of cores this command uses
+			memory: (float) Memory this command needs. Units only need to be consistent with those passed to the scheduler
+			dependencies: (Optional, iter of ShellJob) These must all finish successfully (or be skipped) before this job is started
+			completedChecker: (Optional, f()->Bool) Called when the job is ready to run; if it returns True the job is skipped (e.g. because its output is already complete)
+
+		"""
+		self.comm = comm
+		self.nCores = nCores
+		self.memory = memory
+		self.dependencies = list() if dependencies is None else list(dependencies)
+		self.completedChecker = completedChecker
+		self.status = STATUS_PENDING
+		self.returnCode = None
+
+	def __repr__(self):
+		return "ShellJob(comm={!r}, nCores={}, memory={}, status={})".format(self.comm, self.nCores, self.memory, self.status)
+
+	def __reduce__(self):
+		return (str, (self.comm,))
+
+
+def getShellJobsFromRunComms(runComms):
+	""" Converts an iter of run commands into ShellJob objects. Strings become single-core jobs with no dependencies, ShellJob objects are passed through unchanged
+
+	Args:
+		runComms: (iter of str/ShellJob objects, or None) e.g. preRunShellComms from a workflow
+
+	Returns
+		outJobs: (list of ShellJob)
+
+	"""
+	if runComms is None:
+		return list()
+	return [x if isinstance(x,ShellJob) else ShellJob(x) for x in runComms]
+
+
+class AsyncShellJobScheduler():
+	""" Runs ShellJob objects on a fixed pool of cores (and optionally memory), starting any job whose dependencies are done as soon as enough resources are free (first-fit in the order jobs are passed) """
+
+	def __init__(self, nCores, memory=None, quiet=True):
+		""" Initializer
+
+		Args:
+			nCores: (int) Total number of cores available
+			memory: (Optional, float) Total memory available. Default is to not limit by memory
+			quiet: (Bool) If True stdout/stderr of the commands are discarded
+
+		"""
+		self.nCores = nCores
+		self.memory = memory
+		self.quiet = quiet
+
+	def runJobs(self, jobs, onJobComplete=None):
+		""" Runs all jobs and waits for them to finish
+
+		Args:
+			jobs: (iter of ShellJob/str) Jobs to run; see getShellJobsFromRunComms
+			onJobComplete: (Optional, f(ShellJob)) Called (in the calling thread) as each job finishes/is skipped, while other jobs are still running
+
+		Returns
+			outJobs: (list of ShellJob) Same order as jobs; status and returnCode attributes are set
+
+		Raises:
+			ValueError: If a job needs more resources than are available, depends on a job not in jobs, or dependencies are circular
+		"""
+		outJobs = getShellJobsFromRunComms(jobs)
+		for job in self.iterCompletedJobs(outJobs):
+			if onJobComplete is not None:
+				onJobComplete(job)
+		return outJobs
+
+	def iterCompletedJobs(self, jobs):
+		""" Generator which runs jobs in a background thread and yields each one as it finishes
+
+		Args:
+			jobs: (iter of ShellJob/str) Jobs to run; see getShellJobsFromRunComms
+
+		Yields
+			job: (ShellJob) status and returnCode attributes are set. Order is the order they finished in
+
+		Raises:
+			ValueError: If a job needs more resources than are available, depends on a job not in jobs, or dependencies are circular
+
+		NOTES:
+			Jobs keep running (and new ones are started) while the caller processes the yielded job. Stopping iteration early does NOT cancel the remaining jobs
+
+		"""
+		jobs = getShellJobsFromRunComms(jobs)
+		self._checkJobsCanAllRun(jobs)
+		outQueue, endSentinel = queue.Queue(), object()
+
+		def _runInThread():
+			try:
+				asyncio.run( self.runJobsAsync(jobs, onJobComplete=outQueue.put) )
+			except BaseException as e:
+				outQueue.put(e)
+			finally:
+				outQueue.put(endSentinel)
+
+		thread = threading.Thread(target=_runInThread, daemon=True)
+		thread.start()
+
+		while True:
+			currVal = outQueue.get()
+			if currVal is endSentinel:
+				break
+			elif isinstance(currVal, BaseException):
+				raise currVal
+			yield currVal
+
+		thread.join()
+
+	async def runJobsAsync(self, jobs, onJobComplete=None):
+		""" Coroutine version of runJobs; for use within an existing event loop. onJobComplete is called within the event loop so should be fast (it delays starting new jobs) """
+		jobs = getShellJobsFromRunComms(jobs)
+		self._checkJobsCanAllRun(jobs)
+		onJobComplete = (lambda job: None) if onJobComplete is None else onJobComplete
+		for job in jobs:
+			job.status, job.returnCode = STATUS_PENDING, None
+
+		pending, running, checkedIds = list(jobs), dict(), set()
+		freeResources = {"nCores":self.nCores, "memory":self.memory}
+
+		while (len(pending)>0) or (len(running)>0):
+			for job in self._popJobsThatDontNeedRunning(pending, checkedIds):
+				onJobComplete(job)
+
+			for job in self._popJobsToStart(pending, freeResources):
+				running[ asyncio.ensure_future(self._runSingleJob(job)) ] = job
+
+			if len(running)==0:
+				if len(pending)>0:
+					raise RuntimeError("Unable to start any of the remaining jobs: {}".format(pending))
+				continue
+
+			finished, unused = await asyncio.wait( list(running.keys()), return_when=asyncio.FIRST_COMPLETED )
+			for task in finished:
+				job = running.pop(task)
+				self._updateFreeResources(freeResources, job, sign=1)
+				job.returnCode = task.result()
+				job.status = STATUS_COMPLETED if job.returnCode==0 else STATUS_FAILED
+				onJobComplete(job)
+
+		return jobs
+
+	async def _runSingleJob(self, job):
+		outStream = subprocess.DEVNULL if self.quiet else None
+		process = await asyncio.create_subprocess_shell(job.comm, stdout=outStream, stderr=outStream)
+		return await process.wait()
+
+	#Jobs whose dependencies failed, or whose outputs are already complete. Loops since marking one job can affect others
+	#checkedIds means we only call completedChecker once per job
+	def _popJobsThatDontNeedRunning(self, pending, checkedIds):
+		outJobs, anyChanged = list(), True
+		while anyChanged:
+			anyChanged = False
+			for job in list(pending):
+				depStatuses = [x.status for x in job.dependencies]
+				if any([x in _FAILED_STATUSES for x in depStatuses]):
+					job.status = STATUS_DEPENDENCY_FAILED
+				elif not all([x in _SUCCESS_STATUSES for x in depStatuses]):
+					continue
+				elif (id(job) not in checkedIds) and (job.completedChecker is not None) and job.completedChecker():
+					job.status = STATUS_SKIPPED
+				else:
+					checkedIds.add(id(job))
+					continue
+				_removeJob(pending, job)
+				outJobs.append(job)
+				anyChanged = True
+		return outJobs
+
+	def _popJobsToStart(self, pending, freeResources):
+		outJobs = list()
+		for job in list(pending):
+			if not all([x.status in _SUCCESS_STATUSES for x in job.dependencies]):
+				continue
+			if self._jobFitsInResources(job, freeResources):
+				self._updateFreeResources(freeResources, job, sign=-1)
+				_removeJob(pending, job)
+				outJobs.append(job)
+		return outJobs
+
+	def _jobFitsInResources(self, job, resources):
+		if job.nCores > resources["nCores"]:
+			return False
+		if (resources["memory"] is not None) and (job.memory > resources["memory"]):
+			return False
+		return True
+
+	def _updateFreeResources(self, freeResources, job, sign):
+		freeResources["nCores"] += sign*job.nCores
+		if freeResources["memory"] is not None:
+			freeResources["memory"] += sign*job.memory
+
+	def _checkJobsCanAllRun(self, jobs):
+		totalResources = {"nCores":self.nCores, "memory":self.memory}
+		for job in jobs:
+			if not self._jobFitsInResources(job, totalResources):
+				raise ValueError("{} needs more resources than available (nCores={}, memory={})".format(job, self.nCores, self.memory))
+
+		jobIds = set([id(x) for x in jobs])
+		for job in jobs:
+			if any([id(x) not in jobIds for x in job.dependencies]):
+				raise ValueError("{} depends on a job which isnt being run".format(job))
+
+		_checkNoCircularDependencies(jobs)
+
+
+#list.remove uses ==, which would match any job with the same command string
+def _removeJob(jobs, job):
+	jobs.pop( [id(x) for x in jobs].index(id(job)) )
+
+
+def _checkNoCircularDependencies(jobs):
+	visited, inStack = set(), set()
+
+	def _visit(job):
+		if id(job) in inStack:
+			raise ValueError("Circular dependency found involving {}".format(job))
+		if id(job) in visited:
+			return
+		inStack.add(id(job))
+		for dep in job.dependencies:
+			_visit(dep)
+		inStack.remove(id(job))
+		visited.add(id(job))
+
+	for job in jobs:
+		_visit(job)
+
@@ -1,6 +1,7 @@
 import abc
 
 from . import creator_resetable_kwargs as baseCreator
+from . import job_scheduler as jobSchedHelp
 
 class CalcMethod(abc.ABC):
 
@@ -27,6 +28,11 @@ class CalcMethod(abc.ABC):
 		""" Command to run the job. Should be possible to pass to subprocess.call """
 		pass
 
+	@property
+	def shellJob(self):
+		""" job_scheduler.ShellJob for runComm which uses nCores; this is what workflows return in preRunShellComms. It is also a str equal to runComm """
+		return jobSchedHelp.ShellJob(self.runComm, nCores=self.nCores)
+
 	@property
 	@abc.abstractmethod
 	def parsedFile(self):
@@ -128,6 +134,11 @@ class StubCalcMethodFromParsedFileObject(CalcMethod):
 	def runComm(self):
 		return list()
 
+	#Nothing to run, so no job
+	@property
+	def shellJob(self):
+		return self.runComm
+
 	@property
 	def parsedFile(self):
 		return self._parsedFile
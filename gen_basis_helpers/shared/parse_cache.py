@@ -0,0 +1,145 @@
+""" Persistent (on-disk) cache for the results of parsing output files. Results are pickled alongside the parsed files and keyed on the size, modification time and content hash of every input file; so they are automatically invalidated when any input file changes (or when files are added/removed). Cache files are written atomically (write to temp file then rename) so they can be shared between processes """
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+
+CACHE_FILE_EXT = ".parse_cache.pkl"
+_CACHE_FORMAT_VERSION = 1
+_HASH_CHUNK_SIZE = 2**20
+
+#If a file was modified this close to the cache being written we cant trust size/mtime to detect changes (mtimes have limited resolution) so always compare hashes
+_RACY_WINDOW_NS = 2*(10**9)
+
+
+def getCachedOrParsedValue(cachePath, inpPaths, parseFunct, key=None):
+	""" Returns the cached value of parseFunct() if inpPaths are unchanged since it was cached; else calls parseFunct() and caches the result
+
+	Args:
+		cachePath: (str) Path to the cache file
+		inpPaths: (iter of str) Paths to all files which parseFunct() depends on. Any missing paths are ignored (so the cache is invalidated if they later appear)
+		parseFunct: (f()) Function that returns the parsed value. The value must be picklable to be cached
+		key: (Optional, picklable obj) Extra information the parsed value depends on (e.g. the runType). The cache is invalidated if this changes
+
+	Returns
+		outVal: Return value of parseFunct(), either freshly calculated or loaded from the cache
+
+	NOTES:
+		a) Errors in reading the cache file (e.g. its corrupt or from an older version) just lead to parseFunct() being called; similarly, failing to write the cache (e.g. read-only folder or unpicklable value) just means nothing is cached. Errors from parseFunct() are NOT caught
+		b) Input files are only hashed if their size/mtime differ from those stored (or are too close to the cache write time to be trusted). Thus a touched-but-unchanged file still gives a cache hit
+
+	"""
+	fingerprints = getFileFingerprints(inpPaths, hashFiles=False)
+	cachedDict = _readCacheFile(cachePath)
+
+	if (cachedDict is not None) and (cachedDict["key"] == key):
+		isMatch, needsUpdate, newFingerprints = _compareFingerprintsToCached(fingerprints, cachedDict)
+		if isMatch:
+			if needsUpdate:
+				_tryToWriteCacheFile(cachePath, newFingerprints, key, cachedDict["value"])
+			return cachedDict["value"]
+
+	#Hash BEFORE parsing; if files change while parsing the cache is simply invalid next time
+	fingerprints = getFileFingerprints(inpPaths)
+	outVal = parseFunct()
+	_tryToWriteCacheFile(cachePath, fingerprints, key, outVal)
+	return outVal
+
+
+def getFileFingerprints(inpPaths, hashFiles=True):
+	""" Gets information used to identify whether a set of files has changed
+
+	Args:
+		inpPaths: (iter of str) Paths to files. Missing files are skipped
+		hashFiles: (Bool) If True compute a content hash for each file; else the hash is set to None
+
+	Returns
+		outDict: (dict) Keys are absolute file paths, values are [size, mtimeNs, hash]
+
+	"""
+	outDict = dict()
+	for inpPath in inpPaths:
+		absPath = os.path.abspath(inpPath)
+		try:
+			statInfo = os.stat(absPath)
+			currHash = _getFileHash(absPath) if hashFiles else None
+		except FileNotFoundError:
+			continue
+		outDict[absPath] = [statInfo.st_size, statInfo.st_mtime_ns, currHash]
+	return outDict
+
+
+def _getFileHash(inpPath):
+	outHash = hashlib.sha1()
+	with open(inpPath, "rb") as f:
+		for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+			outHash.update(chunk)
+	return outHash.hexdigest()
+
+
+#Returns (isMatch, needsUpdate, newFingerprints); needsUpdate means the stored fingerprints are out of date (but file contents are the same)
+def _compareFingerprintsToCached(fingerprints, cachedDict):
+	cachedPrints = cachedDict["fingerprints"]
+	if set(fingerprints.keys()) != set(cachedPrints.keys()):
+		return False, False, None
+
+	needsUpdate, newPrints = False, dict()
+	for path, (size, mtimeNs, unusedHash) in fingerprints.items():
+		cachedSize, cachedMtimeNs, cachedHash = cachedPrints[path]
+		if size != cachedSize:
+			return False, False, None
+		isRacy = mtimeNs >= cachedDict["writeTimeNs"] - _RACY_WINDOW_NS
+		if (mtimeNs != cachedMtimeNs) or isRacy:
+			try:
+				currHash = _getFileHash(path)
+			except FileNotFoundError:
+				return False, False, None
+			if currHash != cachedHash:
+				return False, False, None
+			needsUpdate = True #Rewriting means racy files are likely not racy next time
+		newPrints[path] = [size, mtimeNs, cachedHash]
+
+	return True, needsUpdate, newPrints
+
+
+def _readCacheFile(cachePath):
+	try:
+		with open(cachePath, "rb") as f:
+			outDict = pickle.load(f)
+	except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError, ValueError):
+		return None
+
+	if not isinstance(outDict, dict) or (outDict.get("version") != _CACHE_FORMAT_VERSION):
+		return None
+
+	return outDict
+
+
+def _tryToWriteCacheFile(cachePath, fingerprints, key, value):
+	try:
+		_writeCacheFile(cachePath, fingerprints, key, value)
+	except (OSError, pickle.PicklingError, TypeError, AttributeError):
+		pass
+
+
+def _writeCacheFile(cachePath, fingerprints, key, value):
+	outDict = {"version":_CACHE_FORMAT_VERSION, "key":key, "fingerprints":fingerprints, "value":value}
+	folder = os.path.split( os.path.abspath(cachePath) )[0]
+	fileDescriptor, tempPath = tempfile.mkstemp(dir=folder, prefix=".tmp_", suffix=CACHE_FILE_EXT) #Suffix means these get ignored in the same way as cache files
+	try:
+		with os.fdopen(fileDescriptor, "wb") as f:
+			outDict["writeTimeNs"] = _getFileSystemTimeNs(f)
+			pickle.dump(outDict, f, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(tempPath, cachePath)
+	except BaseException:
+		if os.path.exists(tempPath):
+			os.remove(tempPath)
+		raise
+
+
+#Use the file systems idea of "now" rather than the system clock (these can differ for network file systems)
+def _getFileSystemTimeNs(fileObj):
+	return os.fstat(fileObj.fileno()).st_mtime_ns
+
@@ -61,3 +61,44 @@ class TestStandardInputObj(unittest.TestCase):
 		mockedOutputClass.assert_called_with(fakeOutput,self.testLabelA)
 
 
+class TestCreateOutputObjsUsingScheduler(unittest.TestCase):
+
+	def setUp(self):
+		self.runCommsA, self.runCommsB, self.runCommsC = ["comm_a1", "comm_a2"], ["comm_b"], list()
+		self.mapFunction = None
+		self.createTestObjs()
+
+	def createTestObjs(self):
+		self.inpObjs = [mock.Mock(), mock.Mock(), mock.Mock()]
+		for inpObj, runComms in zip(self.inpObjs, [self.runCommsA, self.runCommsB, self.runCommsC]):
+			inpObj.runComms = runComms
+		self.callOrder = list()
+		self.scheduler = types.SimpleNamespace(iterCompletedJobs=self._iterCompletedJobs)
+
+	#Finishes jobs in reverse order; recording each finished job (and each output created) to check the order
+	def _iterCompletedJobs(self, jobs):
+		for job in reversed(list(jobs)):
+			self.callOrder.append(job.comm)
+			yield job
+
+	def _runTestFunct(self):
+		for idx,inpObj in enumerate(self.inpObjs):
+			inpObj.createOutputObj.side_effect = lambda *args, idx=idx, **kwargs: self.callOrder.append(idx) or idx
+		return tCode.createOutputObjsUsingScheduler(self.inpObjs, self.scheduler, mapFunction=self.mapFunction)
+
+	def testExpectedOutputOrder(self):
+		expVals = [0,1,2]
+		actVals = self._runTestFunct()
+		self.assertEqual(expVals, actVals)
+
+	def testOutputsCreatedAsSoonAsJobsFinish(self):
+		expCallOrder = [2, "comm_b", 1, "comm_a2", "comm_a1", 0]
+		self._runTestFunct()
+		self.assertEqual(expCallOrder, self.callOrder)
+
+	def testMapFunctionPassed(self):
+		self.mapFunction = mock.Mock()
+		self._runTestFunct()
+		for inpObj in self.inpObjs:
+			inpObj.createOutputObj.assert_called_with(mapFunction=self.mapFunction)
+
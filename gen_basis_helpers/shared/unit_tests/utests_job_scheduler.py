@@ -0,0 +1,147 @@
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+
+import gen_basis_helpers.shared.job_scheduler as tCode
+
+
+#Stands in for cp2k; sleeps then writes start/end times and a "PROGRAM ENDED AT" line to the output file. Exits with the requested return code
+_FAKE_EXE_STR = """
+import sys, time
+outPath, sleepTime, retCode = sys.argv[1], float(sys.argv[2]), int(sys.argv[3])
+startTime = time.time()
+time.sleep(sleepTime)
+with open(outPath, "wt") as f:
+	f.write("{} {}\\n PROGRAM ENDED AT\\n".format(startTime, time.time()))
+sys.exit(retCode)
+"""
+
+
+class TestAsyncShellJobScheduler(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.exePath = os.path.join(self.workFolder, "fake_cp2k.py")
+		with open(self.exePath, "wt") as f:
+			f.write(_FAKE_EXE_STR)
+		self.nCores = 2
+		self.memory = None
+		self.createTestObjs()
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def createTestObjs(self):
+		self.testObj = tCode.AsyncShellJobScheduler(self.nCores, memory=self.memory)
+
+	def _getOutPath(self, label):
+		return os.path.join(self.workFolder, label + ".cpout")
+
+	def _getJob(self, label, sleepTime=0.0, retCode=0, **kwargs):
+		comm = "{} {} {} {} {}".format(sys.executable, self.exePath, self._getOutPath(label), sleepTime, retCode)
+		return tCode.ShellJob(comm, **kwargs)
+
+	def _getStartAndEndTime(self, label):
+		with open(self._getOutPath(label), "rt") as f:
+			return [float(x) for x in f.readline().strip().split()]
+
+	def _getMaxOverlappingJobs(self, labels):
+		times = [self._getStartAndEndTime(x) for x in labels]
+		return max([ len([1 for start,end in times if start <= currStart < end]) for currStart,unused in times ])
+
+	def testAllJobsRunAndSucceed(self):
+		labels = ["job_a", "job_b", "job_c"]
+		jobs = [self._getJob(x) for x in labels]
+		outJobs = self.testObj.runJobs(jobs)
+		self.assertEqual( [tCode.STATUS_COMPLETED for x in labels], [x.status for x in outJobs] )
+		self.assertEqual( [0 for x in labels], [x.returnCode for x in outJobs] )
+		self.assertTrue( all([os.path.exists(self._getOutPath(x)) for x in labels]) )
+
+	def testStringCommsAccepted(self):
+		outJobs = self.testObj.runJobs( [self._getJob("job_a").comm] )
+		self.assertEqual(tCode.STATUS_COMPLETED, outJobs[0].status)
+
+	def testCoreLimitRespected(self):
+		labels = ["job_a", "job_b", "job_c"]
+		jobs = [self._getJob(x, sleepTime=0.3, nCores=2) for x in labels]
+		self.testObj.runJobs(jobs)
+		self.assertEqual(1, self._getMaxOverlappingJobs(labels))
+
+	def testMemoryLimitRespected(self):
+		self.nCores, self.memory = 4, 10
+		self.createTestObjs()
+		labels = ["job_a", "job_b"]
+		jobs = [self._getJob(x, sleepTime=0.3, memory=6) for x in labels]
+		self.testObj.runJobs(jobs)
+		self.assertEqual(1, self._getMaxOverlappingJobs(labels))
+
+	def testJobsRunConcurrentlyWhenTheyFit(self):
+		labels = ["job_a", "job_b"]
+		jobs = [self._getJob(x, sleepTime=0.5) for x in labels]
+		self.testObj.runJobs(jobs)
+		self.assertEqual(2, self._getMaxOverlappingJobs(labels))
+
+	def testDependentJobStartsAfterDependency(self):
+		jobA = self._getJob("job_a", sleepTime=0.3)
+		jobB = self._getJob("job_b", dependencies=[jobA])
+		self.testObj.runJobs([jobB, jobA])
+		endTimeA, startTimeB = self._getStartAndEndTime("job_a")[1], self._getStartAndEndTime("job_b")[0]
+		self.assertTrue( startTimeB >= endTimeA )
+
+	def testFailedDependencyMeansJobNotRun(self):
+		jobA = self._getJob("job_a", retCode=2)
+		jobB = self._getJob("job_b", dependencies=[jobA])
+		self.testObj.runJobs([jobA, jobB])
+		self.assertEqual( [tCode.STATUS_FAILED, tCode.STATUS_DEPENDENCY_FAILED], [jobA.status, jobB.status] )
+		self.assertEqual(2, jobA.returnCode)
+		self.assertFalse( os.path.exists(self._getOutPath("job_b")) )
+
+	def testCompletedJobsSkipped(self):
+		jobA = self._getJob("job_a", completedChecker=lambda: True)
+		jobB = self._getJob("job_b", dependencies=[jobA])
+		self.testObj.runJobs([jobA, jobB])
+		self.assertEqual( [tCode.STATUS_SKIPPED, tCode.STATUS_COMPLETED], [jobA.status, jobB.status] )
+		self.assertFalse( os.path.exists(self._getOutPath("job_a")) )
+
+	def testCompletionsStreamedInFinishOrder(self):
+		slowJob, fastJob = self._getJob("job_a", sleepTime=0.5), self._getJob("job_b")
+		actOrder = [x for x in self.testObj.iterCompletedJobs([slowJob, fastJob])]
+		self.assertEqual([fastJob, slowJob], actOrder)
+
+	def testOnJobCompleteCalledForEachJob(self):
+		jobs = [self._getJob("job_a"), self._getJob("job_b")]
+		completedJobs = list()
+		self.testObj.runJobs(jobs, onJobComplete=completedJobs.append)
+		self.assertEqual( sorted([id(x) for x in jobs]), sorted([id(x) for x in completedJobs]) )
+
+	#Jobs are str subclasses, so must not be confused with other jobs with the same command
+	def testJobsWithSameCommKeptSeparate(self):
+		jobA = self._getJob("job_a")
+		jobB = self._getJob("job_a", dependencies=[jobA])
+		outJobs = self.testObj.runJobs([jobB, jobA])
+		self.assertEqual( [tCode.STATUS_COMPLETED, tCode.STATUS_COMPLETED], [x.status for x in outJobs] )
+
+	def testShellJobUsableAsPlainComm(self):
+		job = self._getJob("job_a", nCores=2, completedChecker=lambda: False)
+		self.assertEqual(job.comm, job)
+		self.assertEqual( job.comm, pickle.loads(pickle.dumps(job)) )
+
+	def testRaisesIfJobNeedsTooManyCores(self):
+		with self.assertRaises(ValueError):
+			self.testObj.runJobs( [self._getJob("job_a", nCores=3)] )
+
+	def testRaisesForCircularDependencies(self):
+		jobA, jobB = self._getJob("job_a"), self._getJob("job_b")
+		jobA.dependencies, jobB.dependencies = [jobB], [jobA]
+		with self.assertRaises(ValueError):
+			self.testObj.runJobs([jobA, jobB])
+
+	def testRaisesForDependencyNotBeingRun(self):
+		jobA = self._getJob("job_a")
+		jobB = self._getJob("job_b", dependencies=[jobA])
+		with self.assertRaises(ValueError):
+			self.testObj.runJobs([jobB])
+
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import gen_basis_helpers.shared.parse_cache as tCode
+
+
+class TestGetCachedOrParsedValue(unittest.TestCase):
+
+	def setUp(self):
+		self.workFolder = tempfile.mkdtemp()
+		self.inpPaths = [os.path.join(self.workFolder, x) for x in ["file_a.txt", "file_b.txt"]]
+		self.cachePath = os.path.join(self.workFolder, "calc" + tCode.CACHE_FILE_EXT)
+		self.key = "md"
+		self.fileContents = ["contents_a", "contents_b"]
+		self.parseFunct = mock.Mock(side_effect=self._parseFiles)
+		self._writeFiles()
+
+	def tearDown(self):
+		shutil.rmtree(self.workFolder)
+
+	def _writeFiles(self):
+		for path, contents in zip(self.inpPaths, self.fileContents):
+			with open(path,"wt") as f:
+				f.write(contents)
+
+	def _parseFiles(self):
+		outVals = list()
+		for path in [x for x in self.inpPaths if os.path.exists(x)]:
+			with open(path,"rt") as f:
+				outVals.append(f.read())
+		return outVals
+
+	def _runTestFunct(self):
+		return tCode.getCachedOrParsedValue(self.cachePath, self.inpPaths, self.parseFunct, key=self.key)
+
+	def _setAllMTimesToPast(self, offsetSecs=100):
+		for path in self.inpPaths:
+			statInfo = os.stat(path)
+			os.utime(path, ns=(statInfo.st_atime_ns, statInfo.st_mtime_ns-offsetSecs*(10**9)))
+
+	def testParsesOnceForUnchangedFiles(self):
+		self._setAllMTimesToPast()
+		expVal = self.fileContents
+		actVals = [self._runTestFunct() for x in range(3)]
+		self.assertEqual(1, self.parseFunct.call_count)
+		self.assertEqual([expVal,expVal,expVal], actVals)
+
+	def testCacheSharedBetweenCalls_diffParseFunct(self):
+		self._runTestFunct()
+		self.parseFunct = mock.Mock()
+		actVal = self._runTestFunct()
+		self.parseFunct.assert_not_called()
+		self.assertEqual(self.fileContents, actVal)
+
+	def testReparsesWhenFileContentsChange_sameSize(self):
+		self._runTestFunct()
+		self.fileContents[1] = "contents_c"
+		self._writeFiles()
+		actVal = self._runTestFunct()
+		self.assertEqual(2, self.parseFunct.call_count)
+		self.assertEqual(self.fileContents, actVal)
+
+	def testNoReparseWhenFileOnlyTouched(self):
+		self._runTestFunct()
+		self._setAllMTimesToPast(offsetSecs=50)
+		self._runTestFunct()
+		self.assertEqual(1, self.parseFunct.call_count)
+
+	def testReparsesWhenFileAdded(self):
+		self.inpPaths.append( os.path.join(self.workFolder, "file_c.txt") )
+		self._runTestFunct()
+		self.fileContents.append("contents_c")
+		self._writeFiles()
+		actVal = self._runTestFunct()
+		self.assertEqual(2, self.parseFunct.call_count)
+		self.assertEqual(self.fileContents, actVal)
+
+	def testReparsesWhenKeyChanges(self):
+		self._runTestFunct()
+		self.key = "band"
+		self._runTestFunct()
+		self.assertEqual(2, self.parseFunct.call_count)
+
+	def testCorruptCacheFileLeadsToReparse(self):
+		self._runTestFunct()
+		with open(self.cachePath,"wb") as f:
+			f.write(b"not a pickle")
+		actVal = self._runTestFunct()
+		self.assertEqual(2, self.parseFunct.call_count)
+		self.assertEqual(self.fileContents, actVal)
+
+	def testUnpicklableValueStillReturned(self):
+		expVal = lambda x: x
+		self.parseFunct = mock.Mock(return_value=expVal)
+		actVal = self._runTestFunct()
+		self.assertIs(expVal, actVal)
+		self.assertFalse( os.path.exists(self.cachePath) )
+		self.assertEqual( sorted(["file_a.txt","file_b.txt"]), sorted(os.listdir(self.workFolder)) )
+
@@ -12,7 +12,8 @@ class BaseWorkflow():
 	def preRunShellComms(self):
 		""" List of string commands that will get run before run() is called. Higher-level functions can therefore 
 		combine these for a set of WorkFlows, which should lead to more efficient parralelisation. Return None or
-		empty list to not run any of these commands.
+		empty list to not run any of these commands. Workflows running a CalcMethod should use calcObj.shellJob (a
+		str subclass carrying nCores) so job schedulers know how many cores each command needs.
 		
 		"""
 		return list()
@@ -30,7 +30,7 @@ class ConvergerWorkflowTemplate(wFlow.WorkFlowBase):
 	def preRunShellComms(self):
 		outComms = list()
 		for x in self.calcObjs:
-			outComms.append(x.runComm)
+			outComms.append(x.shellJob)
 		return outComms
 
 	@property
@@ -213,7 +213,7 @@ class StressStrainWorkflow(baseFlow.BaseLabelledWorkflow):
 	def preRunShellComms(self):
 		outComms = list()
 		for x in self.calcObjs:
-			outComms.append( x.runComm ) #Each command is a single string
+			outComms.append( x.shellJob ) #Each command is a single string
 		return outComms
 
 	@property
@@ -34,7 +34,7 @@ class EosWorkflow(baseFlow.BaseLabelledWorkflow):
 	def preRunShellComms(self):
 		outComms = list()
 		for x in self._calcObjs:
-			outComms.append( x.runComm ) #Each command is a single string
+			outComms.append( x.shellJob ) #Each command is a single string
 		return outComms
 	
 	@property
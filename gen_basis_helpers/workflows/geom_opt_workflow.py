@@ -24,7 +24,7 @@ class GeomOptWorkflow(baseFlow.BaseLabelledWorkflow):
 
 	@property
 	def preRunShellComms(self):
-		return [self.calcObj.runComm]
+		return [self.calcObj.shellJob]
 
 	@property
 	def namespaceAttrs(self):
@@ -45,4 +45,4 @@ class ParsedFileWorkflow(baseFlow.BaseLabelledWorkflow):
 
 	@property
 	def preRunShellComms(self):
-		return [self.calcObj.runComm]
+		return [self.calcObj.shellJob]
@@ -37,7 +37,7 @@ class SelfPointDefectWorkflow(baseFlow.BaseLabelledWorkflow):
 
 	@property
 	def preRunShellComms(self):
-		return [self.bulkCalcObj.runComm,self.defectCalcObj.runComm]
+		return [self.bulkCalcObj.shellJob,self.defectCalcObj.shellJob]
 
 	@property
 	def namespaceAttrs(self):
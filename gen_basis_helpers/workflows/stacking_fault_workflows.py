@@ -38,7 +38,7 @@ class StackingFaultWorkflowTwoStructs(baseFlow.BaseLabelledWorkflow):
 
 	@property
 	def preRunShellComms(self):
-		allComms = [self.perfectStructObj.runComm, self.stackFaultStructObj.runComm]
+		allComms = [self.perfectStructObj.shellJob, self.stackFaultStructObj.shellJob]
 		return allComms
 
 
@@ -93,9 +93,9 @@ class StackingFaultWorkflow(baseFlow.BaseLabelledWorkflow):
 
 	@property
 	def preRunShellComms(self):
-		allComms = [self.perfectStructCalcObj.runComm]
+		allComms = [self.perfectStructCalcObj.shellJob]
 		for x in self.calcObjs:
-			allComms.append( x.runComm )
+			allComms.append( x.shellJob )
 		return allComms
 
 	@property	
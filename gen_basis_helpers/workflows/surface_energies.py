@@ -39,7 +39,7 @@ class SurfaceEnergyWorkflow(baseFlow.BaseLabelledWorkflow):
 
 	@property
 	def preRunShellComms(self):
-		return [self.bulkCalcObj.runComm,self.surfCalcObj.runComm]
+		return [self.bulkCalcObj.shellJob,self.surfCalcObj.shellJob]
 
 
 	@property
@@ -94,7 +94,7 @@ class TotalEnergyWorkflow(TotalEnergyWorkflowBase):
 
 	@property
 	def preRunShellComms(self):
-		return [self.calcObj.runComm]
+		return [self.calcObj.shellJob]
 
 	@property
 	def output(self):
@@ -47,7 +47,7 @@ class TestConvergerTemplate(unittest.TestCase):
 
 def _createMockCalcMethObj( runComm, parsedFile ):
 	outObj = mock.Mock()
-	outObj.runComm = runComm
+	outObj.shellJob = runComm
 	outObj.parsedFile = parsedFile
 	return outObj
 
@@ -26,7 +26,7 @@ class DudCalcObj(methodObjs.CalcMethod):
 
 	@property
 	def nCores(self):
-		raise NotImplementedError("")
+		return 1
 
 	@property
 	def parsedFile(self):
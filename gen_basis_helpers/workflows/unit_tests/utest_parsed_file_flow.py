@@ -31,6 +31,6 @@ class TestParsedFileWorkflow(unittest.TestCase):
 	def testExpectedPreRunShellComms(self):
 		expCommA = "commA"
 		expComms = [expCommA]
-		self.calcObjA.runComm = expCommA
+		self.calcObjA.shellJob = expCommA
 		self.assertEqual( expComms, self.testObjA.preRunShellComms )
 
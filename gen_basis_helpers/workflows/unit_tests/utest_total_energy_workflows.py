@@ -71,7 +71,7 @@ class TestTotalEnergyWorkflow(unittest.TestCase):
 
 	def createTestObjs(self):
 		self.calcObjA = mock.Mock()
-		self.calcObjA.runComm = self.runCommA
+		self.calcObjA.shellJob = self.runCommA
 		energyObj = types.SimpleNamespace( **{self.eType:self.outEnergy} )
 		self.calcObjA.parsedFile = types.SimpleNamespace(energies=energyObj, numbAtoms=self.numbAtoms)
 		self.testObjA = tCode.TotalEnergyWorkflow(self.calcObjA, eType=self.eType, ePerAtom=self.ePerAtom)